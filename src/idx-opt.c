@@ -289,11 +289,11 @@ int bisect_right_e(npy_float16 *a, npy_float64 x, int hi, int offset) {
   int lo = 0;
   int mid;
 
-  if (x < a[offset]) return 0;
+  if (NAN_AWARE_LT(x, a[offset])) return 0;
   if (a[hi-1+offset] <= x) return hi;
   while (lo < hi) {
     mid = lo + (hi-lo)/2;
-    if (x < a[mid+offset]) hi = mid;
+    if (NAN_AWARE_LT(x, a[mid+offset])) hi = mid;
     else lo = mid+1;
   }
   return lo;
@@ -319,11 +319,11 @@ int bisect_right_f(npy_float32 *a, npy_float64 x, int hi, int offset) {
   int lo = 0;
   int mid;
 
-  if (x < a[offset]) return 0;
+  if (NAN_AWARE_LT(x, a[offset])) return 0;
   if (a[hi-1+offset] <= x) return hi;
   while (lo < hi) {
     mid = lo + (hi-lo)/2;
-    if (x < a[mid+offset]) hi = mid;
+    if (NAN_AWARE_LT(x, a[mid+offset])) hi = mid;
     else lo = mid+1;
   }
   return lo;
@@ -349,11 +349,11 @@ int bisect_right_d(npy_float64 *a, npy_float64 x, int hi, int offset) {
   int lo = 0;
   int mid;
 
-  if (x < a[offset]) return 0;
+  if (NAN_AWARE_LT(x, a[offset])) return 0;
   if (a[hi-1+offset] <= x) return hi;
   while (lo < hi) {
     mid = lo + (hi-lo)/2;
-    if (x < a[mid+offset]) hi = mid;
+    if (NAN_AWARE_LT(x, a[mid+offset])) hi = mid;
     else lo = mid+1;
   }
   return lo;
@@ -379,11 +379,11 @@ int bisect_right_g(npy_longdouble *a, npy_longdouble x, int hi, int offset) {
   int lo = 0;
   int mid;
 
-  if (x < a[offset]) return 0;
+  if (NAN_AWARE_LT(x, a[offset])) return 0;
   if (a[hi-1+offset] <= x) return hi;
   while (lo < hi) {
     mid = lo + (hi-lo)/2;
-    if (x < a[mid+offset]) hi = mid;
+    if (NAN_AWARE_LT(x, a[mid+offset])) hi = mid;
     else lo = mid+1;
   }
   return lo;
@@ -980,3 +980,17 @@ herr_t pt_H5free_memory(void *buf) {
 }
 
 #endif
+
+
+#if H5_VERSION_LE(1,8,15)
+
+herr_t pt_H5is_library_threadsafe(hbool_t *is_ts) {
+#ifdef H5_HAVE_THREADSAFE
+ *is_ts = 1;
+#else
+ *is_ts = 0;
+#endif
+ return 0;
+}
+
+#endif
@@ -159,3 +159,9 @@ herr_t pt_H5free_memory(void *buf);
 #else
 #define pt_H5free_memory H5free_memory
 #endif
+
+#if H5_VERSION_LE(1,8,15)
+herr_t pt_H5is_library_threadsafe(hbool_t *is_ts);
+#else
+#define pt_H5is_library_threadsafe H5is_library_threadsafe
+#endif
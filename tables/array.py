@@ -169,6 +169,8 @@ class Array(hdf5extension.Array, Leaf):
         """Whether we are in the middle of an iteration or not (sentinel)."""
         self.listarr = None
         """Current buffer in iterators."""
+        self._prefetcher = None
+        """Iterator over the buffers read ahead (if any)."""
 
         # Documented (*public*) attributes.
         self.atom = _atom
@@ -255,7 +257,7 @@ class Array(hdf5extension.Array, Leaf):
 
     getEnum = previous_api(get_enum)
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def iterrows(self, start=None, stop=None, step=None, prefetch=None):
         """Iterate over the rows of the array.
 
         This method returns an iterator yielding an object of the current
@@ -267,6 +269,12 @@ class Array(hdf5extension.Array, Leaf):
         that purpose.  If you only want to iterate over a given *range of rows*
         in the array, you may use the start, stop and step parameters.
 
+        If *prefetch* is greater than 0, that number of buffers are read
+        ahead by a background thread while the rows in the current one
+        are being processed.  If it is None, the ``PREFETCH_BUFFERS``
+        parameter is used.  Please see :data:`parameters.PREFETCH_BUFFERS`
+        for the restrictions that apply while iterating with read-ahead.
+
         Examples
         --------
 
@@ -279,6 +287,9 @@ class Array(hdf5extension.Array, Leaf):
            array is iterated from *start* to the last line.
            In PyTables < 3.0 only one element was returned.
 
+        .. versionchanged:: 3.1.2
+           The *prefetch* argument was added.
+
         """
 
         try:
@@ -287,7 +298,9 @@ class Array(hdf5extension.Array, Leaf):
         except IndexError:
             # If problems with indexes, silently return the null tuple
             return ()
-        self._init_loop()
+        if prefetch is None:
+            prefetch = self._v_file.params['PREFETCH_BUFFERS']
+        self._init_loop(prefetch)
         return self
 
     def __iter__(self):
@@ -315,17 +328,40 @@ class Array(hdf5extension.Array, Leaf):
             self._stop = self.nrows
             self._step = 1
             # and initialize the loop
-            self._init_loop()
+            self._init_loop(self._v_file.params['PREFETCH_BUFFERS'])
         return self
 
-    def _init_loop(self):
-        """Initialization for the __iter__ iterator."""
+    def _init_loop(self, prefetch=0):
+        """Initialization for the __iter__ iterator.
+
+        If `prefetch` is greater than 0, that number of buffers are read
+        ahead by a background thread.
+
+        """
 
         self._nrowsread = self._start
         self._startb = self._start
         self._row = -1   # Sentinel
         self._init = True  # Sentinel
         self.nrow = SizeType(self._start - self._step)    # row number
+        self._stop_prefetch()
+        if prefetch > 0 and self._start < self._stop:
+            start, stop, step = self._start, self._stop, self._step
+            bufstep = step * self.nrowsinbuf
+
+            def read(startb, stopb):
+                return (startb, self._read(startb, stopb, step))
+
+            buffers = ((startb, min(startb + bufstep, stop))
+                       for startb in xrange(start, stop, bufstep))
+            self._prefetcher = self._g_prefetch(read, buffers, prefetch)
+
+    def _stop_prefetch(self):
+        """Stop reading ahead (if it was being done)."""
+
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
 
     _initLoop = previous_api(_init_loop)
 
@@ -341,6 +377,7 @@ class Array(hdf5extension.Array, Leaf):
         if self._nrowsread >= self._stop:
             self._init = False
             self.listarr = None        # fixes issue #308
+            self._stop_prefetch()
             raise StopIteration        # end of iteration
         else:
             # Read a chunk of rows
@@ -349,7 +386,13 @@ class Array(hdf5extension.Array, Leaf):
                 # Protection for reading more elements than needed
                 if self._stopb > self._stop:
                     self._stopb = self._stop
-                listarr = self._read(self._startb, self._stopb, self._step)
+                if self._prefetcher is not None:
+                    startb, listarr = next(self._prefetcher)
+                    assert startb == self._startb, \
+                        "the buffers read ahead are out of sync"
+                else:
+                    listarr = self._read(self._startb, self._stopb,
+                                         self._step)
                 # Swap the axes to easy the return of elements
                 if self.extdim > 0:
                     listarr = listarr.swapaxes(self.extdim, 0)
@@ -874,7 +917,7 @@ class Array(hdf5extension.Array, Leaf):
             arr.byteswap(True)
         return arr
 
-    def read(self, start=None, stop=None, step=None, out=None):
+    def read(self, start=None, stop=None, step=None, out=None, mmap=False):
         """Get data in the array as an object of the current flavor.
 
         The start, stop and step parameters can be used to select only a
@@ -898,9 +941,18 @@ class Array(hdf5extension.Array, Leaf):
         The exception is when an output buffer is supplied, in which case
         the output will be in the byteorder of that output buffer.
 
+        If mmap is true, nothing is read: a read-only view of the
+        selected rows in a memory map of the array is returned instead
+        (see :meth:`Leaf.as_mmap` for the arrays supporting this).  The
+        view is a NumPy object in the byteorder on disk, whatever the
+        flavor of the array, and the out parameter cannot be used.
+
         .. versionchanged:: 3.0
            Added the *out* parameter.
 
+        .. versionchanged:: 3.1.2
+           Added the *mmap* parameter.
+
         """
 
         self._g_check_open()
@@ -908,10 +960,26 @@ class Array(hdf5extension.Array, Leaf):
             msg = ("Optional 'out' argument may only be supplied if array "
                    "flavor is 'numpy', currently is {0}").format(self.flavor)
             raise TypeError(msg)
+        if mmap:
+            if out is not None:
+                raise ValueError("the 'out' and 'mmap' arguments cannot be "
+                                 "used together")
+            arr = self.as_mmap()
+            if arr.shape:
+                (start, stop, step) = self._process_range_read(
+                    start, stop, step)
+                arr = arr[start:stop:step]
+            return arr
         (start, stop, step) = self._process_range_read(start, stop, step)
         arr = self._read(start, stop, step, out)
         return internal_to_flavor(arr, self.flavor)
 
+    def _g_mmap_dtype(self):
+        # Time64 values are converted after being read
+        if self.atom.type == 'time64':
+            return None
+        return self.atom.dtype
+
     def _g_copy_with_stats(self, group, name, start, stop, step,
                            title, filters, chunkshape, _log, **kwargs):
         """Private part of Leaf.copy() for each kind of leaf."""
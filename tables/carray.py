@@ -176,6 +176,8 @@ class CArray(Array):
         """Whether we are in the middle of an iteration or not (sentinel)."""
         self.listarr = None
         """Current buffer in iterators."""
+        self._prefetcher = None
+        """Iterator over the buffers read ahead (if any)."""
 
         if new:
             if not isinstance(atom, Atom):
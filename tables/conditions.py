@@ -34,7 +34,7 @@ import re
 from numexpr.necompiler import typecode_to_kind
 from numexpr.necompiler import expressionToAST, typeCompileAst
 from numexpr.necompiler import stringToExpression, NumExpr
-from numexpr.expressions import ExpressionNode
+from numexpr.expressions import ExpressionNode, VariableNode
 from tables.utilsextension import get_nested_field
 from tables.utils import lazyattr
 
@@ -312,6 +312,155 @@ def _get_idx_expr(expr, indexedcols):
     return _get_idx_expr_recurse(expr, indexedcols, [], [''])
 
 
+def _get_composite_expr(expr, indexedcols, compositecols):
+    """Extract an expression on a composite index out of `expr`.
+
+    The comparisons in the top-level conjunction of `expr` are matched
+    against the composite indexes in `compositecols`, a sequence of
+    tuples with the names of the variables for the leading columns of
+    every index.  An index is usable when there are equality comparisons
+    on some of its leading columns, optionally followed by range
+    comparisons on the next one.
+
+    If a composite index is usable for two or more columns (or for a
+    column with no index of its own), the result is like the one of
+    `_get_idx_expr()`, i.e. an ``(idxexprs, strexpr)`` tuple where the
+    composite index expression goes first, with the tuple of variable
+    names taking part in it in place of a single variable.  The rest of
+    comparisons in the conjunction may add more index expressions.  If
+    the index expression covers the whole of `expr`, a list with it is
+    returned instead.  Otherwise, None is returned.
+
+    """
+
+    # Get the comparisons in the top-level conjunction
+    terms = []
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if node.astType == 'op' and node.value == 'and':
+            stack.extend(reversed(node.children))
+        else:
+            terms.append(node)
+    compvars = set(var for cvars in compositecols for var in cvars)
+    cmps = {}
+    for nterm, term in enumerate(terms):
+        var, op, limit = _get_indexable_cmp(term, compvars)
+        if var is not None and op != 'invert':
+            cmps.setdefault(var, []).append((nterm, op, limit))
+
+    # Choose the composite index usable for more comparisons
+    best = None
+    for cvars in compositecols:
+        usedvars, used = [], []
+        for var in cvars:
+            varcmps = cmps.get(var, [])
+            eqcmps = [cmp_ for cmp_ in varcmps if cmp_[1] == 'eq']
+            if eqcmps:
+                usedvars.append(var)
+                used.append(eqcmps[0])
+                continue
+            lower = [cmp_ for cmp_ in varcmps if cmp_[1] in ('gt', 'ge')]
+            upper = [cmp_ for cmp_ in varcmps if cmp_[1] in ('lt', 'le')]
+            if lower or upper:
+                usedvars.append(var)
+                used.extend(lower[:1] + upper[:1])
+            break
+        if len(usedvars) < 2 and (not usedvars or usedvars[0] in indexedcols):
+            continue
+        if best is None or len(usedvars) > len(best[0]):
+            best = (tuple(usedvars), used)
+    if best is None:
+        return None
+
+    usedvars, used = best
+    idxexpr = (usedvars, tuple(cmp_[1] for cmp_ in used),
+               tuple(cmp_[2] for cmp_ in used))
+    usedterms = set(cmp_[0] for cmp_ in used)
+    if len(usedterms) == len(terms):
+        return [idxexpr]
+
+    # Add the indexable expressions in the rest of the conjunction
+    idxexprs, strexpr = [idxexpr], 'e0'
+    for nterm, term in enumerate(terms):
+        if nterm in usedterms:
+            continue
+        texprs = _get_idx_expr(term, indexedcols)
+        if isinstance(texprs, list):
+            texprs, tstrexpr = texprs, 'e0'
+        else:
+            texprs, tstrexpr = texprs[0], texprs[1][0]
+        if not texprs:
+            continue
+        offset = len(idxexprs)
+        tstrexpr = re.sub(r'e(\d+)',
+                          lambda m: 'e%d' % (int(m.group(1)) + offset),
+                          tstrexpr)
+        idxexprs.extend(texprs)
+        strexpr = '(%s & %s)' % (strexpr, tstrexpr)
+    return (idxexprs, [strexpr])
+
+
+def _get_expr_node(expression, typemap, varmap):
+    """Parse `expression`, renaming its variables after `varmap`.
+
+    `varmap` maps the variable names in `expression` to variables in
+    the `typemap` mapping, which gives their Numexpr types.
+
+    """
+
+    exprtypes = dict((var, typemap[newvar])
+                     for (var, newvar) in varmap.iteritems())
+    exprnode = stringToExpression(expression, exprtypes, {})
+    # The same node is used for all the occurrences of a variable
+    renamed = set()
+    stack = [exprnode]
+    while stack:
+        node = stack.pop()
+        if node.astType == 'variable':
+            if id(node) not in renamed:
+                renamed.add(id(node))
+                node.value = varmap[node.value]
+        elif node.children:
+            stack.extend(node.children)
+    return exprnode
+
+
+def _replace_indexed_exprs(expr, exprnodes):
+    """Replace the sub-expressions in `expr` having an index.
+
+    `exprnodes` is a sequence of ``(var, exprnode)`` pairs, and every
+    sub-expression of `expr` equivalent to an `exprnode` is replaced by
+    a variable named `var`, so that comparisons with it are indexable.
+    `expr` is modified in place, and the new expression is returned.
+
+    """
+
+    def replacement(node):
+        for var, exprnode in exprnodes:
+            if _equiv_expr_node(node, exprnode):
+                return VariableNode(var, node.astKind)
+        return None
+
+    newexpr = replacement(expr)
+    if newexpr is not None:
+        return newexpr
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if not node.children:
+            continue
+        children = []
+        for child in node.children:
+            newchild = replacement(child)
+            if newchild is None:
+                stack.append(child)
+                newchild = child
+            children.append(newchild)
+        node.children = tuple(children)
+    return expr
+
+
 class CompiledCondition(object):
     """Container for a compiled condition."""
 
@@ -325,25 +474,48 @@ class CompiledCondition(object):
         idxvars = []
         for expr in idxexprs:
             idxvar = expr[0]
-            if idxvar not in idxvars:
-                idxvars.append(idxvar)
+            # Expressions on composite indexes have several variables
+            if not isinstance(idxvar, tuple):
+                idxvar = (idxvar,)
+            for var in idxvar:
+                if var not in idxvars:
+                    idxvars.append(var)
         return frozenset(idxvars)
 
-    def __init__(self, func, params, idxexprs, strexpr):
+    def __init__(self, func, params, idxexprs, strexpr,
+                 index_complete=False):
         self.function = func
         """The compiled function object corresponding to this condition."""
         self.parameters = params
         """A list of parameter names for this condition."""
         self.index_expressions = idxexprs
-        """A list of expressions in the form ``(var, (ops), (limits))``."""
+        """A list of expressions in the form ``(var, (ops), (limits))``.
+
+        For expressions on composite indexes, ``var`` is a tuple with the
+        names of the variables for the leading columns of the index."""
         self.string_expression = strexpr
         """The indexable expression in string format."""
+        self.index_complete = index_complete
+        """Whether the condition is made of a single index expression."""
+        self._function_args = None
+        """The arguments for compiling new instances of `function`."""
 
     def __repr__(self):
         return ("idxexprs: %s\nstrexpr: %s\nidxvars: %s"
                 % (self.index_expressions, self.string_expression,
                    self.index_variables))
 
+    def new_function(self):
+        """Compile a new instance of the function object.
+
+        Numexpr function objects keep the temporaries of an evaluation
+        in the object itself, so threads evaluating a condition at the
+        same time need an instance each.
+
+        """
+
+        return NumExpr(*self._function_args)
+
     def with_replaced_vars(self, condvars):
         """Replace index limit variables with their values in-place.
 
@@ -366,7 +538,9 @@ class CompiledCondition(object):
             exprs2.append((var, ops, tuple(limit_values)))
         # Create a new container for the converted values
         newcc = CompiledCondition(
-            self.function, self.parameters, exprs2, self.string_expression)
+            self.function, self.parameters, exprs2, self.string_expression,
+            self.index_complete)
+        newcc._function_args = self._function_args
         return newcc
 
 
@@ -384,7 +558,8 @@ def _get_variable_names(expression):
     return list(set(names))  # remove repeated names
 
 
-def compile_condition(condition, typemap, indexedcols):
+def compile_condition(condition, typemap, indexedcols, compositecols=(),
+                      indexedexprs=()):
     """Compile a condition and extract usable index conditions.
 
     Looks for variable-constant comparisons in the `condition` string
@@ -392,6 +567,17 @@ def compile_condition(condition, typemap, indexedcols):
     `indexedcols`.  The part of `condition` having usable indexes is
     returned as a compiled condition in a `CompiledCondition` container.
 
+    The `compositecols` sequence has a tuple for every usable composite
+    index, with the variable names of its leading columns.  A composite
+    index is preferred when it can resolve comparisons on two or more
+    columns (see `_get_composite_expr()`).
+
+    The `indexedexprs` sequence has an ``(var, expression, varmap)``
+    tuple for every usable expression index, where `varmap` maps the
+    variables in `expression` to the ones in `condition`.  Occurrences
+    of `expression` in `condition` are considered indexable, and they
+    appear as the `var` variable in the index expressions.
+
     Expressions such as '0 < c1 <= 1' do not work as expected.  The
     Numexpr types of *all* variables must be given in the `typemap`
     mapping.  The ``function`` of the resulting `CompiledCondition`
@@ -405,9 +591,22 @@ def compile_condition(condition, typemap, indexedcols):
     if expr.astKind != 'bool':
         raise TypeError("condition ``%s`` does not have a boolean type"
                         % condition)
-    idxexprs = _get_idx_expr(expr, indexedcols)
+    idxexpr = expr
+    if indexedexprs:
+        # Use a new expression tree, since it will be modified
+        idxexpr = stringToExpression(condition, typemap, {})
+        exprnodes = [(var, _get_expr_node(expression, typemap, varmap))
+                     for (var, expression, varmap) in indexedexprs]
+        idxexpr = _replace_indexed_exprs(idxexpr, exprnodes)
+        indexedcols = indexedcols.union(var for (var, _, _) in indexedexprs)
+    idxexprs = None
+    if compositecols:
+        idxexprs = _get_composite_expr(idxexpr, indexedcols, compositecols)
+    if idxexprs is None:
+        idxexprs = _get_idx_expr(idxexpr, indexedcols)
     # Post-process the answer
-    if isinstance(idxexprs, list):
+    index_complete = isinstance(idxexprs, list)
+    if index_complete:
         # Simple expression
         strexpr = ['e0']
     else:
@@ -431,7 +630,10 @@ def compile_condition(condition, typemap, indexedcols):
     params = varnames
 
     # This is more comfortable to handle about than a tuple.
-    return CompiledCondition(func, params, idxexprs, strexpr)
+    compiled = CompiledCondition(func, params, idxexprs, strexpr,
+                                 index_complete)
+    compiled._function_args = (expr, signature)
+    return compiled
 
 
 def call_on_recarr(func, params, recarr, param2arg=None):
@@ -326,6 +326,7 @@ cdef extern from "hdf5.h" nogil:
                          void *buf)
   hid_t H5Dget_create_plist(hid_t dataset_id)
   hsize_t H5Dget_storage_size(hid_t dataset_id)
+  haddr_t H5Dget_offset(hid_t dset_id)
   herr_t H5Dvlen_get_buf_size(hid_t dataset_id, hid_t type_id, hid_t space_id,
                               hsize_t *size)
 
@@ -364,6 +365,7 @@ cdef extern from "hdf5.h" nogil:
   int    H5Tget_nmembers(hid_t type_id)
   char  *H5Tget_member_name(hid_t type_id, unsigned membno)
   hid_t  H5Tget_member_type(hid_t type_id, unsigned membno)
+  size_t H5Tget_member_offset(hid_t type_id, unsigned membno)
   hid_t  H5Tget_native_type(hid_t type_id, H5T_direction_t direction)
   herr_t H5Tget_member_value(hid_t type_id, int membno, void *value)
   int    H5Tget_offset(hid_t type_id)
@@ -395,6 +397,8 @@ cdef extern from "hdf5.h" nogil:
                       size_t rdcc_nbytes, double rdcc_w0)
   herr_t H5Pset_sieve_buf_size(hid_t fapl_id, hsize_t size)
   H5D_layout_t H5Pget_layout(hid_t plist)
+  int H5Pget_nfilters(hid_t plist)
+  int H5Pget_external_count(hid_t plist)
   int H5Pget_chunk(hid_t plist, int max_ndims, hsize_t *dims)
 
   hid_t H5Pget_driver(hid_t plist_id)
@@ -505,6 +509,7 @@ cdef extern from "utils.h" nogil:
   herr_t pt_H5Pset_file_image(hid_t fapl_id, void *buf_ptr, size_t buf_len)
   ssize_t pt_H5Fget_file_image(hid_t file_id, void *buf_ptr, size_t buf_len)
   herr_t pt_H5free_memory(void *buf)
+  herr_t pt_H5is_library_threadsafe(hbool_t *is_ts)
 
   int H5_HAVE_DIRECT_DRIVER, H5_HAVE_WINDOWS_DRIVER, H5_HAVE_IMAGE_FILE
 
@@ -53,6 +53,7 @@ from tables.carray import CArray
 from tables.earray import EArray
 from tables.vlarray import VLArray
 from tables.table import Table
+from tables.index import Index
 from tables import linkextension
 from tables.utils import detect_number_of_cores
 from tables import lrucacheextension
@@ -182,6 +183,60 @@ def _checkfilters(filters):
                         type(filters))
 
 
+_size_units = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3,
+               'T': 1024 ** 4}
+
+
+def _parse_size(size):
+    """Get the number of bytes in `size`, maybe a string like ``'4GB'``."""
+
+    if isinstance(size, basestring):
+        value = size.strip().upper()
+        if value.endswith('B'):
+            value = value[:-1]
+        unit = value[-1:] if value[-1:] in _size_units else ''
+        try:
+            size = float(value[:len(value) - len(unit)]) * _size_units[unit]
+        except ValueError:
+            raise ValueError("invalid size: %r" % (size,))
+    size = long(size)
+    if size < 0:
+        raise ValueError("size can not be negative: %r" % (size,))
+    return size
+
+
+def _make_cache_budget(params):
+    """Create the `CacheBudget` for the ``CACHE_BUDGET`` in `params`.
+
+    The HDF5 caches are limited in `params` to their share of the budget,
+    and the rest is left for the caches of PyTables.  None is returned
+    if there is no budget.
+
+    """
+
+    if params['CACHE_BUDGET'] is None:
+        return None
+    budget = _parse_size(params['CACHE_BUDGET'])
+    nleaves = max(abs(params['NODE_CACHE_SLOTS']), 1)
+    params['METADATA_CACHE_SIZE'] = min(params['METADATA_CACHE_SIZE'],
+                                        budget // 8)
+    params['CHUNK_CACHE_SIZE'] = min(params['CHUNK_CACHE_SIZE'],
+                                     budget // 8 // nleaves)
+    hdf5size = (params['METADATA_CACHE_SIZE'] +
+                params['CHUNK_CACHE_SIZE'] * nleaves)
+    return lrucacheextension.CacheBudget(budget - hdf5size)
+
+
+def _merge_stats(total, stats):
+    """Add the counters in the `stats` dictionary to the `total` one."""
+
+    for key, value in stats.iteritems():
+        if isinstance(value, dict):
+            _merge_stats(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
 def copy_file(srcfilename, dstfilename, overwrite=False, **kwargs):
     """An easy way of copying one PyTables file to another.
 
@@ -778,6 +833,18 @@ class File(hdf5extension.File, object):
         if params['MAX_BLOSC_THREADS'] is None:
             params['MAX_BLOSC_THREADS'] = detect_number_of_cores()
 
+        if params['QUERY_THREADS'] is None:
+            params['QUERY_THREADS'] = detect_number_of_cores()
+
+        if params['INDEX_THREADS'] is None:
+            params['INDEX_THREADS'] = detect_number_of_cores()
+
+        self._cache_budget = _make_cache_budget(params)
+        """The budget shared by the caches in this file (or None)."""
+
+        self._closed_stats = {}
+        """The statistics of the nodes already closed."""
+
         self.params = params
 
         # Now, it is time to initialize the File extension
@@ -2692,6 +2759,51 @@ class File(hdf5extension.File, object):
 
     # </Undo/Redo support>
 
+    def _g_keep_stats(self, node):
+        """Add the statistics of `node`, which is being closed, to the
+        ones of the nodes already closed."""
+
+        _merge_stats(self._closed_stats, node._g_get_stats())
+
+    def get_stats(self, reset=False):
+        """Get the statistics of the reads and caches in this file.
+
+        A dictionary is returned with the same entries as the one of
+        :meth:`Leaf.get_stats`, with the counters added up for all the
+        nodes of the file, including the ones closed since the file was
+        opened (or since the last reset).  The statistics of every kind
+        of cache are added up too (with ``disabled`` telling the number
+        of disabled caches), and they include the caches of indexes, like
+        ``'bounds'``, ``'limbounds'``, ``'sorted'`` and ``'sortedLR'``
+        (see the parameters with these prefixes).  Besides, the
+        ``cache_budget`` entry has the ``maxsize`` and the current
+        ``size`` of the budget of the caches in the file (see the
+        ``CACHE_BUDGET`` parameter), or None if there is no budget.
+
+        If *reset* is true, all the counters are set to zero after being
+        returned.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._check_open()
+        stats = {'reads': 0, 'chunks_read': 0, 'bytes_read': 0,
+                 'bytes_decompressed': 0, 'read_time': 0.0, 'caches': {}}
+        _merge_stats(stats, self._closed_stats)
+        for node in self._node_manager.registry.values():
+            if node._v_isopen:
+                _merge_stats(stats, node._g_get_stats(reset))
+        if reset:
+            self._closed_stats = {}
+        budget = self._cache_budget
+        if budget is None:
+            stats['cache_budget'] = None
+        else:
+            stats['cache_budget'] = {'maxsize': budget.maxsize,
+                                     'size': budget.size}
+        return stats
+
     def flush(self):
         """Flush all the alive leaves in the object tree."""
 
@@ -2721,6 +2833,13 @@ class File(hdf5extension.File, object):
             self._actionlog.attrs._g__setattr("CURMARK", self._curmark)
             self._actionlog.attrs._g__setattr("CURACTION", self._curaction)
 
+        if self.params['INDEX_SAVE_CACHES'] and self._iswritable():
+            # Save the caches of the indexes that have been searched
+            for node in list(self._node_manager.registry.values()):
+                if (isinstance(node, Index) and node._v_isopen and
+                        node._cacheused):
+                    node.save_cache()
+
         # Close all loaded nodes.
         self.root._f_close()
 
@@ -907,6 +907,8 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
         """Close this (open) group."""
 
         if self._v_isopen:
+            # Keep the statistics of the group in its file
+            self._v_file._g_keep_stats(self)
             # hdf5extension operations:
             #   Close HDF5 group.
             self._g_close_group()
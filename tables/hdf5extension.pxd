@@ -25,8 +25,15 @@ cdef class Leaf(Node):
   cdef hid_t   base_type_id
   cdef hid_t   disk_type_id
   cdef hsize_t *dims     # Necessary to be here because of Leaf._g_truncate()
+  cdef long long nreads, nchunksread, nbytesread   # Statistics of reads
+  cdef double readtime
   cdef _get_type_ids(self)
   cdef _convert_time64(self, ndarray nparr, int sense)
+  cdef _count_read(self, long long nbytes, long long nchunks, double tref)
+  cdef long long _chunks_spanned(self, object starts, object stops)
+  cdef long long _chunks_in_rows(self, int dim, hsize_t start, hsize_t stop,
+                                 hsize_t step)
+  cdef long long _chunks_in_points(self, hsize_t npoints)
 
 cdef class Array(Leaf):
   cdef int      rank
@@ -32,6 +32,7 @@ Misc variables:
 import os
 import warnings
 from collections import namedtuple
+from timeit import default_timer
 
 ObjInfo = namedtuple('ObjInfo', ['addr', 'rc'])
 
@@ -67,10 +68,12 @@ from libc.string cimport strdup, strlen
 from numpy cimport import_array, ndarray, npy_intp
 from cpython.bytes cimport (PyBytes_AsString, PyBytes_FromStringAndSize,
     PyBytes_Check)
+from cpython.bytearray cimport PyByteArray_FromStringAndSize
 from cpython.unicode cimport PyUnicode_DecodeUTF8
 
 
 from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
+  haddr_t, H5D_layout_t, H5D_CONTIGUOUS, H5T_COMPOUND,
   H5S_seloper_t, H5D_FILL_VALUE_UNDEFINED,
   H5O_TYPE_UNKNOWN, H5O_TYPE_GROUP, H5O_TYPE_DATASET, H5O_TYPE_NAMED_DATATYPE,
   H5L_TYPE_ERROR, H5L_TYPE_HARD, H5L_TYPE_SOFT, H5L_TYPE_EXTERNAL,
@@ -84,7 +87,11 @@ from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
   H5Gcreate, H5Gopen, H5Gclose, H5Ldelete, H5Lmove,
   H5Dopen, H5Dclose, H5Dread, H5Dwrite, H5Dget_type,
   H5Dget_space, H5Dvlen_reclaim, H5Dget_storage_size, H5Dvlen_get_buf_size,
-  H5Tclose, H5Tis_variable_str, H5Tget_sign,
+  H5Dget_create_plist, H5Dget_offset,
+  H5Pget_layout, H5Pget_nfilters, H5Pget_external_count,
+  H5Tget_class, H5Tget_nmembers, H5Tget_member_name,
+  H5Tget_member_type, H5Tget_member_offset, pt_H5free_memory,
+  H5Tclose, H5Tis_variable_str, H5Tget_sign, H5Tget_size,
   H5Adelete, H5T_BITFIELD, H5T_INTEGER, H5T_FLOAT, H5T_STRING, H5Tget_order,
   H5Pcreate, H5Pset_cache, H5Pclose, H5Pget_userblock, H5Pset_userblock,
   H5Pset_fapl_sec2, H5Pset_fapl_log, H5Pset_fapl_stdio, H5Pset_fapl_core,
@@ -1107,12 +1114,88 @@ cdef class Group(Node):
   _g_moveNode = previous_api(_g_move_node)
 
 
+cdef int type_matches_dtype(hid_t type_id, object dtype):
+  """Tell whether the HDF5 type has the same memory layout as `dtype`."""
+
+  cdef int i, nmembers, matches
+  cdef hid_t member_type_id
+  cdef char *cname
+
+  if H5Tget_size(type_id) != dtype.itemsize:
+    return False
+  if H5Tget_class(type_id) != H5T_COMPOUND or dtype.names is None:
+    # Complex numbers are compound types too
+    return H5Tget_class(type_id) != H5T_COMPOUND or dtype.kind == 'c'
+  nmembers = H5Tget_nmembers(type_id)
+  if nmembers != len(dtype.names):
+    return False
+  for i in range(nmembers):
+    cname = H5Tget_member_name(type_id, i)
+    name = cstr_to_pystr(cname)
+    pt_H5free_memory(cname)
+    if name not in dtype.fields:
+      return False
+    field_dtype, offset = dtype.fields[name][:2]
+    if H5Tget_member_offset(type_id, i) != offset:
+      return False
+    member_type_id = H5Tget_member_type(type_id, i)
+    matches = type_matches_dtype(member_type_id, field_dtype)
+    H5Tclose(member_type_id)
+    if not matches:
+      return False
+  return True
+
+
 cdef class Leaf(Node):
   # Instance variables declared in .pxd
 
   def _get_storage_size(self):
       return H5Dget_storage_size(self.dataset_id)
 
+  def _get_disk_itemsize(self):
+    """Get the size in bytes of the elements of this leaf on disk."""
+
+    cdef hid_t disk_type_id
+    cdef size_t itemsize
+
+    disk_type_id = H5Dget_type(self.dataset_id)
+    if disk_type_id < 0:
+      raise HDF5ExtError("Unable to get the type of the dataset")
+    itemsize = H5Tget_size(disk_type_id)
+    H5Tclose(disk_type_id)
+    return itemsize
+
+  def _get_contiguous_offset(self, dtype):
+    """Get the offset of the data of this leaf in the file.
+
+    None is returned if the data is not stored contiguously and
+    uncompressed in the file (or it has not been written yet), or if
+    its type on disk does not have the same layout as `dtype`.
+
+    """
+
+    cdef hid_t plist
+    cdef H5D_layout_t layout
+    cdef int nfilters, nexternal
+    cdef haddr_t offset
+
+    plist = H5Dget_create_plist(self.dataset_id)
+    if plist < 0:
+      raise HDF5ExtError("Unable to get the creation property list")
+    layout = H5Pget_layout(plist)
+    nfilters = H5Pget_nfilters(plist)
+    nexternal = H5Pget_external_count(plist)
+    H5Pclose(plist)
+    if layout != H5D_CONTIGUOUS or nfilters != 0 or nexternal != 0:
+      return None
+    if not type_matches_dtype(self.disk_type_id, dtype):
+      return None
+    # This is HADDR_UNDEF when the data has not been allocated yet
+    offset = H5Dget_offset(self.dataset_id)
+    if offset < 0:
+      return None
+    return offset
+
   def _g_new(self, where, name, init):
     if init:
       # Put this info to 0 just when the class is initialized
@@ -1166,6 +1249,61 @@ cdef class Leaf(Node):
   # can't do since cdef'd
   #_convertTime64 = previous_api(_convert_time64)
 
+  def _g_read_stats(self):
+    """Get the ``(reads, chunks_read, bytes_read, read_time)`` counters of
+    the reads done in this leaf (see `Leaf.get_stats()`)."""
+
+    return (self.nreads, self.nchunksread, self.nbytesread, self.readtime)
+
+  def _g_reset_read_stats(self):
+    """Set the counters of reads to zero."""
+
+    self.nreads = 0
+    self.nchunksread = 0
+    self.nbytesread = 0
+    self.readtime = 0.0
+
+  cdef _count_read(self, long long nbytes, long long nchunks, double tref):
+    """Update the counters with a read started at `tref`."""
+
+    self.nreads = self.nreads + 1
+    self.nchunksread = self.nchunksread + nchunks
+    self.nbytesread = self.nbytesread + nbytes
+    self.readtime = self.readtime + (default_timer() - tref)
+
+  cdef long long _chunks_spanned(self, object starts, object stops):
+    """Get the number of chunks that intersect the box between `starts`
+    and `stops` (0 for non-chunked leaves)."""
+
+    cdef long long nchunks = 1
+
+    chunkshape = getattr(self, '_v_chunkshape', None)
+    if chunkshape is None:
+      return 0
+    for start, stop, chunklen in zip(starts, stops, chunkshape):
+      if stop <= start:
+        return 0
+      nchunks = nchunks * ((stop - 1) // chunklen - start // chunklen + 1)
+    return nchunks
+
+  cdef long long _chunks_in_rows(self, int dim, hsize_t start, hsize_t stop,
+                                 hsize_t step):
+    """Get the number of chunks spanned by a range of rows in `dim`."""
+
+    starts = [0] * len(self.shape)
+    stops = list(self.shape)
+    if stop <= start or not starts:
+      return 0
+    starts[dim] = start
+    stops[dim] = stop - (stop - start - 1) % step
+    return self._chunks_spanned(starts, stops)
+
+  cdef long long _chunks_in_points(self, hsize_t npoints):
+    """Get the (maximum) number of chunks spanned by `npoints` points."""
+
+    return min(npoints,
+               self._chunks_spanned([0] * len(self.shape), self.shape))
+
   def _g_truncate(self, hsize_t size):
     """Truncate a Leaf to `size` nrows."""
 
@@ -1466,6 +1604,7 @@ cdef class Array(Leaf):
     cdef void *rbuf
     cdef hsize_t nrows
     cdef int extdim
+    cdef double tref
 
     # Get the pointer to the buffer data area
     rbuf = nparr.data
@@ -1478,12 +1617,16 @@ cdef class Array(Leaf):
       extdim = -1
 
     # Do the physical read
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYread(self.dataset_id, self.type_id, start, nrows, step,
                           extdim, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the array data.")
+    self._count_read(nparr.nbytes,
+                     self._chunks_in_rows(max(extdim, 0), start, stop, step),
+                     tref)
 
     if self.atom.kind == 'time':
       # Swap the byteorder by hand (this is not currently supported by HDF5)
@@ -1505,6 +1648,7 @@ cdef class Array(Leaf):
     cdef hsize_t *stop
     cdef hsize_t *step
     cdef void *rbuf
+    cdef double tref
 
     # Get the pointer to the buffer data area of startl, stopl and stepl arrays
     start = <hsize_t *>startl.data
@@ -1514,12 +1658,16 @@ cdef class Array(Leaf):
     rbuf = nparr.data
 
     # Do the physical read
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYreadSlice(self.dataset_id, self.type_id,
                                start, stop, step, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the array data.")
+    self._count_read(nparr.nbytes,
+                     self._chunks_spanned(startl.tolist(), stopl.tolist()),
+                     tref)
 
     if self.atom.kind == 'time':
       # Swap the byteorder by hand (this is not currently supported by HDF5)
@@ -1543,6 +1691,7 @@ cdef class Array(Leaf):
     cdef hsize_t size
     cdef void *rbuf
     cdef object mode
+    cdef double tref
 
     # Get the dataspace handle
     space_id = H5Dget_space(self.dataset_id)
@@ -1558,12 +1707,14 @@ cdef class Array(Leaf):
     rbuf = nparr.data
 
     # Do the actual read
+    tref = default_timer()
     with nogil:
         ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
                       H5P_DEFAULT, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the array data.")
+    self._count_read(nparr.nbytes, self._chunks_in_points(size), tref)
 
     # Terminate access to the memory dataspace
     H5Sclose(mem_space_id)
@@ -1635,6 +1786,7 @@ cdef class Array(Leaf):
     cdef hsize_t size
     cdef void *rbuf
     cdef object mode
+    cdef double tref
 
     # Get the dataspace handle
     space_id = H5Dget_space(self.dataset_id)
@@ -1653,12 +1805,14 @@ cdef class Array(Leaf):
     rbuf = nparr.data
 
     # Do the actual read
+    tref = default_timer()
     with nogil:
         ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
                       H5P_DEFAULT, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the array data.")
+    self._count_read(nparr.nbytes, self._chunks_in_points(size), tref)
 
     # Terminate access to the memory dataspace
     H5Sclose(mem_space_id)
@@ -2002,6 +2156,8 @@ cdef class VLArray(Leaf):
     cdef hid_t space_id
     cdef hid_t mem_space_id
     cdef object buf, nparr, shape, datalist
+    cdef long long nbytes
+    cdef double tref
 
     # Compute the number of rows to read
     nrows = get_len_of_range(start, stop, step)
@@ -2011,6 +2167,7 @@ cdef class VLArray(Leaf):
         h5bt=False)
 
     # Now, read the chunk of rows
+    tref = default_timer()
     with nogil:
         # Allocate the necessary memory for keeping the row handlers
         rdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
@@ -2029,6 +2186,12 @@ cdef class VLArray(Leaf):
       raise HDF5ExtError(
         "VLArray._read_array: Problems reading the array data.")
 
+    nbytes = 0
+    for i from 0 <= i < nrows:
+      nbytes = nbytes + rdata[i].len * self._atomicsize
+    self._count_read(nbytes, self._chunks_in_rows(0, start, stop, step),
+                     tref)
+
     datalist = []
     for i from 0 <= i < nrows:
       # Number of atoms in row
@@ -2037,9 +2200,10 @@ cdef class VLArray(Leaf):
       if vllen > 0:
         # Create a buffer to keep this info. It is important to do a
         # copy, because we will dispose the buffer memory later on by
-        # calling the H5Dvlen_reclaim. PyBytes_FromStringAndSize does this.
-        buf = PyBytes_FromStringAndSize(<char *>rdata[i].p,
-                                        vllen*self._atomicsize)
+        # calling the H5Dvlen_reclaim. PyByteArray_FromStringAndSize does
+        # this, and the resulting buffer is writeable.
+        buf = PyByteArray_FromStringAndSize(<char *>rdata[i].p,
+                                            vllen*self._atomicsize)
       else:
         # Case where there is info with zero lentgh
         buf = None
@@ -105,7 +105,8 @@ def computeblocksize(expectedrows, compoundsize, lowercompoundsize):
     return size
 
 
-def calc_chunksize(expectedrows, optlevel=6, indsize=4, memlevel=4):
+def calc_chunksize(expectedrows, optlevel=6, indsize=4, memlevel=4,
+                   maxslicesize=None):
     """Calculate the HDF5 chunk size for index and sorted arrays.
 
     The logic to do that is based purely in experiments playing with
@@ -114,6 +115,9 @@ def calc_chunksize(expectedrows, optlevel=6, indsize=4, memlevel=4):
     uncompressor takes too much time. This might (should) be further
     optimized by doing more experiments.
 
+    If `maxslicesize` is not None, the slicesize (and the chunksize, if
+    needed) is reduced so that slices do not have more elements than that.
+
     """
 
     chunksize = computechunksize(expectedrows)
@@ -129,6 +133,12 @@ def calc_chunksize(expectedrows, optlevel=6, indsize=4, memlevel=4):
     elif indsize == 8:  # full
         chunksize, slicesize = ccs_full(optlevel, chunksize, slicesize)
 
+    if maxslicesize is not None and slicesize > maxslicesize:
+        # slicesize must be a multiple of 4 chunks (see computeslicesize())
+        while chunksize > 1 and 4 * chunksize > maxslicesize:
+            chunksize //= 2
+        slicesize = max(maxslicesize // (4 * chunksize), 1) * 4 * chunksize
+
     # Finally, compute blocksize and superblocksize
     blocksize = computeblocksize(expectedrows, slicesize, chunksize)
     superblocksize = computeblocksize(expectedrows, blocksize, slicesize)
@@ -403,42 +413,44 @@ def string_next_after(x, direction, itemsize):
     padsize = itemsize - len(x)
     if padsize > 0:
         x += b"\x00" * padsize
-    if sys.version_info[0] < 3:
-        xlist = list(x)
-    else:
-        # int.to_bytes is not available in Python < 3.2
-        # xlist = [i.to_bytes(1, sys.byteorder) for i in x]
-        xlist = [bytes([i]) for i in x]
-    xlist.reverse()
-    i = 0
+    xlist = bytearray(x)
     if direction > 0:
-        if xlist == b"\xff" * itemsize:
-            # Maximum value, return this
-            return b"".join(xlist)
-        for xchar in xlist:
-            if ord(xchar) < 0xff:
-                xlist[i] = chr(ord(xchar) + 1).encode('ascii')
-                break
-            else:
-                xlist[i] = b"\x00"
-            i += 1
+        last, wrapped = 0xff, 0x00
     else:
-        if xlist == b"\x00" * itemsize:
-            # Minimum value, return this
-            return b"".join(xlist)
-        for xchar in xlist:
-            if ord(xchar) > 0x00:
-                xlist[i] = chr(ord(xchar) - 1).encode('ascii')
-                break
-            else:
-                xlist[i] = b"\xff"
-            i += 1
-    xlist.reverse()
-    return b"".join(xlist)
+        last, wrapped = 0x00, 0xff
+    if xlist == bytearray([last]) * itemsize:
+        # Maximum (or minimum) value, return this
+        return bytes(xlist)
+    # Propagate the carry from the last char on
+    for i in range(len(xlist) - 1, -1, -1):
+        if xlist[i] != last:
+            xlist[i] += direction
+            break
+        xlist[i] = wrapped
+    return bytes(xlist)
 
 StringNextAfter = previous_api(string_next_after)
 
 
+def string_prefix_after(prefix):
+    """Return the lowest string greater than all the ones starting with
+    `prefix`.
+
+    Hence, a string starts with `prefix` if and only if it is in the
+    range ``[prefix, string_prefix_after(prefix))``.  None is returned
+    if there is no such string (i.e. if all the chars in `prefix` are
+    ``\\xff``).
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    prefix = prefix.rstrip(b"\xff")
+    if not prefix:
+        return None
+    return string_next_after(prefix, +1, len(prefix))
+
+
 def int_type_next_after(x, direction, itemsize):
     """Return the next representable neighbor of x in the appropriate
     direction."""
@@ -22,21 +22,23 @@ import math
 import warnings
 
 import numpy
+import numexpr
 
 from tables.idxutils import (calc_chunksize, calcoptlevels,
                              get_reduction_level, nextafter, inftype)
 
 from tables import indexesextension
 from tables.node import NotLoggedMixin
-from tables.atom import UIntAtom, Atom
+from tables.atom import UIntAtom, Int64Atom, Atom, ObjectAtom
 from tables.earray import EArray
+from tables.vlarray import VLArray
 from tables.carray import CArray
 from tables.leaf import Filters
 from tables.indexes import CacheArray, LastRowArray, IndexArray
 from tables.group import Group
 from tables.path import join_path
 from tables.exceptions import PerformanceWarning
-from tables.utils import is_idx, idx2long, lazyattr
+from tables.utils import is_idx, idx2long, lazyattr, map_in_threads
 from tables.utilsextension import (nan_aware_gt, nan_aware_ge,
                                    nan_aware_lt, nan_aware_le,
                                    bisect_left, bisect_right)
@@ -89,6 +91,13 @@ opt_search_types = ("int8", "int16", "int32", "int64",
 # The upper limit for uint32 ints
 max32 = 2**32
 
+# The number of distinct values in a bitmap index above which a
+# performance warning is issued (every value takes its own bitmap).
+bitmap_max_values = 1024
+
+# The number of bins in the equi-depth histograms of indexes
+histogram_bins = 32
+
 
 def _table_column_pathname_of_index(indexpathname):
     names = indexpathname.split("/")
@@ -151,6 +160,11 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
     blocksizes
         The four main sizes of the compound blocks in index datasets (a low
         level parameter).
+    memory_limit
+        The approximate maximum number of bytes of memory used for building
+        the index (see :meth:`Column.create_index`).
+
+        .. versionadded:: 3.1.2
 
     """
 
@@ -329,6 +343,43 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             pass
         return lbucket
 
+    histogram = property(
+        lambda self: getattr(self._v_attrs, 'histogram', None), None, None,
+        """The bounds of the equi-depth histogram of the indexed values.
+
+        Every one of the bins between consecutive bounds holds about the
+        same number of rows (NaN values are left out).  This is None
+        if the statistics of the index have not been computed yet (they
+        are computed when the index is built, see
+        :meth:`Index.estimate_nrows`).
+
+        .. versionadded:: 3.1.2
+
+        """)
+
+    ndistinct = property(
+        lambda self: getattr(self._v_attrs, 'ndistinct', None), None, None,
+        """An estimate of the number of distinct indexed values.
+
+        It is exact for columns with few distinct values, and an upper
+        bound otherwise.  This is None if the statistics of the index
+        have not been computed yet.
+
+        .. versionadded:: 3.1.2
+
+        """)
+
+    ndeltarows = property(
+        lambda self: len(self._get_delta()[0]), None, None,
+        """The number of modified rows not merged into the index yet.
+
+        Queries take these rows into account, but the index can not be
+        used for sorting until they are merged with :meth:`Index.compact`.
+
+        .. versionadded:: 3.1.2
+
+        """)
+
     def __init__(self, parentnode, name,
                  atom=None, title="",
                  kind=None,
@@ -338,7 +389,8 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
                  expectedrows=0,
                  byteorder=None,
                  blocksizes=None,
-                 new=True):
+                 new=True,
+                 memory_limit=None):
 
         self._v_version = None
         """The object version of this index."""
@@ -375,6 +427,8 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         """The number of currently indexed rows for this column."""
         self.blocksizes = blocksizes
         """The four main sizes of the compound blocks (if specified)."""
+        self.memory_limit = memory_limit
+        """The maximum memory for building the index (if specified)."""
         self.dirtycache = True
         """Dirty cache (for ranges, bounds & sorted) flag."""
         self.superblocksize = None
@@ -394,6 +448,12 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         sorted index. -1 means that this number is not computed yet."""
         self.tprof = 0
         """Time counter for benchmarking purposes."""
+        self._delta = None
+        """The ``(rows, oldvalues, newvalues)`` of modified rows (cache)."""
+        self._deltaselected = numpy.empty(0, dtype='int64')
+        """The modified rows selected by the last search."""
+        self._cacheused = False
+        """Whether the caches for searches have been set up."""
 
         from tables.file import open_file
         self._openFile = open_file
@@ -471,8 +531,14 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         # Compute the superblocksize, blocksize, slicesize and chunksize values
         # (in case these parameters haven't been passed to the constructor)
         if self.blocksizes is None:
+            maxslicesize = None
+            if self.memory_limit is not None:
+                # Leave most of the memory for merging the slices
+                rowsize = self.dtype.itemsize + self.indsize
+                maxslicesize = self.memory_limit // (4 * rowsize)
             self.blocksizes = calc_chunksize(
-                self.expectedrows, self.optlevel, self.indsize)
+                self.expectedrows, self.optlevel, self.indsize,
+                maxslicesize=maxslicesize)
         (self.superblocksize, self.blocksize,
          self.slicesize, self.chunksize) = self.blocksizes
         if debug:
@@ -558,18 +624,59 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
     _g_postInitHook = previous_api(_g_post_init_hook)
 
     def initial_append(self, xarr, nrow, reduction):
-        """Compute an initial indices arrays for data to be indexed."""
+        """Compute an initial indices arrays for data to be indexed.
+
+        The data in `xarr` may also be an ``(arr, idx)`` tuple with the
+        arrays returned by `init_slice()`, already sorted by `keysort()`.
+
+        """
 
         if profile:
             tref = time()
         if profile:
             show_stats("Entering initial_append", tref)
         arr = xarr.pop()
+        if isinstance(arr, tuple):
+            arr, idx = arr
+        else:
+            arr, idx = self.init_slice(arr, nrow)
+            # In-place sorting
+            if profile:
+                show_stats("Before keysort", tref)
+            indexesextension.keysort(arr, idx)
+        larr = arr[-1]
+        if reduction > 1:
+            # It's important to do a copy() here in order to ensure that
+            # sorted._append() will receive a contiguous array.
+            if profile:
+                show_stats("Before reduction", tref)
+            reduc = arr[::reduction].copy()
+            if profile:
+                show_stats("After reduction", tref)
+            arr = reduc
+            if profile:
+                show_stats("After arr <-- reduc", tref)
+        # A completely sorted index is not longer possible after an
+        # append of an index with already one slice.
+        if nrow > 0:
+            self._v_attrs.is_csi = False
+        if profile:
+            show_stats("Exiting initial_append", tref)
+        return larr, arr, idx
+
+    def init_slice(self, arr, nrow, lastrow=True):
+        """Get the values and indices of a slice to be sorted.
+
+        `arr` has the values of the slice that will go to the `nrow` row
+        of the index.  Unless `lastrow` is false, the values in the last
+        row of the index (if any) are put at the beginning of the slice.
+        An ``(arr, idx)`` tuple with the arrays to be sorted is returned.
+
+        """
+
         indsize = self.indsize
         slicesize = self.slicesize
         nelementsILR = self.nelementsILR
-        if profile:
-            show_stats("Before creating idx", tref)
         if indsize == 8:
             idx = numpy.arange(0, len(arr), dtype="uint64") + nrow * slicesize
         elif indsize == 4:
@@ -606,35 +713,13 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
                 offset2 = (nrow % self.nslicesblock) * slicesize // lbucket
                 idx += offset2
         # Add the last row at the beginning of arr & idx (if needed)
-        if (indsize == 8 and nelementsILR > 0):
+        if (indsize == 8 and nelementsILR > 0 and lastrow):
             # It is possible that the values in LR are already sorted.
             # Fetch them and override existing values in arr and idx.
             assert len(arr) > nelementsILR
             self.read_slice_lr(self.sortedLR, arr[:nelementsILR])
             self.read_slice_lr(self.indicesLR, idx[:nelementsILR])
-        # In-place sorting
-        if profile:
-            show_stats("Before keysort", tref)
-        indexesextension.keysort(arr, idx)
-        larr = arr[-1]
-        if reduction > 1:
-            # It's important to do a copy() here in order to ensure that
-            # sorted._append() will receive a contiguous array.
-            if profile:
-                show_stats("Before reduction", tref)
-            reduc = arr[::reduction].copy()
-            if profile:
-                show_stats("After reduction", tref)
-            arr = reduc
-            if profile:
-                show_stats("After arr <-- reduc", tref)
-        # A completely sorted index is not longer possible after an
-        # append of an index with already one slice.
-        if nrow > 0:
-            self._v_attrs.is_csi = False
-        if profile:
-            show_stats("Exiting initial_append", tref)
-        return larr, arr, idx
+        return arr, idx
 
     def final_idx32(self, idx, offset):
         """Perform final operations in 32-bit indices."""
@@ -682,6 +767,8 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         indicesLR = where.indicesLR
         nrows = sorted.nrows  # before sorted.append()
         larr, arr, idx = self.initial_append(xarr, nrows, reduction)
+        # The modified rows in the last row have been read again
+        self._discard_delta(nrows * self.slicesize)
         # Save the sorted array
         sorted.append(arr.reshape(1, arr.size))
         cs = self.chunksize // reduction
@@ -721,6 +808,39 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         if profile:
             show_stats("Exiting append", tref)
 
+    def append_slices(self, xarrs, update=False, nthreads=1):
+        """Append several slices to the index objects.
+
+        This is the same as calling `append()` for every array in the
+        `xarrs` iterable, but when `nthreads` is greater than 1, the
+        slices are sorted by a pool of `nthreads` threads while the next
+        ones are being read.  The `xarrs` iterable is consumed and the
+        sorted slices are appended by the calling thread, since HDF5 is
+        not thread-safe.
+
+        """
+
+        if nthreads <= 1:
+            for arr in xarrs:
+                self.append([arr], update=update)
+            return
+
+        if not update and self.temp_required:
+            nrow = self.tmp.sorted.nrows
+        else:
+            nrow = self.sorted.nrows
+
+        def sort_slice(arr, idx):
+            indexesextension.keysort(arr, idx)
+            return (arr, idx)
+
+        # Only the first slice takes the values in the last row
+        slices = (self.init_slice(arr, nrow + i, lastrow=(i == 0))
+                  for (i, arr) in enumerate(xarrs))
+        for sslice in map_in_threads(sort_slice, slices,
+                                     nthreads, 2 * nthreads):
+            self.append([sslice], update=update)
+
     def append_last_row(self, xarr, update=False):
         """Append the array to the last row index objects."""
 
@@ -740,6 +860,8 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         indicesLR = where.indicesLR
         sortedLR = where.sortedLR
         larr, arr, idx = self.initial_append(xarr, nrows, reduction)
+        # The modified rows in the last row have been read again
+        self._discard_delta(nrows * self.slicesize)
         nelementsSLR = len(arr)
         nelementsILR = len(idx)
         # Build the cache of bounds
@@ -771,16 +893,26 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
 
     appendLastRow = previous_api(append_last_row)
 
-    def optimize(self, verbose=False):
+    def optimize(self, verbose=False, progress=None):
         """Optimize an index so as to allow faster searches.
 
         verbose
             If True, messages about the progress of the
             optimization process are printed out.
+        progress
+            If not None, it is called as ``progress(nrows, npasses)``
+            while the index is optimized (see :meth:`Column.create_index`).
 
         """
 
         if not self.temp_required:
+            # Compute the statistics from the index itself
+            stats = [self._slice_stats(self.sorted[i], self.reduction)
+                     for i in xrange(self.nslices)]
+            if self.nelementsSLR > 0:
+                stats.append(self._slice_stats(
+                    self.sortedLR[:self.nelementsSLR], self.reduction))
+            self.set_stats(stats)
             return
 
         if verbose:
@@ -788,6 +920,16 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         else:
             self.verbose = debug
 
+        if self.want_complete_sort and self.memory_limit is not None:
+            # Merging the sorted slices gives a completely sorted index
+            # right away, with no need of the optimization passes.
+            self.do_external_sort(progress)
+            self.cleanup_temp()
+            return
+
+        if progress is not None:
+            progress(0, 1)
+
         # Initialize last_tover and last_nover
         self.last_tover = 0
         self.last_nover = 0
@@ -960,6 +1102,227 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             c = round(clock() - c1, 4)
             print("time: %s. clock: %s" % (t, c))
 
+    def count_passes(self, nelements):
+        """Get the number of passes over the data for building the index.
+
+        The first pass sorts the slices of the index with `nelements`
+        values.  Then, either the index is optimized in one more pass, or
+        the slices are merged in one or more passes (see
+        :meth:`Index.do_external_sort`).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if not self.temp_required:
+            return 1
+        if self.want_complete_sort and self.memory_limit is not None:
+            nruns = -(-nelements // self.slicesize)
+            return 1 + len(self.plan_merge(nruns))
+        return 2
+
+    def plan_merge(self, nruns):
+        """Get the number of sorted runs merged at once in every pass.
+
+        The slices, the read buffers of the `nruns` runs being merged and
+        the merged values must fit in ``memory_limit`` bytes, and buffers
+        should not be smaller than a chunk.  When there are too many runs,
+        they are merged in groups in intermediate passes.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        rowsize = self.dtype.itemsize + self.indsize
+        available = max(self.memory_limit - self.slicesize * rowsize, 0)
+        maxruns = max(available // (2 * self.chunksize * rowsize), 2)
+        passes = []
+        while nruns > maxruns:
+            passes.append(maxruns)
+            nruns = -(-nruns // maxruns)
+        passes.append(nruns)
+        return passes
+
+    def _read_run(self, run, start, stop):
+        """Read the values and indices in `start` to `stop` of `run`."""
+
+        sorted, indices, nrow, offset = run[:4]
+        if nrow is None:
+            return (sorted[offset + start:offset + stop],
+                    indices[offset + start:offset + stop])
+        return (sorted[nrow, start:stop], indices[nrow, start:stop])
+
+    def merge_runs(self, runs, bufsize):
+        """Merge the sorted `runs`, reading `bufsize` elements at a time.
+
+        Every run is a ``(sorted, indices, nrow, offset, length)`` tuple
+        of arrays in the temporary file (`nrow` is None for 1-D arrays).
+        This is a generator of ``(sorted, indices)`` arrays which, one
+        after the other, hold the values of all the runs in order.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        nruns = len(runs)
+        # The next position to read in every run and the buffered values
+        positions = [0] * nruns
+        buffers = [None] * nruns
+        while True:
+            for i, run in enumerate(runs):
+                if ((buffers[i] is None or len(buffers[i][0]) == 0) and
+                        positions[i] < run[4]):
+                    stop = min(positions[i] + bufsize, run[4])
+                    buffers[i] = self._read_run(run, positions[i], stop)
+                    positions[i] = stop
+            active = [i for i in xrange(nruns)
+                      if buffers[i] is not None and len(buffers[i][0]) > 0]
+            if not active:
+                break
+            # The values still on disk are not lower than the last value
+            # in the buffer of their run, so every buffered value up to
+            # the lowest of those is ready to be merged.
+            lasts = [buffers[i][0][-1] for i in active
+                     if positions[i] < runs[i][4]]
+            if lasts:
+                # Sorting also works for strings and leaves NaNs at the end
+                bound = numpy.sort(numpy.array(lasts, dtype=self.dtype))[0]
+            sorted, indices = [], []
+            for i in active:
+                bsorted, bindices = buffers[i]
+                if lasts:
+                    n = bsorted.searchsorted(bound, side='right')
+                else:
+                    n = len(bsorted)
+                sorted.append(bsorted[:n])
+                indices.append(bindices[:n])
+                buffers[i] = (bsorted[n:], bindices[n:])
+            sorted = numpy.concatenate(sorted)
+            indices = numpy.concatenate(indices)
+            indexesextension.keysort(sorted, indices)
+            yield sorted, indices
+
+    def do_external_sort(self, progress=None):
+        """Bring the index into a complete sorted state with a k-way merge.
+
+        The sorted slices (and the last row) in the temporary file are
+        merged in one or more passes (see :meth:`Index.plan_merge`) so
+        that the memory used never exceeds ``memory_limit``.  If
+        `progress` is not None, it is called as ``progress(nrows,
+        npasses)`` with the number of merged values in the current pass
+        and the number of remaining passes (including the current one).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if self.verbose:
+            t1 = time()
+            c1 = clock()
+        ss = self.slicesize
+        tmp = self.tmp
+        nslices = self.nslices
+        nelementsLR = self.nelementsILR
+        nelements = nslices * ss + nelementsLR
+        rowsize = self.dtype.itemsize + self.indsize
+        available = max(self.memory_limit - ss * rowsize, 0)
+
+        runs = [(tmp.sorted, tmp.indices, i, 0, ss) for i in xrange(nslices)]
+        if nelementsLR > 0:
+            runs.append((tmp.sortedLR, tmp.indicesLR, None, 0, nelementsLR))
+        passes = self.plan_merge(len(runs))
+        atom = Atom.from_dtype(self.dtype)
+        iatom = UIntAtom(itemsize=self.indsize)
+        # Intermediate passes write longer runs into 1-D arrays
+        for npass, nmerged in enumerate(passes[:-1]):
+            if self.verbose:
+                print("merging %d runs in groups of %d" % (len(runs), nmerged))
+            bufsize = max(available // (2 * nmerged * rowsize),
+                          self.chunksize)
+            sorted = EArray(tmp, 'msorted%d' % npass, atom, (0,),
+                            "Merged sorted values", self.filters,
+                            expectedrows=nelements)
+            indices = EArray(tmp, 'mindices%d' % npass, iatom, (0,),
+                             "Merged indices", self.filters,
+                             expectedrows=nelements)
+            newruns = []
+            for i in xrange(0, len(runs), nmerged):
+                offset = sorted.nrows
+                for msorted, mindices in self.merge_runs(
+                        runs[i:i + nmerged], bufsize):
+                    sorted.append(msorted)
+                    indices.append(mindices)
+                    if progress is not None:
+                        progress(sorted.nrows, len(passes) - npass)
+                newruns.append((sorted, indices, None, offset,
+                                sorted.nrows - offset))
+            if npass > 0:
+                # The arrays of the previous pass are not needed anymore
+                runs[0][0]._f_remove()
+                runs[0][1]._f_remove()
+            runs = newruns
+
+        # The final pass writes the slices of the index
+        if self.verbose:
+            print("merging %d runs" % len(runs))
+        bufsize = max(available // (2 * len(runs) * rowsize), self.chunksize)
+        shape = (0, ss)
+        sorted = EArray(tmp, 'msorted', atom, shape, "Merged sorted",
+                        self.filters, chunkshape=(1, self.chunksize))
+        indices = EArray(tmp, 'mindices', iatom, shape, "Merged indices",
+                         self.filters, chunkshape=(1, self.chunksize))
+        ssorted = numpy.empty(ss, dtype=self.dtype)
+        sindices = numpy.empty(ss, dtype='u%d' % self.indsize)
+        nslice = nfilled = 0
+        for msorted, mindices in self.merge_runs(runs, bufsize):
+            while len(msorted) > 0:
+                n = min(ss - nfilled, len(msorted))
+                ssorted[nfilled:nfilled + n] = msorted[:n]
+                sindices[nfilled:nfilled + n] = mindices[:n]
+                msorted, mindices = msorted[n:], mindices[n:]
+                nfilled += n
+                if nfilled == ss:
+                    sorted.append(ssorted.reshape(1, ss))
+                    indices.append(sindices.reshape(1, ss))
+                    # Update caches for this slice
+                    self.update_caches(nslice, ssorted)
+                    nslice += 1
+                    nfilled = 0
+            if progress is not None:
+                progress(min(nslice * ss + nfilled, nelements), 1)
+        assert nslice == nslices and nfilled == nelementsLR
+
+        # Replace the slices in the temporary file with the merged ones
+        if len(passes) > 1:
+            runs[0][0]._f_remove()
+            runs[0][1]._f_remove()
+        tmp.sorted._f_remove()
+        tmp.indices._f_remove()
+        sorted._f_rename('sorted')
+        indices._f_rename('indices')
+        if nelementsLR > 0:
+            # The remaining values go to the last row
+            sortedlr = ssorted[:nelementsLR]
+            tmp.sortedLR[:nelementsLR] = sortedlr
+            tmp.indicesLR[:nelementsLR] = sindices[:nelementsLR]
+            bebounds = numpy.concatenate(
+                (sortedlr[::self.chunksize], [sortedlr[-1]]))
+            tmp.sortedLR[nelementsLR:nelementsLR + len(bebounds)] = bebounds
+            self.bebounds = bebounds
+
+        # Compute the overlaps in order to verify that we have achieved
+        # a complete sort (this also sets the 'is_csi' flag).
+        self.compute_overlaps(tmp, "do_external_sort()", self.verbose)
+        if self.noverlaps > 0:
+            warnings.warn(
+                "the external sort was not able to achieve a completely "
+                "sorted index.  Please report this to the authors.",
+                UserWarning)
+        if self.verbose:
+            t = round(time() - t1, 4)
+            c = round(clock() - c1, 4)
+            print("time: %s. clock: %s" % (t, c))
+
     def swap(self, what, mode=None):
         """Swap chunks or slices using a certain bounds reference."""
 
@@ -1105,9 +1468,12 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         cs = self.chunksize // reduction
         ncs = self.nchunkslice
         tmp = self.tmp
+        stats = []
         for i in xrange(self.nslices):
             # Copy sorted & indices slices
-            sorted = tmp.sorted[i][::reduction].copy()
+            sorted = tmp.sorted[i]
+            stats.append(self._slice_stats(sorted))
+            sorted = sorted[::reduction].copy()
             self.sorted.append(sorted.reshape(1, sorted.size))
             # Compute ranges
             self.ranges.append([[sorted[0], sorted[-1]]])
@@ -1130,7 +1496,9 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             sortedLR = self.sortedLR
             indicesLR = self.indicesLR
             nelementsLR = self.nelementsILR
-            sortedlr = tmp.sortedLR[:nelementsLR][::reduction].copy()
+            sortedlr = tmp.sortedLR[:nelementsLR]
+            stats.append(self._slice_stats(sortedlr))
+            sortedlr = sortedlr[::reduction].copy()
             nelementsSLR = len(sortedlr)
             sortedLR[:nelementsSLR] = sortedlr
             # Now, the bounds
@@ -1144,6 +1512,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         # The number of elements will be saved as an attribute
         self.sortedLR.attrs.nelements = self.nelementsSLR
         self.indicesLR.attrs.nelements = self.nelementsILR
+        self.set_stats(stats)
 
         if self.verbose:
             print("Deleting temporaries...")
@@ -1530,6 +1899,122 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         assert pos > 0
         return pos
 
+    def _slice_stats(self, sorted, weight=1):
+        """Summarize the `sorted` values of a slice for the statistics.
+
+        Every value stands for `weight` rows.  A ``(samples, nrows,
+        ndistinct, distinct)`` tuple is returned, where `distinct` has
+        the distinct values in the slice, or is None if there are many.
+
+        """
+
+        if self.dtype.kind == 'f':
+            # NaN values are left out of the statistics
+            sorted = sorted[~numpy.isnan(sorted)]
+        nrows = len(sorted) * weight
+        if len(sorted) == 0:
+            return (sorted, 0, 0, sorted)
+        # Take evenly spaced samples, including the first and last values
+        nsamples = min(len(sorted), 4 * histogram_bins)
+        positions = numpy.linspace(0, len(sorted) - 1, nsamples)
+        samples = sorted[positions.round().astype('int_')]
+        changes = numpy.empty(len(sorted), dtype='bool')
+        changes[0] = True
+        changes[1:] = sorted[1:] != sorted[:-1]
+        ndistinct = changes.sum()
+        distinct = None
+        if ndistinct <= 4 * histogram_bins:
+            distinct = sorted[changes]
+        return (samples, nrows, ndistinct, distinct)
+
+    def set_stats(self, stats):
+        """Compute the histogram and distinct count of the index.
+
+        `stats` is a sequence with the summaries of all the slices of
+        the index (see :meth:`Index._slice_stats`).  The statistics are
+        kept in the ``histogram``, ``histrows`` and ``ndistinct``
+        attributes of the index.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if not self._v_file._iswritable() or self.dtype.kind not in 'biufS':
+            return
+        stats = [stat for stat in stats if stat[1] > 0]
+        if not stats:
+            return
+        samples = numpy.concatenate([stat[0] for stat in stats])
+        weights = numpy.concatenate([
+            numpy.ones(len(stat[0])) * stat[1] / len(stat[0])
+            for stat in stats])
+        order = samples.argsort(kind='mergesort')
+        samples = samples[order]
+        cumweights = weights[order].cumsum()
+        nrows = cumweights[-1]
+        # The interior bounds split the rows into bins of the same size
+        targets = numpy.arange(1, histogram_bins) * (nrows / histogram_bins)
+        positions = cumweights.searchsorted(targets)
+        positions = numpy.minimum(positions, len(samples) - 1)
+        self._v_attrs.histogram = numpy.concatenate(
+            (samples[:1], samples[positions], samples[-1:]))
+        self._v_attrs.histrows = long(round(nrows))
+        # The distinct values are exact when every slice has few of them
+        distincts = [stat[3] for stat in stats]
+        if all(distinct is not None for distinct in distincts):
+            ndistinct = len(numpy.unique(numpy.concatenate(distincts)))
+        else:
+            ndistinct = min(sum(stat[2] for stat in stats), nrows)
+        self._v_attrs.ndistinct = long(ndistinct)
+
+    def estimate_nrows(self, item):
+        """Estimate the number of rows with values in the `item` range.
+
+        `item` is a ``(low, high)`` tuple like the ones returned by
+        :meth:`Index.get_lookup_range` (both limits are included).  The
+        estimate is computed from the histogram of the index (see
+        :attr:`Index.histogram`) and, for single values, from its number
+        of distinct values.  None is returned when the index has no
+        statistics.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        histogram = self.histogram
+        if histogram is None:
+            return None
+        if not item or item[0] > item[1]:
+            return 0
+        low, high = item
+        nbins = len(histogram) - 1
+        lows, highs = histogram[:-1], histogram[1:]
+        inside = (highs >= low) & (lows <= high)
+        if low == high:
+            # The bins full of this value (and part of the bins around
+            # them) for frequent values, or the average otherwise
+            nfull = (inside & (lows == highs)).sum()
+            if nfull > 0:
+                fraction = (nfull + 1.) / nbins
+            elif inside.any():
+                fraction = 1. / max(self.ndistinct, 1)
+            else:
+                fraction = 0.
+        elif self.dtype.kind == 'S':
+            fraction = float(inside.sum()) / nbins
+        else:
+            # Interpolate linearly inside the bins
+            lows = lows.astype('float64')
+            highs = highs.astype('float64')
+            widths = highs - lows
+            overlaps = (numpy.minimum(highs, float(high)) -
+                        numpy.maximum(lows, float(low)))
+            fractions = numpy.ones(nbins)
+            wide = widths > 0
+            fractions[wide] = (overlaps[wide] / widths[wide]).clip(0, 1)
+            fraction = fractions[inside].sum() / nbins
+        return long(round(fraction * self._v_attrs.histrows))
+
     def compute_overlaps_finegrain(self, where, message, verbose):
         """Compute some statistics about overlaping of slices in index.
 
@@ -1800,6 +2285,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         "Clean the limits cache and resize starts and lengths arrays"
 
         params = self._v_file.params
+        budget = self._v_file._cache_budget
         # The sorted IndexArray is absolutely required to be in memory
         # at the same time than the Index instance, so create a strong
         # reference to it.  We are not introducing leaks because the
@@ -1808,19 +2294,21 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         self._sorted = self.sorted
         self._sorted.boundscache = ObjectCache(params['BOUNDS_MAX_SLOTS'],
                                                params['BOUNDS_MAX_SIZE'],
-                                               'non-opt types bounds')
+                                               'non-opt types bounds',
+                                               budget)
         self.sorted.boundscache = ObjectCache(params['BOUNDS_MAX_SLOTS'],
                                               params['BOUNDS_MAX_SIZE'],
-                                              'non-opt types bounds')
+                                              'non-opt types bounds',
+                                              budget)
         """A cache for the bounds (2nd hash) data. Only used for
         non-optimized types searches."""
         self.limboundscache = ObjectCache(params['LIMBOUNDS_MAX_SLOTS'],
                                           params['LIMBOUNDS_MAX_SIZE'],
-                                          'bounding limits')
+                                          'bounding limits', budget)
         """A cache for bounding limits."""
         self.sortedLRcache = ObjectCache(params['SORTEDLR_MAX_SLOTS'],
                                          params['SORTEDLR_MAX_SIZE'],
-                                         'last row chunks')
+                                         'last row chunks', budget)
         """A cache for the last row chunks. Only used for searches in
         the last row, and mainly useful for small indexes."""
         self.starts = numpy.empty(shape=self.nrows, dtype=numpy.int32)
@@ -1828,6 +2316,77 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         self.sorted._init_sorted_slice(self)
         self.dirtycache = False
 
+    def _g_get_caches(self):
+        caches = {}
+        for kind, name in (('limbounds', 'limboundscache'),
+                           ('sortedLR', 'sortedLRcache')):
+            if name in self.__dict__:
+                caches[kind] = self.__dict__[name]
+        return caches
+
+    def _cache_stamp(self):
+        """Get the state of the index that cache entries depend on."""
+
+        return (long(self.nelements), long(self.nelementsILR),
+                long(self.nslices), long(self.chunksize))
+
+    def save_cache(self):
+        """Save the caches used for searches in the index.
+
+        The entries in the caches of bounds and sorted values that have
+        been used by the last searches (the hottest ones) are kept in a
+        hidden node of the index, so that the next time the file is
+        opened, they are loaded on the first search instead of starting
+        with empty caches.  They are not used if the index changes in
+        the meantime.  This method does nothing if the index has not been
+        searched yet.
+
+        See also the ``INDEX_SAVE_CACHES`` parameter, for saving the caches
+        of indexes when the file is closed.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._v_file._check_writable()
+        if self.dirtycache:
+            return
+        cache = {
+            'stamp': self._cache_stamp(),
+            'limbounds': self.limboundscache.items(),
+            'sortedLR': self.sortedLRcache.items(),
+            'bounds': self.sorted.boundscache.items(),
+            'numcaches': self.sorted._get_cache_items(),
+        }
+        if 'warmcache' in self:
+            self.warmcache._f_remove()
+        warmcache = VLArray(self, 'warmcache', ObjectAtom(),
+                            "Saved caches for searches", _log=False)
+        warmcache.append(cache)
+
+    def load_cache(self):
+        """Load the caches saved by :meth:`Index.save_cache`.
+
+        This is done automatically on the first search.  True is returned
+        if the caches were loaded.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if 'warmcache' not in self:
+            return False
+        if self.dirtycache:
+            self.restorecache()
+        cache = self.warmcache[0]
+        if cache['stamp'] != self._cache_stamp():
+            return False
+        self.limboundscache.load(cache['limbounds'])
+        self.sortedLRcache.load(cache['sortedLR'])
+        self.sorted.boundscache.load(cache['bounds'])
+        self.sorted._load_cache_items(*cache['numcaches'])
+        return True
+
     def search(self, item):
         """Do a binary search in this index for an item."""
 
@@ -1838,6 +2397,14 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
 
         if self.dirtycache:
             self.restorecache()
+            if not self._cacheused:
+                # Warm the caches up with the ones saved in the file
+                self._cacheused = True
+                self.load_cache()
+        elif self.sorted._caches_evicted():
+            # The cache budget has taken the memory of the caches for
+            # optimized searches, so create them again
+            self.sorted._init_sorted_slice(self)
 
         # An empty item or if left limit is larger than the right one
         # means that the number of records is always going to be empty,
@@ -1846,7 +2413,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         if not item or item[0] > item[1]:
             self.starts[:] = 0
             self.lengths[:] = 0
-            return 0
+            return self.search_delta(item)
 
         tlen = 0
         # Check whether the item tuple is in the limits cache or not
@@ -1861,7 +2428,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
                 self.starts[nrow2] = start
                 self.lengths[nrow2] = length
                 tlen = tlen + length
-            return tlen
+            return tlen + self.search_delta(item)
         # The item is not in cache. Do the real lookup.
         sorted = self.sorted
         if self.nslices > 0:
@@ -1926,7 +2493,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
 
         if profile:
             show_stats("Exiting search", tref)
-        return tlen
+        return tlen + self.search_delta(item)
 
     # This is an scalar version of search. It works with strings as well.
     def search_scalar(self, item, sorted):
@@ -2013,6 +2580,135 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
 
     searchLastRow = previous_api(search_last_row)
 
+    def _get_delta(self):
+        """Get the ``(rows, oldvalues, newvalues)`` of the modified rows.
+
+        `rows` is sorted, `oldvalues` are the values of the rows in the
+        sorted index and `newvalues` are their current values.
+
+        """
+
+        if self._delta is None:
+            if 'deltarows' in self:
+                self._delta = (self.deltarows[:], self.deltaold[:],
+                               self.deltanew[:])
+            else:
+                self._delta = (numpy.empty(0, dtype='int64'),
+                               numpy.empty(0, dtype=self.dtype),
+                               numpy.empty(0, dtype=self.dtype))
+        return self._delta
+
+    def _set_delta(self, rows, oldvalues, newvalues):
+        """Save the `rows`, `oldvalues` and `newvalues` of the delta."""
+
+        if 'deltarows' not in self:
+            if len(rows) == 0:
+                return
+            atom = Atom.from_dtype(self.dtype)
+            EArray(self, 'deltarows', Int64Atom(), (0,), "Modified rows",
+                   self.filters, _log=False)
+            EArray(self, 'deltaold', atom, (0,), "Indexed values of rows",
+                   self.filters, byteorder=self.byteorder, _log=False)
+            EArray(self, 'deltanew', atom, (0,), "Current values of rows",
+                   self.filters, byteorder=self.byteorder, _log=False)
+        for name, values in (('deltarows', rows), ('deltaold', oldvalues),
+                             ('deltanew', newvalues)):
+            array = self._f_get_child(name)
+            array.truncate(0)
+            if len(values) > 0:
+                array.append(values)
+        self._delta = (rows, oldvalues, newvalues)
+
+    def _discard_delta(self, start):
+        """Forget the modified rows from `start` on.
+
+        This is used when those rows are read again from the table.
+
+        """
+
+        rows, oldvalues, newvalues = self._get_delta()
+        if len(rows) == 0 or rows[-1] < start:
+            return
+        stop = numpy.searchsorted(rows, start)
+        self._set_delta(rows[:stop], oldvalues[:stop], newvalues[:stop])
+
+    def update_rows(self, rows, oldvalues, newvalues):
+        """Take into account that `rows` changed from `oldvalues` to
+        `newvalues`.
+
+        The sorted index is left untouched: the modified rows are kept in
+        a delta that :meth:`Index.search` and :meth:`Index.get_chunkmap`
+        consult.  If the delta would grow beyond the
+        ``INDEX_DELTA_MAX_ROWS`` parameter, nothing is done and False is
+        returned, meaning that the index must be rebuilt.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        # When a row is repeated, its last value is the one in the table
+        rows, last = numpy.unique(numpy.asarray(rows, dtype='int64')[::-1],
+                                  return_index=True)
+        oldvalues = numpy.asarray(oldvalues, dtype=self.dtype)[::-1][last]
+        newvalues = numpy.asarray(newvalues, dtype=self.dtype)[::-1][last]
+        drows, dold, dnew = self._get_delta()
+        # Rows already in the delta keep their value in the sorted index
+        pos = numpy.searchsorted(drows, rows)
+        known = pos < len(drows)
+        known[known] = drows[pos[known]] == rows[known]
+        dnew = dnew.copy()
+        dnew[pos[known]] = newvalues[known]
+        drows = numpy.concatenate((drows, rows[~known]))
+        dold = numpy.concatenate((dold, oldvalues[~known]))
+        dnew = numpy.concatenate((dnew, newvalues[~known]))
+        order = numpy.argsort(drows, kind='mergesort')
+        # Rows back to their value in the sorted index need no delta
+        order = order[dold[order] != dnew[order]]
+        if len(order) > self._v_file.params['INDEX_DELTA_MAX_ROWS']:
+            return False
+        self._set_delta(drows[order], dold[order], dnew[order])
+        return True
+
+    def search_delta(self, item):
+        """Correct the count of a search of `item` with the modified rows.
+
+        The modified rows whose current value is in `item` are selected
+        for :meth:`Index.get_chunkmap`.  The number of those rows minus
+        the number of modified rows whose value in the sorted index is in
+        `item` is returned.
+
+        """
+
+        rows, oldvalues, newvalues = self._get_delta()
+        if len(rows) == 0 or not item or item[0] > item[1]:
+            self._deltaselected = rows[:0]
+            return 0
+        low, high = item
+        innew = (newvalues >= low) & (newvalues <= high)
+        inold = (oldvalues >= low) & (oldvalues <= high)
+        self._deltaselected = rows[innew]
+        return int(innew.sum()) - int(inold.sum())
+
+    def compact(self):
+        """Merge the modified rows into the index.
+
+        The index is rebuilt from the current values of the column, so
+        this index object is removed and a new one takes its place (get it
+        again from the column or the table).  Nothing is done if there are
+        no modified rows (see :attr:`Index.ndeltarows`).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if self.ndeltarows == 0:
+            return
+        table = self.table
+        if self._v_name in table._tableindexes:
+            table._do_reindex_table_index(self._v_name, False)
+        else:
+            self.column.reindex()
+
     def get_chunkmap(self):
         """Compute a map with the interesting chunks in index."""
 
@@ -2020,41 +2716,22 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             tref = time()
         if profile:
             show_stats("Entering get_chunkmap", tref)
-        ss = self.slicesize
-        nsb = self.nslicesblock
-        nslices = self.nslices
         lbucket = self.lbucket
-        indsize = self.indsize
         bucketsinblock = float(self.blocksize) / lbucket
         nchunks = long(math.ceil(float(self.nelements) / lbucket))
         chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
         reduction = self.reduction
-        starts = (self.starts - 1) * reduction + 1
-        stops = (self.starts + self.lengths) * reduction
+        nrows = self.nrows
+        starts = self.starts[:nrows].astype('int64')
+        stops = (starts + self.lengths[:nrows]) * reduction
+        starts = (starts - 1) * reduction + 1
         starts[starts < 0] = 0    # All negative values set to zero
-        indices = self.indices
-        for nslice in xrange(self.nrows):
-            start = starts[nslice]
-            stop = stops[nslice]
-            if stop > start:
-                idx = numpy.empty(shape=stop - start, dtype='u%d' % indsize)
-                if nslice < nslices:
-                    indices._read_index_slice(nslice, start, stop, idx)
-                else:
-                    self.indicesLR._read_index_slice(start, stop, idx)
-                if indsize == 8:
-                    idx //= lbucket
-                elif indsize == 2:
-                    # The chunkmap size cannot be never larger than 'int_'
-                    idx = idx.astype("int_")
-                    offset = long((nslice // nsb) * bucketsinblock)
-                    idx += offset
-                elif indsize == 1:
-                    # The chunkmap size cannot be never larger than 'int_'
-                    idx = idx.astype("int_")
-                    offset = (nslice * ss) // lbucket
-                    idx += offset
-                chunkmap[idx] = True
+        # Read the selected indices of every slice and map them into
+        # chunks in the extension
+        indexesextension.get_chunkmap(
+            self.indices, self.indicesLR, starts, stops, chunkmap,
+            self.nslices, self.indsize, lbucket, self.slicesize,
+            self.nslicesblock, bucketsinblock)
         # The case lbucket < nrowsinchunk should only happen in tests
         nrowsinchunk = self.nrowsinchunk
         if lbucket != nrowsinchunk:
@@ -2062,13 +2739,11 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             nelements = self.nelements
             tnchunks = long(math.ceil(float(nelements) / nrowsinchunk))
             tchunkmap = numpy.zeros(shape=tnchunks, dtype="bool")
-            ratio = float(lbucket) / nrowsinchunk
-            idx = chunkmap.nonzero()[0]
-            starts = (idx * ratio).astype('int_')
-            stops = numpy.ceil((idx + 1) * ratio).astype('int_')
-            for i in range(len(idx)):
-                tchunkmap[starts[i]:stops[i]] = True
+            indexesextension.expand_chunkmap(chunkmap, tchunkmap,
+                                             lbucket, nrowsinchunk)
             chunkmap = tchunkmap
+        # Add the chunks of the modified rows selected by the search
+        chunkmap[self._deltaselected // nrowsinchunk] = True
         if profile:
             show_stats("Exiting get_chunkmap", tref)
         return chunkmap
@@ -2078,8 +2753,7 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         assert len(limits) in [1, 2]
         assert len(ops) == len(limits)
 
-        column = self.column
-        coldtype = column.dtype.base
+        coldtype = self.dtype
         itemsize = coldtype.itemsize
 
         if len(limits) == 1:
@@ -2123,6 +2797,201 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
 
     getLookupRange = previous_api(get_lookup_range)
 
+    def get_minmax(self):
+        """Return the minimum and maximum values in this index.
+
+        Only the ranges of the slices and the bounds of the last row are
+        read, so no sorted data is touched.  Note that the maximum is
+        only exact for indexes without reduction (``reduction == 1``);
+        otherwise it may be lower than the actual one.  If there are NaN
+        values in the index, both values are NaN, as in ``numpy.min()``
+        and ``numpy.max()``.  If the index is empty, None is returned.
+
+        """
+
+        if self.nelements == 0:
+            return None
+        ranges = self.ranges[:self.nslices]
+        lows, highs = ranges[:, 0], ranges[:, 1]
+        if self.nelementsILR > 0:
+            lows = numpy.concatenate((lows, self.bebounds[:1]))
+            highs = numpy.concatenate((highs, self.bebounds[-1:]))
+        # Sorting also works for strings and leaves NaNs at the end
+        minvalue = numpy.sort(lows)[0]
+        maxvalue = numpy.sort(highs)[-1]
+        if self.dtype.kind == 'f' and numpy.isnan(maxvalue):
+            minvalue = maxvalue
+        return (minvalue, maxvalue)
+
+    def _neighbor(self, value, direction):
+        """Get the value of the index type next to `value` in `direction`.
+
+        None is returned if there is no such value.
+
+        """
+
+        dtype = self.dtype
+        if dtype.kind == 'f':
+            inf = dtype.type(direction * numpy.inf)
+            if value == inf:
+                return None
+            return numpy.nextafter(dtype.type(value), inf)
+        elif dtype.kind == 'S':
+            itemsize = dtype.itemsize
+            if value.ljust(itemsize, b'\0') == inftype(dtype, itemsize,
+                                                       direction):
+                return None
+            return nextafter(value, direction, dtype, itemsize)
+        elif dtype.kind == 'b':
+            if bool(value) == (direction > 0):
+                return None
+            return dtype.type(direction > 0)
+        info = numpy.iinfo(dtype)
+        value = long(value) + direction
+        if not info.min <= value <= info.max:
+            return None
+        return dtype.type(value)
+
+    def _nvalues(self):
+        """Get the number of indexed values which are not NaN."""
+
+        dtype, itemsize = self.dtype, self.dtype.itemsize
+        return self.search((inftype(dtype, itemsize, sign=-1),
+                            inftype(dtype, itemsize, sign=+1)))
+
+    def rank(self, value):
+        """Return the number of indexed values lower than `value`.
+
+        NaN values are never lower than any value.  The count is taken
+        from a search in the index, so it is exact as long as the index
+        has no reduction (``reduction == 1``).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        normalized = _normalize_limit(self.dtype, 'lt', value)
+        if normalized is None:
+            return 0
+        if normalized == (None, None):
+            return self._nvalues()
+        op, limit = normalized
+        if op == 'lt':
+            limit = self._neighbor(limit, -1)
+            if limit is None:
+                return 0
+        return self.search((inftype(self.dtype, self.dtype.itemsize, -1),
+                            limit))
+
+    def _pick_pivot(self):
+        """Get a pivot value for the values found by the last search.
+
+        The median of the values found in every slice is read, and the
+        median of them weighted by the number of values found in their
+        slices is returned, so that at least about a quarter of the
+        values found are on each side of the pivot.
+
+        """
+
+        nslots = self.nslices + (self.nelementsSLR > 0)
+        lengths = self.lengths[:nslots]
+        slots = numpy.flatnonzero(lengths)
+        medians = numpy.empty(len(slots), dtype=self.dtype)
+        buffer_ = numpy.empty(1, dtype=self.dtype)
+        for i, slot in enumerate(slots):
+            pos = self.starts[slot] + lengths[slot] // 2
+            if slot < self.nslices:
+                self.read_slice(self.sorted, slot, buffer_, pos)
+            else:
+                self.read_slice_lr(self.sortedLR, buffer_, pos)
+            medians[i] = buffer_[0]
+        order = numpy.argsort(medians, kind='mergesort')
+        weights = numpy.cumsum(lengths[slots][order], dtype='int64')
+        half = numpy.searchsorted(weights, weights[-1] // 2, side='right')
+        return medians[order][min(half, len(weights) - 1)]
+
+    def _read_found(self, nfound):
+        """Read the `nfound` values found by the last search."""
+
+        values = numpy.empty(nfound, dtype=self.dtype)
+        nslots = self.nslices + (self.nelementsSLR > 0)
+        pos = 0
+        for slot in numpy.flatnonzero(self.lengths[:nslots]):
+            length = self.lengths[slot]
+            buffer_ = values[pos:pos + length]
+            if slot < self.nslices:
+                self.read_slice(self.sorted, slot, buffer_, self.starts[slot])
+            else:
+                self.read_slice_lr(self.sortedLR, buffer_, self.starts[slot])
+            pos += length
+        return values
+
+    def select(self, k):
+        """Return the `k`-th lowest value in this index (counting from 0).
+
+        NaN values are not counted, so `k` must be lower than the number
+        of indexed values that are not NaN.  The index must have no
+        reduction (``reduction == 1``) and no modified rows pending to
+        be merged (``ndeltarows == 0``).
+
+        In CSI indexes, the value is read right from its position in the
+        sorted values.  Otherwise, the range of values holding the
+        wanted one is narrowed by searching for pivot values taken from
+        the medians of every slice, which cuts down the range by at
+        least about a quarter each time.  When no more than a slice of
+        values remains in the range, they are read and sorted.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        assert self.reduction == 1 and self.ndeltarows == 0
+        if self.is_csi:
+            return self.read_sorted(k, k + 1)[0]
+
+        dtype, itemsize = self.dtype, self.dtype.itemsize
+        low = inftype(dtype, itemsize, sign=-1)
+        high = inftype(dtype, itemsize, sign=+1)
+        nlow = 0  # the number of values lower than `low`
+        while True:
+            nfound = self.search((low, high))
+            if nfound <= self.slicesize:
+                values = numpy.sort(self._read_found(nfound))
+                return values[k - nlow]
+            pivot = self._pick_pivot()
+            nle = nlow + self.search((low, pivot))
+            before = self._neighbor(pivot, -1)
+            nlt = nlow
+            if before is not None:
+                nlt += self.search((low, before))
+            if k < nlt:
+                high = before
+            elif k < nle:
+                return pivot
+            else:
+                low, nlow = self._neighbor(pivot, +1), nle
+
+    def value_counts(self):
+        """Return the distinct values in this index and their counts.
+
+        A tuple with an array of values sorted in ascending order and an
+        array with the number of times every value appears is returned.
+        NaN values are not counted.  The sorted values are read slice by
+        slice and counted with no further sorting.  The index must have
+        no reduction (``reduction == 1``) and no modified rows pending to
+        be merged (``ndeltarows == 0``).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        assert self.reduction == 1 and self.ndeltarows == 0
+        slicesize, nelements = self.slicesize, self.nelements
+        return _count_values(
+            (self.read_sorted(start, min(start + slicesize, nelements))
+             for start in xrange(0, nelements, slicesize)),
+            self.dtype)
+
     def _f_remove(self, recursive=False):
         """Remove this Index object."""
 
@@ -2176,6 +3045,967 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         return retstr
 
 
+def _count_sorted(values):
+    """Get the distinct values in the sorted `values` and their counts.
+
+    A ``(values, counts)`` tuple is returned.  NaN values are left out.
+
+    """
+
+    if values.dtype.kind == 'f':
+        values = values[~numpy.isnan(values)]
+    if len(values) == 0:
+        return (values[:0].copy(), numpy.zeros(0, dtype='int64'))
+    starts = numpy.flatnonzero(
+        numpy.concatenate(([True], values[1:] != values[:-1])))
+    counts = numpy.diff(numpy.concatenate((starts, [len(values)])))
+    return (values[starts], counts.astype('int64'))
+
+
+def _merge_counts(pairs):
+    """Merge a sequence of ``(values, counts)`` tuples into one.
+
+    The counts of equal values are added up, and the resulting values
+    are sorted in ascending order.
+
+    """
+
+    values = numpy.concatenate([pair[0] for pair in pairs])
+    counts = numpy.concatenate([pair[1] for pair in pairs])
+    if len(values) == 0:
+        return (values, counts)
+    order = numpy.argsort(values, kind='mergesort')
+    values, counts = values[order], counts[order]
+    starts = numpy.flatnonzero(
+        numpy.concatenate(([True], values[1:] != values[:-1])))
+    return (values[starts], numpy.add.reduceat(counts, starts))
+
+
+def _count_values(arrays, dtype):
+    """Count the distinct values in an iterable of sorted `arrays`.
+
+    A ``(values, counts)`` tuple is returned, with the values of `dtype`
+    sorted in ascending order.  The counts of every array are merged
+    with the accumulated ones only when they outgrow them, so the cost
+    of merging is amortized.  NaN values are left out.
+
+    """
+
+    values, counts = _count_sorted(numpy.empty(0, dtype=dtype))
+    pending = [(values, counts)]
+    npending = 0
+    for array in arrays:
+        pair = _count_sorted(array)
+        pending.append(pair)
+        npending += len(pair[0])
+        if npending >= len(values):
+            values, counts = _merge_counts(pending)
+            pending = [(values, counts)]
+            npending = 0
+    return _merge_counts(pending)
+
+
+def _sortable_bytes(values):
+    """Encode `values` as big-endian bytes that sort like the values.
+
+    A 2-D ``uint8`` array with a row of bytes per value is returned.  The
+    sign bit of signed integers is flipped, and so are all the bits of
+    negative floats (just the sign bit for positive ones), so that the
+    bytes of the values compare like the values themselves.
+
+    """
+
+    values = numpy.ascontiguousarray(values)
+    dtype = values.dtype
+    if dtype.kind in 'Sb':
+        return values.view('u1').reshape(len(values), dtype.itemsize)
+    utype = numpy.dtype('u%d' % dtype.itemsize)
+    signbit = numpy.array(1 << (8 * dtype.itemsize - 1), dtype=utype)
+    if dtype.kind == 'f':
+        # Adding a zero gets rid of negative zeros (they compare equal
+        # to positive zeros, but their bits do not)
+        values = values.astype(dtype.newbyteorder('=')) + dtype.type(0)
+        bits = values.view(utype)
+        bits = numpy.where(bits & signbit, ~bits, bits | signbit)
+    elif dtype.kind == 'i':
+        bits = values.astype(dtype.newbyteorder('=')).view(utype) ^ signbit
+    else:
+        bits = values
+    bits = bits.astype(utype.newbyteorder('>'))
+    return bits.view('u1').reshape(len(values), dtype.itemsize)
+
+
+def _composite_keys(arrays):
+    """Get the keys of a composite index for the values in `arrays`.
+
+    `arrays` has an array of values for every column in the index, and
+    a string array with the concatenated encodings of the values in
+    every row is returned.
+
+    """
+
+    keys = numpy.concatenate([_sortable_bytes(values) for values in arrays],
+                             axis=1)
+    return keys.view('S%d' % keys.shape[1]).reshape(len(keys))
+
+
+def _normalize_limit(dtype, op, limit):
+    """Turn a comparison with `limit` into one with a value of `dtype`.
+
+    An ``(op, value)`` tuple is returned, where `value` can be
+    represented exactly with `dtype`.  If no value of `dtype` fulfills
+    the comparison, None is returned, and if all of them do,
+    ``(None, None)`` is returned.
+
+    """
+
+    kind = dtype.kind
+    if kind == 'S':
+        if len(limit.rstrip(b'\0')) <= dtype.itemsize:
+            return (op, limit)
+        # Only the values longer than the column can hold match exactly
+        limit = limit[:dtype.itemsize]
+        if op == 'eq':
+            return None
+        return ('gt', limit) if op in ('gt', 'ge') else ('le', limit)
+
+    if kind == 'f':
+        limit = float(limit)
+        if math.isnan(limit):
+            return None
+        value = dtype.type(limit)
+        if float(value) < limit:
+            op = {'eq': None, 'ge': 'gt', 'gt': 'gt',
+                  'le': 'le', 'lt': 'le'}[op]
+        elif float(value) > limit:
+            op = {'eq': None, 'ge': 'ge', 'gt': 'ge',
+                  'le': 'lt', 'lt': 'lt'}[op]
+        if op is None:
+            return None
+        return (op, value)
+
+    # Integer and boolean columns
+    if isinstance(limit, float):
+        if math.isnan(limit):
+            return None
+        if limit != math.floor(limit):
+            if op == 'eq':
+                return None
+            if op in ('gt', 'ge'):
+                op, limit = 'ge', math.ceil(limit)
+            else:
+                op, limit = 'le', math.floor(limit)
+    limit = long(limit)
+    if op == 'gt':
+        op, limit = 'ge', limit + 1
+    elif op == 'lt':
+        op, limit = 'le', limit - 1
+    if kind == 'b':
+        minvalue, maxvalue = 0, 1
+    else:
+        info = numpy.iinfo(dtype)
+        minvalue, maxvalue = long(info.min), long(info.max)
+    if op == 'eq':
+        if not minvalue <= limit <= maxvalue:
+            return None
+    elif op == 'ge':
+        if limit > maxvalue:
+            return None
+        if limit <= minvalue:
+            return (None, None)
+    else:  # 'le'
+        if limit < minvalue:
+            return None
+        if limit >= maxvalue:
+            return (None, None)
+    return (op, dtype.type(limit))
+
+
+def _step_bytes(key, step):
+    """Add `step` (+1 or -1) to `key` as a big-endian number.
+
+    None is returned on overflow.
+
+    """
+
+    key = bytearray(key)
+    stop = 0 if step > 0 else 255
+    for i in xrange(len(key) - 1, -1, -1):
+        if key[i] != 255 - stop:
+            key[i] += step
+            return bytes(key)
+        key[i] = stop
+    return None
+
+
+class CompositeIndex(Index):
+    """Represents an index of several columns in a table.
+
+    The rows are sorted by the values of the columns in lexicographic
+    order (i.e. by the first column, then by the second one and so on),
+    so conditions made of equality comparisons on some leading columns,
+    optionally followed by range comparisons on the next column, can be
+    resolved by the index alone.  For instance, an index on the
+    ``('symbol', 'ts')`` columns is used for the ``(symbol == s) & (ts >
+    t0) & (ts < t1)`` and ``symbol == s`` conditions.
+
+    Rows are indexed by keys made of the big-endian, order-preserving
+    encodings of their values, and this class provides the methods and
+    attributes of :class:`Index`.  Composite indexes are created with
+    :meth:`Table.create_index`.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    _c_classid = 'COMPOSITEINDEX'
+
+    colnames = property(
+        lambda self: tuple(self._v_attrs.colnames), None, None,
+        "The path names of the indexed columns, in order.")
+
+    columns = property(
+        lambda self: tuple(self.table.cols._g_col(colname)
+                           for colname in self.colnames), None, None,
+        """The Column (see :ref:`ColumnClassDescr`) instances for the
+        indexed columns.""")
+
+    def __init__(self, parentnode, name,
+                 atom=None, title="",
+                 kind=None,
+                 optlevel=None,
+                 filters=None,
+                 tmp_dir=None,
+                 expectedrows=0,
+                 byteorder=None,
+                 blocksizes=None,
+                 new=True,
+                 colnames=None):
+
+        self._newcolnames = colnames
+        """The path names of the columns for a new index."""
+
+        super(CompositeIndex, self).__init__(
+            parentnode, name, atom, title, kind, optlevel, filters, tmp_dir,
+            expectedrows, byteorder, blocksizes, new)
+
+    def _g_post_init_hook(self):
+        super(CompositeIndex, self)._g_post_init_hook()
+        if self._v_new:
+            self._v_attrs.colnames = list(self._newcolnames)
+
+    def compute_values(self, arrays):
+        """Get the index keys of the rows with values in `arrays`.
+
+        `arrays` is a sequence with the values of every column in the
+        index, in order.
+
+        """
+
+        return _composite_keys(arrays)
+
+    def get_lookup_range(self, ops, limits):
+        """Get the range of keys fulfilling a condition.
+
+        `ops` has an ``'eq'`` operation for every leading column taking
+        part in the condition, optionally followed by one or two range
+        operations (``'gt'`` or ``'ge'`` and then ``'lt'`` or ``'le'``)
+        on the next column, and `limits` has the value for every
+        operation.  An empty tuple is returned when no key can fulfill
+        the condition.
+
+        """
+
+        dtypes = [column.dtype.base for column in self.columns]
+        itemsize = self.dtype.itemsize
+        neq = ops.count('eq')  # the equality comparisons come first
+        prefix = b''
+        for dtype, limit in zip(dtypes, limits[:neq]):
+            normalized = _normalize_limit(dtype, 'eq', limit)
+            if normalized is None:
+                return ()
+            prefix += _sortable_bytes(
+                numpy.array([normalized[1]], dtype=dtype)).tostring()
+        lower = upper = (None, None)
+        for op, limit in zip(ops[neq:], limits[neq:]):
+            normalized = _normalize_limit(dtypes[neq], op, limit)
+            if normalized is None:
+                return ()
+            if op in ('gt', 'ge'):
+                lower = normalized
+            else:
+                upper = normalized
+
+        # Build the keys for both ends of the range
+        bounds = []
+        for (op, value), fill in ((lower, b'\0'), (upper, b'\xff')):
+            key = prefix
+            if op is None and neq < len(ops) and dtypes[neq].kind == 'f':
+                # NaNs never fulfill range comparisons
+                if fill == b'\0':
+                    op, value = ('ge', -numpy.inf)
+                else:
+                    op, value = ('le', numpy.inf)
+            if op is not None:
+                key += _sortable_bytes(
+                    numpy.array([value], dtype=dtypes[neq])).tostring()
+                if op in ('gt', 'lt'):
+                    key = _step_bytes(key, +1 if op == 'gt' else -1)
+                    if key is None:
+                        return ()
+            bounds.append(key + fill * (itemsize - len(key)))
+        # Index values are compared without their trailing null bytes,
+        # so the keys must be too
+        lower, upper = numpy.array(bounds, dtype=self.dtype).tolist()
+        return (lower, upper)
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        return "Composite%s on %s" % (
+            super(CompositeIndex, self).__str__(), ", ".join(self.colnames))
+
+    def __repr__(self):
+        """This provides more metainfo than standard __repr__"""
+
+        return "%s (Composite index for columns %s)\n%s" % (
+            self._v_pathname, ", ".join(self.colnames), str(self))
+
+
+class ExpressionIndex(Index):
+    """Represents an index of an expression on the columns of a table.
+
+    The index keeps the sorted values of a Numexpr expression on some
+    columns of the table (like ``abs(a - b)`` or ``price * qty``) for
+    every row, so conditions comparing the very same expression with
+    constants can be resolved by the index.  Expression indexes are
+    created with :meth:`Table.create_expr_index`, and this class
+    provides the methods and attributes of :class:`Index`.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    _c_classid = 'EXPRESSIONINDEX'
+
+    expression = property(
+        lambda self: self._v_attrs.expression, None, None,
+        "The indexed expression.")
+
+    colnames = property(
+        lambda self: tuple(self._v_attrs.colnames), None, None,
+        "The path names of the columns taking part in the expression.")
+
+    def __init__(self, parentnode, name,
+                 atom=None, title="",
+                 kind=None,
+                 optlevel=None,
+                 filters=None,
+                 tmp_dir=None,
+                 expectedrows=0,
+                 byteorder=None,
+                 blocksizes=None,
+                 new=True,
+                 expression=None,
+                 colnames=None):
+
+        self._newexpression = (expression, colnames)
+        """The expression and its column path names for a new index."""
+
+        super(ExpressionIndex, self).__init__(
+            parentnode, name, atom, title, kind, optlevel, filters, tmp_dir,
+            expectedrows, byteorder, blocksizes, new)
+
+    def _g_post_init_hook(self):
+        super(ExpressionIndex, self)._g_post_init_hook()
+        if self._v_new:
+            expression, colnames = self._newexpression
+            self._v_attrs.expression = expression
+            self._v_attrs.colnames = list(colnames)
+
+    def compute_values(self, arrays):
+        """Evaluate the expression for the rows with values in `arrays`.
+
+        `arrays` is a sequence with the values of every column in
+        :attr:`ExpressionIndex.colnames`, in order.
+
+        """
+
+        values = numexpr.evaluate(self.expression,
+                                  dict(zip(self.colnames, arrays)))
+        return values.astype(self.dtype)
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        return "Expression%s on %s" % (
+            super(ExpressionIndex, self).__str__(), self.expression)
+
+    def __repr__(self):
+        """This provides more metainfo than standard __repr__"""
+
+        return "%s (Expression index for %s)\n%s" % (
+            self._v_pathname, self.expression, str(self))
+
+
+class _RowIndex(NotLoggedMixin, Group):
+    """Base class for the index kinds that are not made of sorted values.
+
+    These indexes are fed with the rows of the column in order, so they
+    have no last row and they can not be used for sorting.
+
+    """
+
+    filters = Index.filters
+    dirty = Index.dirty
+    column = Index.column
+    table = Index.table
+
+    is_csi = False
+    """These indexes are never completely sorted."""
+
+    ndeltarows = 0
+    """These indexes are always updated in place."""
+
+    @lazyattr
+    def nrowsinchunk(self):
+        """The number of rows that fits in a *table* chunk."""
+
+        return self.table.chunkshape[0]
+
+    def __init__(self, parentnode, name,
+                 atom=None, title="",
+                 optlevel=None,
+                 filters=None,
+                 expectedrows=0,
+                 byteorder=None,
+                 new=True):
+
+        self.optlevel = optlevel
+        """The optimization level for this index."""
+        self.expectedrows = expectedrows
+        """The expected number of rows in the indexed column."""
+        if byteorder in ["little", "big"]:
+            self.byteorder = byteorder
+        else:
+            self.byteorder = sys.byteorder
+        """The byteorder of the index datasets."""
+        if atom is not None:
+            self.dtype = atom.dtype.base
+            self.type = atom.type
+            """The datatype of the indexed values."""
+        self.nelements = None
+        """The number of currently indexed rows for this column."""
+
+        super(_RowIndex, self).__init__(parentnode, name, title, new,
+                                        filters)
+
+    def _g_post_init_hook(self):
+        super(_RowIndex, self)._g_post_init_hook()
+
+        if self._v_new:
+            self.nelements = 0
+            self._v_attrs.optlevel = self.optlevel
+            self._v_attrs.nelements = numpy.uint64(0)
+        else:
+            attrs = self._v_attrs
+            self.optlevel = int(attrs.optlevel)
+            self.nelements = long(attrs.nelements)
+
+    def _set_nelements(self, nelements):
+        self.nelements = nelements
+        self._v_attrs.nelements = numpy.uint64(nelements)
+
+    def optimize(self, verbose=False, progress=None):
+        """Optimize the index (nothing to do for this kind of index)."""
+
+        pass
+
+    def get_lookup_range(self, ops, limits):
+        """Get the item to be searched for the `ops` with `limits`."""
+
+        assert len(ops) in [1, 2]
+        assert len(ops) == len(limits)
+        return (tuple(ops), tuple(limits))
+
+    def _f_remove(self, recursive=False):
+        """Remove this index object."""
+
+        # Index removal is always recursive,
+        # no matter what `recursive` says.
+        super(_RowIndex, self)._f_remove(True)
+
+
+class BitmapIndex(_RowIndex):
+    """Represents a bitmap index of a column in a table.
+
+    A bitmap index keeps a bitmap for every distinct value in the column,
+    with one bit per row telling whether the row holds that value.  The
+    bitmaps are stored packed and compressed, so they are very small for
+    columns with a low number of distinct values (enumerated, boolean or
+    status columns), and the bitmaps of several columns can be combined
+    row by row to resolve compound conditions.
+
+    Bitmap indexes are created by passing ``kind='bitmap'`` to
+    :meth:`Column.create_index`.  They support the same conditions as the
+    other index kinds, but they can not be used for sorting.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    _c_classid = 'BITMAPINDEX'
+
+    kind = property(lambda self: 'bitmap', None, None,
+                    "The kind of this index (always 'bitmap').")
+
+    reduction = 1
+    """Bitmap indexes always give exact results."""
+
+    selected = None
+    """The positions of the values selected by the last search."""
+
+    def _g_post_init_hook(self):
+        super(BitmapIndex, self)._g_post_init_hook()
+
+        if not self._v_new:
+            self.dtype = self.values.atom.dtype
+            self.type = self.values.atom.type
+            self._distinct = self.values[:]
+            self._counts = self.counts[:]
+            return
+
+        # The index is new. Initialize the values
+        EArray(self, 'values', Atom.from_dtype(self.dtype), (0,),
+               "Distinct values", self.filters, byteorder=self.byteorder,
+               _log=False)
+        EArray(self, 'counts', Int64Atom(), (0,), "Rows with every value",
+               self.filters, _log=False)
+        self._distinct = numpy.empty(0, dtype=self.dtype)
+        self._counts = numpy.empty(0, dtype='int64')
+
+    def _get_bitmap(self, nvalue):
+        return self._f_get_child('bitmap%d' % nvalue)
+
+    def _add_values(self, values):
+        """Create the bitmaps for new distinct `values`."""
+
+        nbytes = (self.nelements + 7) // 8
+        blocksize = 2**20
+        for nvalue in xrange(len(self._distinct),
+                             len(self._distinct) + len(values)):
+            bitmap = EArray(self, 'bitmap%d' % nvalue, UIntAtom(itemsize=1),
+                            (0,), "Bitmap for value #%d" % nvalue,
+                            self.filters, self.expectedrows // 8 + 1,
+                            _log=False)
+            # The value was not in the rows already indexed
+            for start in xrange(0, nbytes, blocksize):
+                bitmap.append(numpy.zeros(min(blocksize, nbytes - start),
+                                          dtype='uint8'))
+        self.values.append(values)
+        self.counts.append(numpy.zeros(len(values), dtype='int64'))
+        nvalues = len(self._distinct) + len(values)
+        if len(self._distinct) <= bitmap_max_values < nvalues:
+            warnings.warn(
+                "the bitmap index of column ``%s`` has more than %d "
+                "distinct values; other index kinds are a better choice "
+                "for it" % (self.column.pathname, bitmap_max_values),
+                PerformanceWarning)
+        self._distinct = numpy.concatenate((self._distinct, values))
+        self._counts = numpy.concatenate(
+            (self._counts, numpy.zeros(len(values), dtype='int64')))
+
+    def append(self, arr):
+        """Add the values in `arr` as the next rows of the index."""
+
+        nrows = len(arr)
+        if nrows == 0:
+            return
+        distinct = numpy.unique(arr)
+        if distinct.dtype.kind == 'f':
+            # NaN values never satisfy a condition, so leave them out
+            distinct = distinct[~numpy.isnan(distinct)]
+        newvalues = distinct[~numpy.in1d(distinct, self._distinct)]
+        if len(newvalues) > 0:
+            self._add_values(newvalues)
+
+        # The bits of the last (partial) byte are kept in the bitmaps
+        offset = self.nelements % 8
+        for nvalue, value in enumerate(self._distinct):
+            bits = (arr == value)
+            self._counts[nvalue] += numpy.count_nonzero(bits)
+            bitmap = self._get_bitmap(nvalue)
+            if offset:
+                lastbyte = bitmap.nrows - 1
+                tail = numpy.unpackbits(bitmap[lastbyte:])[:offset]
+                packed = numpy.packbits(numpy.concatenate((tail, bits)))
+                bitmap[lastbyte] = packed[0]
+                packed = packed[1:]
+            else:
+                packed = numpy.packbits(bits)
+            if len(packed) > 0:
+                bitmap.append(packed)
+        if len(self._counts) > 0:
+            self.counts[:] = self._counts
+        self._set_nelements(self.nelements + nrows)
+
+    def update_rows(self, rows, oldvalues, newvalues):
+        """Move the bits of `rows` from their `oldvalues` to their
+        `newvalues`.
+
+        Bitmap indexes are always updated in place, so True is returned.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        # When a row is repeated, its last value is the one in the table
+        rows, last = numpy.unique(numpy.asarray(rows, dtype='int64')[::-1],
+                                  return_index=True)
+        oldvalues = numpy.asarray(oldvalues)[::-1][last]
+        newvalues = numpy.asarray(newvalues)[::-1][last]
+        distinct = numpy.unique(newvalues)
+        if distinct.dtype.kind == 'f':
+            distinct = distinct[~numpy.isnan(distinct)]
+        newdistinct = distinct[~numpy.in1d(distinct, self._distinct)]
+        if len(newdistinct) > 0:
+            self._add_values(newdistinct)
+
+        for nvalue, value in enumerate(self._distinct):
+            unset = (oldvalues == value)
+            bits = (newvalues == value)
+            changed = rows[unset | bits]
+            if len(changed) == 0:
+                continue
+            self._counts[nvalue] += (numpy.count_nonzero(bits) -
+                                     numpy.count_nonzero(unset))
+            # Only the bytes between the first and last rows are touched
+            first, stop = changed[0] // 8, changed[-1] // 8 + 1
+            bitmap = self._get_bitmap(nvalue)
+            packed = numpy.unpackbits(bitmap[first:stop])
+            packed[rows[unset] - first * 8] = 0
+            packed[rows[bits] - first * 8] = 1
+            bitmap[first:stop] = numpy.packbits(packed)
+        self.counts[:] = self._counts
+        return True
+
+    def search(self, item):
+        """Select the values matching `item` and count their rows."""
+
+        ops, limits = item
+        distinct = self._distinct
+        selected = numpy.ones(len(distinct), dtype='bool')
+        for op, limit in zip(ops, limits):
+            if op == 'lt':
+                selected &= distinct < limit
+            elif op == 'le':
+                selected &= distinct <= limit
+            elif op == 'gt':
+                selected &= distinct > limit
+            elif op == 'ge':
+                selected &= distinct >= limit
+            else:  # 'eq'
+                selected &= distinct == limit
+        self.selected = numpy.flatnonzero(selected)
+        return long(self._counts[self.selected].sum())
+
+    def read_bitmap(self, start, stop, selected=None):
+        """Get the rows in `start` to `stop` matching the last search.
+
+        A boolean array is returned.  If `selected` is given, it replaces
+        the positions of the values selected by the last search.  `start`
+        must be a multiple of 8.
+
+        """
+
+        assert start % 8 == 0, "start must be a multiple of 8"
+        if selected is None:
+            selected = self.selected
+        stop = min(stop, self.nelements)
+        if stop <= start:
+            return numpy.zeros(0, dtype='bool')
+        bytestart, bytestop = start // 8, (stop + 7) // 8
+        packed = numpy.zeros(bytestop - bytestart, dtype='uint8')
+        for nvalue in selected:
+            packed |= self._get_bitmap(nvalue)[bytestart:bytestop]
+        return numpy.unpackbits(packed)[:stop - start].view('bool')
+
+    def get_chunkmap(self):
+        """Compute a map with the interesting chunks in index."""
+
+        nrowsinchunk = self.nrowsinchunk
+        nelements = self.nelements
+        nchunks = long(math.ceil(float(nelements) / nrowsinchunk))
+        chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
+        if len(self.selected) == 0:
+            return chunkmap
+        # Blocks of rows made of whole bytes and whole chunks
+        blockrows = nrowsinchunk * 8 * max(2**17 // nrowsinchunk, 1)
+        for start in xrange(0, nelements, blockrows):
+            rows = self.read_bitmap(start, start + blockrows)
+            nblockchunks = -(-len(rows) // nrowsinchunk)
+            rows = numpy.concatenate(
+                (rows, numpy.zeros(nblockchunks * nrowsinchunk - len(rows),
+                                   dtype='bool')))
+            nchunk = start // nrowsinchunk
+            chunkmap[nchunk:nchunk + nblockchunks] = rows.reshape(
+                nblockchunks, nrowsinchunk).any(axis=1)
+        return chunkmap
+
+    def get_minmax(self):
+        """Return the minimum and maximum values in this index.
+
+        Only the distinct values of the index are read.  If there are NaN
+        values in the index, both values are NaN, as in ``numpy.min()``
+        and ``numpy.max()``.  If the index is empty, None is returned.
+
+        """
+
+        if self.nelements == 0:
+            return None
+        if self._counts.sum() < self.nelements:
+            # Some rows are not in any bitmap, so they must be NaN
+            nan = numpy.array(numpy.nan, dtype=self.dtype)[()]
+            return (nan, nan)
+        values = numpy.sort(self._distinct[self._counts > 0])
+        return (values[0], values[-1])
+
+    def _nvalues(self):
+        """Get the number of indexed values which are not NaN."""
+
+        return long(self._counts.sum())
+
+    def rank(self, value):
+        """Return the number of indexed values lower than `value`.
+
+        Only the distinct values of the index are read.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self.search((('lt',), (value,)))
+
+    def select(self, k):
+        """Return the `k`-th lowest value in this index (counting from 0).
+
+        NaN values are not counted, so `k` must be lower than the number
+        of indexed values that are not NaN.  Only the distinct values of
+        the index and their counts are read.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        values, counts = self.value_counts()
+        return values[numpy.searchsorted(numpy.cumsum(counts), k,
+                                         side='right')]
+
+    def value_counts(self):
+        """Return the distinct values in this index and their counts.
+
+        See :meth:`Index.value_counts`.  Only the distinct values of the
+        index and their counts are read.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        present = self._counts > 0
+        return _merge_counts([(self._distinct[present],
+                               self._counts[present])])
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        # The filters
+        filters = ""
+        if self.filters.complevel:
+            if self.filters.shuffle:
+                filters += ", shuffle"
+            filters += ", %s(%s)" % (self.filters.complib,
+                                     self.filters.complevel)
+        return "BitmapIndex(%d values%s)" % (len(self._distinct), filters)
+
+
+def _hash_values(values):
+    """Compute a 64-bit hash of the bytes of every item in `values`.
+
+    The hashes are computed column-wise, so the loop goes over the bytes
+    of the items rather than over the items themselves.
+
+    """
+
+    values = numpy.ascontiguousarray(values)
+    data = values.view('uint8').reshape(len(values), values.dtype.itemsize)
+    hashes = numpy.empty(len(values), dtype='uint64')
+    hashes.fill(numpy.uint64(14695981039346656037))
+    prime = numpy.uint64(1099511628211)
+    for nbyte in xrange(data.shape[1]):
+        hashes ^= data[:, nbyte]
+        hashes *= prime
+    return _mix_hashes(hashes)
+
+
+def _mix_hashes(hashes):
+    """Mix the bits of `hashes` in-place (64-bit finalizer of MurmurHash3)."""
+
+    shift = numpy.uint64(33)
+    hashes ^= hashes >> shift
+    hashes *= numpy.uint64(0xff51afd7ed558ccd)
+    hashes ^= hashes >> shift
+    hashes *= numpy.uint64(0xc4ceb9fe1a85ec53)
+    hashes ^= hashes >> shift
+    return hashes
+
+
+class BloomIndex(_RowIndex):
+    """Represents a Bloom filter index of a string column in a table.
+
+    A Bloom filter is kept for every chunk of the table, telling whether
+    a value *may* be in the chunk.  Queries with equality comparisons on
+    the column only read the chunks whose filter matches the value, so
+    looking up a key in a high-cardinality column (like an identifier)
+    reads a handful of chunks.  Bloom indexes are very cheap to build and
+    they are updated incrementally on appends, but they are of no help
+    for other comparisons nor for sorting.
+
+    Bloom indexes are created by passing ``kind='bloom'`` to
+    :meth:`Column.create_index`.  The optimization level sets the size of
+    the filters: it takes ``2 * optlevel + 4`` bits per row, which gives
+    less than a 0.1% of false positive chunks for the default level (6).
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    _c_classid = 'BLOOMINDEX'
+
+    kind = property(lambda self: 'bloom', None, None,
+                    "The kind of this index (always 'bloom').")
+
+    reduction = None
+    """Bloom indexes only find candidate chunks, so they are never exact."""
+
+    def _g_post_init_hook(self):
+        super(BloomIndex, self)._g_post_init_hook()
+
+        if not self._v_new:
+            self.nbits = int(self._v_attrs.nbits)
+            self.nhashes = int(self._v_attrs.nhashes)
+            return
+
+        # The index is new. Initialize the values
+        bitsperrow = 2 * self.optlevel + 4
+        nbits = -(-self.nrowsinchunk * bitsperrow // 8) * 8
+        self.nbits = self._v_attrs.nbits = nbits
+        """The number of bits in the filter of every chunk."""
+        self.nhashes = self._v_attrs.nhashes = max(
+            int(round(bitsperrow * math.log(2))), 1)
+        """The number of hash functions of the filters."""
+        EArray(self, 'bloom', UIntAtom(itemsize=1), (0, nbits // 8),
+               "Bloom filter of every chunk", self.filters,
+               self.expectedrows // self.nrowsinchunk + 1, _log=False)
+
+    def _get_positions(self, values):
+        """Get the bits set by every item in `values` (one row per item)."""
+
+        # Derive all the hash functions from a single hash per item
+        hashes = _hash_values(values)
+        seeds = (numpy.arange(self.nhashes, dtype='uint64') *
+                 numpy.uint64(0x9e3779b97f4a7c15))
+        hashes = _mix_hashes(hashes[:, numpy.newaxis] + seeds)
+        return (hashes % numpy.uint64(self.nbits)).astype('int64')
+
+    def append(self, arr):
+        """Add the values in `arr` as the next rows of the index."""
+
+        nrows = len(arr)
+        if nrows == 0:
+            return
+        nrowsinchunk = self.nrowsinchunk
+        bloom = self._f_get_child('bloom')
+        chunkids = numpy.arange(self.nelements, self.nelements + nrows,
+                                dtype='int64') // nrowsinchunk
+        first = chunkids[0]
+        nchunks = chunkids[-1] - first + 1
+        bits = numpy.zeros((nchunks, self.nbits), dtype='bool')
+        positions = self._get_positions(arr)
+        bits[(chunkids - first)[:, numpy.newaxis], positions] = True
+        packed = numpy.packbits(bits, axis=1)
+        if first < bloom.nrows:
+            # Add the values to the filter of the last (partial) chunk
+            packed[0] |= bloom[first]
+            bloom[first] = packed[0]
+            packed = packed[1:]
+        if len(packed) > 0:
+            bloom.append(packed)
+        self._set_nelements(self.nelements + nrows)
+
+    def update_rows(self, rows, oldvalues, newvalues):
+        """Add the `newvalues` of `rows` to the filters of their chunks.
+
+        The `oldvalues` can not be removed from the filters, so they only
+        give false positive chunks until the index is rebuilt.  Bloom
+        indexes are always updated in place, so True is returned.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        bloom = self._f_get_child('bloom')
+        chunkids = numpy.asarray(rows, dtype='int64') // self.nrowsinchunk
+        first, stop = chunkids.min(), chunkids.max() + 1
+        bits = numpy.unpackbits(bloom[first:stop], axis=1).astype('bool')
+        positions = self._get_positions(newvalues)
+        bits[(chunkids - first)[:, numpy.newaxis], positions] = True
+        bloom[first:stop] = numpy.packbits(bits, axis=1)
+        return True
+
+    def search(self, item):
+        """Find the chunks that may match `item`.
+
+        The number of rows in those chunks is returned, which is an
+        upper bound of the rows matching `item`.
+
+        """
+
+        ops, limits = item
+        bloom = self._f_get_child('bloom')
+        chunkmap = numpy.ones(bloom.nrows, dtype='bool')
+        if ops == ('eq',):
+            value = numpy.array(limits, dtype=self.column.dtype.base)
+            nbytes, nbits = divmod(self._get_positions(value)[0], 8)
+            masks = (128 >> nbits).astype('uint8')
+            # Read the filters a chunk of the dataset at a time, and test
+            # all the bits of the value at once
+            blocksize = bloom.chunkshape[0]
+            for start in xrange(0, bloom.nrows, blocksize):
+                block = bloom[start:start + blocksize]
+                chunkmap[start:start + blocksize] = (
+                    block[:, nbytes] & masks).all(axis=1)
+        self._chunkmap = chunkmap
+        nrows = chunkmap.sum() * self.nrowsinchunk
+        return long(min(nrows, self.nelements))
+
+    def get_chunkmap(self):
+        """Compute a map with the interesting chunks in index."""
+
+        return self._chunkmap
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        # The filters
+        filters = ""
+        if self.filters.complevel:
+            if self.filters.shuffle:
+                filters += ", shuffle"
+            filters += ", %s(%s)" % (self.filters.complib,
+                                     self.filters.complevel)
+        return "BloomIndex(%s%s)" % (self.optlevel, filters)
+
+
 class IndexesDescG(NotLoggedMixin, Group):
     _c_classid = 'DINDEX'
 
@@ -11,7 +11,7 @@
 #
 ########################################################################
 
-"""Here is defined the IndexArray class."""
+"""Here is defined the IndexArray class (and other index helpers)."""
 
 from bisect import bisect_left, bisect_right
 
@@ -44,6 +44,19 @@ class LastRowArray(NotLoggedMixin, CArray, indexesextension.LastRowArray):
     _c_classId = previous_api_property('_c_classid')
 
 
+class ZoneMapArray(NotLoggedMixin, EArray):
+    """Container for the minimum and maximum values of a table column in
+    every chunk of the table (a *zone map*).
+
+    Every row of this array holds the ``(min, max)`` pair for the chunk
+    with the same number in the table.
+
+    """
+
+    # Class identifier.
+    _c_classid = 'ZONEMAPARRAY'
+
+
 class IndexArray(NotLoggedMixin, EArray, indexesextension.IndexArray):
     """Represent the index (sorted or reverse index) dataset in HDF5 file.
 
@@ -177,6 +190,13 @@ class IndexArray(NotLoggedMixin, EArray, indexesextension.IndexArray):
 
     _searchBin = previous_api(_search_bin)
 
+    def _g_get_caches(self):
+        caches = self._get_num_caches()
+        if not caches and 'boundscache' in self.__dict__:
+            # The bounds cache for non-optimized search types
+            caches['bounds'] = self.boundscache
+        return caches
+
     def __str__(self):
         "A compact representation of this class"
         return "IndexArray(path=%s)" % self._v_pathname
@@ -20,11 +20,15 @@ Classes (type extensions):
 
 Functions:
 
+    get_chunkmap
+    expand_chunkmap
+
 Misc variables:
 
 """
 
 import numpy
+from timeit import default_timer
 
 from tables.exceptions import HDF5ExtError
 from hdf5extension cimport Array
@@ -132,45 +136,68 @@ def keysort(ndarray array1, ndarray array2):
   array1 can be of any type, except complex or string.  array2 may be made of
   elements on any size.
 
+  The GIL is released while sorting, so several arrays can be sorted at the
+  same time by different threads.
+
   """
 
   cdef npy_intp size
   cdef int elsize1, elsize2
+  cdef char *data1
+  cdef char *data2
+  cdef int ret
 
   size = array1.size
   elsize1 = array1.itemsize
   elsize2 = array2.itemsize
+  data1 = array1.data
+  data2 = array2.data
   if array1.dtype == "float64":
-    return keysort_f64(<npy_float64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f64(<npy_float64 *>data1, data2, size, elsize2)
   elif array1.dtype == "float32":
-    return keysort_f32(<npy_float32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f32(<npy_float32 *>data1, data2, size, elsize2)
   # elif array1.dtype == "float16": # raises an error if float16 is not defined
   elif array1.dtype.name == "float16":
-    return keysort_f16(<npy_float16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f16(<npy_float16 *>data1, data2, size, elsize2)
   elif array1.dtype.name == "float96":
-    return keysort_f96(<npy_float96 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f96(<npy_float96 *>data1, data2, size, elsize2)
   elif array1.dtype.name == "float128":
-    return keysort_f128(<npy_float128 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f128(<npy_float128 *>data1, data2, size, elsize2)
   elif array1.dtype == "int64":
-    return keysort_i64(<npy_int64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i64(<npy_int64 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint64":
-    return keysort_u64(<npy_uint64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u64(<npy_uint64 *>data1, data2, size, elsize2)
   elif array1.dtype == "int32":
-    return keysort_i32(<npy_int32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i32(<npy_int32 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint32":
-    return keysort_u32(<npy_uint32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u32(<npy_uint32 *>data1, data2, size, elsize2)
   elif array1.dtype == "int16":
-    return keysort_i16(<npy_int16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i16(<npy_int16 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint16":
-    return keysort_u16(<npy_uint16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u16(<npy_uint16 *>data1, data2, size, elsize2)
   elif array1.dtype == "int8":
-    return keysort_i8(<npy_int8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i8(<npy_int8 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint8":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype == "bool":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype.char == "S":
-    return keysort_S(array1.data, elsize1, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_S(data1, elsize1, data2, size, elsize2)
     # As it turns out, an indirect sort is always faster, and much faster on
     # new processors.  See
     # http://www.mail-archive.com/numpy-discussion@scipy.org/msg06639.html
@@ -184,6 +211,7 @@ def keysort(ndarray array1, ndarray array2):
     #return 0
   else:
     raise ValueError("This shouldn't happen!")
+  return ret
 
 
 # Classes
@@ -210,10 +238,16 @@ cdef class CacheArray(Array):
   cdef read_slice(self, hsize_t nrow, hsize_t start, hsize_t stop, void *rbuf):
     # "Read an slice of bounds."
 
+    cdef double tref
+
+    tref = default_timer()
     if (H5ARRAYOread_readBoundsSlice(
       self.dataset_id, self.mem_space_id, self.type_id,
       nrow, start, stop, rbuf) < 0):
       raise HDF5ExtError("Problems reading the bounds array data.")
+    self._count_read((stop - start) * self.atom.itemsize,
+                     self._chunks_spanned((nrow, start), (nrow + 1, stop)),
+                     tref)
     return
 
   def _g_close(self):
@@ -240,14 +274,19 @@ cdef class IndexArray(Array):
   def _read_index_slice(self, hsize_t irow, hsize_t start, hsize_t stop,
                       ndarray idx):
     cdef herr_t ret
+    cdef double tref
 
     # Do the physical read
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYOread_readSlice(self.dataset_id, self.type_id,
                                      irow, start, stop, idx.data)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the index indices.")
+    self._count_read((stop - start) * idx.itemsize,
+                     self._chunks_spanned((irow, start), (irow + 1, stop)),
+                     tref)
 
   _readIndexSlice = previous_api(_read_index_slice)
 
@@ -299,7 +338,8 @@ cdef class IndexArray(Array):
       rowsize = (self.bounds_ext._v_chunkshape[1] * dtype.itemsize)
       maxslots = params['BOUNDS_MAX_SIZE'] / rowsize
       self.boundscache = <NumCache>NumCache(
-        (maxslots, self.nbounds), dtype, 'non-opt types bounds')
+        (maxslots, self.nbounds), dtype, 'non-opt types bounds',
+        self._v_file._cache_budget)
       self.bufferbc = numpy.empty(dtype=dtype, shape=self.nbounds)
       # Get the pointer for the internal buffer for 2nd level cache
       self.rbufbc = self.bufferbc.data
@@ -307,15 +347,56 @@ cdef class IndexArray(Array):
       rowsize = (self.chunksize*dtype.itemsize)
       maxslots = params['SORTED_MAX_SIZE'] / (self.chunksize*dtype.itemsize)
       self.sortedcache = <NumCache>NumCache(
-        (maxslots, self.chunksize), dtype, 'sorted')
+        (maxslots, self.chunksize), dtype, 'sorted',
+        self._v_file._cache_budget)
 
 
   _initSortedSlice = previous_api(_init_sorted_slice)
 
+  def _get_cache_items(self):
+    """Get the entries in the caches of bounds and sorted values.
+
+    A ``(bounds, sorted)`` tuple of lists is returned (see
+    `NumCache.items()`).  These caches only exist for optimized search
+    types.
+
+    """
+
+    if self.boundscache is None:
+      return ([], [])
+    return (self.boundscache.items(), self.sortedcache.items())
+
+  def _get_num_caches(self):
+    """Get the caches of bounds and sorted values for optimized search
+    types, in a dictionary keyed by kind."""
+
+    if self.boundscache is None:
+      return {}
+    return {'bounds': self.boundscache, 'sorted': self.sortedcache}
+
+  def _caches_evicted(self):
+    """Tell whether the cache budget has evicted the caches of bounds and
+    sorted values."""
+
+    if self.boundscache is None:
+      return False
+    return self.boundscache.evicted or self.sortedcache.evicted
+
+  def _load_cache_items(self, bounds, sorted):
+    """Put the entries got by `_get_cache_items()` back in the caches."""
+
+    if self.boundscache is None:
+      return
+    self.boundscache.load(bounds)
+    self.sortedcache.load(sorted)
+
   cdef void *_g_read_sorted_slice(self, hsize_t irow, hsize_t start,
                                 hsize_t stop):
     """Read the sorted part of an index."""
 
+    cdef double tref
+
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYOread_readSortedSlice(
           self.dataset_id, self.mem_space_id, self.type_id,
@@ -323,6 +404,9 @@ cdef class IndexArray(Array):
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the array data.")
+    self._count_read((stop - start) * self.bufferlb.itemsize,
+                     self._chunks_spanned((irow, start), (irow + 1, stop)),
+                     tref)
 
     return self.rbuflb
 
@@ -948,9 +1032,10 @@ cdef class IndexArray(Array):
       bread = 0
       nchunk = -1
 
-      # Look if item1 is in this row
+      # Look if item1 is in this row (NaNs are sorted last, so a NaN
+      # maximum is greater than any item)
       if item1 > rbufrv[rvrow]:
-        if item1 <= rbufrv[rvrow+1]:
+        if item1 <= rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           # Get the bounds row from the LRU cache or read them.
           rbufbc = <npy_float16 *>self.get_lru_bounds(nrow, nbounds)
           bread = 1
@@ -964,7 +1049,7 @@ cdef class IndexArray(Array):
         start = 0
       # Now, for item2
       if item2 >= rbufrv[rvrow]:
-        if item2 < rbufrv[rvrow+1]:
+        if item2 < rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           if not bread:
             # Get the bounds row from the LRU cache or read them.
             rbufbc = <npy_float16 *>self.get_lru_bounds(nrow, nbounds)
@@ -1011,9 +1096,10 @@ cdef class IndexArray(Array):
       rvrow = nrow*2
       bread = 0
       nchunk = -1
-      # Look if item1 is in this row
+      # Look if item1 is in this row (NaNs are sorted last, so a NaN
+      # maximum is greater than any item)
       if item1 > rbufrv[rvrow]:
-        if item1 <= rbufrv[rvrow+1]:
+        if item1 <= rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           # Get the bounds row from the LRU cache or read them.
           rbufbc = <npy_float32 *>self.get_lru_bounds(nrow, nbounds)
           bread = 1
@@ -1027,7 +1113,7 @@ cdef class IndexArray(Array):
         start = 0
       # Now, for item2
       if item2 >= rbufrv[rvrow]:
-        if item2 < rbufrv[rvrow+1]:
+        if item2 < rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           if not bread:
             # Get the bounds row from the LRU cache or read them.
             rbufbc = <npy_float32 *>self.get_lru_bounds(nrow, nbounds)
@@ -1076,9 +1162,10 @@ cdef class IndexArray(Array):
       bread = 0
       nchunk = -1
 
-      # Look if item1 is in this row
+      # Look if item1 is in this row (NaNs are sorted last, so a NaN
+      # maximum is greater than any item)
       if item1 > rbufrv[rvrow]:
-        if item1 <= rbufrv[rvrow+1]:
+        if item1 <= rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           # Get the bounds row from the LRU cache or read them.
           rbufbc = <npy_float64 *>self.get_lru_bounds(nrow, nbounds)
           bread = 1
@@ -1092,7 +1179,7 @@ cdef class IndexArray(Array):
         start = 0
       # Now, for item2
       if item2 >= rbufrv[rvrow]:
-        if item2 < rbufrv[rvrow+1]:
+        if item2 < rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           if not bread:
             # Get the bounds row from the LRU cache or read them.
             rbufbc = <npy_float64 *>self.get_lru_bounds(nrow, nbounds)
@@ -1141,9 +1228,10 @@ cdef class IndexArray(Array):
       bread = 0
       nchunk = -1
 
-      # Look if item1 is in this row
+      # Look if item1 is in this row (NaNs are sorted last, so a NaN
+      # maximum is greater than any item)
       if item1 > rbufrv[rvrow]:
-        if item1 <= rbufrv[rvrow+1]:
+        if item1 <= rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           # Get the bounds row from the LRU cache or read them.
           rbufbc = <npy_longdouble *>self.get_lru_bounds(nrow, nbounds)
           bread = 1
@@ -1157,7 +1245,7 @@ cdef class IndexArray(Array):
         start = 0
       # Now, for item2
       if item2 >= rbufrv[rvrow]:
-        if item2 < rbufrv[rvrow+1]:
+        if item2 < rbufrv[rvrow+1] or rbufrv[rvrow+1] != rbufrv[rvrow+1]:
           if not bread:
             # Get the bounds row from the LRU cache or read them.
             rbufbc = <npy_longdouble *>self.get_lru_bounds(nrow, nbounds)
@@ -1193,12 +1281,17 @@ cdef class LastRowArray(Array):
   def _read_index_slice(self, hsize_t start, hsize_t stop, ndarray idx):
     """Read the reverse index part of an LR index."""
 
+    cdef double tref
+
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYOreadSliceLR(self.dataset_id, self.type_id,
                                   start, stop, idx.data)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the index data in Last Row.")
+    self._count_read((stop - start) * idx.itemsize,
+                     self._chunks_in_rows(0, start, stop, 1), tref)
 
   _readIndexSlice = previous_api(_read_index_slice)
 
@@ -1206,19 +1299,129 @@ cdef class LastRowArray(Array):
     """Read the sorted part of an LR index."""
 
     cdef void  *rbuflb
+    cdef double tref
 
     rbuflb = sorted.rbuflb  # direct access to rbuflb: very fast.
+    tref = default_timer()
     with nogil:
         ret = H5ARRAYOreadSliceLR(self.dataset_id, self.type_id,
                                   start, stop, rbuflb)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading the index data.")
+    self._count_read((stop - start) * sorted.bufferlb.itemsize,
+                     self._chunks_in_rows(0, start, stop, 1), tref)
     return sorted.bufferlb[:stop-start]
 
   _readSortedSlice = previous_api(_read_sorted_slice)
 
 
+def get_chunkmap(IndexArray indices, LastRowArray indicesLR,
+                 ndarray starts, ndarray stops, ndarray chunkmap,
+                 long nslices, int indsize, long lbucket, long slicesize,
+                 long nslicesblock, double bucketsinblock):
+  """Mark the buckets with selected rows of an index in `chunkmap`.
+
+  `starts` and `stops` are int64 arrays with the range of selected
+  indices in every row of the index (the rows after `nslices` are read
+  from `indicesLR`).  All the slices are read in a single buffer.
+
+  """
+
+  cdef long nrow, nrows, i, n, maxlen, offset, nchunk, nchunks
+  cdef npy_int64 *rbufst
+  cdef npy_int64 *rbufsp
+  cdef npy_uint8 *rbufcm
+  cdef npy_uint8 *idx8
+  cdef npy_uint16 *idx16
+  cdef npy_uint32 *idx32
+  cdef npy_uint64 *idx64
+  cdef void *rbuf
+  cdef ndarray buf
+  cdef herr_t ret
+
+  nrows = starts.shape[0]
+  rbufst = <npy_int64 *>starts.data
+  rbufsp = <npy_int64 *>stops.data
+  rbufcm = <npy_uint8 *>chunkmap.data
+  nchunks = chunkmap.shape[0]
+  maxlen = 0
+  for nrow in range(nrows):
+    if rbufsp[nrow] - rbufst[nrow] > maxlen:
+      maxlen = rbufsp[nrow] - rbufst[nrow]
+  if maxlen == 0:
+    return
+  buf = numpy.empty(shape=maxlen, dtype='u%d' % indsize)
+  rbuf = buf.data
+  idx8 = <npy_uint8 *>rbuf
+  idx16 = <npy_uint16 *>rbuf
+  idx32 = <npy_uint32 *>rbuf
+  idx64 = <npy_uint64 *>rbuf
+  for nrow in range(nrows):
+    n = rbufsp[nrow] - rbufst[nrow]
+    if n <= 0:
+      continue
+    with nogil:
+      if nrow < nslices:
+        ret = H5ARRAYOread_readSlice(indices.dataset_id, indices.type_id,
+                                     nrow, rbufst[nrow], rbufsp[nrow], rbuf)
+      else:
+        ret = H5ARRAYOreadSliceLR(indicesLR.dataset_id, indicesLR.type_id,
+                                  rbufst[nrow], rbufsp[nrow], rbuf)
+    if ret < 0:
+      raise HDF5ExtError("Problems reading the index indices.")
+    with nogil:
+      if indsize == 8:
+        for i in range(n):
+          nchunk = idx64[i] // lbucket
+          if nchunk < nchunks:
+            rbufcm[nchunk] = 1
+      elif indsize == 4:
+        for i in range(n):
+          nchunk = idx32[i]
+          if nchunk < nchunks:
+            rbufcm[nchunk] = 1
+      elif indsize == 2:
+        offset = <long>((nrow // nslicesblock) * bucketsinblock)
+        for i in range(n):
+          nchunk = idx16[i] + offset
+          if nchunk < nchunks:
+            rbufcm[nchunk] = 1
+      else:
+        offset = (nrow * slicesize) // lbucket
+        for i in range(n):
+          nchunk = idx8[i] + offset
+          if nchunk < nchunks:
+            rbufcm[nchunk] = 1
+
+
+def expand_chunkmap(ndarray chunkmap, ndarray tchunkmap,
+                    long lbucket, long nrowsinchunk):
+  """Mark in `tchunkmap` the chunks overlapping the buckets in `chunkmap`.
+
+  Every element of `chunkmap` stands for `lbucket` rows, and every
+  element of `tchunkmap` for `nrowsinchunk` rows.
+
+  """
+
+  cdef long nchunk, tnchunks, i, start, stop
+  cdef npy_uint8 *rbufcm
+  cdef npy_uint8 *rbuftcm
+
+  rbufcm = <npy_uint8 *>chunkmap.data
+  rbuftcm = <npy_uint8 *>tchunkmap.data
+  tnchunks = tchunkmap.shape[0]
+  with nogil:
+    for nchunk in range(chunkmap.shape[0]):
+      if rbufcm[nchunk]:
+        start = (nchunk * lbucket) // nrowsinchunk
+        stop = ((nchunk + 1) * lbucket + nrowsinchunk - 1) // nrowsinchunk
+        if stop > tnchunks:
+          stop = tnchunks
+        for i in range(start, stop):
+          rbuftcm[i] = 1
+
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 2
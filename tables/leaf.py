@@ -14,6 +14,7 @@
 
 import warnings
 import math
+import weakref
 
 import numpy
 
@@ -21,7 +22,7 @@ from tables.flavor import (check_flavor, internal_flavor,
                            alias_map as flavor_alias_map)
 from tables.node import Node
 from tables.filters import Filters
-from tables.utils import byteorders, lazyattr, SizeType
+from tables.utils import byteorders, lazyattr, SizeType, map_in_threads
 from tables.exceptions import PerformanceWarning
 from tables import utilsextension
 from tables._past import previous_api
@@ -242,6 +243,8 @@ class Leaf(Node):
         """
         self._flavor = None
         """Private storage for the `flavor` property."""
+        self._prefetchers = weakref.WeakSet()
+        """The read-ahead iterators working on this leaf."""
 
         if new:
             # Get filter properties from parent group if not given.
@@ -574,6 +577,46 @@ very small/large chunksize, you may want to increase/decrease it."""
 
     _pointSelection = previous_api(_point_selection)
 
+    def _g_prefetch(self, func, argsiter, nbuffers):
+        """Map `func` over `argsiter` in a background thread.
+
+        This is used for reading ahead the buffers of row iterators:
+        the results are yielded in order, and up to `nbuffers` of them
+        are computed in advance while the last one yielded is being
+        processed.  The iterator is closed (and its thread stopped) when
+        the leaf is closed.
+
+        As the background thread accesses the file, None is returned
+        (and the buffers should be read on demand) if the HDF5 library
+        is not thread-safe.
+
+        """
+
+        if not utilsextension.is_hdf5_threadsafe():
+            warnings.warn("the HDF5 library is not thread-safe; "
+                          "buffers will not be read ahead",
+                          PerformanceWarning)
+            return None
+        prefetcher = map_in_threads(func, argsiter, 1, nbuffers + 1)
+        self._prefetchers.add(prefetcher)
+        return prefetcher
+
+    def _g_stop_prefetchers(self):
+        """Stop the read-ahead iterators working on this leaf."""
+
+        for prefetcher in list(self._prefetchers):
+            prefetcher.close()
+
+    def _g_mmap_dtype(self):
+        """Get the dtype of the data of the leaf as stored on disk.
+
+        None is returned if the data cannot be memory-mapped because it
+        is stored differently than in memory.
+
+        """
+
+        return None
+
     # Public methods
     # ~~~~~~~~~~~~~~
     # Tree manipulation
@@ -724,6 +767,109 @@ very small/large chunksize, you may want to increase/decrease it."""
 
     # Data handling
     # `````````````
+    def _g_get_stats(self, reset=False):
+        stats = super(Leaf, self)._g_get_stats(reset)
+        nreads, nchunks, nbytes, readtime = self._g_read_stats()
+        chunkbytes = 0
+        if nchunks > 0:
+            # Ask the dataset itself instead of using the lazy ``filters``
+            # and ``dtype`` attributes: the former needs the parent, which
+            # may be already closed while closing the file, and the latter
+            # is not defined for every kind of leaf
+            filters_dict = utilsextension.get_filters(self._v_objectid, '.')
+            if set(filters_dict or ()).difference(['shuffle', 'fletcher32']):
+                chunkbytes = (int(numpy.prod(self.chunkshape)) *
+                              self._get_disk_itemsize())
+        stats.update({'reads': nreads, 'chunks_read': nchunks,
+                      'bytes_read': nbytes,
+                      'bytes_decompressed': nchunks * chunkbytes,
+                      'read_time': readtime})
+        if reset:
+            self._g_reset_read_stats()
+        return stats
+
+    def as_mmap(self):
+        """Get a read-only memory map of the data in this leaf.
+
+        A ``numpy.memmap`` instance with the shape and the datatype of
+        the leaf is returned, so that the data is not read (nor copied)
+        in advance: the operating system loads the pages of the file as
+        they are accessed, and it shares them among the processes
+        mapping the same file.  The byteorder of the data is the one on
+        disk.
+
+        This is only possible for leaves of the :class:`Array` and
+        :class:`Table` classes whose data is stored contiguously (i.e.
+        not chunked), without filters and in a regular file (see the
+        ``DRIVER`` parameter), and with datatypes having the same layout
+        on disk as in memory (columns and atoms of ``time64`` type are
+        not supported, for example).  Otherwise, a ValueError is raised.
+
+        Please note that the map is not updated if the leaf is resized,
+        and that it should not be used after the leaf has been removed.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        driver = self._v_file.params['DRIVER']
+        if driver not in (None, 'H5FD_SEC2', 'H5FD_STDIO', 'H5FD_WINDOWS'):
+            raise ValueError("leaf ``%s`` cannot be memory-mapped with the "
+                             "``%s`` driver" % (self._v_pathname, driver))
+        dtype = self._g_mmap_dtype()
+        if dtype is None:
+            raise ValueError("leaf ``%s`` cannot be memory-mapped because "
+                             "of its datatype" % self._v_pathname)
+        if self.byteorder == 'little':
+            dtype = dtype.newbyteorder('<')
+        elif self.byteorder == 'big':
+            dtype = dtype.newbyteorder('>')
+        if self._v_file.mode != 'r':
+            # Make sure that the data is in the file
+            self.flush()
+        offset = self._get_contiguous_offset(dtype)
+        if offset is None:
+            raise ValueError("leaf ``%s`` cannot be memory-mapped because "
+                             "its data is not stored contiguously and "
+                             "without filters (or it is empty)"
+                             % self._v_pathname)
+        return numpy.memmap(self._v_file.filename, dtype=dtype, mode='r',
+                            offset=offset, shape=self.shape)
+
+    def get_stats(self, reset=False):
+        """Get the statistics of the reads and caches of this leaf.
+
+        A dictionary is returned with these entries, counted since the
+        leaf was opened (or since the last reset):
+
+        * ``reads``: the number of reads from HDF5.
+        * ``chunks_read``: the number of chunks spanned by those reads.
+          Chunks found in the HDF5 chunk cache are counted too.
+        * ``bytes_read``: the number of bytes got by the reads.
+        * ``bytes_decompressed``: for compressed leaves, the number of
+          bytes in the chunks read (each chunk is decompressed as a
+          whole), otherwise 0.
+        * ``read_time``: the time (in seconds) spent in the reads.
+        * ``caches``: a dictionary with the statistics of every cache
+          kept by PyTables for the leaf (like ``'chunks'``, ``'iterseq'``
+          and ``'query'`` for tables, see the ``TABLE_MAX_SIZE``,
+          ``ITERSEQ_MAX_SIZE`` and ``QUERY_CACHE_MAX_SIZE`` parameters).
+          These are dictionaries with the ``hits``, ``misses`` and
+          ``evictions`` of the cache, the number of times that it has
+          been automatically disabled (``disables``) and enabled again
+          (``enables``) because of its hit ratio, whether it is
+          ``disabled`` now, and its ``size`` in bytes.
+
+        The counters are always on, and they are set to zero after being
+        returned if *reset* is true.  See also :meth:`File.get_stats`.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._g_get_stats(reset)
+
     def flush(self):
         """Flush pending data to disk.
 
@@ -748,6 +894,9 @@ very small/large chunksize, you may want to increase/decrease it."""
         if not self._v_isopen:
             return  # the node is already closed or not initialized
 
+        # No more reads from other threads
+        self._g_stop_prefetchers()
+
         # Only do a flush in case the leaf has an IO buffer.  The
         # internal buffers of HDF5 will be flushed afterwards during the
         # self._g_close() call.  Avoiding an unnecessary flush()
@@ -755,6 +904,9 @@ very small/large chunksize, you may want to increase/decrease it."""
         if flush and hasattr(self, "_v_iobuf"):
             self.flush()
 
+        # Keep the statistics of the leaf in its file
+        self._v_file._g_keep_stats(self)
+
         # Close the dataset and release resources
         self._g_close()
 
@@ -23,8 +23,27 @@ cdef class NodeCache:
   cdef object cpop(self, object path)
 
 
+cdef class BaseCache
+
+
+# Memory budget shared by several caches
+cdef class CacheBudget:
+  cdef readonly long long maxsize
+  cdef long long clock
+  cdef object caches
+  cdef long long tick(self)
+  cdef int reserve(self, BaseCache cache, long long nbytes)
+  cdef release(self, BaseCache cache, long long nbytes)
+
+
 # Base class for other caches
 cdef class BaseCache:
+  cdef object __weakref__
+  cdef CacheBudget budget
+  cdef readonly long long budgetsize
+  cdef long long lastused
+  cdef readonly int evicted
+  cdef long long nhits, nlookups, nevictions, ndisables, nenables
   cdef int iscachedisabled, incsetcount
   cdef long setcount, getcount, containscount
   cdef long disablecyclecount, disableeverycycles
@@ -38,6 +57,9 @@ cdef class BaseCache:
   cdef int checkhitratio(self)
   cdef int couldenablecache_(self)
   cdef long incseqn(self)
+  cdef touch_(self)
+  cdef int evict_(self)
+  cdef long long nbytes_(self)
 
 
 #  Helper class for ObjectCache
@@ -55,7 +77,8 @@ cdef class ObjectCache(BaseCache):
   cdef ObjectNode mrunode
   cdef removeslot_(self, long nslot)
   cdef clearcache_(self)
-  cdef updateslot_(self, long nslot, long size, object key, object value)
+  cdef long updateslot_(self, long nslot, long size, object key,
+                        object value)
   cdef long setitem_(self, object key, object value, long size)
   cdef long getslot_(self, object key)
   cdef object getitem_(self, long nslot)
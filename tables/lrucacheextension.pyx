@@ -17,6 +17,7 @@ Classes (type extensions):
     NodeCache
     ObjectCache
     NumCache
+    CacheBudget
 
 Functions:
 
@@ -28,6 +29,7 @@ cdef extern from "Python.h":
     int PyUnicode_Compare(object, object)
 
 import sys
+import weakref
 
 import numpy
 from libc.string cimport memcpy, strcmp
@@ -188,7 +190,7 @@ cdef class NodeCache:
 cdef class BaseCache:
   """Base class that implements automatic probing/disabling of the cache."""
 
-  def __init__(self, long nslots, object name):
+  def __init__(self, long nslots, object name, CacheBudget budget=None):
 
     if nslots < 0:
       raise ValueError("Negative number (%s) of slots!" % nslots)
@@ -206,6 +208,13 @@ cdef class BaseCache:
     # The array for keeping the access times (using long ints here)
     self.atimes = <ndarray>numpy.zeros(shape=nslots, dtype=numpy.int_)
     self.ratimes = <long *>self.atimes.data
+    # The memory budget shared with other caches (if any)
+    self.budget = budget
+    self.budgetsize = 0
+    self.lastused = 0
+    self.evicted = False
+    if budget is not None:
+      budget.caches.add(self)
 
   def __len__(self):
     return self.nslots
@@ -237,12 +246,15 @@ cdef class BaseCache:
         if hitratio < self.lowesthr:
           # Hit ratio is low. Disable the cache.
           self.iscachedisabled = True
+          self.ndisables = self.ndisables + 1
         else:
           # Hit ratio is acceptable. (Re-)Enable the cache.
           self.iscachedisabled = False
         self.disablecyclecount = 0
       if self.enablecyclecount >= self.enableeverycycles:
         # We have reached the time for forcing the cache to act again
+        if self.iscachedisabled:
+          self.nenables = self.nenables + 1
         self.iscachedisabled = False
         self.enablecyclecount = 0
     return not self.iscachedisabled
@@ -281,11 +293,129 @@ cdef class BaseCache:
       self.seqn_ = 1
     return self.seqn_
 
+  # Record the use of this cache in its budget (if any)
+  cdef touch_(self):
+    if self.budget is not None:
+      self.lastused = self.budget.tick()
+
+  # Free some memory for the budget. Return false if nothing could be freed.
+  cdef int evict_(self):
+    return False
+
+  # The memory (in bytes) taken by the data in cache
+  cdef long long nbytes_(self):
+    return 0
+
+  def get_stats(self):
+    """Return a dictionary with the statistics of this cache.
+
+    The counters are kept since the cache was created or since the last
+    call to `reset_stats()`: ``hits`` and ``misses`` of lookups,
+    ``evictions`` of entries (to make room for others, or because the
+    cache was disabled or evicted by its budget), and ``disables`` and
+    ``enables`` for the automatic disabling of the cache when its hit
+    ratio is too low.  Besides, ``disabled`` tells whether the cache is
+    disabled now, and ``size`` the memory (in bytes) that it takes.
+
+    """
+
+    return {'hits': self.nhits, 'misses': self.nlookups - self.nhits,
+            'evictions': self.nevictions, 'disables': self.ndisables,
+            'enables': self.nenables, 'disabled': bool(self.iscachedisabled),
+            'size': self.nbytes_()}
+
+  def reset_stats(self):
+    """Set the counters of `get_stats()` to zero."""
+
+    self.nhits = 0;  self.nlookups = 0;  self.nevictions = 0
+    self.ndisables = 0;  self.nenables = 0
+
   def __repr__(self):
     return "<%s(%s) (%d elements)>" % (self.name, str(self.__class__),
                                        self.nslots)
 
 
+########################################################################
+#  Memory budget shared by several caches
+########################################################################
+
+cdef class CacheBudget:
+  """Memory budget shared by the ObjectCache and NumCache instances that
+  are created with it.
+
+  Caches charge the memory that they take to the budget, and when one
+  of them needs more memory than what is left, the least recently used
+  caches free some of theirs: ObjectCache instances drop their least
+  recently used object, and NumCache instances release all their data
+  (they are disabled from then on, see the `evicted` attribute of
+  caches).  As NumCache instances allocate all their memory when they
+  are created, they are limited to a quarter of the budget.  Caches are
+  only weakly referenced by the budget, and the memory charged by a
+  cache is returned when it is collected.
+
+  """
+
+  def __init__(self, long long maxsize):
+    """Maximum size in bytes of all the caches together."""
+
+    if maxsize < 0:
+      raise ValueError("Negative size (%s) for cache budget!" % maxsize)
+    self.maxsize = maxsize
+    self.clock = 0
+    self.caches = weakref.WeakSet()
+
+  property size:
+    "The memory (in bytes) charged by the caches in this budget."
+    def __get__(self):
+      cdef BaseCache cache
+      cdef long long size = 0
+      for cache in list(self.caches):
+        size = size + cache.budgetsize
+      return size
+
+  def __len__(self):
+    return len(self.caches)
+
+  # Return the next value of the clock for access times of caches
+  cdef long long tick(self):
+    self.clock = self.clock + 1
+    return self.clock
+
+  # Charge `nbytes` to `cache`, making room for them by evicting the
+  # least recently used of the other caches. Return false if there is
+  # no room in spite of that.
+  cdef int reserve(self, BaseCache cache, long long nbytes):
+    cdef BaseCache other, victim
+    cdef long long size
+
+    if nbytes > self.maxsize:
+      return False
+    while True:
+      size = 0
+      victim = None
+      for other in list(self.caches):
+        size = size + other.budgetsize
+        if (other is not cache and other.budgetsize > 0 and
+            (victim is None or other.lastused < victim.lastused)):
+          victim = other
+      if size + nbytes <= self.maxsize:
+        break
+      if victim is None or not victim.evict_():
+        return False
+    cache.budgetsize = cache.budgetsize + nbytes
+    cache.touch_()
+    return True
+
+  # Give back `nbytes` charged to `cache`
+  cdef release(self, BaseCache cache, long long nbytes):
+    cache.budgetsize = cache.budgetsize - nbytes
+
+  def __repr__(self):
+    return "<%s (%d caches, %.3f KB used of %.3f KB)>" % (
+      str(self.__class__), len(self.caches), self.size / 1024.,
+      self.maxsize / 1024.)
+
+
 ########################################################################
 #  Helper class for ObjectCache
 ########################################################################
@@ -312,7 +442,8 @@ cdef class ObjectNode:
 cdef class ObjectCache(BaseCache):
   """Least-Recently-Used (LRU) cache specific for python objects."""
 
-  def __init__(self, long nslots, long maxcachesize, object name):
+  def __init__(self, long nslots, long maxcachesize, object name,
+               CacheBudget budget=None):
     """Maximum size of the cache.
 
     If more than 'nslots' elements are added to the cache,
@@ -321,10 +452,11 @@ cdef class ObjectCache(BaseCache):
     Parameters:
     nslots - The number of slots in cache
     name - A descriptive name for this cache
+    budget - The CacheBudget that the memory of this cache is charged to
 
     """
 
-    super(ObjectCache, self).__init__(nslots, name)
+    super(ObjectCache, self).__init__(nslots, name, budget)
     self.cachesize = 0
     self.maxcachesize = maxcachesize
     # maxobjsize will be the same as the maximum cache size
@@ -338,6 +470,9 @@ cdef class ObjectCache(BaseCache):
 
   # Clear cache
   cdef clearcache_(self):
+    if self.budget is not None:
+      self.budget.release(self, self.budgetsize)
+    self.nevictions = self.nevictions + len(self.__dict)
     self.__list = [None]*self.nslots
     self.__dict = {}
     self.mrunode = <ObjectNode>None
@@ -352,17 +487,21 @@ cdef class ObjectCache(BaseCache):
     assert nslot < self.nslots, "Attempting to remove beyond cache capacity."
     node = self.__list[nslot]
     if node is not None:
+      self.nevictions = self.nevictions + 1
       self.__list[nslot] = None
       del self.__dict[node.key]
       self.cachesize = self.cachesize - self.rsizes[nslot]
+      if self.budget is not None:
+        self.budget.release(self, self.rsizes[nslot])
       self.rsizes[nslot] = 0
       if self.mrunode and self.mrunode.nslot == nslot:
         self.mrunode = <ObjectNode>None
     # The next slot to be updated will be this one
     self.nextslot = nslot
 
-  # Update a slot
-  cdef updateslot_(self, long nslot, long size, object key, object value):
+  # Update a slot. Return -1 if the budget has no room for the object.
+  cdef long updateslot_(self, long nslot, long size, object key,
+                        object value):
     cdef ObjectNode node, oldnode
     cdef long nslot1, nslot2
     cdef object lruidx
@@ -377,6 +516,13 @@ cdef class ObjectCache(BaseCache):
       nslot1 = self.atimes[largidx].argmin()
       nslot2 = largidx[nslot1]
       self.removeslot_(nslot2)
+    if self.budget is not None:
+      # Make room in the budget, evicting objects in this cache if
+      # evicting the ones in other caches is not enough
+      while not self.budget.reserve(self, size):
+        if not self.evict_():
+          self.nextslot = nslot
+          return -1
     # Insert the new one
     node = ObjectNode(key, value, nslot)
     self.ratimes[nslot] = self.incseqn()
@@ -387,6 +533,15 @@ cdef class ObjectCache(BaseCache):
     self.cachesize = self.cachesize + size
     # The next slot to update will be the LRU
     self.nextslot = self.atimes.argmin()
+    return nslot
+
+  # Remove all the objects in cache (for Python calls)
+  def clear(self):
+    self.clearcache_()
+
+  # Remove the object in a slot (for Python calls)
+  def removeslot(self, long nslot):
+    self.removeslot_(nslot)
 
   # Put the object to the data in cache (for Python calls)
   def setitem(self, object key, object value, object size):
@@ -407,9 +562,10 @@ cdef class ObjectCache(BaseCache):
       self.incsetcount = False
     if size > self.maxobjsize:  # Check if the object is too large
       return -1
+    if self.budget is not None and size > self.budget.maxsize:
+      return -1
     if self.checkhitratio():
-      nslot = self.nextslot
-      self.updateslot_(nslot, size, key, value)
+      nslot = self.updateslot_(self.nextslot, size, key, value)
     else:
       # Empty the cache because it is not effective and it is taking space
       self.clearcache_()
@@ -430,6 +586,7 @@ cdef class ObjectCache(BaseCache):
     if self.nslots == 0:   # The cache has been set to empty
       return -1
     self.containscount = self.containscount + 1
+    self.nlookups = self.nlookups + 1
     # Give a chance to the MRU node
     node = self.mrunode
     if node and node.key == key:
@@ -449,11 +606,61 @@ cdef class ObjectCache(BaseCache):
     cdef ObjectNode node
 
     self.getcount = self.getcount + 1
+    self.nhits = self.nhits + 1
     node = self.__list[nslot]
     self.ratimes[nslot] = self.incseqn()
     self.mrunode = node
+    self.touch_()
     return node.obj
 
+  cdef long long nbytes_(self):
+    return self.cachesize
+
+  # Remove the least recently used object
+  cdef int evict_(self):
+    cdef ObjectNode node
+    cdef long nslot = -1
+
+    for node in self.__list:
+      if node is not None and (nslot < 0 or
+                               self.ratimes[node.nslot] < self.ratimes[nslot]):
+        nslot = node.nslot
+    if nslot < 0:
+      return False
+    self.removeslot_(nslot)
+    return True
+
+  def items(self):
+    """Return the (key, value, size) tuples in cache.
+
+    The most recently used objects come first.
+
+    """
+
+    cdef ObjectNode node
+
+    items = []
+    for node in self.__list:
+      if node is not None:
+        items.append((self.ratimes[node.nslot], node.key, node.obj,
+                      self.rsizes[node.nslot]))
+    items.sort(key=lambda item: -item[0])
+    return [item[1:] for item in items]
+
+  def load(self, items):
+    """Put the (key, value, size) tuples in `items` in cache.
+
+    `items` is like the list returned by `items()`, so only the first
+    ones are put when there are more than slots in cache.  The probes
+    of the hit ratio are not affected by this.
+
+    """
+
+    for key, value, size in reversed(list(items)[:self.nslots]):
+      if key not in self.__dict:
+        self.setitem_(key, value, size)
+    self.setcount = 0;  self.getcount = 0;  self.containscount = 0
+
   def __repr__(self):
     if self.nprobes > 0:
       hitratio = self.hitratio / self.nprobes
@@ -482,7 +689,8 @@ cdef class ObjectCache(BaseCache):
 cdef class NumCache(BaseCache):
   """Least-Recently-Used (LRU) cache specific for Numerical data."""
 
-  def __init__(self, object shape, object dtype, object name):
+  def __init__(self, object shape, object dtype, object name,
+               CacheBudget budget=None):
     """Maximum size of the cache.
 
     If more than 'nslots' elements are added to the cache,
@@ -492,16 +700,23 @@ cdef class NumCache(BaseCache):
     shape - The rectangular shape of the cache (nslots, nelemsperslot)
     itemsize - The size of the element base in cache
     name - A descriptive name for this cache
+    budget - The CacheBudget that the memory of this cache is charged to
 
     """
 
     cdef long nslots
+    cdef long long slotbytes
 
     nslots = shape[0];  self.slotsize = shape[1]
     if nslots >= 1<<16:
       # nslots can't be higher than 2**16. Will silently trunk the number.
       nslots = <long>((1<<16)-1)  # Cast makes cython happy here
-    super(NumCache, self).__init__(nslots, name)
+    slotbytes = self.slotsize * dtype.itemsize
+    if budget is not None and slotbytes > 0:
+      # The cache can not take more than a quarter of the budget, so
+      # that it does not evict all the others when created
+      nslots = <long>min(nslots, budget.maxsize // 4 // slotbytes)
+    super(NumCache, self).__init__(nslots, name, budget)
     self.itemsize = dtype.itemsize
     self.__dict = {}
     # The cache object where all data will go
@@ -513,6 +728,9 @@ cdef class NumCache(BaseCache):
     # The array for keeping the keys of slots
     self.keys = <ndarray>(-numpy.ones(shape=nslots, dtype=numpy.int64))
     self.rkeys = <long long *>self.keys.data
+    # The whole cache is allocated upfront, so charge it all at once
+    if budget is not None and not budget.reserve(self, nslots * slotbytes):
+      self.evict_()
 
   # Returns the address of nslot
   cdef void *getaddrslot_(self, long nslot):
@@ -561,6 +779,7 @@ cdef class NumCache(BaseCache):
         # Remove the slot from the dict
         key2 = self.keys[nslot]
         del self.__dict[key2]
+        self.nevictions = self.nevictions + 1
         self.nextslot = self.nextslot - 1
       else:
         # Get the next slot available
@@ -570,11 +789,13 @@ cdef class NumCache(BaseCache):
       self.keys[nslot] = key
       self.ratimes[nslot] = self.incseqn()
       self.nextslot = self.nextslot + 1
+      self.touch_()
       # The next reduces the performance of the cache in scenarios where
       # the efficicency is near to zero.  I don't understand exactly why.
       # F. Alted 24-03-2008
     elif self.nextslot > 0:
       # Empty the cache if needed
+      self.nevictions = self.nevictions + len(self.__dict)
       self.__dict.clear()
       self.nextslot = 0
     return nslot
@@ -587,6 +808,7 @@ cdef class NumCache(BaseCache):
     cdef object nslot
 
     self.containscount = self.containscount + 1
+    self.nlookups = self.nlookups + 1
     if self.nextslot == 0:   # No chances for finding a slot
       return -1
     try:
@@ -615,9 +837,68 @@ cdef class NumCache(BaseCache):
   cdef void *getitem1_(self, long nslot):
 
     self.getcount = self.getcount + 1
+    self.nhits = self.nhits + 1
     self.ratimes[nslot] = self.incseqn()
+    self.touch_()
     return <char *>self.rcache + nslot * self.slotsize * self.itemsize
 
+  cdef long long nbytes_(self):
+    return self.nslots * self.slotsize * self.itemsize
+
+  # Release all the data in cache, which is disabled from now on.
+  # The data is freed right away, so this must not be called while a
+  # pointer got from getitem1_() or getaddrslot_() is still in use, that
+  # is, only from Python calls (like the creation of other caches or
+  # ObjectCache.setitem()).
+  cdef int evict_(self):
+
+    if self.nslots == 0:
+      return False
+    if self.budget is not None:
+      self.budget.release(self, self.budgetsize)
+    self.nevictions = self.nevictions + len(self.__dict)
+    self.__dict.clear()
+    self.nslots = 0;  self.nextslot = 0
+    # Keep the scratch slot only (see setitem1_)
+    self.cacheobj = <ndarray>numpy.empty(shape=(1, self.slotsize),
+                                         dtype=self.cacheobj.dtype)
+    self.rcache = <void *>self.cacheobj.data
+    self.keys = <ndarray>(-numpy.ones(shape=0, dtype=numpy.int64))
+    self.rkeys = <long long *>self.keys.data
+    self.atimes = <ndarray>numpy.zeros(shape=0, dtype=numpy.int_)
+    self.ratimes = <long *>self.atimes.data
+    self.evicted = True
+    return True
+
+  def items(self):
+    """Return the (key, data) pairs in cache.
+
+    The most recently used data comes first.
+
+    """
+
+    nslots = self.atimes[:self.nextslot].argsort()[::-1]
+    return [(self.keys[nslot], self.cacheobj[nslot].copy())
+            for nslot in nslots]
+
+  def load(self, items):
+    """Put the (key, data) pairs in `items` in cache.
+
+    `items` is like the list returned by `items()`, so only the first
+    ones are put when there are more than slots in cache.  Data not
+    fitting exactly in a slot is left out.  The probes of the hit ratio
+    are not affected by this.
+
+    """
+
+    cdef ndarray nparr
+
+    for key, data in reversed(list(items)[:self.nslots]):
+      nparr = numpy.ascontiguousarray(data, dtype=self.cacheobj.dtype)
+      if nparr.size == self.slotsize and key not in self.__dict:
+        self.setitem_(key, nparr.data, 0)
+    self.setcount = 0;  self.getcount = 0;  self.containscount = 0
+
   def __repr__(self):
     cachesize = (self.nslots * self.slotsize * self.itemsize) / 1024.
     if self.nprobes > 0:
@@ -325,6 +325,22 @@ class Node(object):
         """Code to be called before killing the node."""
         pass
 
+    def _g_get_caches(self):
+        """Get the caches of this node, in a dictionary keyed by kind."""
+
+        return {}
+
+    def _g_get_stats(self, reset=False):
+        """Get the statistics of this node (see `File.get_stats()`)."""
+
+        caches = self._g_get_caches()
+        stats = {'caches': dict((kind, cache.get_stats())
+                                for kind, cache in caches.iteritems())}
+        if reset:
+            for cache in caches.itervalues():
+                cache.reset_stats()
+        return stats
+
     _g_preKillHook = previous_api(_g_pre_kill_hook)
 
     def _g_create(self):
@@ -51,6 +51,26 @@ in conditions like ``lim1 <= col < lim2``) cached during index lookups
 LIMBOUNDS_MAX_SLOTS = 128
 """The maximum number of slots for LIMBOUNDS cache."""
 
+QUERY_CACHE_MAX_SIZE = 0
+"""The maximum space that will take the cache of results of in-kernel
+queries (in bytes).  The coordinates of the rows fulfilling a query are
+kept compressed, and they are extended with the new rows when the table
+only grows by appending.  Caching the results is only worth it for
+applications repeating the same queries, so the default (0) disables the
+cache.  Set it to a positive size (like 1 MB) to enable it.
+
+.. versionadded:: 3.1.2
+
+"""
+
+QUERY_CACHE_MAX_SLOTS = 128
+"""The maximum number of slots in the cache of results of in-kernel
+queries.
+
+.. versionadded:: 3.1.2
+
+"""
+
 TABLE_MAX_SIZE = 1 * _MB
 """The maximum size for table chunks cached during index queries."""
 
@@ -122,6 +142,24 @@ MAX_UNDO_PATH_LENGTH = 10 * _KB
 # Cache limits
 # ------------
 
+CACHE_BUDGET = None
+"""Maximum memory (in bytes) for all the caches of a file together.
+
+It can be an integer or a string with a unit, like ``'512MB'`` or
+``'4GB'``.  The HDF5 caches get up to a quarter of the budget: the
+metadata cache and the chunk caches of the leaves in the node cache
+(see ``NODE_CACHE_SLOTS``) are limited to an eighth each, which may
+lower the values of ``METADATA_CACHE_SIZE`` and ``CHUNK_CACHE_SIZE``.
+The rest of the budget is shared by the caches that PyTables keeps for
+table reads and index searches, and when they need more memory than what
+is left, the least recently used caches in the file release theirs.
+``None`` means that there is no budget, and that every cache is only
+bounded by its own parameter.
+
+.. versionadded:: 3.1.2
+
+"""
+
 COND_CACHE_SLOTS = 128
 """Maximum number of conditions for table queries to be kept in memory."""
 
@@ -189,6 +227,35 @@ BUFFER_TIMES = 100
 """The maximum buffersize/rowsize ratio before issuing a
 :exc:`tables.PerformanceWarning`."""
 
+GROUPBY_MAX_SIZE = 64 * _MB
+"""The maximum size (in bytes) of the groups that :meth:`Table.groupby`
+keeps in memory.  When this size is exceeded, the groups are written
+into a temporary file and merged at the end.
+
+.. versionadded:: 3.1.2
+
+"""
+
+JOIN_MAX_SIZE = 64 * _MB
+"""The maximum size (in bytes) of the keys that :meth:`Table.join`
+sorts in memory for a table without a suitable index.  When this size
+is exceeded, the sorted keys are written into a temporary file and
+merged at the end.
+
+.. versionadded:: 3.1.2
+
+"""
+
+QUANTILE_SKETCH_SIZE = 64 * _KB
+"""The number of values in every block of the sketch used by
+:meth:`Column.quantile` when the column has no usable index.  The
+quantiles of columns with no more rows than this are exact; otherwise,
+their error decreases as this grows, at the cost of more memory.
+
+.. versionadded:: 3.1.2
+
+"""
+
 
 # Miscellaneous
 # -------------
@@ -227,6 +294,85 @@ your machine. In general, it is a good idea to set this to the number of
 cores in your machine or, when your machine has many of them (e.g. > 4),
 perhaps one less than this."""
 
+QUERY_THREADS = 1
+"""The number of threads used for evaluating the condition of queries
+returning their results in bulk (:meth:`Table.read_where` and
+:meth:`Table.get_where_list`).  The data is always read by the calling
+thread (HDF5 is not thread-safe) while the condition is evaluated by the
+worker threads on the buffers already read, so that I/O and computation
+overlap.  If `None`, it is automatically set to the number of cores in
+your machine.  The default (1) evaluates the condition serially.
+
+.. versionadded:: 3.1.2
+
+"""
+
+INDEX_THREADS = 1
+"""The number of threads used for sorting the slices of an index while
+it is being built (see :meth:`Column.create_index`).  The column values
+are always read and the sorted slices are appended by the calling thread
+(HDF5 is not thread-safe), while the worker threads sort the slices
+already read.  If `None`, it is automatically set to the number of cores
+in your machine.  The default (1) sorts the slices serially.
+
+.. versionadded:: 3.1.2
+
+"""
+
+PREFETCH_BUFFERS = 0
+"""The number of I/O buffers read ahead by a background thread while
+iterating sequentially over the rows of tables and arrays (see
+:meth:`Table.iterrows` and :meth:`Array.iterrows`), so that disk
+latency and decompression overlap with the processing of the rows.
+As the background thread accesses the file while the body of the loop
+may do so too, read-ahead requires an HDF5 library built in thread-safe
+mode: otherwise a :exc:`PerformanceWarning` is issued and the buffers
+are read on demand.  Updating the rows of a table while iterating stops
+the read-ahead.  The default (0) reads the buffers on demand.
+
+.. versionadded:: 3.1.2
+
+"""
+
+INDEX_DELTA_MAX_ROWS = 10000
+"""Maximum number of modified rows kept in the delta of an index.
+
+When rows of an indexed column are modified, the sorted index is not
+rebuilt: the old and new values of the rows are kept in a delta that
+queries take into account.  When the delta of an index grows beyond this
+number of rows, the index is rebuilt instead (see :meth:`Index.compact`).
+
+.. versionadded:: 3.1.2
+
+"""
+
+INDEX_MAX_SELECTIVITY = 0.5
+"""Maximum fraction of the indexed rows that a condition may select for
+its index to be used in a query.
+
+The number of rows selected by every indexed part of a query condition is
+estimated from the histogram of its index (see :attr:`Index.histogram`).
+The indexes of the parts selecting a larger fraction of rows are not
+searched, and when no index is selective enough, the condition is simply
+evaluated in-kernel over the whole table.  Set it to 1 to always use the
+indexes.
+
+.. versionadded:: 3.1.2
+
+"""
+
+INDEX_SAVE_CACHES = False
+"""Whether the caches of indexes are saved when a file is closed.
+
+If true, the caches of the indexes that have been searched are saved
+in the file when it is closed (see :meth:`Index.save_cache`), so that the
+first queries after opening the file again do not start with empty caches.
+This only happens for files opened in a writable mode.
+
+.. versionadded:: 3.1.2
+
+"""
+
 USER_BLOCK_SIZE = 0
 """Sets the user block size of a file.
 
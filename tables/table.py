@@ -14,8 +14,12 @@
 
 import sys
 import math
+import hashlib
 import warnings
+import os
 import os.path
+import tempfile
+import threading
 from time import time
 from functools import reduce as _reduce
 
@@ -25,12 +29,13 @@ import numexpr
 from tables import tableextension
 from tables.lrucacheextension import ObjectCache, NumCache
 from tables.atom import Atom
-from tables.conditions import compile_condition
+from tables.conditions import compile_condition, call_on_recarr
 from numexpr.necompiler import (
     getType as numexpr_getType, double, is_cpu_amd_intel)
 from numexpr.expressions import functions as numexpr_functions
 from tables.flavor import flavor_of, array_as_internal, internal_to_flavor
-from tables.utils import is_idx, lazyattr, SizeType, NailedDict as CacheDict
+from tables.utils import (is_idx, lazyattr, SizeType, map_in_threads,
+                          NailedDict as CacheDict)
 from tables.leaf import Leaf
 from tables.description import (
     IsDescription, Description, Col, descr_from_dtype)
@@ -40,8 +45,11 @@ from tables.utilsextension import get_nested_field
 
 from tables.path import join_path, split_path
 from tables.index import (
-    OldIndex, default_index_filters, default_auto_index, Index, IndexesDescG,
-    IndexesTableG)
+    OldIndex, default_index_filters, default_auto_index, Index, BitmapIndex,
+    BloomIndex, CompositeIndex, ExpressionIndex, IndexesDescG, IndexesTableG,
+    _count_values, _composite_keys, _hash_values)
+from tables.indexes import ZoneMapArray
+from tables.idxutils import string_prefix_after
 
 profile = False
 # profile = True  # Uncomment for profiling
@@ -146,6 +154,88 @@ def _index_pathname_of_column_(tablePath, colpathname):
 _indexPathnameOfColumn_ = previous_api(_index_pathname_of_column_)
 
 
+def _zonemap_pathname_of_column(table, colpathname):
+    return _zonemap_pathname_of_column_(table._v_pathname, colpathname)
+
+
+def _zonemap_pathname_of_column_(tablePath, colpathname):
+    zmname = '_z_%s' % colpathname.replace('/', '__')
+    return join_path(_index_pathname_of_(tablePath), zmname)
+
+
+def _composite_index_name(colpathnames):
+    return '_m_%s' % '___'.join(colpathname.replace('/', '__')
+                                for colpathname in colpathnames)
+
+
+def _expr_index_name(expression):
+    expression = ''.join(expression.split())
+    return '_e_%s' % hashlib.md5(expression.encode('ascii')).hexdigest()
+
+
+def _chunk_minmax(values, chunkids):
+    """Get the minimum and maximum of `values` in every chunk.
+
+    `chunkids` holds the (non-decreasing) chunk number of every value.
+    A ``(chunks, zones)`` tuple is returned, where `chunks` are the
+    different chunk numbers and `zones` is an array with a ``(min,
+    max)`` row for each one of them.  NaN values are ignored.
+
+    """
+
+    starts = numpy.flatnonzero(
+        numpy.concatenate(([True], chunkids[1:] != chunkids[:-1])))
+    chunks = chunkids[starts]
+    zones = numpy.empty((len(chunks), 2), dtype=values.dtype)
+    if values.dtype.kind in ('S', 'U'):
+        # Strings cannot be reduced with ufuncs, so sort them by value
+        # in every chunk.
+        order = numpy.argsort(values, kind='mergesort')
+        order = order[numpy.argsort(chunkids[order], kind='mergesort')]
+        svalues = values[order]
+        stops = numpy.concatenate((starts[1:], [len(values)]))
+        zones[:, 0] = svalues[starts]
+        zones[:, 1] = svalues[stops - 1]
+    else:
+        zones[:, 0] = numpy.fmin.reduceat(values, starts)
+        zones[:, 1] = numpy.fmax.reduceat(values, starts)
+    return (chunks, zones)
+
+
+def _merge_zones(zones1, zones2):
+    """Get the zones covering both `zones1` and `zones2`."""
+
+    zones = numpy.empty_like(zones1)
+    if zones1.dtype.kind in ('S', 'U'):
+        zones[:, 0] = numpy.where(zones2[:, 0] < zones1[:, 0],
+                                  zones2[:, 0], zones1[:, 0])
+        zones[:, 1] = numpy.where(zones2[:, 1] > zones1[:, 1],
+                                  zones2[:, 1], zones1[:, 1])
+    else:
+        zones[:, 0] = numpy.fmin(zones1[:, 0], zones2[:, 0])
+        zones[:, 1] = numpy.fmax(zones1[:, 1], zones2[:, 1])
+    return zones
+
+
+def _zones_chunkmap(zones, ops, lims):
+    """Get the chunks whose zones may satisfy the `ops` with `lims`."""
+
+    mins, maxs = zones[:, 0], zones[:, 1]
+    chunkmap = numpy.ones(len(zones), dtype='bool')
+    for op, lim in zip(ops, lims):
+        if op == 'lt':
+            chunkmap &= mins < lim
+        elif op == 'le':
+            chunkmap &= mins <= lim
+        elif op == 'gt':
+            chunkmap &= maxs > lim
+        elif op == 'ge':
+            chunkmap &= maxs >= lim
+        else:  # 'eq'
+            chunkmap &= (mins <= lim) & (maxs >= lim)
+    return chunkmap
+
+
 def _table__setautoindex(self, auto):
     auto = bool(auto)
     try:
@@ -190,9 +280,9 @@ _table__autoindex = property(
     """Automatically keep column indexes up to date?
 
     Setting this value states whether existing indexes should be
-    automatically updated after an append operation or recomputed
-    after an index-invalidating operation (i.e. removal and
-    modification of rows).  The default is true.
+    automatically updated after an append or a modification of rows,
+    or recomputed after an index-invalidating operation (i.e. removal
+    of rows).  The default is true.
 
     This value gets into effect whenever a column is altered.  If you
     don't have automatic indexing activated and you want to do an an
@@ -208,25 +298,107 @@ _table__autoIndex = previous_api(_table__autoindex)
 def restorecache(self):
     # Define a cache for sparse table reads
     params = self._v_file.params
+    budget = self._v_file._cache_budget
     chunksize = self._v_chunkshape[0]
     nslots = params['TABLE_MAX_SIZE'] / (chunksize * self._v_dtype.itemsize)
     self._chunkcache = NumCache((nslots, chunksize), self._v_dtype,
-                                'table chunk cache')
+                                'table chunk cache', budget)
     self._seqcache = ObjectCache(params['ITERSEQ_MAX_SLOTS'],
                                  params['ITERSEQ_MAX_SIZE'],
-                                 'Iter sequence cache')
+                                 'Iter sequence cache', budget)
     self._dirtycache = False
 
 
+def _compress_coords(coords):
+    """Compress the increasing row coordinates in `coords`.
+
+    A ``(first, dtype, data)`` tuple is returned, where `first` is the
+    first coordinate (None if there are none) and `data` is a string
+    with the differences between consecutive coordinates, stored with
+    the smallest `dtype` able to hold them.
+
+    """
+
+    if len(coords) == 0:
+        return (None, 'uint8', b'')
+    deltas = numpy.diff(coords)
+    maxdelta = deltas.max() if len(deltas) > 0 else 0
+    for dtype in ('uint8', 'uint16', 'uint32'):
+        if maxdelta <= numpy.iinfo(dtype).max:
+            break
+    else:
+        dtype = 'int64'
+    return (long(coords[0]), dtype, deltas.astype(dtype).tostring())
+
+
+def _decompress_coords(first, dtype, data):
+    """Get back the row coordinates compressed by `_compress_coords()`."""
+
+    if first is None:
+        return numpy.empty(0, dtype='int64')
+    deltas = numpy.frombuffer(data, dtype=dtype)
+    coords = numpy.empty(len(deltas) + 1, dtype='int64')
+    coords[0] = first
+    coords[1:] = first + deltas.cumsum(dtype='int64')
+    return coords
+
+
+def _bitmaps_chunkmap(strexpr, bitmaps, nrows, nrowsinchunk):
+    """Compute the chunkmap of `strexpr` by combining row bitmaps.
+
+    `bitmaps` maps every variable in `strexpr` to a ``(index,
+    selected)`` tuple, where `index` is a bitmap index and `selected`
+    are the positions of the values to be read from it.
+
+    """
+
+    nchunks = long(math.ceil(float(nrows) / nrowsinchunk))
+    chunkmap = numpy.empty(shape=nchunks, dtype="bool")
+    # Blocks of rows made of whole bytes and whole chunks
+    blockrows = nrowsinchunk * 8 * max(2**17 // nrowsinchunk, 1)
+    for start in xrange(0, nrows, blockrows):
+        stop = min(start + blockrows, nrows)
+        bmvars = {}
+        for var, (index, selected) in bitmaps.iteritems():
+            rows = index.read_bitmap(start, stop, selected)
+            if len(rows) < stop - start:
+                # Rows not covered by the index may match
+                rows = numpy.concatenate(
+                    (rows, numpy.ones(stop - start - len(rows), dtype="bool")))
+            bmvars[var] = rows
+        rows = numexpr.evaluate(strexpr, bmvars)
+        nblockchunks = -(-len(rows) // nrowsinchunk)
+        rows = numpy.concatenate(
+            (rows, numpy.zeros(nblockchunks * nrowsinchunk - len(rows),
+                               dtype="bool")))
+        nchunk = start // nrowsinchunk
+        chunkmap[nchunk:nchunk + nblockchunks] = rows.reshape(
+            nblockchunks, nrowsinchunk).any(axis=1)
+    return chunkmap
+
+
 def _table__where_indexed(self, compiled, condition, condvars,
                           start, stop, step):
+    """Resolve the indexable part of a condition.
+
+    A ``(chunkmap, coords)`` tuple is returned.  When the matching row
+    coordinates are already known (because they were cached or the
+    result is empty), `chunkmap` is None and `coords` is an array with
+    them.  Otherwise, `coords` is None and `chunkmap` is a boolean array
+    with the table chunks that may hold matching rows, or None when the
+    indexes would select too many rows to be worth using (see
+    :data:`parameters.INDEX_MAX_SELECTIVITY`).
+
+    """
+
     if profile:
         tref = time()
     if profile:
         show_stats("Entering table_whereIndexed", tref)
     self._use_index = True
-    # Clean the table caches for indexed queries if needed
-    if self._dirtycache:
+    # Clean the table caches for indexed queries if needed (or create
+    # them again if the cache budget has evicted them)
+    if self._dirtycache or self._chunkcache.evicted:
         restorecache(self)
 
     # Get the values in expression that are not columns
@@ -242,14 +414,14 @@ def _table__where_indexed(self, compiled, condition, condvars,
         # Get the row sequence from the cache
         seq = self._seqcache.getitem(nslot)
         if len(seq) == 0:
-            return iter([])
+            return (None, numpy.array([], dtype='int64'))
         # seq is a list.
         seq = numpy.array(seq, dtype='int64')
         # Correct the ranges in cached sequence
         if (start, stop, step) != (0, self.nrows, 1):
             seq = seq[(seq >= start) & (
                 seq < stop) & ((seq - start) % step == 0)]
-        return self.itersequence(seq)
+        return (None, seq)
     else:
         # No luck.  self._seqcache will be populated
         # in the iterator if possible. (Row._finish_riterator)
@@ -258,49 +430,780 @@ def _table__where_indexed(self, compiled, condition, condvars,
     # Compute the chunkmap for every index in indexed expression
     idxexprs = compiled.index_expressions
     strexpr = compiled.string_expression
+    nrowsinchunk = self.chunkshape[0]
+    nchunks = long(math.ceil(float(self.nrows) / nrowsinchunk))
+    indexes = [self._get_expr_index(idxexpr[0], condvars)
+               for idxexpr in idxexprs]
+    # Compound conditions on bitmap indexes are resolved row by row
+    rowwise = len(indexes) > 1 and all(
+        index is not None and not index.dirty and index.kind == 'bitmap'
+        for index in indexes)
+    # Estimate the rows selected by every index from its statistics, so
+    # that the most selective indexes are searched first and the ones
+    # selecting too many rows are not searched at all.
+    maxselectivity = self._v_file.params['INDEX_MAX_SELECTIVITY']
+    ranges = [None] * len(idxexprs)
+    skipped = [False] * len(idxexprs)
+    estimates = [self.nrows] * len(idxexprs)
+    for i, idxexpr in enumerate(idxexprs):
+        index = indexes[i]
+        if index is None or index.dirty:
+            continue
+        ranges[i] = index.get_lookup_range(*idxexpr[1:])
+        if rowwise or not hasattr(index, 'estimate_nrows'):
+            continue
+        estimate = index.estimate_nrows(ranges[i])
+        if estimate is not None:
+            estimates[i] = estimate
+            skipped[i] = estimate > maxselectivity * index.nelements
+    if all(skipped):
+        # The indexes would not help, so do an in-kernel query instead
+        # (whose results must not end up in the sequence cache)
+        self._use_index = False
+        self._seqcache_key = None
+        return (None, None)
+    # In a conjunction, no more indexes are needed after an empty chunkmap
+    conjunction = '|' not in strexpr and '~' not in strexpr
     cmvars = {}
+    bitmaps = {}
     tcoords = 0
-    for i, idxexpr in enumerate(idxexprs):
-        var, ops, lims = idxexpr
-        col = condvars[var]
-        index = col.index
-        assert index is not None, "the chosen column is not indexed"
-        assert not index.dirty, "the chosen column has a dirty index"
+    # Whether the row counts in `tcoords` are exact
+    exact = True
+    for i in sorted(xrange(len(idxexprs)), key=lambda i: estimates[i]):
+        var, ops, lims = idxexprs[i]
+        index = indexes[i]
+        if index is None and (isinstance(var, tuple) or var not in condvars):
+            # The composite or expression index is not usable anymore.
+            cmvars["e%d" % i] = numpy.ones(nchunks, dtype="bool")
+            exact = False
+            continue
+        if index is None or index.dirty:
+            # Use the zone map of the column instead.
+            zonemap = condvars[var].zonemap
+            assert zonemap is not None, "the chosen column is not indexed"
+            cmvars["e%d" % i] = _zones_chunkmap(zonemap[:], ops, lims)
+            exact = False
+            continue
+        if skipped[i] or (conjunction and cmvars and
+                          not all(cm.any() for cm in cmvars.values())):
+            # The rest of the condition is evaluated in-kernel
+            cmvars["e%d" % i] = numpy.ones(nchunks, dtype="bool")
+            exact = False
+            continue
 
         # Get the number of rows that the indexed condition yields.
-        range_ = index.get_lookup_range(ops, lims)
+        range_ = ranges[i]
         ncoords = index.search(range_)
         tcoords += ncoords
+        nindexed = index.nelements
+        exact = exact and index.reduction == 1 and nindexed == self.nrows
+        if rowwise:
+            # Keep the values selected by the search for later
+            bitmaps["e%d" % i] = (index, index.selected)
+            continue
         if index.reduction == 1 and ncoords == 0:
             # No values from index condition, thus the chunkmap should be empty
-            nrowsinchunk = self.chunkshape[0]
-            nchunks = long(math.ceil(float(self.nrows) / nrowsinchunk))
             chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
         else:
             # Get the chunkmap from the index
             chunkmap = index.get_chunkmap()
+        if nindexed < self.nrows:
+            # Rows not covered by the index may match
+            chunkmap = chunkmap[:nindexed // nrowsinchunk]
+            chunkmap = numpy.concatenate(
+                (chunkmap, numpy.ones(nchunks - len(chunkmap), dtype="bool")))
         # Assign the chunkmap to the cmvars dictionary
         cmvars["e%d" % i] = chunkmap
 
-    if index.reduction == 1 and tcoords == 0:
+    if exact and tcoords == 0:
         # No candidates found in any indexed expression component, so leave now
         self._seqcache.setitem(seqkey, [], 1)
-        return iter([])
+        self._seqcache_key = None
+        return (None, numpy.array([], dtype='int64'))
 
     # Compute the final chunkmap
-    chunkmap = numexpr.evaluate(strexpr, cmvars)
+    if rowwise:
+        chunkmap = _bitmaps_chunkmap(strexpr, bitmaps, self.nrows,
+                                     nrowsinchunk)
+    else:
+        chunkmap = numexpr.evaluate(strexpr, cmvars)
     if not chunkmap.any():
         # The chunkmap is all False, so the result is empty
         self._seqcache.setitem(seqkey, [], 1)
-        return iter([])
+        self._seqcache_key = None
+        return (None, numpy.array([], dtype='int64'))
 
     if profile:
         show_stats("Exiting table_whereIndexed", tref)
-    return chunkmap
+    return (chunkmap, None)
 
 _table__whereIndexed = previous_api(_table__where_indexed)
 
 
+# The reductions supported by `Table.aggregate()`
+_aggregate_functions = ('count', 'sum', 'min', 'max', 'mean')
+
+
+class _Reduction(object):
+    """Accumulator for a reduction over a column, computed buffer-wise.
+
+    `func` is one of the names in ``_aggregate_functions`` and `dtype`
+    is the dtype of the column (including its shape).
+
+    """
+
+    def __init__(self, func, dtype):
+        if func not in _aggregate_functions:
+            raise ValueError("unknown aggregate function ``%s``; "
+                             "valid ones are: %s"
+                             % (func, ", ".join(_aggregate_functions)))
+        self.func = func
+        self.dtype = dtype
+        self.count = 0
+        self.value = None
+
+    def update(self, values):
+        """Fold the `values` array (along its first dimension) in."""
+
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        func = self.func
+        if func == 'count':
+            return
+        if func in ('sum', 'mean'):
+            if func == 'mean' and values.dtype.kind != 'c':
+                partial = values.sum(axis=0, dtype='float64')
+            else:
+                partial = values.sum(axis=0)
+            if self.value is not None:
+                partial = self.value + partial
+        elif values.dtype.kind in 'SU':
+            # String comparisons are not supported by ufuncs
+            if self.value is not None:
+                values = numpy.concatenate((values, [self.value]))
+            partial = numpy.sort(values, axis=0)[0 if func == 'min' else -1]
+        else:
+            partial = values.min(axis=0) if func == 'min' else values.max(axis=0)
+            if self.value is not None:
+                ufunc = numpy.minimum if func == 'min' else numpy.maximum
+                partial = ufunc(self.value, partial)
+        self.value = partial
+
+    def result(self):
+        """Return the reduced value.
+
+        The ``min``, ``max`` and ``mean`` reductions of no values are
+        None, while their ``sum`` is zero.
+
+        """
+
+        if self.func == 'count':
+            return self.count
+        if self.func == 'sum' and self.value is None:
+            return numpy.empty(0, self.dtype).sum(axis=0)
+        if self.func == 'mean' and self.value is not None:
+            return self.value / self.count
+        return self.value
+
+
+class _QuantileSketch(object):
+    """Accumulator for approximate quantiles of a column, computed
+    buffer-wise.
+
+    Values are gathered in sorted blocks of `size` values at some level.
+    When there are two blocks at the same level, they are merged and
+    every other value is kept, so that they make a single block at the
+    next level, where every value stands for twice as many values.  The
+    memory used only grows with the logarithm of the number of values,
+    and the rank of the values returned is off by less than about
+    ``n * log2(n / size) / size`` positions for ``n`` values.  The
+    results are exact while no more than `size` values are fed.
+
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.pending = []
+        self.npending = 0
+        self.levels = {}
+        self.odd = 0  # alternates the half kept in every merge
+
+    def update(self, values):
+        """Fold the `values` array in (NaN values are left out)."""
+
+        if values.dtype.kind == 'f':
+            values = values[~numpy.isnan(values)]
+        else:
+            values = values.copy()
+        self.count += len(values)
+        self.pending.append(values)
+        self.npending += len(values)
+        size = self.size
+        if self.npending < size:
+            return
+        pending = numpy.concatenate(self.pending)
+        nblocks = len(pending) // size
+        for nblock in xrange(nblocks):
+            block = numpy.sort(pending[nblock * size:(nblock + 1) * size])
+            level = 0
+            while level in self.levels:
+                block = numpy.sort(
+                    numpy.concatenate((self.levels.pop(level), block)),
+                    kind='mergesort')[self.odd::2]
+                self.odd = 1 - self.odd
+                level += 1
+            self.levels[level] = block
+        self.pending = [pending[nblocks * size:]]
+        self.npending = len(self.pending[0])
+
+    def select(self, ranks):
+        """Get the values at the `ranks` positions of the values fed."""
+
+        blocks = [(block, 2 ** level)
+                  for level, block in self.levels.iteritems()]
+        blocks.extend((block, 1) for block in self.pending)
+        values = numpy.concatenate([block for block, weight in blocks])
+        weights = numpy.concatenate(
+            [numpy.repeat(numpy.int64(weight), len(block))
+             for block, weight in blocks])
+        order = numpy.argsort(values, kind='mergesort')
+        positions = numpy.cumsum(weights[order])
+        found = numpy.searchsorted(positions, ranks, side='right')
+        return values[order][numpy.minimum(found, len(values) - 1)]
+
+
+class _HyperLogLog(object):
+    """Accumulator for the approximate number of distinct values of a
+    column, computed buffer-wise.
+
+    This is a HyperLogLog sketch: the first `precision` bits of the hash
+    of every value choose a register, and every register keeps the
+    highest position of the first set bit in the rest of the hashes that
+    it has seen.  The count is estimated from the harmonic mean of the
+    registers, with a relative standard error of about ``1.04 /
+    sqrt(2**precision)``.
+
+    """
+
+    def __init__(self, precision):
+        self.precision = precision
+        self.registers = numpy.zeros(2 ** precision, dtype='uint8')
+
+    def update(self, values):
+        """Fold the `values` array in (NaN values are left out)."""
+
+        if values.dtype.kind == 'f':
+            # Adding a zero gets rid of negative zeros
+            values = values[~numpy.isnan(values)] + values.dtype.type(0)
+        if len(values) == 0:
+            return
+        precision = self.precision
+        hashes = _hash_values(values)
+        nregisters = hashes >> numpy.uint64(64 - precision)
+        rest = hashes << numpy.uint64(precision)
+        # Count the leading zeros of the rest of the hashes
+        nzeros = numpy.zeros(len(rest), dtype='uint8')
+        for shift in (32, 16, 8, 4, 2, 1):
+            top = (rest >> numpy.uint64(64 - shift)) == 0
+            nzeros[top] += shift
+            rest[top] <<= numpy.uint64(shift)
+        ranks = numpy.minimum(nzeros + 1, 65 - precision).astype('uint8')
+        # Keep the highest rank for every register
+        order = numpy.lexsort((ranks, nregisters))
+        nregisters, ranks = nregisters[order], ranks[order]
+        last = numpy.concatenate((nregisters[1:] != nregisters[:-1], [True]))
+        nregisters, ranks = nregisters[last], ranks[last]
+        self.registers[nregisters] = numpy.maximum(
+            self.registers[nregisters], ranks)
+
+    def result(self):
+        """Return the estimated number of distinct values."""
+
+        registers = self.registers
+        m = len(registers)
+        estimate = (0.7213 / (1 + 1.079 / m) * m * m /
+                    numpy.sum(2.0 ** -registers.astype('float64')))
+        nempty = numpy.count_nonzero(registers == 0)
+        if estimate <= 2.5 * m and nempty > 0:
+            # Linear counting is more accurate for small counts
+            estimate = m * math.log(float(m) / nempty)
+        return int(round(estimate))
+
+
+# The partial states kept by every reduction in a group-by, and the
+# ufuncs used for merging them: (suffix, dtype, ufunc), where dtype is
+# None for using the dtype of the column.
+_groupby_states = {
+    'count': [('n', 'int64', numpy.add)],
+    'sum': [('s', 'sum', numpy.add)],
+    'min': [('v', None, numpy.minimum)],
+    'max': [('v', None, numpy.maximum)],
+    'mean': [('s', 'mean', numpy.add), ('n', 'int64', numpy.add)],
+}
+
+
+class _GroupAccumulator(object):
+    """Accumulator for the reductions of a group-by, computed buffer-wise.
+
+    Groups are kept in a structured array (the *states*) sorted by key,
+    with one field per key column (``k0``, ``k1``...) and one field for
+    every partial state of every reduction (``a0s``, ``a0n``...).  The
+    states of every buffer are reduced on their own and then merged in
+    bulk with the accumulated ones, so the cost is amortized.  When
+    more than `maxsize` bytes of groups are accumulated, they are
+    written as a sorted run into a temporary file in `tmp_dir`, and all
+    the runs are merged when the results are requested.
+
+    `keys` is a sequence of ``(colname, dtype)`` pairs and `aggs` a
+    sequence of ``(outname, colname, func, dtype)`` tuples.
+
+    """
+
+    def __init__(self, keys, aggs, maxsize, tmp_dir):
+        for outname, colname, func, dtype in aggs:
+            if func not in _groupby_states:
+                raise ValueError("unknown aggregate function ``%s``; "
+                                 "valid ones are: %s"
+                                 % (func, ", ".join(_aggregate_functions)))
+        self.keys = keys
+        self.aggs = aggs
+        self.tmp_dir = tmp_dir
+
+        statefields = [('k%d' % i, dtype)
+                       for i, (colname, dtype) in enumerate(keys)]
+        outfields = [(colname, dtype) for colname, dtype in keys]
+        self.ufuncs = []
+        for i, (outname, colname, func, dtype) in enumerate(aggs):
+            for suffix, sdtype, ufunc in _groupby_states[func]:
+                if suffix == 'n':
+                    sdtype = numpy.dtype(sdtype)
+                else:
+                    if sdtype == 'sum':
+                        sdtype = numpy.empty(0, dtype).sum(axis=0).dtype
+                    elif sdtype == 'mean':
+                        sdtype = numpy.dtype('complex128'
+                                             if dtype.base.kind == 'c'
+                                             else 'float64')
+                    else:
+                        sdtype = dtype.base
+                    sdtype = numpy.dtype((sdtype, dtype.shape))
+                fieldname = 'a%d%s' % (i, suffix)
+                statefields.append((fieldname, sdtype))
+                self.ufuncs.append((fieldname, ufunc))
+            # The results have the dtype of the first state
+            outfields.append((outname, statefields[-len(
+                _groupby_states[func])][1]))
+        self.statedtype = numpy.dtype(statefields)
+        self.outdtype = numpy.dtype(outfields)
+        self.maxgroups = max(maxsize // self.statedtype.itemsize, 1)
+
+        self.groups = numpy.empty(0, self.statedtype)
+        self.pending = []
+        self.npending = 0
+        self.tmpfile = None
+        self.runs = []
+
+    def states(self, buf):
+        """Get the states for the rows in the `buf` record array."""
+
+        states = numpy.empty(len(buf), self.statedtype)
+        for i, (colname, dtype) in enumerate(self.keys):
+            states['k%d' % i] = get_nested_field(buf, colname)
+        for i, (outname, colname, func, dtype) in enumerate(self.aggs):
+            suffix = _groupby_states[func][0][0]
+            if func != 'count':
+                states['a%d%s' % (i, suffix)] = get_nested_field(buf,
+                                                                 colname)
+            if func in ('count', 'mean'):
+                states['a%dn' % i] = 1
+        return states
+
+    def reduce(self, states):
+        """Reduce the `states` array so as to get one row per key."""
+
+        if len(states) == 0:
+            return states
+        nkeys = len(self.keys)
+        keycols = [states['k%d' % i] for i in xrange(nkeys)]
+        order = numpy.lexsort(keycols[::-1])
+        states = states[order]
+        newgroup = numpy.zeros(len(states) - 1, dtype=bool)
+        for i in xrange(nkeys):
+            keycol = states['k%d' % i]
+            differ = keycol[1:] != keycol[:-1]
+            if keycol.dtype.kind in 'fc':
+                # NaN keys are sorted last, and they make a single group
+                isnan = numpy.isnan(keycol)
+                differ &= ~(isnan[1:] & isnan[:-1])
+            newgroup |= differ
+        starts = numpy.concatenate(([0], newgroup.nonzero()[0] + 1))
+        groups = states[starts]
+        for fieldname, ufunc in self.ufuncs:
+            groups[fieldname] = ufunc.reduceat(states[fieldname], starts,
+                                               axis=0)
+        return groups
+
+    def _merge_pending(self):
+        if self.pending:
+            self.groups = self.reduce(
+                numpy.concatenate([self.groups] + self.pending))
+            self.pending = []
+            self.npending = 0
+
+    def update(self, buf):
+        """Fold the rows in the `buf` record array in."""
+
+        if len(buf) == 0:
+            return
+        partial = self.reduce(self.states(buf))
+        self.pending.append(partial)
+        self.npending += len(partial)
+        if self.npending >= len(self.groups):
+            self._merge_pending()
+            if len(self.groups) > self.maxgroups:
+                self._spill()
+
+    def _spill(self):
+        """Write the accumulated groups as a sorted run on disk."""
+
+        if self.tmpfile is None:
+            from tables.file import open_file
+            fd, self.tmpfilename = tempfile.mkstemp(
+                ".tmp", "pytables-", self.tmp_dir)
+            # Close the file descriptor so as to avoid leaks
+            os.close(fd)
+            self.tmpfile = open_file(self.tmpfilename, "w")
+        run = self.tmpfile.create_table(
+            '/', 'run%d' % len(self.runs), self.statedtype,
+            expectedrows=len(self.groups))
+        run.append(self.groups)
+        run.flush()
+        self.runs.append(run)
+        self.groups = numpy.empty(0, self.statedtype)
+
+    def _count_upto(self, states, key):
+        """Count the rows in sorted `states` whose key is <= `key`."""
+
+        states = numpy.concatenate((states, key))
+        keycols = [states['k%d' % i] for i in xrange(len(self.keys))]
+        # The stable sort leaves `key` after the equal ones
+        order = numpy.lexsort(keycols[::-1])
+        return (order == len(states) - 1).nonzero()[0][0]
+
+    def finalize(self, groups):
+        """Convert the `groups` states into an array of results."""
+
+        result = numpy.empty(len(groups), self.outdtype)
+        for i, (colname, dtype) in enumerate(self.keys):
+            result[colname] = groups['k%d' % i]
+        for i, (outname, colname, func, dtype) in enumerate(self.aggs):
+            values = groups['a%d%s' % (i, _groupby_states[func][0][0])]
+            if func == 'mean':
+                counts = groups['a%dn' % i]
+                counts = counts.reshape(counts.shape + (1,) * len(dtype.shape))
+                values = values / counts
+            result[outname] = values
+        return result
+
+    def results(self, nrowsinbuf):
+        """Yield arrays with the results of the group-by, sorted by key.
+
+        The temporary file is removed once the results are consumed.
+
+        """
+
+        self._merge_pending()
+        if not self.runs:
+            yield self.finalize(self.groups)
+            return
+
+        try:
+            self._spill()
+            # Merge the sorted runs, one block of every run at a time.
+            sources = [[run, 0, numpy.empty(0, self.statedtype)]
+                       for run in self.runs]
+            while True:
+                for source in sources[:]:
+                    run, pos, block = source
+                    if len(block) == 0:
+                        if pos >= run.nrows:
+                            sources.remove(source)
+                            continue
+                        source[2] = run.read(pos, pos + nrowsinbuf)
+                        source[1] = pos + nrowsinbuf
+                if not sources:
+                    break
+                # No remaining group can be less than the smallest of
+                # the last keys in the current blocks.
+                lasts = numpy.concatenate([block[-1:]
+                                           for run, pos, block in sources])
+                lastkeys = [lasts['k%d' % i] for i in xrange(len(self.keys))]
+                frontier = lasts[numpy.lexsort(lastkeys[::-1])[:1]]
+                blocks = []
+                for source in sources:
+                    block = source[2]
+                    n = self._count_upto(block, frontier)
+                    blocks.append(block[:n])
+                    source[2] = block[n:]
+                yield self.finalize(self.reduce(numpy.concatenate(blocks)))
+        finally:
+            self.tmpfile.close()
+            os.remove(self.tmpfilename)
+            self.tmpfile = None
+
+
+def _select_topk(coords, values, k, reverse):
+    """Get the `k` first rows in the order of `values`.
+
+    The `coords` and `values` of the selected rows are returned, sorted
+    in ascending order of `values` (or descending if `reverse`).  Ties
+    keep the order of `coords` (or the reversed one if `reverse`).
+
+    """
+
+    order = numpy.argsort(values, kind='mergesort')
+    if reverse:
+        order = order[::-1]
+    order = order[:k]
+    return (coords[order], values[order])
+
+
+# The kinds of join supported by `Table.join()`
+_join_kinds = ('inner', 'left', 'asof')
+
+
+def _truncate_keys(keys, size):
+    """Keep the first `size` bytes of the string array `keys`."""
+
+    if keys.dtype.itemsize == size:
+        return keys
+    nbytes = keys.view('u1').reshape(len(keys), keys.dtype.itemsize)
+    return numpy.ascontiguousarray(nbytes[:, :size]).view(
+        'S%d' % size).reshape(len(keys))
+
+
+class _SortedRuns(object):
+    """Sorter of keys and row coordinates with bounded memory.
+
+    Pairs of keys (strings) and coordinates are accumulated in memory
+    until they take more than `maxsize` bytes; then they are sorted by
+    key and written as a run into a temporary file in `tmp_dir`, and
+    all the runs are merged when the results are requested.
+
+    """
+
+    def __init__(self, keysize, maxsize, tmp_dir):
+        self.dtype = numpy.dtype([('key', 'S%d' % keysize),
+                                  ('coord', 'int64')])
+        self.maxpairs = max(maxsize // self.dtype.itemsize, 1)
+        self.tmp_dir = tmp_dir
+        self.pending = []
+        self.npending = 0
+        self.tmpfile = None
+        self.runs = []
+
+    def add(self, keys, coords):
+        """Add the pairs of `keys` and `coords`."""
+
+        pairs = numpy.empty(len(keys), self.dtype)
+        pairs['key'] = keys
+        pairs['coord'] = coords
+        self.pending.append(pairs)
+        self.npending += len(pairs)
+        if self.npending > self.maxpairs:
+            self._spill()
+
+    def _sort_pending(self):
+        pairs = numpy.concatenate([numpy.empty(0, self.dtype)] +
+                                  self.pending)
+        self.pending = []
+        self.npending = 0
+        return pairs[numpy.argsort(pairs['key'], kind='mergesort')]
+
+    def _spill(self):
+        """Write the accumulated pairs as a sorted run on disk."""
+
+        if self.tmpfile is None:
+            from tables.file import open_file
+            fd, self.tmpfilename = tempfile.mkstemp(
+                ".tmp", "pytables-", self.tmp_dir)
+            # Close the file descriptor so as to avoid leaks
+            os.close(fd)
+            self.tmpfile = open_file(self.tmpfilename, "w")
+        pairs = self._sort_pending()
+        run = self.tmpfile.create_table(
+            '/', 'run%d' % len(self.runs), self.dtype,
+            expectedrows=len(pairs))
+        run.append(pairs)
+        run.flush()
+        self.runs.append(run)
+
+    def results(self, nrowsinbuf):
+        """Yield ``(keys, coords)`` arrays with the pairs sorted by key.
+
+        The temporary file is removed once the results are consumed.
+
+        """
+
+        if not self.runs:
+            pairs = self._sort_pending()
+            for start in xrange(0, len(pairs), nrowsinbuf):
+                block = pairs[start:start + nrowsinbuf]
+                yield (block['key'], block['coord'])
+            return
+
+        try:
+            if self.npending > 0:
+                self._spill()
+            # Merge the sorted runs, one block of every run at a time.
+            sources = [[run, 0, numpy.empty(0, self.dtype)]
+                       for run in self.runs]
+            while True:
+                for source in sources[:]:
+                    run, pos, block = source
+                    if len(block) == 0:
+                        if pos >= run.nrows:
+                            sources.remove(source)
+                            continue
+                        source[2] = run.read(pos, pos + nrowsinbuf)
+                        source[1] = pos + nrowsinbuf
+                if not sources:
+                    break
+                # No remaining key can be less than the smallest of the
+                # last keys in the current blocks.
+                frontier = min(block['key'][-1]
+                               for run, pos, block in sources)
+                blocks = []
+                for source in sources:
+                    block = source[2]
+                    n = numpy.searchsorted(block['key'], frontier,
+                                           side='right')
+                    blocks.append(block[:n])
+                    source[2] = block[n:]
+                pairs = numpy.concatenate(blocks)
+                pairs = pairs[numpy.argsort(pairs['key'], kind='mergesort')]
+                yield (pairs['key'], pairs['coord'])
+        finally:
+            self.tmpfile.close()
+            os.remove(self.tmpfilename)
+            self.tmpfile = None
+
+
+def _match_keys(lkeys, lcoords, rkeys, rcoords, how, grouplen):
+    """Match the rows with the sorted `lkeys` with the ones with `rkeys`.
+
+    A tuple with the coordinates of the matching left and right rows is
+    returned, with -1 as the right coordinate of unmatched left rows.
+    All the rows with the keys in `lkeys` must be in `rkeys`, as well as
+    the last row with a lower key (if any) for ``'asof'`` joins, where
+    the first `grouplen` bytes of the keys must also be equal for rows
+    to match.
+
+    """
+
+    if how == 'asof':
+        matches = numpy.repeat(numpy.int64(-1), len(lkeys))
+        if len(rkeys) == 0:
+            return (lcoords, matches)
+        pos = numpy.searchsorted(rkeys, lkeys, side='right') - 1
+        found = pos >= 0
+        pos = numpy.maximum(pos, 0)
+        if grouplen > 0:
+            found &= (_truncate_keys(rkeys[pos], grouplen) ==
+                      _truncate_keys(lkeys, grouplen))
+        matches[found] = rcoords[pos[found]]
+        return (lcoords, matches)
+
+    lo = numpy.searchsorted(rkeys, lkeys, side='left')
+    nmatches = numpy.searchsorted(rkeys, lkeys, side='right') - lo
+    if how == 'left':
+        nrows = numpy.maximum(nmatches, 1)
+    else:
+        nrows = nmatches
+    # The position of every result row among the ones of its left row
+    offsets = (numpy.arange(nrows.sum(), dtype='int64') -
+               numpy.repeat(numpy.cumsum(nrows) - nrows, nrows))
+    matched = numpy.repeat(nmatches > 0, nrows)
+    matches = numpy.repeat(numpy.int64(-1), len(matched))
+    matches[matched] = rcoords[(numpy.repeat(lo, nrows) + offsets)[matched]]
+    return (numpy.repeat(lcoords, nrows), matches)
+
+
+def _next_key_block(blocks, keys, coords):
+    """Append the next non-empty block in `blocks` to `keys` and `coords`.
+
+    A ``(keys, coords, done)`` tuple is returned, where `done` tells
+    whether `blocks` is exhausted.
+
+    """
+
+    for bkeys, bcoords in blocks:
+        if len(bkeys) > 0:
+            return (numpy.concatenate((keys, bkeys)),
+                    numpy.concatenate((coords, bcoords)), False)
+    return (keys, coords, True)
+
+
+def _merge_join(lblocks, rblocks, how, grouplen):
+    """Join two streams of ``(keys, coords)`` blocks sorted by key.
+
+    Tuples with the coordinates of the matching rows are yielded in key
+    order (see `_match_keys()`).  Only the rows with keys lower than the
+    last ones read from both streams are matched, since all the rows
+    with those keys have already been read.  When all the rows read
+    from a stream have the same key, another block is read from it, so
+    memory only grows with the number of rows with the same key.
+
+    """
+
+    lblocks, rblocks = iter(lblocks), iter(rblocks)
+    lkeys = rkeys = numpy.empty(0, 'S1')
+    lcoords = rcoords = numpy.empty(0, 'int64')
+    ldone = rdone = False
+    # The last right row passed, which asof joins may still match
+    lastkey, lastcoord = rkeys, rcoords
+    while True:
+        if len(lkeys) == 0 and not ldone:
+            lkeys, lcoords, ldone = _next_key_block(lblocks, lkeys, lcoords)
+        if len(rkeys) == 0 and not rdone:
+            rkeys, rcoords, rdone = _next_key_block(rblocks, rkeys, rcoords)
+        if len(lkeys) == 0:
+            break
+        lasts = []
+        if not ldone:
+            lasts.append(lkeys[-1])
+        if not rdone:
+            lasts.append(rkeys[-1])
+        if lasts:
+            frontier = min(lasts)
+            nl = numpy.searchsorted(lkeys, frontier)
+            nr = numpy.searchsorted(rkeys, frontier)
+        else:
+            nl, nr = len(lkeys), len(rkeys)
+        if nl == 0 and nr == 0:
+            # Read more rows with the frontier key
+            if not ldone and lkeys[-1] == frontier:
+                lkeys, lcoords, ldone = _next_key_block(lblocks, lkeys,
+                                                        lcoords)
+            if not rdone and rkeys[-1] == frontier:
+                rkeys, rcoords, rdone = _next_key_block(rblocks, rkeys,
+                                                        rcoords)
+            continue
+        mkeys, mcoords = rkeys[:nr], rcoords[:nr]
+        if how == 'asof':
+            mkeys = numpy.concatenate((lastkey, mkeys))
+            mcoords = numpy.concatenate((lastcoord, mcoords))
+            lastkey, lastcoord = mkeys[-1:], mcoords[-1:]
+        lmatches, rmatches = _match_keys(lkeys[:nl], lcoords[:nl],
+                                         mkeys, mcoords, how, grouplen)
+        lkeys, lcoords = lkeys[nl:], lcoords[nl:]
+        rkeys, rcoords = rkeys[nr:], rcoords[nr:]
+        if len(lmatches) > 0:
+            yield (lmatches, rmatches)
+
+
 def create_indexes_table(table):
     itgroup = IndexesTableG(
         table._v_parent, _index_name_of(table),
@@ -321,7 +1224,8 @@ createIndexesDescr = previous_api(create_indexes_descr)
 
 
 def _column__create_index(self, optlevel, kind, filters, tmp_dir,
-                          blocksizes, verbose):
+                          blocksizes, verbose, nthreads=None,
+                          memory_limit=None, progress=None):
     name = self.name
     table = self.table
     dtype = self.dtype
@@ -344,6 +1248,11 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
         raise TypeError("complex columns can not be indexed")
     if dtype.shape != ():
         raise TypeError("multidimensional columns can not be indexed")
+    if kind == 'bloom' and dtype.kind != 'S':
+        raise TypeError("bloom indexes are only supported for string columns")
+    if memory_limit is not None and memory_limit <= 0:
+        raise ValueError("``memory_limit`` must be a positive number of "
+                         "bytes: %r" % (memory_limit,))
 
     # Get the indexes group for table, and if not exists, create it
     try:
@@ -378,16 +1287,27 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
         expectedrows = table.nrows
 
     # Create the index itself
-    index = Index(
-        idgroup, name, atom=atom,
-        title="Index for %s column" % name,
-        kind=kind,
-        optlevel=optlevel,
-        filters=filters,
-        tmp_dir=tmp_dir,
-        expectedrows=expectedrows,
-        byteorder=table.byteorder,
-        blocksizes=blocksizes)
+    if kind in ('bitmap', 'bloom'):
+        indexclass = {'bitmap': BitmapIndex, 'bloom': BloomIndex}[kind]
+        index = indexclass(
+            idgroup, name, atom=atom,
+            title="%s index for %s column" % (kind.capitalize(), name),
+            optlevel=optlevel,
+            filters=filters,
+            expectedrows=expectedrows,
+            byteorder=table.byteorder)
+    else:
+        index = Index(
+            idgroup, name, atom=atom,
+            title="Index for %s column" % name,
+            kind=kind,
+            optlevel=optlevel,
+            filters=filters,
+            tmp_dir=tmp_dir,
+            expectedrows=expectedrows,
+            byteorder=table.byteorder,
+            blocksizes=blocksizes,
+            memory_limit=memory_limit)
 
     table._set_column_indexing(self.pathname, True)
 
@@ -396,7 +1316,8 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
     # Add rows to the index if necessary
     if table.nrows > 0:
         indexedrows = table._add_rows_to_index(
-            self.pathname, 0, table.nrows, lastrow=True, update=False)
+            self.pathname, 0, table.nrows, lastrow=True, update=False,
+            nthreads=nthreads, progress=progress)
     else:
         indexedrows = 0
     index.dirty = False
@@ -404,7 +1325,9 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
     table._unsaved_indexedrows = table.nrows - indexedrows
 
     # Optimize the index that has been already filled-up
-    index.optimize(verbose=verbose)
+    index.optimize(verbose=verbose, progress=progress)
+    if progress is not None:
+        progress(table.nrows, 0)
 
     # We cannot do a flush here because when reindexing during a
     # flush, the indexes are created anew, and that creates a nested
@@ -416,6 +1339,125 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
 _column__createIndex = previous_api(_column__create_index)
 
 
+def _table__create_composite_index(self, colpathnames, optlevel, kind,
+                                   filters, tmp_dir, blocksizes, verbose,
+                                   nthreads=None):
+    name = _composite_index_name(colpathnames)
+
+    # Warn if the index already exists
+    if name in self._tableindexes:
+        index = self._get_table_index(name)
+        raise ValueError("%s for columns %s already exists. If you want to "
+                         "re-create it, please, try with reindex() method "
+                         "better" % (str(index), ", ".join(colpathnames)))
+
+    # Check that the datatypes are indexable.
+    itemsize = 0
+    for colpathname in colpathnames:
+        dtype = self.cols._g_col(colpathname).dtype
+        if dtype.kind == 'c':
+            raise TypeError("complex columns can not be indexed")
+        if dtype.shape != ():
+            raise TypeError("multidimensional columns can not be indexed")
+        if dtype.kind == 'f' and dtype.itemsize > 8:
+            raise TypeError("extended precision columns can not be part "
+                            "of a composite index")
+        itemsize += dtype.itemsize
+
+    # The index keys are strings with the encoded values of the columns
+    atom = Atom.from_dtype(numpy.dtype(('S%d' % itemsize, (0,))))
+    return _table__create_table_index(
+        self, CompositeIndex, name, colpathnames, atom,
+        "Composite index for %s columns" % ", ".join(colpathnames),
+        optlevel, kind, filters, tmp_dir, blocksizes, verbose, nthreads,
+        colnames=colpathnames)
+
+
+def _table__create_expr_index(self, expression, optlevel, kind,
+                              filters, tmp_dir, blocksizes, verbose,
+                              nthreads=None):
+    name = _expr_index_name(expression)
+
+    # Warn if the index already exists
+    if name in self._tableindexes:
+        index = self._get_table_index(name)
+        raise ValueError("%s already exists. If you want to re-create it, "
+                         "please, try with reindex() method better"
+                         % str(index))
+
+    # Only top-level columns of the table may appear in the expression.
+    exprvars = self._required_expr_vars(expression, {})
+    if not exprvars:
+        raise ValueError("there are no columns taking part "
+                         "in expression ``%s``" % (expression,))
+    colpathnames = sorted(exprvars)
+
+    # Check that the datatype of the expression is indexable.
+    dtype = numexpr.evaluate(
+        expression, dict((colname, numpy.empty(0, dtype=col.dtype))
+                         for (colname, col) in exprvars.iteritems())).dtype
+    if dtype.kind == 'c':
+        raise TypeError("complex expressions can not be indexed")
+
+    atom = Atom.from_dtype(numpy.dtype((dtype, (0,))))
+    return _table__create_table_index(
+        self, ExpressionIndex, name, colpathnames, atom,
+        "Index for expression ``%s``" % expression,
+        optlevel, kind, filters, tmp_dir, blocksizes, verbose, nthreads,
+        expression=expression, colnames=colpathnames)
+
+
+def _table__create_table_index(self, indexclass, name, colpathnames, atom,
+                               title, optlevel, kind, filters, tmp_dir,
+                               blocksizes, verbose, nthreads=None, **kwargs):
+    get_node = self._v_file._get_node
+
+    # Get the indexes group for table, and if not exists, create it
+    try:
+        itgroup = get_node(_index_pathname_of(self))
+    except NoSuchNodeError:
+        itgroup = create_indexes_table(self)
+
+    # Protection on tables larger than the expected rows
+    expectedrows = self._v_expectedrows
+    if self.nrows > expectedrows:
+        expectedrows = self.nrows
+
+    # Create the index itself
+    index = indexclass(
+        itgroup, name, atom=atom,
+        title=title,
+        kind=kind,
+        optlevel=optlevel,
+        filters=filters,
+        tmp_dir=tmp_dir,
+        expectedrows=expectedrows,
+        byteorder=self.byteorder,
+        blocksizes=blocksizes,
+        **kwargs)
+
+    # Changing the set of indexes invalidates the condition cache
+    self._condition_cache.clear()
+    self._tableindexes[name] = tuple(colpathnames)
+    self.indexed = True
+
+    # Feed the index with values
+    if self.nrows > 0:
+        indexedrows = self._add_rows_to_index(
+            name, 0, self.nrows, lastrow=True, update=False,
+            nthreads=nthreads)
+    else:
+        indexedrows = 0
+    index.dirty = False
+    self._indexedrows = indexedrows
+    self._unsaved_indexedrows = self.nrows - indexedrows
+
+    # Optimize the index that has been already filled-up
+    index.optimize(verbose=verbose)
+
+    return indexedrows
+
+
 class _ColIndexes(dict):
     """Provides a nice representation of column indexes."""
 
@@ -693,6 +1735,34 @@ class Table(tableextension.Table, Leaf):
         None, None,
         """A dictionary with the indexes of the indexed columns.""")
 
+    composite_indexes = property(
+        lambda self: dict(
+            (_index.colnames, _index)
+            for _index in self._get_table_indexes(CompositeIndex)),
+        None, None,
+        """A dictionary with the composite indexes of the table.
+
+        The keys are tuples with the pathnames of the indexed columns
+        (see :meth:`Table.create_index`).
+
+        .. versionadded:: 3.1.2
+
+        """)
+
+    expr_indexes = property(
+        lambda self: dict(
+            (_index.expression, _index)
+            for _index in self._get_table_indexes(ExpressionIndex)),
+        None, None,
+        """A dictionary with the expression indexes of the table.
+
+        The keys are the indexed expressions (see
+        :meth:`Table.create_expr_index`).
+
+        .. versionadded:: 3.1.2
+
+        """)
+
     _dirtyindexes = property(
         lambda self: self._condition_cache._nailcount > 0,
         None, None,
@@ -772,6 +1842,11 @@ class Table(tableextension.Table, Leaf):
         """Maps the name of a column to its default value."""
         self.colindexed = {}
         """Is the column which name is used as a key indexed?"""
+        self._zonemapped = set()
+        """The pathnames of the columns with a zone map."""
+        self._tableindexes = {}
+        """Maps the names of composite and expression indexes to the
+        pathnames of the columns they depend on."""
 
         self._use_index = False
         """Whether an index can be used or not in a search.  Boolean."""
@@ -782,6 +1857,12 @@ class Table(tableextension.Table, Leaf):
         max_slots = parentnode._v_file.params['COND_CACHE_SLOTS']
         self._condition_cache = CacheDict(max_slots)
         """Cache of already compiled conditions."""
+        params = parentnode._v_file.params
+        self._querycache = ObjectCache(params['QUERY_CACHE_MAX_SLOTS'],
+                                       params['QUERY_CACHE_MAX_SIZE'],
+                                       'query cache',
+                                       parentnode._v_file._cache_budget)
+        """Cache of the results of in-kernel queries."""
         self._exprvars_cache = {}
         """Cache of variables participating in numexpr expressions."""
         self._enabled_indexing_in_queries = True
@@ -902,6 +1983,9 @@ class Table(tableextension.Table, Leaf):
             colname = colobj._v_pathname
             # Is this column indexed?
             if igroup:
+                zonemapname = _zonemap_pathname_of_column(self, colname)
+                if zonemapname in self._v_file:
+                    self._zonemapped.add(colname)
                 indexname = _index_pathname_of_column(self, colname)
                 indexed = indexname in self._v_file
                 self.colindexed[colname] = indexed
@@ -923,6 +2007,19 @@ class Table(tableextension.Table, Leaf):
             if indexed:
                 self.indexed = True
 
+        # Look for composite and expression indexes
+        if igroup:
+            itgroup = self._v_file._get_node(indexesgrouppath)
+            for name in list(itgroup._v_children):
+                if not name.startswith(('_m_', '_e_')):
+                    continue
+                indexobj = itgroup._f_get_child(name)
+                if isinstance(indexobj, (CompositeIndex, ExpressionIndex)):
+                    self._tableindexes[name] = indexobj.colnames
+                    if indexobj.dirty:
+                        self._condition_cache.nail()
+                    self.indexed = True
+
         if oldindexes:  # this should only appear under 2.x Pro
             warnings.warn(
                 "table ``%s`` has column indexes with PyTables 1.x format. "
@@ -1327,6 +2424,60 @@ class Table(tableextension.Table, Leaf):
 
     _getConditionKey = previous_api(_get_condition_key)
 
+    def _get_query_key(self, condition, condvars, start, stop, step):
+        """Get the query cache key for `condition` in the given range.
+
+        The key is made of the condition cache key, the values of the
+        normal variables and the range.  A range reaching the end of
+        the table is kept open (with a None `stop`), so that the results
+        can be extended when rows are appended.
+
+        """
+
+        condkey = self._get_condition_key(condition, condvars)
+        values = []
+        for (var, val) in sorted(condvars.iteritems()):
+            if not hasattr(val, 'pathname'):
+                values.append((var, val.dtype.str, val.shape,
+                               val.tostring()))
+        if stop == self.nrows:
+            stop = None
+        return (condkey, tuple(values), (start, stop, step))
+
+    def _query_cache_lookup(self, querykey, extend=False):
+        """Look up the results of a query in the query cache.
+
+        A ``(coords, blocks, resume)`` tuple is returned, where `coords`
+        are the coordinates of the rows known to fulfill the query (or
+        None if the query is not cached), `blocks` are the compressed
+        blocks holding them and `resume` is the row where the query must
+        be resumed in order to get the rows appended to the table after
+        the results were cached.  If `extend` is true, these results are
+        removed from the cache, since they are going to be extended.
+
+        """
+
+        nslot = self._querycache.getslot(querykey)
+        if nslot < 0:
+            return (None, (), None)
+        (start, stop, step) = querykey[2]
+        resume, blocks = self._querycache.getitem(nslot)
+        if resume > self.nrows:
+            # This should never happen, but be safe
+            self._querycache.removeslot(nslot)
+            return (None, (), None)
+        if stop is None and resume < self.nrows:
+            # Go on with the first row in range not yet checked
+            resume = start + -(-(resume - start) // step) * step
+            if extend:
+                self._querycache.removeslot(nslot)
+        if blocks:
+            coords = numpy.concatenate(
+                [_decompress_coords(*block) for block in blocks])
+        else:
+            coords = numpy.array([], dtype='int64')
+        return (coords, blocks, resume)
+
     def _compile_condition(self, condition, condvars):
         """Compile the `condition` and extract usable index conditions.
 
@@ -1359,14 +2510,43 @@ class Table(tableextension.Table, Leaf):
             coltype = col.dtype.type
             typemap[colname] = _nxtype_from_nptype[coltype]
 
-            # Get the set of columns with usable indexes.
-            if (self._enabled_indexing_in_queries  # not test in-kernel searches
-                    and self.colindexed[col.pathname] and not col.index.dirty):
+            # Get the set of columns with usable indexes or zone maps.
+            if not self._enabled_indexing_in_queries:
+                continue  # not test in-kernel searches
+            if ((self.colindexed[col.pathname] and not col.index.dirty)
+                    or col.pathname in self._zonemapped):
                 indexedcols.append(colname)
 
         indexedcols = frozenset(indexedcols)
+
+        # Get the variables for the leading columns of composite indexes
+        # and the expressions with an index.
+        compositecols = []
+        indexedexprs = []
+        if self._enabled_indexing_in_queries:
+            colvars = dict((colpath, colname)
+                           for (colname, colpath) in zip(colnames, colpaths))
+            for (name, indexcols) in self._tableindexes.iteritems():
+                index = self._get_table_index(name)
+                if index.dirty:
+                    continue
+                if isinstance(index, ExpressionIndex):
+                    if set(indexcols).issubset(colvars):
+                        varmap = dict((colpath, colvars[colpath])
+                                      for colpath in indexcols)
+                        indexedexprs.append((name, index.expression, varmap))
+                    continue
+                cvars = []
+                for colpath in indexcols:
+                    if colpath not in colvars:
+                        break
+                    cvars.append(colvars[colpath])
+                if cvars:
+                    compositecols.append(tuple(cvars))
+
         # Now let ``compile_condition()`` do the Numexpr-related job.
-        compiled = compile_condition(condition, typemap, indexedcols)
+        compiled = compile_condition(condition, typemap, indexedcols,
+                                     compositecols, indexedexprs)
 
         # Check that there actually are columns in the condition.
         if not set(compiled.parameters).intersection(set(colnames)):
@@ -1385,7 +2565,10 @@ class Table(tableextension.Table, Leaf):
         The meaning of the condition and *condvars* arguments is the same as in
         the :meth:`Table.where` method. If condition can use indexing, this
         method returns a frozenset with the path names of the columns whose
-        index is usable. Otherwise, it returns an empty list.
+        index (or zone map, see :meth:`Column.create_zonemap`) is usable.
+        For expression indexes (see :meth:`Table.create_expr_index`), the
+        columns in the expression are included.  Otherwise, it returns an
+        empty list.
 
         This method is mainly intended for testing. Keep in mind that changing
         the set of indexed columns or their dirtiness may make this method
@@ -1397,7 +2580,12 @@ class Table(tableextension.Table, Leaf):
         condvars = self._required_expr_vars(condition, condvars, depth=2)
         compiled = self._compile_condition(condition, condvars)
         # Return the columns in indexed expressions
-        idxcols = [condvars[var].pathname for var in compiled.index_variables]
+        idxcols = []
+        for var in compiled.index_variables:
+            if var in condvars:
+                idxcols.append(condvars[var].pathname)
+            else:  # the sub-expression of an expression index
+                idxcols.extend(self._tableindexes[var])
         return frozenset(idxcols)
 
     willQueryUseIndexing = previous_api(will_query_use_indexing)
@@ -1519,17 +2707,26 @@ class Table(tableextension.Table, Leaf):
 
         # Can we use indexes?
         if compiled.index_expressions:
-            chunkmap = _table__where_indexed(
+            chunkmap, coords = _table__where_indexed(
                 self, compiled, condition, condvars, start, stop, step)
-            if not isinstance(chunkmap, numpy.ndarray):
-                # If it is not a NumPy array it should be an iterator
+            if coords is not None:
+                # The matching rows are already known
                 # Reset conditions
                 self._use_index = False
                 self._where_condition = None
-                # ...and return the iterator
-                return chunkmap
+                # ...and return an iterator over them
+                return self.itersequence(coords)
         else:
             chunkmap = None  # default to an in-kernel query
+            if self._v_file.params['QUERY_CACHE_MAX_SIZE'] > 0:
+                # The results may be in the query cache already
+                querykey = self._get_query_key(condition, condvars,
+                                               start, stop, step)
+                coords, blocks, resume = self._query_cache_lookup(querykey)
+                if coords is not None and resume >= stop:
+                    self._use_index = False
+                    self._where_condition = None
+                    return self.itersequence(coords)
 
         args = [condvars[param] for param in compiled.parameters]
         self._where_condition = (compiled.function, args)
@@ -1538,8 +2735,232 @@ class Table(tableextension.Table, Leaf):
             show_stats("Exiting table._where", tref)
         return row._iter(start, stop, step, chunkmap=chunkmap)
 
+    def _where_buffers(self, condition, condvars, start=None, stop=None,
+                       step=None, nthreads=None, depth=3):
+        """Iterate over the I/O buffers of a query on `condition`.
+
+        This is the bulk counterpart of `self._where()`: instead of
+        yielding a `Row` for every matching row, it yields a ``(coords,
+        buf, valid)`` tuple for every buffer of rows read from disk.
+        `coords` is an array with the table coordinates of the rows in
+        the `buf` structured array, and `valid` is a boolean array
+        telling which of them fulfill the condition and are inside the
+        requested range.  Hence, the cost of the selection depends on
+        the number of buffers and not on the number of matching rows.
+
+        The `buf` array is reused between iterations, so its contents
+        must be consumed (or copied) before getting the next buffer.
+
+        `nthreads` is the number of threads used for evaluating the
+        condition; if None, the ``QUERY_THREADS`` parameter is used.
+        `depth` has the same meaning than in
+        `self._required_expr_vars()`.
+
+        """
+
+        # Adjust the slice to be used.
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        if start >= stop:  # empty range
+            return iter([])
+
+        # Compile the condition and extract usable index conditions.
+        condvars = self._required_expr_vars(condition, condvars, depth=depth)
+        compiled = self._compile_condition(condition, condvars)
+        args = [condvars[param] for param in compiled.parameters]
+
+        # Can we use indexes?
+        chunkmap, seqkey = None, None
+        if compiled.index_expressions:
+            chunkmap, coords = _table__where_indexed(
+                self, compiled, condition, condvars, start, stop, step)
+            self._use_index = False
+            # The buffers below will take care of the sequence cache
+            seqkey, self._seqcache_key = self._seqcache_key, None
+            if coords is not None:
+                # The matching rows are already known
+                return self._iter_coords_buffers(coords)
+        if nthreads is None:
+            nthreads = self._v_file.params['QUERY_THREADS']
+        if (not compiled.index_expressions and
+                self._v_file.params['QUERY_CACHE_MAX_SIZE'] > 0):
+            # In-kernel query: look its results up in the query cache
+            querykey = self._get_query_key(condition, condvars,
+                                           start, stop, step)
+            coords, blocks, resume = self._query_cache_lookup(
+                querykey, extend=True)
+            if coords is not None and resume >= stop:
+                return self._iter_coords_buffers(coords)
+            if coords is not None:
+                # The table has grown: only check the appended rows
+                start = resume
+            buffers = self._iter_where_buffers(compiled, args,
+                                               start, stop, step,
+                                               nthreads=nthreads)
+            return self._iter_cached_query_buffers(querykey, coords, blocks,
+                                                   buffers, stop)
+        return self._iter_where_buffers(compiled, args,
+                                        start, stop, step, chunkmap, seqkey,
+                                        nthreads)
+
+    def _iter_coords_buffers(self, coords):
+        """Yield the buffers for a query whose results are already known."""
+
+        nrowsinbuf = self.nrowsinbuf
+        for bstart in xrange(0, len(coords), nrowsinbuf):
+            bcoords = coords[bstart:bstart + nrowsinbuf]
+            buf = self._read_coordinates(bcoords)
+            yield (bcoords, buf, numpy.ones(len(bcoords), dtype=bool))
+
+    def _iter_cached_query_buffers(self, querykey, coords, blocks, buffers,
+                                   stop):
+        """Yield the buffers for an in-kernel query, caching its results.
+
+        The buffers for the already known `coords` (if any) come first,
+        and then the `buffers` of the rows still to be checked (up to
+        `stop`).  The coordinates of the matching rows in the latter are
+        compressed and added to `blocks`, which is put in the query
+        cache once all the buffers have been consumed (and if it is not
+        too large).
+
+        """
+
+        if coords is not None:
+            for buffer_ in self._iter_coords_buffers(coords):
+                yield buffer_
+        maxsize = self._v_file.params['QUERY_CACHE_MAX_SIZE']
+        blocks = list(blocks)
+        size = sum(len(block[2]) for block in blocks)
+        for bcoords, buf, valid in buffers:
+            if blocks is not None and valid.any():
+                block = _compress_coords(bcoords[valid])
+                size += len(block[2])
+                if size < maxsize:
+                    blocks.append(block)
+                else:
+                    blocks = None
+            yield (bcoords, buf, valid)
+
+        if blocks is not None and querykey not in self._querycache:
+            # Every block takes some bytes more than its data
+            self._querycache.setitem(querykey, (stop, tuple(blocks)),
+                                     size + 64 * len(blocks) + 1)
+
+    def _iter_where_buffers(self, compiled, condargs, start, stop, step,
+                            chunkmap=None, seqkey=None, nthreads=1):
+        """Yield the buffers for an in-kernel or indexed query.
+
+        When `nthreads` is greater than 1, the buffers are still read
+        from disk by the calling thread (HDF5 is not thread-safe), but
+        the `compiled` condition is evaluated in a pool of `nthreads`
+        worker threads (with an instance of its function each), so that
+        I/O and computation overlap.  The buffers are yielded in row
+        order anyway.
+
+        """
+
+        nrowsinbuf = self.nrowsinbuf
+        if chunkmap is None:
+            nrowsinbuf = min(nrowsinbuf, (stop - start - 1) // step + 1)
+        else:
+            nrowsinchunk = self.chunkshape[0]
+            nrowsinbuf = max(nrowsinbuf // nrowsinchunk, 1) * nrowsinchunk
+        if seqkey is not None:
+            iterseq_max_elements = self._v_file.params['ITERSEQ_MAX_ELEMENTS']
+            iterseq = []
+        else:
+            iterseq = None
+
+        local = threading.local()
+
+        def evaluate(coords, buf):
+            if nthreads > 1:
+                if not hasattr(local, 'condfunc'):
+                    local.condfunc = compiled.new_function()
+                condfunc = local.condfunc
+            else:
+                condfunc = compiled.function
+            valid = call_on_recarr(condfunc, condargs, buf)
+            if chunkmap is not None:
+                # Discard the rows in candidate chunks which are out of range
+                valid &= (coords >= start) & (coords < stop)
+                if step > 1:
+                    valid &= ((coords - start) % step == 0)
+            return (coords, buf, valid)
+
+        if nthreads > 1:
+            # Every buffer in flight needs its own I/O buffer
+            maxpending = 2 * nthreads
+            iobufs = [self._get_container(nrowsinbuf)
+                      for i in xrange(maxpending)]
+        else:
+            iobufs = [self._get_container(nrowsinbuf)]
+        segments = self._read_where_segments(start, stop, step,
+                                             chunkmap, iobufs)
+        if nthreads > 1:
+            results = map_in_threads(evaluate, segments,
+                                     nthreads, maxpending)
+        else:
+            results = (evaluate(coords, buf) for coords, buf in segments)
+
+        for coords, buf, valid in results:
+            if iterseq is not None:
+                vcoords = coords[valid]
+                if len(iterseq) + len(vcoords) < iterseq_max_elements:
+                    iterseq.extend(vcoords.tolist())
+                else:
+                    iterseq = None
+            yield (coords, buf, valid)
+
+        if iterseq is not None:
+            # Guessing iterseq size: each element takes at least 8 bytes
+            self._seqcache.setitem(seqkey, iterseq, len(iterseq) * 8 + 1)
+
+    def _read_where_segments(self, start, stop, step, chunkmap, iobufs):
+        """Read the rows to be checked by a query, one buffer at a time.
+
+        Yields ``(coords, buf)`` tuples.  The `iobufs` containers are
+        used in turn for holding the data read.
+
+        """
+
+        nbufs = len(iobufs)
+        if chunkmap is None:
+            # In-kernel query: only the rows in range need to be read.
+            bufstep = len(iobufs[0]) * step
+            for i, bstart in enumerate(xrange(start, stop, bufstep)):
+                bstop = min(bstart + bufstep, stop)
+                coords = numpy.arange(bstart, bstop, step, dtype='int64')
+                iobuf = iobufs[i % nbufs]
+                buf = self._read(bstart, bstop, step,
+                                 out=iobuf[:len(coords)])
+                yield (coords, buf)
+            return
+
+        # Indexed query: fill the buffer with the candidate chunks only.
+        nrowsinchunk = self.chunkshape[0]
+        nchunksinbuf = len(iobufs[0]) // nrowsinchunk
+        firstchunk = start // nrowsinchunk
+        lastchunk = (stop - 1) // nrowsinchunk + 1
+        if len(chunkmap) < lastchunk:
+            # Rows not covered by the index are always candidates
+            chunkmap = numpy.concatenate(
+                (chunkmap, numpy.ones(lastchunk - len(chunkmap), dtype=bool)))
+        candidates = chunkmap[firstchunk:lastchunk].nonzero()[0] + firstchunk
+        for i in xrange(0, len(candidates), nchunksinbuf):
+            iobuf = iobufs[(i // nchunksinbuf) % nbufs]
+            nrecords = 0
+            coords = []
+            for nchunk in candidates[i:i + nchunksinbuf]:
+                cstart = nchunk * nrowsinchunk
+                recout = self._read_records(cstart, nrowsinchunk,
+                                            iobuf[nrecords:])
+                coords.append(numpy.arange(cstart, cstart + recout,
+                                           dtype='int64'))
+                nrecords += recout
+            yield (numpy.concatenate(coords), iobuf[:nrecords])
+
     def read_where(self, condition, condvars=None, field=None,
-                   start=None, stop=None, step=None):
+                   start=None, stop=None, step=None, nthreads=None):
         """Read table data fulfilling the given *condition*.
 
         This method is similar to :meth:`Table.read`, having their common
@@ -1547,23 +2968,35 @@ class Table(tableextension.Table, Leaf):
         fulfilling the *condition* are included in the result.
 
         The meaning of the other arguments is the same as in the
-        :meth:`Table.where` method.
+        :meth:`Table.where` method, except for *nthreads*, which is the
+        number of threads used for evaluating the condition while the
+        data is being read (the ``QUERY_THREADS`` parameter is used if
+        it is None).  See :data:`parameters.QUERY_THREADS`.
+
+        .. versionchanged:: 3.1.2
+           The matching rows are gathered directly from the I/O buffers,
+           without creating a Row instance for each of them.  The
+           *nthreads* argument was added.
 
         """
 
         self._g_check_open()
-        coords = [p.nrow for p in
-                  self._where(condition, condvars, start, stop, step)]
-        self._where_condition = None  # reset the conditions
-        if len(coords) > 1:
-            cstart, cstop = coords[0], coords[-1] + 1
-            if cstop - cstart == len(coords):
-                # Chances for monotonically increasing row values. Refine.
-                inc_seq = numpy.alltrue(
-                    numpy.arange(cstart, cstop) == numpy.array(coords))
-                if inc_seq:
-                    return self.read(cstart, cstop, field=field)
-        return self.read_coordinates(coords, field)
+        if field:
+            self._check_column(field)
+
+        values = []
+        for coords, buf, valid in self._where_buffers(
+                condition, condvars, start, stop, step, nthreads):
+            if field:
+                buf = get_nested_field(buf, field)
+            values.append(buf[valid])
+        if values:
+            result = numpy.concatenate(values)
+        else:
+            result = self._get_container(0)
+            if field:
+                result = get_nested_field(result, field)
+        return internal_to_flavor(result, self.flavor)
 
     readWhere = previous_api(read_where)
 
@@ -1605,7 +3038,7 @@ class Table(tableextension.Table, Leaf):
     whereAppend = previous_api(append_where)
 
     def get_where_list(self, condition, condvars=None, sort=False,
-                       start=None, stop=None, step=None):
+                       start=None, stop=None, step=None, nthreads=None):
         """Get the row coordinates fulfilling the given condition.
 
         The coordinates are returned as a list of the current flavor.  sort
@@ -1613,23 +3046,483 @@ class Table(tableextension.Table, Leaf):
         to not sort them.
 
         The meaning of the other arguments is the same as in the
-        :meth:`Table.where` method.
+        :meth:`Table.read_where` method.
+
+        .. versionchanged:: 3.1.2
+           The *nthreads* argument was added.
 
         """
 
         self._g_check_open()
 
-        coords = [p.nrow for p in
-                  self._where(condition, condvars, start, stop, step)]
-        coords = numpy.array(coords, dtype=SizeType)
-        # Reset the conditions
-        self._where_condition = None
+        coords = [bcoords[valid] for bcoords, buf, valid in
+                  self._where_buffers(condition, condvars, start, stop, step,
+                                      nthreads)]
+        if coords:
+            coords = numpy.concatenate(coords).astype(SizeType)
+        else:
+            coords = numpy.array([], dtype=SizeType)
         if sort:
             coords = numpy.sort(coords)
         return internal_to_flavor(coords, self.flavor)
 
     getWhereList = previous_api(get_where_list)
 
+    def aggregate(self, condition, aggregates, condvars=None,
+                  start=None, stop=None, step=None):
+        """Compute reductions over the rows fulfilling the given condition.
+
+        The *aggregates* argument is a mapping from output names to
+        ``(colname, func)`` tuples, where *colname* is the path name of
+        a column and *func* is one of ``'count'``, ``'sum'``, ``'min'``,
+        ``'max'`` or ``'mean'``.  A dictionary with the same keys than
+        *aggregates* and the reduced values is returned.  The ``min``,
+        ``max`` and ``mean`` of an empty selection are None, while its
+        ``sum`` and ``count`` are zero.
+
+        If *condition* is None, all the rows in the range are reduced.
+        Otherwise, the meaning of *condition* and the rest of arguments
+        is the same as in the :meth:`Table.where` method.
+
+        The reductions are computed on every I/O buffer as it is read,
+        so no more than one buffer of rows is kept in memory.  Besides,
+        counts of conditions fully solved by an index and the minimum
+        and maximum of indexed columns over the whole table are computed
+        from the indexes without reading the table at all.
+
+        Examples
+        --------
+
+        ::
+
+            result = table.aggregate('col1 > x', {'total': ('col3', 'sum'),
+                                                  'n': ('col3', 'count')})
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+
+        reductions = []
+        for outname, (colname, func) in aggregates.iteritems():
+            self._check_column(colname)
+            reductions.append(
+                (outname, colname, _Reduction(func, self.coldtypes[colname])))
+
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        compiled = None
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars, depth=2)
+            compiled = self._compile_condition(condition, condvars)
+
+        # First, try to get the results without reading the table.
+        results = {}
+        pending = []
+        for outname, colname, reduction in reductions:
+            shortcut = self._aggregate_shortcut(
+                colname, reduction.func, compiled, condvars, start, stop, step)
+            if shortcut is not None:
+                results[outname] = shortcut[0]
+            else:
+                pending.append((outname, colname, reduction))
+        if not pending:
+            return results
+
+        # Then compute the remaining reductions buffer by buffer.
+        if start >= stop:
+            buffers = iter([])
+        elif condition is None:
+            buffers = ((coords, buf, None) for coords, buf in
+                       self._read_where_segments(
+                           start, stop, step, None,
+                           [self._get_container(self.nrowsinbuf)]))
+        else:
+            buffers = self._where_buffers(condition, condvars,
+                                          start, stop, step)
+        for coords, buf, valid in buffers:
+            for outname, colname, reduction in pending:
+                values = get_nested_field(buf, colname)
+                if valid is not None:
+                    values = values[valid]
+                reduction.update(values)
+        for outname, colname, reduction in pending:
+            results[outname] = reduction.result()
+        return results
+
+    def _aggregate_shortcut(self, colname, func, compiled, condvars,
+                            start, stop, step):
+        """Try to compute a reduction without reading the table.
+
+        A one-element tuple with the result is returned on success, and
+        None if the table must be read.
+
+        """
+
+        if func == 'count' and compiled is None:
+            return (max(0, (stop - start + step - 1) // step),)
+        if (start, stop, step) != (0, self.nrows, 1):
+            return None
+
+        if func == 'count' and compiled.index_complete:
+            # The condition is a single comparison solved by an index.
+            var, ops, lims = compiled.index_expressions[0]
+            index = self._get_expr_index(var, condvars)
+            if (index is not None and not index.dirty and
+                    index.reduction == 1 and index.nelements == self.nrows):
+                return (index.search(index.get_lookup_range(ops, lims)),)
+        elif func in ('min', 'max') and compiled is None:
+            if self.colindexed.get(colname) and self.nrows > 0:
+                index = self.cols._f_col(colname).index
+                if (not index.dirty and index.reduction == 1 and
+                        index.ndeltarows == 0 and
+                        index.nelements == self.nrows):
+                    minvalue, maxvalue = index.get_minmax()
+                    return (minvalue if func == 'min' else maxvalue,)
+        return None
+
+    def groupby(self, keys, aggs, condition=None, condvars=None,
+                start=None, stop=None, step=None, out=None, tmp_dir=None):
+        """Compute reductions over groups of rows with the same keys.
+
+        The *keys* argument is the path name of a column (or a sequence
+        of them) whose values define the groups, and *aggs* is a mapping
+        from output names to ``(colname, func)`` tuples, as in
+        :meth:`Table.aggregate`.  Only the rows fulfilling *condition*
+        (if given) are grouped; the meaning of *condition* and the rest
+        of arguments is the same as in the :meth:`Table.where` method.
+
+        The result is a structured array with a field for every key
+        column followed by a field for every output name, with one row
+        per group, sorted by the keys.  All the NaN values of a key
+        column are considered equal, so their rows make a single group,
+        which is sorted after the others.  If a table is passed in *out*,
+        the results are appended to it instead, and the table is
+        returned; in this case, the results are never kept in memory as
+        a whole.
+
+        Groups are accumulated in memory buffer by buffer.  When more
+        than :data:`parameters.GROUPBY_MAX_SIZE` bytes are needed, the
+        accumulated groups are written as sorted runs into a temporary
+        file in *tmp_dir* (by default, the directory of this file),
+        which are merged at the end.  If there is a single key column
+        with a CSI index (see :meth:`Column.create_csindex`), the rows
+        are read following the order of the index, so that every group
+        is finished as soon as its last row is read, and no temporary
+        storage is needed at all.
+
+        Examples
+        --------
+
+        ::
+
+            result = table.groupby('sensor', {'n': ('value', 'count'),
+                                              'avg': ('value', 'mean')},
+                                   condition='value > 0')
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        if isinstance(keys, basestring):
+            keys = [keys]
+        if not keys:
+            raise ValueError("at least one key column must be given")
+        keydtypes = []
+        for colname in keys:
+            self._check_column(colname)
+            dtype = self.coldtypes[colname]
+            if dtype.shape != ():
+                raise TypeError("key column ``%s`` is multidimensional; "
+                                "only scalar columns can be keys" % colname)
+            keydtypes.append((colname, dtype))
+        aggdtypes = []
+        for outname, (colname, func) in aggs.iteritems():
+            self._check_column(colname)
+            aggdtypes.append((outname, colname, func,
+                              self.coldtypes[colname]))
+        if tmp_dir is None:
+            tmp_dir = os.path.dirname(self._v_file.filename)
+        acc = _GroupAccumulator(keydtypes, aggdtypes,
+                                self._v_file.params['GROUPBY_MAX_SIZE'],
+                                tmp_dir)
+
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars, depth=2)
+
+        index = None
+        if len(keys) == 1 and self.colindexed[keys[0]]:
+            index = self.cols._f_col(keys[0]).index
+            if (index.dirty or not index.is_csi or index.ndeltarows > 0 or
+                    index.nelements != self.nrows):
+                index = None
+        if start >= stop:
+            results = iter([])
+        elif index is not None:
+            results = self._groupby_sorted(acc, index, condition, condvars,
+                                           start, stop, step)
+        else:
+            results = self._groupby_hashed(acc, condition, condvars,
+                                           start, stop, step)
+
+        if out is not None:
+            for result in results:
+                out.append(result)
+            out.flush()
+            return out
+        results = list(results)
+        if not results:
+            result = acc.finalize(numpy.empty(0, acc.statedtype))
+        elif len(results) == 1:
+            result = results[0]
+        else:
+            result = numpy.concatenate(results)
+        return internal_to_flavor(result, self.flavor)
+
+    def _groupby_hashed(self, acc, condition, condvars, start, stop, step):
+        """Group the rows in the range in the order they are stored."""
+
+        if condition is None:
+            buffers = ((coords, buf, None) for coords, buf in
+                       self._read_where_segments(
+                           start, stop, step, None,
+                           [self._get_container(self.nrowsinbuf)]))
+        else:
+            buffers = self._where_buffers(condition, condvars,
+                                          start, stop, step)
+        for coords, buf, valid in buffers:
+            if valid is not None:
+                buf = buf[valid]
+            acc.update(buf)
+        return acc.results(self.nrowsinbuf)
+
+    def _groupby_sorted(self, acc, index, condition, condvars,
+                        start, stop, step):
+        """Group the rows in the range following the order of `index`."""
+
+        if condition is not None:
+            compiled = self._compile_condition(condition, condvars)
+            condargs = [condvars[param] for param in compiled.parameters]
+        nrowsinbuf = self.nrowsinbuf
+        lastgroup = None
+        for istart in xrange(0, index.nelements, nrowsinbuf):
+            coords = index.read_indices(
+                istart, min(istart + nrowsinbuf, index.nelements))
+            coords = coords.astype('int64')
+            if (start, stop, step) != (0, self.nrows, 1):
+                coords = coords[(coords >= start) & (coords < stop) &
+                                ((coords - start) % step == 0)]
+            buf = self._read_coordinates(coords)
+            if condition is not None:
+                buf = buf[call_on_recarr(compiled.function, condargs, buf)]
+            states = acc.states(buf)
+            if lastgroup is not None:
+                states = numpy.concatenate((lastgroup, states))
+            groups = acc.reduce(states)
+            # The last group may continue in the next buffer
+            lastgroup = groups[-1:]
+            if len(groups) > 1:
+                yield acc.finalize(groups[:-1])
+        if lastgroup is not None:
+            yield acc.finalize(lastgroup)
+
+    def join(self, other, on, how='inner', out=None, tmp_dir=None):
+        """Join the rows of this table with the ones of *other* by key.
+
+        The *on* argument is the path name of a column (or a sequence of
+        them) in both tables, whose values are the keys to match, and
+        *how* is the kind of join:
+
+        * ``'inner'``: every pair of rows with equal keys gives a result
+          row.
+        * ``'left'``: like ``'inner'``, but the rows in this table with
+          no matching rows in *other* give a result row too, with the
+          default values of the columns in *other*.
+        * ``'asof'``: every row in this table is matched with the row in
+          *other* with the greatest key not greater than its own, as long
+          as the values of all the key columns but the last one are
+          equal.  For instance, ``on=('symbol', 'ts')`` matches every
+          trade with the last quote of its symbol at the time of the
+          trade.  Rows with no match get default values, as in
+          ``'left'``.
+
+        The result is a structured array with the fields of this table
+        followed by the ones of *other* but the key columns (with a
+        ``_right`` suffix for the names already in use), with the rows
+        sorted by key.  If a table is passed in *out*, the results are
+        appended to it instead, and the table is returned; in this case,
+        the results are never kept in memory as a whole.
+
+        Both tables are walked in key order at the same time, so only
+        the rows with the keys being matched are kept in memory.  If a
+        table has a CSI index for the key column (or a completely sorted
+        composite index whose leading columns are the key columns, see
+        :meth:`Table.create_index`), it gives the order of its rows.
+        Otherwise, the keys of the table are sorted with up to
+        :data:`parameters.JOIN_MAX_SIZE` bytes of memory, and the sorted
+        runs beyond that are written into a temporary file in *tmp_dir*
+        (by default, the directory of this file) and merged.
+
+        Examples
+        --------
+
+        ::
+
+            result = trades.join(quotes, on=('symbol', 'ts'), how='asof')
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        other._g_check_open()
+        if how not in _join_kinds:
+            raise ValueError("unknown kind of join ``%s``; valid ones are: "
+                             "%s" % (how, ", ".join(_join_kinds)))
+        if isinstance(on, basestring):
+            on = [on]
+        on = list(on)
+        if not on:
+            raise ValueError("at least one key column must be given")
+        keydtypes = []
+        for colname in on:
+            self._check_column(colname)
+            other._check_column(colname)
+            ldtype = self.coldtypes[colname]
+            rdtype = other.coldtypes[colname]
+            if ldtype.shape != () or rdtype.shape != ():
+                raise TypeError("key column ``%s`` is multidimensional; "
+                                "only scalar columns can be keys" % colname)
+            if ((ldtype.kind == 'S') != (rdtype.kind == 'S') or
+                    'c' in (ldtype.kind, rdtype.kind)):
+                raise TypeError("key column ``%s`` has types that can not "
+                                "be matched: %s and %s"
+                                % (colname, ldtype, rdtype))
+            keydtypes.append(numpy.promote_types(ldtype, rdtype))
+        if tmp_dir is None:
+            tmp_dir = os.path.dirname(self._v_file.filename)
+
+        # The fields of the result
+        ldtype, rdtype = self.dtype, other.dtype
+        outfields = [(name, ldtype.fields[name][0]) for name in ldtype.names]
+        rfields = []
+        for name in rdtype.names:
+            if name in on:
+                continue
+            outname = name + '_right' if name in ldtype.names else name
+            rfields.append((name, outname))
+            outfields.append((outname, rdtype.fields[name][0]))
+        outdtype = numpy.dtype(outfields)
+
+        maxsize = self._v_file.params['JOIN_MAX_SIZE']
+        matches = _merge_join(
+            self._join_key_blocks(on, keydtypes, maxsize, tmp_dir),
+            other._join_key_blocks(on, keydtypes, maxsize, tmp_dir),
+            how, sum(dtype.itemsize for dtype in keydtypes[:-1]))
+        results = self._join_rows(other, matches, outdtype, rfields)
+
+        if out is not None:
+            for result in results:
+                out.append(result)
+            out.flush()
+            return out
+        results = list(results)
+        if not results:
+            result = numpy.empty(0, outdtype)
+        elif len(results) == 1:
+            result = results[0]
+        else:
+            result = numpy.concatenate(results)
+        return internal_to_flavor(result, self.flavor)
+
+    def _join_index(self, on, dtypes):
+        """Get a completely sorted index giving the order of the `on` keys.
+
+        None is returned if there is no such index.
+
+        """
+
+        if len(on) == 1:
+            if not self.colindexed[on[0]]:
+                return None
+            indexes = [self.cols._f_col(on[0]).index]
+        else:
+            indexes = [index for colnames, index
+                       in self.composite_indexes.iteritems()
+                       if colnames[:len(on)] == tuple(on)]
+            # The keys in the index must be encoded like the join ones
+            if [self.coldtypes[colname] for colname in on] != dtypes:
+                return None
+        for index in indexes:
+            if (index.is_csi and not index.dirty and
+                    index.ndeltarows == 0 and
+                    index.nelements == self.nrows):
+                return index
+        return None
+
+    def _join_key_blocks(self, on, dtypes, maxsize, tmp_dir):
+        """Yield ``(keys, coords)`` blocks with the rows in key order.
+
+        The keys are the encodings of the values of the `on` columns,
+        cast to `dtypes`, which sort like the values themselves (see
+        `_composite_keys()`).
+
+        """
+
+        nrowsinbuf = self.nrowsinbuf
+        keysize = sum(dtype.itemsize for dtype in dtypes)
+        index = self._join_index(on, dtypes)
+        if index is not None:
+            for start in xrange(0, index.nelements, nrowsinbuf):
+                stop = min(start + nrowsinbuf, index.nelements)
+                keys = index.read_sorted(start, stop)
+                if isinstance(index, CompositeIndex):
+                    keys = _truncate_keys(keys, keysize)
+                else:
+                    keys = _composite_keys([keys.astype(dtypes[0])])
+                coords = index.read_indices(start, stop)
+                yield (keys, coords.astype('int64'))
+            return
+
+        runs = _SortedRuns(keysize, maxsize, tmp_dir)
+        for start in xrange(0, self.nrows, nrowsinbuf):
+            stop = min(start + nrowsinbuf, self.nrows)
+            keys = _composite_keys(
+                [self.read(start, stop, field=colname).astype(dtype)
+                 for colname, dtype in zip(on, dtypes)])
+            runs.add(keys, numpy.arange(start, stop, dtype='int64'))
+        for block in runs.results(nrowsinbuf):
+            yield block
+
+    def _join_rows(self, other, matches, outdtype, rfields):
+        """Yield arrays with the rows for the `matches` coordinates.
+
+        `rfields` is a sequence of ``(name, outname)`` tuples with the
+        fields of `other` in the result.
+
+        """
+
+        nrowsinbuf = self.nrowsinbuf
+        defaults = other._v_wdflts
+        for lmatches, rmatches in matches:
+            for start in xrange(0, len(lmatches), nrowsinbuf):
+                lcoords = lmatches[start:start + nrowsinbuf]
+                rcoords = rmatches[start:start + nrowsinbuf]
+                result = numpy.empty(len(lcoords), outdtype)
+                lrows = self._read_coordinates(lcoords)
+                for name in lrows.dtype.names:
+                    result[name] = lrows[name]
+                matched = rcoords >= 0
+                rrows = other._read_coordinates(rcoords[matched])
+                for name, outname in rfields:
+                    column = result[outname]
+                    if not matched.all():
+                        column[:] = defaults[name]
+                    column[matched] = rrows[name]
+                yield result
+
     def itersequence(self, sequence):
         """Iterate over a sequence of row coordinates.
 
@@ -1669,6 +3562,9 @@ class Table(tableextension.Table, Leaf):
                 "`sortby` can only be a `Column` or string object, "
                 "but you passed an object of type: %s" % type(sortby))
         if icol.is_indexed and icol.index.kind == "full":
+            if icol.index.ndeltarows > 0:
+                # Merge the modified rows so that the index order is right
+                icol.index.compact()
             if checkCSI and not icol.index.is_csi:
                 # The index exists, but it is not a CSI one.
                 raise ValueError(
@@ -1743,7 +3639,144 @@ class Table(tableextension.Table, Leaf):
 
     readSorted = previous_api(read_sorted)
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def read_topk(self, sortby, k, condition=None, reverse=True,
+                  condvars=None, field=None):
+        """Read the k table rows with the largest values of a column.
+
+        The *sortby* argument is a :class:`Column` instance or the
+        pathname of a column, and the *k* rows with its largest values
+        (or the smallest ones, if *reverse* is false) are returned,
+        sorted in descending order (ascending if *reverse* is false).
+        Only the rows fulfilling *condition* (if given) are considered;
+        the meaning of *condition* and *condvars* is the same as in the
+        :meth:`Table.where` method.  The meaning of *field* is the same
+        as in :meth:`Table.read_sorted`.  Less than *k* rows are
+        returned if not enough of them fulfill the condition, and the
+        order of rows with equal values is not specified.  Rows with NaN
+        values in the *sortby* column are never returned.
+
+        When the *sortby* column has a completely sorted index (see
+        :meth:`Column.create_csindex`), it is walked from its end and
+        the table rows are only read until *k* matching ones are found.
+        Otherwise, the table is read buffer by buffer and only the best
+        *k* candidates are kept, so the memory used does not depend on
+        the size of the table.
+
+        Examples
+        --------
+
+        ::
+
+            best = table.read_topk('price', 100, 'symbol == b"ABC"')
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        if isinstance(sortby, Column):
+            sortby = sortby.pathname
+        col = self.cols._f_col(sortby)
+        if not isinstance(col, Column):
+            raise TypeError("column ``%s`` is nested, it can not be used "
+                            "for sorting" % sortby)
+        if col.shape[1:] != ():
+            raise TypeError("column ``%s`` is multidimensional, it can "
+                            "not be used for sorting" % sortby)
+        if k < 0:
+            raise ValueError("k must be a non-negative integer: %r" % (k,))
+
+        compiled = None
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars, depth=2)
+            compiled = self._compile_condition(condition, condvars)
+
+        if k == 0 or self.nrows == 0:
+            coords = numpy.array([], dtype='int64')
+        elif (col.is_indexed and col.index.kind == 'full' and
+                col.index.is_csi and not col.index.dirty and
+                col.index.ndeltarows == 0 and
+                col.index.nelements == self.nrows):
+            coords = self._read_topk_indexed(col.index, k, compiled,
+                                             condvars, reverse)
+        else:
+            coords = self._read_topk_buffered(col.pathname, k, condition,
+                                              condvars, reverse)
+        return self.read_coordinates(coords, field)
+
+    def _read_topk_indexed(self, index, k, compiled, condvars, reverse):
+        """Get the coordinates of the top-k rows by walking a CSI `index`.
+
+        Blocks of coordinates are read from the end of the index (or
+        from its beginning if not `reverse`), growing in size, until `k`
+        rows fulfilling the `compiled` condition (if any) are found.
+
+        """
+
+        nelements = index.nelements
+        maxbsize = max(k, self.nrowsinbuf)
+        # NaN values are sorted last in the index, and they are left out
+        skipnan = index.dtype.kind == 'f'
+        if compiled is not None:
+            args = [condvars[param] for param in compiled.parameters]
+        bsize = k
+        pos = nelements if reverse else 0
+        found, nfound = [], 0
+        while nfound < k and (0 < pos if reverse else pos < nelements):
+            if reverse:
+                bstart, bstop = max(pos - bsize, 0), pos
+                pos = bstart
+            else:
+                bstart, bstop = pos, min(pos + bsize, nelements)
+                pos = bstop
+            bcoords = index.read_indices(bstart, bstop, 1)
+            if skipnan:
+                bvalues = index.read_sorted(bstart, bstop, 1)
+                bcoords = bcoords[~numpy.isnan(bvalues)]
+            if reverse:
+                bcoords = bcoords[::-1]
+            if compiled is not None:
+                buf = self._read_coordinates(bcoords)
+                bcoords = bcoords[call_on_recarr(compiled.function, args, buf)]
+            found.append(bcoords)
+            nfound += len(bcoords)
+            bsize = min(2 * bsize, maxbsize)
+        if not found:
+            return numpy.array([], dtype='int64')
+        return numpy.concatenate(found)[:k].astype('int64')
+
+    def _read_topk_buffered(self, colname, k, condition, condvars, reverse):
+        """Get the coordinates of the top-k rows by reading the table.
+
+        Only the coordinates and `colname` values of the best `k`
+        candidates are kept while reading the table buffer by buffer.
+
+        """
+
+        coords = numpy.array([], dtype='int64')
+        values = numpy.array([], dtype=self.coldtypes[colname])
+        if condition is None:
+            buffers = ((bcoords, buf, None) for bcoords, buf in
+                       self._read_where_segments(
+                           0, self.nrows, 1, None,
+                           [self._get_container(self.nrowsinbuf)]))
+        else:
+            buffers = self._where_buffers(condition, condvars)
+        for bcoords, buf, valid in buffers:
+            bvalues = get_nested_field(buf, colname)
+            if valid is not None:
+                bcoords, bvalues = bcoords[valid], bvalues[valid]
+            if bvalues.dtype.kind == 'f':
+                # Rows with NaN values are left out
+                notnan = ~numpy.isnan(bvalues)
+                bcoords, bvalues = bcoords[notnan], bvalues[notnan]
+            coords = numpy.concatenate((coords, bcoords))
+            values = numpy.concatenate((values, bvalues))
+            if len(coords) > k:
+                coords, values = _select_topk(coords, values, k, reverse)
+        return _select_topk(coords, values, k, reverse)[0]
+
+    def iterrows(self, start=None, stop=None, step=None, prefetch=None):
         """Iterate over the table using a Row instance.
 
         If a range is not supplied, *all the rows* in the table are iterated
@@ -1751,6 +3784,13 @@ class Table(tableextension.Table, Leaf):
         that purpose. If you want to iterate over a given *range of rows* in
         the table, you may use the start, stop and step parameters.
 
+        If *prefetch* is greater than 0, that number of I/O buffers are
+        read ahead by a background thread while the rows in the current
+        one are being processed (only for positive steps).  If it is
+        None, the ``PREFETCH_BUFFERS`` parameter is used.  Please see
+        :data:`parameters.PREFETCH_BUFFERS` for the restrictions that
+        apply while iterating with read-ahead.
+
         .. warning::
 
             When in the middle of a table row iterator, you should not
@@ -1779,14 +3819,55 @@ class Table(tableextension.Table, Leaf):
            table is iterated from *start* to the last line.
            In PyTables < 3.0 only one element was returned.
 
+        .. versionchanged:: 3.1.2
+           The *prefetch* argument was added.
+
         """
         (start, stop, step) = self._process_range(start, stop, step,
                                                   warn_negstep=False)
         if (start > stop and 0 < step) or (start < stop and 0 > step):
             # Fall-back action is to return an empty iterator
             return iter([])
+        if prefetch is None:
+            prefetch = self._v_file.params['PREFETCH_BUFFERS']
         row = tableextension.Row(self)
-        return row._iter(start, stop, step)
+        return row._iter(start, stop, step, prefetch=prefetch)
+
+    def _prefetch_records(self, start, stop, step, nrowsinbuf, nbuffers):
+        """Read ahead the I/O buffers of a sequential row iterator.
+
+        The buffers of `nrowsinbuf` rows holding the rows in the range
+        are read by a background thread, up to `nbuffers` of them in
+        advance, and ``(bstart, nrecords, buf)`` tuples are yielded in
+        order.  The `buf` containers are reused, so their contents must
+        be consumed before getting the next buffer.  None is returned if
+        buffers cannot be read ahead (see :meth:`Leaf._g_prefetch`).
+
+        """
+
+        # One buffer is being consumed while `nbuffers` are read ahead
+        nbufs = nbuffers + 1
+        iobufs = [self._get_container(nrowsinbuf) for i in xrange(nbufs)]
+
+        def read(bstart, iobuf):
+            nrecords = min(nrowsinbuf, self.nrows - bstart)
+            return (bstart, self._read_records(bstart, nrecords, iobuf),
+                    iobuf)
+
+        # The buffers start where the ones read by `Row` do, i.e. at a
+        # multiple of `nrowsinbuf` rows from `start`
+        def buffers():
+            bstart, nextrow, nbuf = start, start, 0
+            while nextrow < stop:
+                # Skip the buffers without rows in range (if step is large)
+                bstart += (nextrow - bstart) // nrowsinbuf * nrowsinbuf
+                yield (bstart, iobufs[nbuf % nbufs])
+                nbuf += 1
+                # The first row in range after this buffer
+                nextrow = bstart + nrowsinbuf
+                nextrow = start + -(-(nextrow - start) // step) * step
+
+        return self._g_prefetch(read, buffers(), nbuffers)
 
     def __iter__(self):
         """Iterate over the table using a Row instance.
@@ -2192,9 +4273,15 @@ class Table(tableextension.Table, Leaf):
     def _save_buffered_rows(self, wbufRA, lenrows):
         """Update the indexes after a flushing of rows."""
 
+        if self._zonemapped:
+            # Compute the zones before the rows get converted in place
+            zoneupdates = self._get_zone_updates(
+                self.nrows, 1, wbufRA[:lenrows])
         self._open_append(wbufRA)
         self._append_records(lenrows)
         self._close_append()
+        if self._zonemapped:
+            self._update_zonemaps(zoneupdates)
         if self.indexed:
             self._unsaved_indexedrows += lenrows
             # The table caches for indexed queries are dirty now
@@ -2203,10 +4290,220 @@ class Table(tableextension.Table, Leaf):
                 # Flush the unindexed rows
                 self.flush_rows_to_index(_lastrow=False)
             else:
-                # All the columns are dirty now
-                self._mark_columns_as_dirty(self.colpathnames)
+                # All the columns are dirty now
+                self._mark_columns_as_dirty(self.colpathnames)
+
+    _saveBufferedRows = previous_api(_save_buffered_rows)
+
+    def _get_zone_updates(self, start, step, recarr, coords=None):
+        """Compute the zones of the `recarr` rows for every zone map.
+
+        The rows in `recarr` go to the `start`, `step` range in table or,
+        if `coords` is not None, to the given coordinates.  A list of
+        ``(zonemap, chunks, zones)`` tuples is returned, to be passed to
+        `_update_zonemaps()` once the rows are written.
+
+        """
+
+        if coords is None:
+            coords = numpy.arange(len(recarr), dtype='int64') * step + start
+        if len(coords) == 0:
+            return []
+        chunkids = numpy.asarray(coords, dtype='int64') // self.chunkshape[0]
+        order = None
+        if len(chunkids) > 1 and (numpy.diff(chunkids) < 0).any():
+            order = numpy.argsort(chunkids, kind='mergesort')
+            chunkids = chunkids[order]
+        updates = []
+        for colname in self._zonemapped:
+            zonemap = self._v_file._get_node(
+                _zonemap_pathname_of_column(self, colname))
+            values = get_nested_field(recarr, colname)
+            if order is not None:
+                values = values[order]
+            chunks, zones = _chunk_minmax(values, chunkids)
+            updates.append((zonemap, chunks, zones))
+        return updates
+
+    def _update_zonemaps(self, updates):
+        """Widen the zone maps with the `updates` from `_get_zone_updates()`.
+
+        New rows are appended to zone maps as needed.
+
+        """
+
+        for zonemap, chunks, zones in updates:
+            first = chunks[0]
+            nzones = zonemap.nrows
+            if first < nzones:
+                # Merge with the zones already in the zone map
+                stop = min(chunks[-1] + 1, nzones)
+                oldzones = zonemap[first:stop]
+                inzonemap = chunks < stop
+                idx = chunks[inzonemap] - first
+                oldzones[idx] = _merge_zones(oldzones[idx], zones[inzonemap])
+                zonemap[first:stop] = oldzones
+                chunks, zones = chunks[~inzonemap], zones[~inzonemap]
+            if len(chunks) > 0:
+                # Chunks are always appended contiguously
+                assert chunks[0] == zonemap.nrows
+                zonemap.append(zones)
+        # The table caches for indexed queries are dirty now
+        self._dirtycache = True
+
+    def _rebuild_zonemaps(self, colnames, startchunk=0):
+        """Rebuild the zone maps of `colnames` from `startchunk` onwards.
+
+        Zone maps are created for the columns lacking them.
+
+        """
+
+        if not colnames:
+            return
+        nrowsinchunk = self.chunkshape[0]
+        itgroup = _index_pathname_of(self)
+        if itgroup not in self._v_file:
+            create_indexes_table(self)
+        zonemaps = {}
+        for colname in colnames:
+            zmpath = _zonemap_pathname_of_column(self, colname)
+            zones = None
+            if zmpath in self._v_file:
+                oldzonemap = self._v_file._get_node(zmpath)
+                zones = oldzonemap[:startchunk]
+                # Zone maps cannot be truncated, so create them anew
+                oldzonemap._f_remove()
+            zmparent, zmname = split_path(zmpath)
+            coldtype = self.coldtypes[colname]
+            zonemap = ZoneMapArray(
+                self._v_file._get_node(zmparent), zmname,
+                Atom.from_dtype(coldtype), (0, 2),
+                "Zone map for column %s" % colname,
+                filters=self.filters,
+                expectedrows=self.nrows // nrowsinchunk + 1)
+            if zones is not None and len(zones) > 0:
+                zonemap.append(zones)
+            zonemaps[colname] = zonemap
+            self._zonemapped.add(colname)
+        # Read the remaining chunks and compute their zones
+        start = min(zm.nrows for zm in zonemaps.itervalues()) * nrowsinchunk
+        nrowsinbuf = max(self.nrowsinbuf // nrowsinchunk, 1) * nrowsinchunk
+        for start2 in xrange(start, self.nrows, nrowsinbuf):
+            stop2 = min(start2 + nrowsinbuf, self.nrows)
+            chunkids = numpy.arange(start2, stop2, dtype='int64')
+            chunkids //= nrowsinchunk
+            for colname, zonemap in zonemaps.iteritems():
+                # Skip the chunks already in the zone map
+                first = max(zonemap.nrows * nrowsinchunk, start2)
+                if first >= stop2:
+                    continue
+                values = self.read(first, stop2, field=colname)
+                chunks, zones = _chunk_minmax(
+                    values, chunkids[first - start2:])
+                zonemap.append(zones)
+        # The table caches for indexed queries are dirty now
+        self._dirtycache = True
+
+    def _get_index_updates(self, coords, oldrecarr, recarr):
+        """Compute the changes in the indexes when rows are modified.
+
+        The rows in `oldrecarr` at `coords` are going to be replaced by
+        the rows in `recarr`.  A list of ``(index, rows, oldvalues,
+        newvalues)`` tuples is returned, to be passed to
+        `_update_indexes()` once the rows are written.
+
+        """
+
+        coords = numpy.asarray(coords, dtype='int64')
+        names = [colname for (colname, isindexed)
+                 in self.colindexed.iteritems() if isindexed]
+        names.extend(self._tableindexes)
+        updates = []
+        for name in names:
+            colpathnames = self._tableindexes.get(name)
+            if colpathnames is None:
+                index = self.cols._g_col(name).index
+            else:
+                index = self._get_table_index(name)
+            if index.dirty:
+                continue
+            if colpathnames is None:
+                oldvalues = get_nested_field(oldrecarr, name)
+                newvalues = get_nested_field(recarr, name)
+            else:
+                oldvalues = index.compute_values(
+                    [get_nested_field(oldrecarr, colpathname)
+                     for colpathname in colpathnames])
+                newvalues = index.compute_values(
+                    [get_nested_field(recarr, colpathname)
+                     for colpathname in colpathnames])
+            # Only the rows already in the index matter
+            changed = (oldvalues != newvalues) & (coords < index.nelements)
+            if changed.any():
+                updates.append((index, coords[changed],
+                                oldvalues[changed], newvalues[changed]))
+        return updates
+
+    def _update_indexes(self, updates):
+        """Apply the `updates` from `_get_index_updates()` to the indexes.
+
+        The indexes that can not take the changes in place are marked as
+        dirty.
 
-    _saveBufferedRows = previous_api(_save_buffered_rows)
+        """
+
+        for index, rows, oldvalues, newvalues in updates:
+            if not index.update_rows(rows, oldvalues, newvalues):
+                index.dirty = True
+        # The table caches for indexed queries are dirty now
+        self._dirtycache = True
+
+    def _update_records(self, start, stop, step, recarr):
+        nrecords = min(len(recarr), len(xrange(start, stop, step)))
+        if self._zonemapped:
+            zoneupdates = self._get_zone_updates(
+                start, step, recarr[:nrecords])
+        indexupdates = None
+        if self.indexed and self.autoindex:
+            # Indexes are updated in place with the changed values
+            coords = numpy.arange(nrecords, dtype='int64') * step + start
+            indexupdates = self._get_index_updates(
+                coords, self._read(start, stop, step)[:nrecords],
+                recarr[:nrecords])
+        super(Table, self)._update_records(start, stop, step, recarr)
+        # The results of in-kernel queries may have changed
+        self._querycache.clear()
+        if self._zonemapped:
+            self._update_zonemaps(zoneupdates)
+        if indexupdates:
+            self._update_indexes(indexupdates)
+
+    def _update_elements(self, nrecords, coords, recarr):
+        if self._zonemapped:
+            zoneupdates = self._get_zone_updates(
+                None, None, recarr[:nrecords], coords[:nrecords])
+        indexupdates = None
+        if self.indexed and self.autoindex:
+            # Indexes are updated in place with the changed values
+            indexupdates = self._get_index_updates(
+                coords[:nrecords], self._read_coordinates(coords[:nrecords]),
+                recarr[:nrecords])
+        super(Table, self)._update_elements(nrecords, coords, recarr)
+        # The results of in-kernel queries may have changed
+        self._querycache.clear()
+        if self._zonemapped:
+            self._update_zonemaps(zoneupdates)
+        if indexupdates:
+            self._update_indexes(indexupdates)
+
+    def _g_truncate(self, size):
+        oldnrows = self.nrows
+        super(Table, self)._g_truncate(size)
+        # The results of in-kernel queries may have changed
+        self._querycache.clear()
+        if self._zonemapped:
+            startchunk = min(oldnrows, size) // self.chunkshape[0]
+            self._rebuild_zonemaps(list(self._zonemapped), startchunk)
 
     def append(self, rows):
         """Append a sequence of rows to the end of the table.
@@ -2322,8 +4619,8 @@ class Table(tableextension.Table, Leaf):
             # Do the actual update of rows
             self._update_elements(lcoords, coords, recarr)
 
-        # Redo the index if needed
-        self._reindex(self.colpathnames)
+        # Redo the indexes that could not be updated in place
+        self._reindex_modified(self.colpathnames)
 
         return SizeType(lcoords)
 
@@ -2379,8 +4676,8 @@ class Table(tableextension.Table, Leaf):
         # Do the actual update
         self._update_records(start, stop, step, recarr)
 
-        # Redo the index if needed
-        self._reindex(self.colpathnames)
+        # Redo the indexes that could not be updated in place
+        self._reindex_modified(self.colpathnames)
 
         return SizeType(lenrows)
 
@@ -2462,8 +4759,8 @@ class Table(tableextension.Table, Leaf):
         mod_col[:] = column
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
-        # Redo the index if needed
-        self._reindex([colname])
+        # Redo the indexes that could not be updated in place
+        self._reindex_modified([colname])
 
         return SizeType(nrows)
 
@@ -2540,8 +4837,8 @@ class Table(tableextension.Table, Leaf):
             mod_col[:] = recarray[name].squeeze()
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
-        # Redo the index if needed
-        self._reindex(names)
+        # Redo the indexes that could not be updated in place
+        self._reindex_modified(names)
 
         return SizeType(nrows)
 
@@ -2567,20 +4864,56 @@ class Table(tableextension.Table, Leaf):
                     if nrows > 0 and not col.index.dirty:
                         rowsadded = self._add_rows_to_index(
                             colname, start, nrows, _lastrow, update=True)
+            for name in self._tableindexes:
+                index = self._get_table_index(name)
+                if nrows > 0 and not index.dirty:
+                    rowsadded = self._add_rows_to_index(
+                        name, start, nrows, _lastrow, update=True)
             self._unsaved_indexedrows -= rowsadded
             self._indexedrows += rowsadded
         return rowsadded
 
     flushRowsToIndex = previous_api(flush_rows_to_index)
 
-    def _add_rows_to_index(self, colname, start, nrows, lastrow, update):
-        """Add more elements to the existing index."""
+    def _add_rows_to_index(self, colname, start, nrows, lastrow, update,
+                           nthreads=None, progress=None):
+        """Add more elements to the existing index.
+
+        `nthreads` is the number of threads used for sorting the slices
+        of the index; if None, the ``INDEX_THREADS`` parameter is used.
+        If `progress` is not None, it is called as ``progress(nrows,
+        npasses)`` with the number of rows added so far and the number
+        of passes over the data remaining (see :meth:`Column.create_index`).
+
+        """
 
         # This method really belongs to Column, but since it makes extensive
         # use of the table, it gets dangerous when closing the file, since the
         # column may be accessing a table which is being destroyed.
-        index = self.cols._g_col(colname).index
+        # `colname` may also be the name of a composite or expression index.
+        if colname in self._tableindexes:
+            index = self._get_table_index(colname)
+        else:
+            index = self.cols._g_col(colname).index
+        if index.kind in ('bitmap', 'bloom'):
+            # Bitmap and bloom indexes have no last row, so every row is
+            # added right away, but they are only reported as indexed (like
+            # the last row of other indexes) when `lastrow` is true.
+            stop = start + nrows
+            for start2 in xrange(index.nelements, stop, self.nrowsinbuf):
+                if progress is not None:
+                    progress(start2 - start, 1)
+                stop2 = min(start2 + self.nrowsinbuf, stop)
+                index.append(self._read(start2, stop2, 1, colname))
+            return nrows if lastrow else 0
+        if nthreads is None:
+            nthreads = self._v_file.params['INDEX_THREADS']
         slicesize = index.slicesize
+        memory_limit = getattr(index, 'memory_limit', None)
+        if memory_limit is not None:
+            # Every thread keeps a few slices in memory while sorting
+            slicebytes = slicesize * (index.dtype.itemsize + index.indsize)
+            nthreads = max(1, min(nthreads, memory_limit // (3 * slicebytes)))
         # The next loop does not rely on xrange so that it can
         # deal with long ints (i.e. more than 32-bit integers)
         # This allows to index columns with more than 2**31 rows
@@ -2588,22 +4921,86 @@ class Table(tableextension.Table, Leaf):
         startLR = index.sorted.nrows * slicesize
         indexedrows = startLR - start
         stop = start + nrows - slicesize + 1
-        while startLR < stop:
-            index.append(
-                [self._read(startLR, startLR + slicesize, 1, colname)],
-                update=update)
-            indexedrows += slicesize
-            startLR += slicesize
+        nslices = max(0, (stop - startLR + slicesize - 1) // slicesize)
+        slicestarts = (startLR + i * slicesize for i in xrange(nslices))
+        if progress is not None:
+            npasses = index.count_passes(start + nrows)
+
+            def read_slices():
+                for sstart in slicestarts:
+                    progress(sstart - start, npasses)
+                    yield self._read_index_values(colname, sstart,
+                                                  sstart + slicesize)
+            slices = read_slices()
+        else:
+            slices = (self._read_index_values(colname, sstart,
+                                              sstart + slicesize)
+                      for sstart in slicestarts)
+        index.append_slices(slices, update=update, nthreads=nthreads)
+        indexedrows += nslices * slicesize
+        startLR += nslices * slicesize
         # index the remaining rows in last row
         if lastrow and startLR < self.nrows:
             index.append_last_row(
-                [self._read(startLR, self.nrows, 1, colname)],
+                [self._read_index_values(colname, startLR, self.nrows)],
                 update=update)
             indexedrows += self.nrows - startLR
+        if progress is not None:
+            progress(indexedrows, npasses)
         return indexedrows
 
     _addRowsToIndex = previous_api(_add_rows_to_index)
 
+    def _read_index_values(self, colname, start, stop):
+        """Read the values to be indexed for `colname` in a range of rows.
+
+        For composite and expression indexes (when `colname` is the name
+        of one of them) the values computed from their columns are
+        returned.
+
+        """
+
+        colpathnames = self._tableindexes.get(colname)
+        if colpathnames is None:
+            return self._read(start, stop, 1, colname)
+        index = self._get_table_index(colname)
+        return index.compute_values([self._read(start, stop, 1, colpathname)
+                                     for colpathname in colpathnames])
+
+    def _get_table_index(self, name):
+        """Get the composite or expression index with the given `name`."""
+
+        return self._v_file._get_node(
+            join_path(_index_pathname_of(self), name))
+
+    def _get_table_indexes(self, indexclass):
+        """Get the composite or expression indexes of `indexclass`."""
+
+        indexes = [self._get_table_index(name) for name in self._tableindexes]
+        return [index for index in indexes if isinstance(index, indexclass)]
+
+    def _get_expr_index(self, var, condvars):
+        """Get the index for the variable `var` of an index expression.
+
+        `var` is the name of a column in `condvars` or, for expressions
+        on composite indexes, a tuple with the names of the leading
+        columns of the index (see `compile_condition()`).  For
+        expression indexes, `var` is the name of the index.
+
+        """
+
+        if not isinstance(var, tuple):
+            if var in condvars:
+                return condvars[var].index
+            index = self._get_table_index(var)
+            return None if index.dirty else index
+        colpathnames = tuple(condvars[v].pathname for v in var)
+        for index in self._get_table_indexes(CompositeIndex):
+            if (index.colnames[:len(colpathnames)] == colpathnames and
+                    not index.dirty):
+                return index
+        return None
+
     def remove_rows(self, start=None, stop=None, step=None):
         """Remove a range of rows in the table.
 
@@ -2658,8 +5055,13 @@ class Table(tableextension.Table, Leaf):
                                       'underlying HDF5 library. Sorry!' %
                                       self._v_pathname)
         nrows = self._remove_rows(start, stop, step)
+        # The results of in-kernel queries may have changed
+        self._querycache.clear()
         # remove_rows is a invalidating index operation
         self._reindex(self.colpathnames)
+        if self._zonemapped:
+            startchunk = min(start, stop) // self.chunkshape[0]
+            self._rebuild_zonemaps(list(self._zonemapped), startchunk)
 
         return SizeType(nrows)
 
@@ -2744,6 +5146,7 @@ class Table(tableextension.Table, Leaf):
         self._condition_cache.clear()
         colindexed[colpathname] = isindexed
         self.indexed = max(colindexed.values())  # this is an OR :)
+        self.indexed = self.indexed or bool(self._tableindexes)
 
     _setColumnIndexing = previous_api(_set_column_indexing)
 
@@ -2758,6 +5161,8 @@ class Table(tableextension.Table, Leaf):
                 if colindexed[colname]:
                     col = cols._g_col(colname)
                     col.index.dirty = True
+            for name in self._get_table_indexes_of(colnames):
+                self._get_table_index(name).dirty = True
 
     _markColumnsAsDirty = previous_api(_mark_columns_as_dirty)
 
@@ -2773,6 +5178,9 @@ class Table(tableextension.Table, Leaf):
                     col = cols._g_col(colname)
                     col.index.dirty = True
                     colstoindex.append(colname)
+            for name in self._get_table_indexes_of(colnames):
+                self._get_table_index(name).dirty = True
+                colstoindex.append(name)
             # Now, re-index the dirty ones
             if self.autoindex and colstoindex:
                 self._do_reindex(dirty=True)
@@ -2781,6 +5189,30 @@ class Table(tableextension.Table, Leaf):
 
     _reIndex = previous_api(_reindex)
 
+    def _reindex_modified(self, colnames):
+        """Re-index columns in `colnames` after modifying some rows.
+
+        With automatic indexing, the indexes have already been updated in
+        place while writing the rows, and only the ones that could not be
+        updated (which are dirty now) are recomputed.
+
+        """
+
+        if not self.autoindex:
+            self._reindex(colnames)
+        elif self.indexed:
+            if self._dirtyindexes:
+                self._do_reindex(dirty=True)
+            # The table caches for indexed queries are dirty now
+            self._dirtycache = True
+
+    def _get_table_indexes_of(self, colnames):
+        """Get the names of the table indexes on any of `colnames`."""
+
+        colnames = set(colnames)
+        return [name for (name, indexcols) in self._tableindexes.iteritems()
+                if colnames.intersection(indexcols)]
+
     def _do_reindex(self, dirty):
         """Common code for `reindex()` and `reindex_dirty()`."""
 
@@ -2789,6 +5221,9 @@ class Table(tableextension.Table, Leaf):
             if colindexed:
                 indexcol = self.cols._g_col(colname)
                 indexedrows = indexcol._do_reindex(dirty)
+        for name in list(self._tableindexes):
+            indexedrows = (self._do_reindex_table_index(name, dirty) or
+                           indexedrows)
         # Update counters in case some column has been updated
         if indexedrows > 0:
             self._indexedrows = indexedrows
@@ -2798,6 +5233,29 @@ class Table(tableextension.Table, Leaf):
 
     _doReIndex = previous_api(_do_reindex)
 
+    def _do_reindex_table_index(self, name, dirty):
+        """Recreate the table index `name` (if dirty when `dirty`)."""
+
+        index = self._get_table_index(name)
+        if dirty and not index.dirty:
+            return SizeType(0)
+        self._v_file._check_writable()
+        # Get the old index parameters
+        kind = index.kind
+        optlevel = index.optlevel
+        filters = index.filters
+        if isinstance(index, ExpressionIndex):
+            expression = index.expression
+            self.remove_expr_index(expression)
+            # Create a new index with the previous parameters
+            return self.create_expr_index(expression, kind=kind,
+                                          optlevel=optlevel, filters=filters)
+        colpathnames = index.colnames
+        self.remove_index(colpathnames)
+        # Create a new index with the previous parameters
+        return self.create_index(colpathnames, kind=kind, optlevel=optlevel,
+                                 filters=filters)
+
     def reindex(self):
         """Recompute all the existing indexes in the table.
 
@@ -2825,6 +5283,175 @@ class Table(tableextension.Table, Leaf):
 
     reIndexDirty = previous_api(reindex_dirty)
 
+    def create_index(self, columns, optlevel=6, kind="medium", filters=None,
+                     tmp_dir=None, nthreads=None, _blocksizes=None,
+                     _verbose=False):
+        """Create an index for one or several columns of the table.
+
+        When *columns* is the pathname of a single column (or a sequence
+        with just one), this is the same as calling
+        :meth:`Column.create_index` for it.
+
+        Otherwise, a *composite index* (see
+        :class:`tables.index.CompositeIndex`) is created for the
+        columns in *columns*, whose rows are sorted by the values of the
+        first column, then by the values of the second one and so on.
+        Queries with equality comparisons on some leading columns of the
+        index, optionally followed by range comparisons on the next one,
+        use it for locating the matching rows.  For instance, an index
+        on ``['symbol', 'ts']`` is used by the ``(symbol == s) & (ts >
+        t0) & (ts < t1)`` condition, and it selects far less rows than
+        separate indexes on both columns would do.
+
+        Composite indexes are kept up to date like the ones of columns,
+        and :meth:`Table.reindex` and :meth:`Table.reindex_dirty`
+        recompute them too.  Only the 'ultralight', 'light', 'medium' and
+        'full' kinds are supported for composite indexes.  The rest of
+        arguments and the return value are the ones of
+        :meth:`Column.create_index`.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if isinstance(columns, basestring):
+            columns = [columns]
+        columns = list(columns)
+        if len(columns) == 1:
+            return self.cols._f_col(columns[0]).create_index(
+                optlevel=optlevel, kind=kind, filters=filters,
+                tmp_dir=tmp_dir, nthreads=nthreads, _blocksizes=_blocksizes,
+                _verbose=_verbose)
+
+        self._v_file._check_writable()
+        colpathnames = tuple(self.cols._f_col(colname).pathname
+                             for colname in columns)
+        if len(set(colpathnames)) != len(colpathnames):
+            raise ValueError("columns in a composite index must be "
+                             "different: %s" % (columns,))
+        filters, tmp_dir = self._check_index_args(
+            optlevel, kind, filters, tmp_dir, _blocksizes)
+        idxrows = _table__create_composite_index(
+            self, colpathnames, optlevel, kind, filters, tmp_dir,
+            _blocksizes, _verbose, nthreads)
+        return SizeType(idxrows)
+
+    def remove_index(self, columns):
+        """Remove the index of one or several columns of the table.
+
+        When *columns* is the pathname of a single column (or a sequence
+        with just one), this is the same as calling
+        :meth:`Column.remove_index` for it.  Otherwise, the composite
+        index created by :meth:`Table.create_index` for *columns* is
+        removed.  This method does nothing if there is no such index.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if isinstance(columns, basestring):
+            columns = [columns]
+        columns = list(columns)
+        if len(columns) == 1:
+            return self.cols._f_col(columns[0]).remove_index()
+
+        self._v_file._check_writable()
+        colpathnames = tuple(self.cols._f_col(colname).pathname
+                             for colname in columns)
+        self._remove_table_index(_composite_index_name(colpathnames))
+
+    def create_expr_index(self, expression, optlevel=6, kind="medium",
+                          filters=None, tmp_dir=None, nthreads=None,
+                          _blocksizes=None, _verbose=False):
+        """Create an index on the values of an expression of columns.
+
+        The *expression* is a string with a Numexpr expression (like the
+        conditions in :meth:`Table.where`) whose variables are top-level
+        columns of the table.  An :class:`tables.index.ExpressionIndex`
+        is created for the values that it takes in every row, so that
+        queries comparing the *same* expression with constant values,
+        like ``abs(x - y) > 3`` for an index on ``abs(x - y)``, use it
+        for locating the matching rows.  Expressions are compared as
+        parsed by Numexpr, so differences in whitespace or redundant
+        parentheses do not matter, but the operands must appear in the
+        same order.
+
+        Expression indexes are kept up to date like the ones of columns,
+        and :meth:`Table.reindex` and :meth:`Table.reindex_dirty`
+        recompute them too.  Only the 'ultralight', 'light', 'medium' and
+        'full' kinds are supported.  The rest of arguments and the return
+        value are the ones of :meth:`Column.create_index`.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._v_file._check_writable()
+        filters, tmp_dir = self._check_index_args(
+            optlevel, kind, filters, tmp_dir, _blocksizes)
+        idxrows = _table__create_expr_index(
+            self, expression, optlevel, kind, filters, tmp_dir,
+            _blocksizes, _verbose, nthreads)
+        return SizeType(idxrows)
+
+    def remove_expr_index(self, expression):
+        """Remove the index created for an expression of columns.
+
+        The index created by :meth:`Table.create_expr_index` for
+        *expression* is removed.  This method does nothing if there is
+        no such index.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._v_file._check_writable()
+        self._remove_table_index(_expr_index_name(expression))
+
+    def _check_index_args(self, optlevel, kind, filters, tmp_dir,
+                          blocksizes):
+        """Check the arguments for creating a composite or expression index.
+
+        A ``(filters, tmp_dir)`` tuple with the actual values of these
+        arguments is returned.
+
+        """
+
+        kinds = ['ultralight', 'light', 'medium', 'full']
+        if kind not in kinds:
+            raise ValueError("Kind must have any of these values: %s" % kinds)
+        if (not isinstance(optlevel, (int, long)) or
+                (optlevel < 0 or optlevel > 9)):
+            raise ValueError("Optimization level must be an integer in the "
+                             "range 0-9")
+        if filters is None:
+            filters = default_index_filters
+        if tmp_dir is None:
+            tmp_dir = os.path.dirname(self._v_file.filename)
+        else:
+            if not os.path.isdir(tmp_dir):
+                raise ValueError("Temporary directory '%s' does not exist" %
+                                 tmp_dir)
+        if (blocksizes is not None and
+                (not isinstance(blocksizes, tuple) or len(blocksizes) != 4)):
+            raise ValueError("_blocksizes must be a tuple with exactly 4 "
+                             "elements")
+        return (filters, tmp_dir)
+
+    def _remove_table_index(self, name):
+        """Remove the composite or expression index `name` (if any)."""
+
+        if name in self._tableindexes:
+            index = self._get_table_index(name)
+            # This is needed so as to unnail() the condition cache.
+            index.dirty = False
+            index._f_remove()
+            del self._tableindexes[name]
+            # Changing the set of indexes invalidates the condition cache
+            self._condition_cache.clear()
+            self.indexed = (max(self.colindexed.values()) or
+                            bool(self._tableindexes))
+
     def _g_copy_rows(self, object, start, stop, step, sortby, checkCSI):
         "Copy rows from self to object"
         if sortby is None:
@@ -2888,6 +5515,14 @@ class Table(tableextension.Table, Leaf):
                     newcol.create_index(
                         kind=oldcolindex.kind, optlevel=oldcolindex.optlevel,
                         filters=oldcolindex.filters, tmp_dir=None)
+        for (colpathnames, index) in self.composite_indexes.iteritems():
+            other.create_index(
+                colpathnames, kind=index.kind, optlevel=index.optlevel,
+                filters=index.filters, tmp_dir=None)
+        for (expression, index) in self.expr_indexes.iteritems():
+            other.create_expr_index(
+                expression, kind=index.kind, optlevel=index.optlevel,
+                filters=index.filters, tmp_dir=None)
 
     _g_propIndexes = previous_api(_g_prop_indexes)
 
@@ -2914,6 +5549,9 @@ class Table(tableextension.Table, Leaf):
         # Generate equivalent indexes in the new table, if required.
         if propindexes and self.indexed:
             self._g_prop_indexes(newtable)
+        # And the zone maps too.
+        if propindexes and self._zonemapped:
+            newtable._rebuild_zonemaps(sorted(self._zonemapped))
         return (newtable, nbytes)
 
     _g_copyWithStats = previous_api(_g_copy_with_stats)
@@ -2972,6 +5610,22 @@ class Table(tableextension.Table, Leaf):
 
         super(Table, self).flush()
 
+    def _g_get_caches(self):
+        caches = {}
+        for kind, name in (('chunks', '_chunkcache'),
+                           ('iterseq', '_seqcache'),
+                           ('query', '_querycache')):
+            if name in self.__dict__:
+                caches[kind] = self.__dict__[name]
+        return caches
+
+    def _g_mmap_dtype(self):
+        # Time columns are converted after being read
+        if [coltype for coltype in self.coltypes.itervalues()
+                if coltype.startswith('time')]:
+            return None
+        return self._v_dtype
+
     def _g_pre_kill_hook(self):
         """Code to be called before killing the node."""
 
@@ -3023,6 +5677,9 @@ class Table(tableextension.Table, Leaf):
         #   to first close ``Table`` objects and then ``Index`` hierarchies.
         #
 
+        # No more reads from other threads
+        self._g_stop_prefetchers()
+
         # Flush right now so the row object does not get in the middle.
         if flush:
             self.flush()
@@ -3409,6 +6066,23 @@ class Column(object):
                      associated with this column (None if the column is not
                      indexed).""")
 
+    def _getzonemap(self):
+        zonemapPath = _zonemap_pathname_of_column_(self._table_path,
+                                                   self.pathname)
+        try:
+            zonemap = self._table_file._get_node(zonemapPath)
+        except NodeError:
+            zonemap = None  # The column has no zone map
+        return zonemap
+
+    zonemap = property(_getzonemap, None, None,
+                       """The zone map (an array with the minimum and maximum
+                       values of the column in every table chunk) associated
+                       with this column (None if the column has no zone map).
+
+                       .. versionadded:: 3.1.2
+                       """)
+
     @lazyattr
     def _itemtype(self):
         return self.descr._v_dtypes[self.name]
@@ -3533,6 +6207,17 @@ class Column(object):
     def __iter__(self):
         """Iterate through all items in the column."""
 
+        for buf_slice in self._iter_buffers():
+            for row in buf_slice:
+                yield row
+
+    def _iter_buffers(self):
+        """Iterate through the items in the column, a buffer at a time.
+
+        The same buffer is reused, so it must be copied to be kept.
+
+        """
+
         table = self.table
         itemsize = self.dtype.itemsize
         nrowsinbuf = table._v_file.params['IO_BUFFER_SIZE'] // itemsize
@@ -3543,8 +6228,7 @@ class Column(object):
             buf_slice = buf[0:end_row - start_row]
             table.read(start_row, end_row, 1, field=self.pathname,
                        out=buf_slice)
-            for row in buf_slice:
-                yield row
+            yield buf_slice
 
     def __setitem__(self, key, value):
         """Set a row or a range of rows in a column.
@@ -3602,8 +6286,352 @@ class Column(object):
         else:
             raise ValueError("Non-valid index or slice: %s" % key)
 
+    def _aggregate(self, func, condition, condvars, start, stop, step):
+        """Compute the `func` reduction of this column.
+
+        This must be called directly from the public reduction methods,
+        so that condition variables are looked up in the caller frame.
+
+        """
+
+        table = self.table
+        if condition is not None:
+            condvars = table._required_expr_vars(condition, condvars,
+                                                 depth=3)
+        return table.aggregate(condition, {func: (self.pathname, func)},
+                               condvars, start, stop, step)[func]
+
+    def sum(self, condition=None, condvars=None,
+            start=None, stop=None, step=None):
+        """Return the sum of the values in this column.
+
+        Only the rows fulfilling *condition* (if given) are considered.
+        The meaning of the arguments is the same as in the
+        :meth:`Table.aggregate` method.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._aggregate('sum', condition, condvars, start, stop, step)
+
+    def min(self, condition=None, condvars=None,
+            start=None, stop=None, step=None):
+        """Return the minimum value in this column.
+
+        None is returned if no row is selected.  If the column has a
+        clean index without reduction and no *condition* nor range is
+        given, the value is read from the index.  See
+        :meth:`Column.sum` for the meaning of the arguments.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._aggregate('min', condition, condvars, start, stop, step)
+
+    def max(self, condition=None, condvars=None,
+            start=None, stop=None, step=None):
+        """Return the maximum value in this column.
+
+        None is returned if no row is selected.  If the column has a
+        clean index without reduction and no *condition* nor range is
+        given, the value is read from the index.  See
+        :meth:`Column.sum` for the meaning of the arguments.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._aggregate('max', condition, condvars, start, stop, step)
+
+    def mean(self, condition=None, condvars=None,
+             start=None, stop=None, step=None):
+        """Return the arithmetic mean of the values in this column.
+
+        None is returned if no row is selected.  See :meth:`Column.sum`
+        for the meaning of the arguments.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._aggregate('mean', condition, condvars, start, stop, step)
+
+    def count(self, condition=None, condvars=None,
+              start=None, stop=None, step=None):
+        """Return the number of rows fulfilling *condition*.
+
+        When *condition* is a single comparison on an indexed column
+        without reduction, the count is taken from the index.  See
+        :meth:`Column.sum` for the meaning of the arguments.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._aggregate('count', condition, condvars,
+                               start, stop, step)
+
+    def _order_index(self, sorted_values):
+        """Get the index of this column for answering order queries.
+
+        The index must be clean, have no reduction and cover all the
+        rows in the table.  If `sorted_values` is true, the sorted values
+        of the index are read, so it can not have modified rows pending
+        to be merged either.  None is returned if there is no such index.
+
+        """
+
+        index = self.index
+        if (index is None or index.dirty or index.reduction != 1 or
+                index.nelements != self.table.nrows):
+            return None
+        if sorted_values and index.ndeltarows > 0:
+            return None
+        return index
+
+    def _check_ordered(self):
+        """Check that the values of this column can be ordered."""
+
+        if self._itemtype.shape != () or self.dtype.kind == 'c':
+            raise TypeError("the values of column ``%s`` can not be "
+                            "ordered" % self.pathname)
+
+    def quantile(self, q):
+        """Return the value at the *q* quantile of this column.
+
+        The *q* argument is a number between 0 and 1, or a sequence of
+        them, in which case an array with the value at every quantile is
+        returned.  NaN values are ignored.  As in ``numpy.percentile()``,
+        the value is linearly interpolated between the two values next to
+        the quantile, except for string and boolean columns, where the
+        lower one is returned.  None is returned if there are no values.
+        Use ``q=0.5`` for the median.
+
+        If the column has a clean index without reduction, the values are
+        taken from it: CSI indexes give them right away, while the rest
+        of kinds narrow them down with a few searches (see
+        :meth:`Index.select`).  Otherwise, the column is read and the
+        quantiles are estimated with a sketch using blocks of
+        :data:`parameters.QUANTILE_SKETCH_SIZE` values, so they are only
+        exact for columns with no more rows than that.
+
+        Examples
+        --------
+
+        ::
+
+            median = table.cols.energy.quantile(0.5)
+            q1, q3 = table.cols.energy.quantile([0.25, 0.75])
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._check_ordered()
+        scalar = (numpy.ndim(q) == 0)
+        q = numpy.atleast_1d(numpy.asarray(q, dtype='float64'))
+        if not ((q >= 0) & (q <= 1)).all():
+            raise ValueError("quantiles must be between 0 and 1")
+
+        dtype = self.dtype
+        index = self._order_index(True)
+        if index is not None:
+            nvalues = index._nvalues()
+            select = lambda ranks: numpy.array(
+                [index.select(rank) for rank in ranks], dtype=dtype)
+        else:
+            sketch = _QuantileSketch(
+                self.table._v_file.params['QUANTILE_SKETCH_SIZE'])
+            for values in self._iter_buffers():
+                sketch.update(values)
+            nvalues = sketch.count
+            select = sketch.select
+        if nvalues == 0:
+            return None
+
+        positions = q * (nvalues - 1)
+        lower = numpy.floor(positions).astype('int64')
+        upper = numpy.ceil(positions).astype('int64')
+        ranks = numpy.unique(numpy.concatenate((lower, upper)))
+        values = select(ranks)
+        result = values[numpy.searchsorted(ranks, lower)]
+        if dtype.kind in 'iuf':
+            low = result.astype('float64')
+            high = values[numpy.searchsorted(ranks, upper)].astype('float64')
+            result = low + (high - low) * (positions - lower)
+            if dtype.kind == 'f':
+                result = result.astype(dtype)
+        return result[0] if scalar else result
+
+    def rank(self, value):
+        """Return the number of values in this column lower than *value*.
+
+        NaN values are never lower than any value.  Hence, the fraction of
+        rows below *value* is ``column.rank(value) / len(column)``.  If
+        the column has a clean index without reduction, the count is
+        taken from it (see :meth:`Index.rank`); otherwise, the column is
+        read.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._check_ordered()
+        index = self._order_index(False)
+        if index is not None:
+            return index.rank(value)
+        count = 0
+        for values in self._iter_buffers():
+            count += int(numpy.count_nonzero(values < value))
+        return count
+
+    def _value_counts(self):
+        """Get the distinct values in this column and their counts.
+
+        A ``(values, counts)`` tuple is returned, with the values sorted
+        in ascending order.
+
+        """
+
+        self._check_ordered()
+        index = self._order_index(True)
+        if index is not None:
+            return index.value_counts()
+        return _count_values(
+            (numpy.sort(values) for values in self._iter_buffers()),
+            self.dtype)
+
+    def value_counts(self, limit=None):
+        """Return the distinct values in this column with their counts.
+
+        The result is a structured array with a ``value`` and a ``count``
+        field, with a row for every distinct value, sorted from the most
+        to the least frequent value (values with the same count are
+        sorted in ascending order).  If *limit* is given, only that many
+        rows are returned.  NaN values are not counted.
+
+        If the column has a clean index without reduction, the values are
+        counted in it (see :meth:`Index.value_counts`), which for bitmap
+        indexes does not even need to read the bitmaps.  Otherwise, the
+        column is read and counted buffer by buffer, so only the distinct
+        values are kept in memory.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if limit is not None and limit < 0:
+            raise ValueError("limit can not be negative")
+        values, counts = self._value_counts()
+        order = numpy.argsort(-counts, kind='mergesort')[:limit]
+        result = numpy.empty(len(order), dtype=[('value', self.dtype),
+                                                ('count', 'int64')])
+        result['value'] = values[order]
+        result['count'] = counts[order]
+        return result
+
+    def unique(self):
+        """Return the distinct values in this column, sorted.
+
+        NaN values are left out.  If the column has a clean index without
+        reduction, its sorted values are walked skipping the duplicates
+        (see :meth:`Index.value_counts`); otherwise, the column is read
+        buffer by buffer, so only the distinct values are kept in memory.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return self._value_counts()[0]
+
+    def nunique(self, approx=True):
+        """Return the number of distinct values in this column.
+
+        NaN values are not counted.  If *approx* is true, the count is
+        estimated while reading the column buffer by buffer, with a
+        HyperLogLog sketch whose relative error is usually below 1%, and
+        which takes a few KB of memory no matter the size of the column.
+        Otherwise, the count is exact, and it is computed like in
+        :meth:`Column.unique`.  Columns with a bitmap index always get
+        an exact count from the index alone.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._check_ordered()
+        index = self._order_index(True)
+        if isinstance(index, BitmapIndex):
+            return len(index.value_counts()[0])
+        if not approx:
+            return len(self.unique())
+        sketch = _HyperLogLog(14)
+        for values in self._iter_buffers():
+            sketch.update(values)
+        return sketch.result()
+
+    def startswith(self, prefix, start=None, stop=None, step=None):
+        """Iterate over the rows whose value in this column starts with
+        *prefix*.
+
+        This column must be a string column and *prefix* a byte string.
+        The rows are selected with :meth:`Table.where` by means of the
+        range condition ``(col >= prefix) & (col < upper)``, where
+        *upper* is the lowest string greater than all the ones starting
+        with *prefix*.  Hence, if this column is indexed, the matching
+        rows are found with a single lookup in the index.  As Numexpr
+        compares the bytes of strings as signed chars, another range
+        which is exact for it is added to the condition, and the rows
+        found are checked with ``bytes.startswith()``, so that values
+        with bytes over ``\\x7f`` are matched too.  The meaning of the
+        rest of arguments is the same as in :meth:`Table.where`.
+
+        Examples
+        --------
+
+        ::
+
+            prices = [row['price']
+                      for row in table.cols.symbol.startswith(b'AAP')]
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if self.dtype.kind != 'S':
+            raise TypeError("column ``%s`` is not a string column"
+                            % self.pathname)
+        if not isinstance(prefix, bytes):
+            raise TypeError("the prefix must be a byte string")
+        if len(prefix) > self.dtype.itemsize:
+            # No value in the column is long enough
+            return iter([])
+        # Numexpr compares strings as signed chars, for which ``\x80`` and
+        # ``\x7f`` are the lowest and highest ones, so the first range is
+        # exact for it.  It is empty for indexes, which compare strings as
+        # unsigned chars and use the second range.
+        padding = self.dtype.itemsize - len(prefix)
+        condvars = {'col': self, 'prefix': prefix,
+                    'signed_low': prefix + b'\x80' * padding,
+                    'signed_high': prefix + b'\x7f' * padding}
+        condition = '((col >= signed_low) & (col <= signed_high)) | '
+        upper = string_prefix_after(prefix)
+        if upper is None:
+            condition += '(col >= prefix)'
+        else:
+            condition += '((col >= prefix) & (col < upper))'
+            condvars['upper'] = upper
+        # The second range may let other rows in when Numexpr evaluates it
+        colname = self.pathname
+        return (row for row in self.table.where(condition, condvars,
+                                                start, stop, step)
+                if row[colname].startswith(prefix))
+
     def create_index(self, optlevel=6, kind="medium", filters=None,
-                     tmp_dir=None, _blocksizes=None, _testmode=False,
+                     tmp_dir=None, nthreads=None, memory_limit=None,
+                     progress=None, _blocksizes=None, _testmode=False,
                      _verbose=False):
         """Create an index for this column.
 
@@ -3630,6 +6658,24 @@ class Column(object):
             the query speed) at the price of using more disk space as well as
             more CPU, memory and I/O resources for creating the index.
 
+            The 'bitmap' kind builds a :class:`tables.index.BitmapIndex`,
+            which keeps a compressed bitmap of the rows holding every
+            distinct value.  It is the best choice for columns with few
+            distinct values (enumerated, boolean or status columns), and
+            conditions on several columns with bitmap indexes are resolved
+            row by row.  The optlevel is not used for bitmap indexes.
+
+            The 'bloom' kind builds a :class:`tables.index.BloomIndex`,
+            which keeps a Bloom filter for every chunk of the table.  It
+            is only supported for string columns and it only helps with
+            equality comparisons, but it is very cheap to build and keep
+            up to date, so it is a good choice for point lookups on
+            high-cardinality columns (like identifiers).  The optlevel
+            sets the size of the filters.
+
+            .. versionchanged:: 3.1.2
+               The 'bitmap' and 'bloom' kinds were added.
+
             Note that selecting a full kind with an optlevel of 9 (the maximum)
             guarantees the creation of an index with zero entropy, that is, a
             completely sorted index (CSI) - provided that the number of rows in
@@ -3646,10 +6692,37 @@ class Column(object):
             to specify the directory for this temporary file.  The default is
             to create it in the same directory as the file containing the
             original table.
+        nthreads : int
+            The number of threads used for sorting the slices of the index
+            while the next ones are being read.  If None, the
+            ``INDEX_THREADS`` parameter is used (see
+            :data:`parameters.INDEX_THREADS`).  The optimization of the
+            index is always done by the calling thread.
+
+            .. versionadded:: 3.1.2
+        memory_limit : int
+            The approximate maximum number of bytes of memory used for
+            building the index.  The slices of the index are made small
+            enough to fit in it, fewer threads are used if needed and, for
+            completely sorted indexes (CSI), the sorted slices are merged
+            on disk in as many passes as needed (an external merge sort)
+            instead of being optimized.  If None (the default), the
+            memory used depends on the expected number of rows of the
+            table.  It is not used for the 'bitmap' and 'bloom' kinds.
+
+            .. versionadded:: 3.1.2
+        progress : callable
+            If not None, it is called as ``progress(nrows, npasses)``
+            while the index is being built, where `nrows` is the number of
+            rows processed in the current pass over the data and `npasses`
+            is the number of passes remaining (including the current
+            one).  The last call is always ``progress(table.nrows, 0)``.
+
+            .. versionadded:: 3.1.2
 
         """
 
-        kinds = ['ultralight', 'light', 'medium', 'full']
+        kinds = ['ultralight', 'light', 'medium', 'full', 'bitmap', 'bloom']
         if kind not in kinds:
             raise ValueError("Kind must have any of these values: %s" % kinds)
         if (not isinstance(optlevel, (int, long)) or
@@ -3669,13 +6742,15 @@ class Column(object):
             raise ValueError("_blocksizes must be a tuple with exactly 4 "
                              "elements")
         idxrows = _column__create_index(self, optlevel, kind, filters,
-                                        tmp_dir, _blocksizes, _verbose)
+                                        tmp_dir, _blocksizes, _verbose,
+                                        nthreads, memory_limit, progress)
         return SizeType(idxrows)
 
     createIndex = previous_api(create_index)
 
-    def create_csindex(self, filters=None, tmp_dir=None,
-                       _blocksizes=None, _testmode=False, _verbose=False):
+    def create_csindex(self, filters=None, tmp_dir=None, nthreads=None,
+                       memory_limit=None, progress=None, _blocksizes=None,
+                       _testmode=False, _verbose=False):
         """Create a completely sorted index (CSI) for this column.
 
         This method guarantees the creation of an index with zero entropy, that
@@ -3685,8 +6760,8 @@ class Column(object):
         :meth:`Table.itersorted` or :meth:`Table.read_sorted`) in order to
         ensure completely sorted results.
 
-        For the meaning of filters and tmp_dir arguments see
-        :meth:`Column.create_index`.
+        For the meaning of filters, tmp_dir, nthreads, memory_limit and
+        progress arguments see :meth:`Column.create_index`.
 
         Notes
         -----
@@ -3697,11 +6772,12 @@ class Column(object):
 
         return self.create_index(
             kind='full', optlevel=9, filters=filters, tmp_dir=tmp_dir,
+            nthreads=nthreads, memory_limit=memory_limit, progress=progress,
             _blocksizes=_blocksizes, _testmode=_testmode, _verbose=_verbose)
 
     createCSIndex = previous_api(create_csindex)
 
-    def _do_reindex(self, dirty):
+    def _do_reindex(self, dirty, memory_limit=None, progress=None):
         """Common code for reindex() and reindex_dirty() codes."""
 
         index = self.index
@@ -3721,13 +6797,14 @@ class Column(object):
             index._f_remove()
             # Create a new Index with the previous parameters
             return SizeType(self.create_index(
-                kind=kind, optlevel=optlevel, filters=filters))
+                kind=kind, optlevel=optlevel, filters=filters,
+                memory_limit=memory_limit, progress=progress))
         else:
             return SizeType(0)  # The column is not intended for indexing
 
     _doReIndex = previous_api(_do_reindex)
 
-    def reindex(self):
+    def reindex(self, memory_limit=None, progress=None):
         """Recompute the index associated with this column.
 
         This can be useful when you suspect that, for any reason,
@@ -3735,9 +6812,16 @@ class Column(object):
 
         This method does nothing if the column is not indexed.
 
+        For the meaning of memory_limit and progress arguments see
+        :meth:`Column.create_index`.
+
+        .. versionchanged:: 3.1.2
+           The *memory_limit* and *progress* arguments were added.
+
         """
 
-        self._do_reindex(dirty=False)
+        self._do_reindex(dirty=False, memory_limit=memory_limit,
+                         progress=progress)
 
     reIndex = previous_api(reindex)
 
@@ -3775,6 +6859,62 @@ class Column(object):
 
     removeIndex = previous_api(remove_index)
 
+    def create_zonemap(self):
+        """Create a zone map for this column.
+
+        A zone map keeps the minimum and maximum values of the column in
+        every chunk of the table.  Queries on columns having a zone map
+        (but no usable index) only read the chunks whose values may
+        satisfy the condition, which is very effective for columns whose
+        values are clustered (e.g. timestamps or sequential identifiers).
+
+        Zone maps are kept up to date when rows are appended, modified or
+        removed.  Modifications only widen the zones, so a zone map may
+        become less selective after many modifications; remove it and
+        create it again to recover the tight zones.
+
+        Complex and multidimensional columns are not supported.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._table_file._check_writable()
+
+        table = self.table
+        if self.pathname in table._zonemapped:
+            raise ValueError(
+                "column '%s' already has a zone map" % self.pathname)
+        dtype = self.descr._v_dtypes[self.name]
+        if dtype.shape != ():
+            raise TypeError("multidimensional columns cannot have zone maps")
+        if dtype.kind == 'c':
+            raise TypeError("complex columns cannot have zone maps")
+
+        # Changing the set of zone-mapped columns invalidates the
+        # condition cache
+        table._condition_cache.clear()
+        table._rebuild_zonemaps([self.pathname])
+
+    def remove_zonemap(self):
+        """Remove the zone map associated with this column.
+
+        This method does nothing if the column has no zone map.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._table_file._check_writable()
+
+        zonemap = self.zonemap
+        if zonemap is not None:
+            table = self.table
+            zonemap._f_remove()
+            table._zonemapped.discard(self.pathname)
+            table._condition_cache.clear()
+            table._dirtycache = True
+
     def close(self):
         """Close this column."""
 
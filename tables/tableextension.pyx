@@ -26,6 +26,7 @@ Misc variables:
 import sys
 import numpy
 from time import time
+from timeit import default_timer
 
 from tables.description import Col
 from tables.exceptions import HDF5ExtError
@@ -560,6 +561,7 @@ cdef class Table(Leaf):
   def _read_records(self, hsize_t start, hsize_t nrecords, ndarray recarr):
     cdef void *rbuf
     cdef int ret
+    cdef double tref
 
     # Correct the number of records to read, if needed
     if (start + nrecords) > self.nrows:
@@ -569,12 +571,16 @@ cdef class Table(Leaf):
     rbuf = recarr.data
 
     # Read the records from disk
+    tref = default_timer()
     with nogil:
         ret = H5TBOread_records(self.dataset_id, self.type_id, start,
                                 nrecords, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading records.")
+    self._count_read(nrecords * recarr.itemsize,
+                     self._chunks_in_rows(0, start, start + nrecords, 1),
+                     tref)
 
     # Convert some HDF5 types to NumPy after reading.
     self._convert_types(recarr, nrecords, 1)
@@ -587,6 +593,7 @@ cdef class Table(Leaf):
     cdef int ret
     cdef void *rbuf
     cdef NumCache chunkcache
+    cdef double tref
 
     chunkcache = self._chunkcache
     chunkshape = chunkcache.slotsize
@@ -602,12 +609,14 @@ cdef class Table(Leaf):
       chunkcache.getitem_(nslot, rbuf, 0)
     else:
       # Chunk is not in cache. Read it and put it in the LRU cache.
+      tref = default_timer()
       with nogil:
           ret = H5TBOread_records(self.dataset_id, self.type_id,
                                   start, nrecords, rbuf)
 
       if ret < 0:
         raise HDF5ExtError("Problems reading chunk records.")
+      self._count_read(nrecords * chunkcache.itemsize, 1, tref)
       nslot = chunkcache.setitem_(nchunk, rbuf, 0)
     return nrecords
 
@@ -616,6 +625,7 @@ cdef class Table(Leaf):
     cdef void *rbuf
     cdef void *rbuf2
     cdef int ret
+    cdef double tref
 
     # Get the chunk of the coords that correspond to a buffer
     nrecords = coords.size
@@ -624,12 +634,15 @@ cdef class Table(Leaf):
     # Get the pointer to the buffer coords area
     rbuf2 = coords.data
 
+    tref = default_timer()
     with nogil:
         ret = H5TBOread_elements(self.dataset_id, self.type_id,
                                  nrecords, rbuf2, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems reading records.")
+    self._count_read(nrecords * recarr.itemsize,
+                     self._chunks_in_points(nrecords), tref)
 
     # Convert some HDF5 types to NumPy after reading.
     self._convert_types(recarr, nrecords, 1)
@@ -730,6 +743,7 @@ cdef class Row:
   cdef object  _table_file, _table_path
   cdef object  modified_fields
   cdef object  seqcache_key
+  cdef object  prefetcher
 
   # Deprecated API
   indexChunk = previous_api_property('indexchunk')
@@ -790,9 +804,19 @@ cdef class Row:
     self.wfieldscache = {}
     self.modified_fields = set()
 
-  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None):
-    """Return an iterator for traversiong the data in table."""
+  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None,
+            prefetch=0):
+    """Return an iterator for traversiong the data in table.
+
+    If `prefetch` is greater than 0, that number of I/O buffers are read
+    ahead by a background thread (only for sequential iterations).
+
+    """
     self._init_loop(start, stop, step, coords, chunkmap)
+    if (prefetch > 0 and self.step > 0 and self.coords is None and
+        not self.wherecond and not self.indexed and self.start < self.stop):
+      self.prefetcher = self.table._prefetch_records(
+        self.start, self.stop, self.step, self.nrowsinbuf, prefetch)
     return iter(self)
 
   def __iter__(self):
@@ -834,6 +858,7 @@ cdef class Row:
                  object coords, object chunkmap):
     """Initialization for the __iter__ iterator"""
     table = self.table
+    self._stop_prefetch()
     self._riterator = 1   # We are inside a read iterator
     self.start = start
     self.stop = stop
@@ -1142,8 +1167,11 @@ cdef class Row:
             self.stopb = self.nrowsinbuf
           self._row = self.startb - self.step
           # Read a chunk
-          recout = self.table._read_records(self.nrowsread, self.nrowsinbuf,
-                                            self.iobuf)
+          if self.prefetcher is not None:
+            recout = self._read_prefetched()
+          else:
+            recout = self.table._read_records(self.nrowsread,
+                                              self.nrowsinbuf, self.iobuf)
           self.nrowsread = self.nrowsread + recout
 
         self._row = self._row + self.step
@@ -1176,10 +1204,35 @@ cdef class Row:
       else:
         self._finish_riterator()
 
+  cdef int _read_prefetched(self):
+    """Get the buffer at `self.nrowsread` from the read-ahead thread."""
+    cdef ndarray iobuf, buf
+    cdef hsize_t start
+    cdef int recout
+
+    start, recout, buf = next(self.prefetcher)
+    if start != self.nrowsread:
+      # This should never happen, but be safe
+      self._stop_prefetch()
+      return self.table._read_records(self.nrowsread, self.nrowsinbuf,
+                                      self.iobuf)
+    # The prefetched buffers are reused, so copy the rows
+    iobuf = <ndarray>self.iobuf
+    memcpy(iobuf.data, buf.data, recout * self._stride)
+    return recout
+
+  cdef _stop_prefetch(self):
+    """Stop reading ahead (if it was being done)."""
+
+    if self.prefetcher is not None:
+      self.prefetcher.close()
+      self.prefetcher = None
+
   cdef _finish_riterator(self):
     """Clean-up things after iterator has been done"""
     cdef ObjectCache seqcache
 
+    self._stop_prefetch()
     self.rfieldscache = {}     # empty rfields cache
     self.wfieldscache = {}     # empty wfields cache
     # Make a copy of the last read row in the private record
@@ -1403,6 +1456,10 @@ cdef class Row:
     if not self._riterator:
       raise NotImplementedError("You are only allowed to update rows through the Row.update() method if you are in the middle of a table iterator.")
 
+    # Rows are going to be written, so stop reading ahead (HDF5 is not
+    # thread-safe)
+    self._stop_prefetch()
+
     if self.mod_elements is None:
       # Initialize an array for keeping the modified elements
       # (just in case Row.update() would be used)
@@ -1435,8 +1492,10 @@ cdef class Row:
     table._update_elements(self._mod_nrows, self.mod_elements, self.iobufcpy)
     # Reset the counter of modified rows to 0
     self._mod_nrows = 0
-    # Mark the modified fields' indexes as dirty.
-    table._mark_columns_as_dirty(self.modified_fields)
+    # Mark the modified fields' indexes as dirty (with automatic indexing
+    # they have been updated in place by `Table._update_elements()`).
+    if not table.autoindex:
+      table._mark_columns_as_dirty(self.modified_fields)
 
   _flushModRows = previous_api(_flush_mod_rows)
 
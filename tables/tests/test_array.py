@@ -2668,6 +2668,111 @@ class TestCreateArrayArgs(common.TempFileMixin, TestCase):
                           shape=shape)
 
 
+class PrefetchTestCase(common.TempFileMixin, TestCase):
+    """Test case for reading ahead the buffers of array iterators."""
+
+    def setUp(self):
+        super(PrefetchTestCase, self).setUp()
+        self.array = self.h5file.create_carray(
+            '/', 'array', obj=numpy.arange(3000).reshape(1000, 3),
+            filters=tables.Filters(complevel=1), chunkshape=(10, 3))
+        self.array.nrowsinbuf = 17
+
+    def test00_iterrows(self):
+        """Iterating with read-ahead."""
+
+        array = self.array
+        data = array.read()
+        for prefetch in (1, 3):
+            for start, stop, step in [(None, None, None), (3, 500, 1),
+                                      (5, 999, 7), (1, None, 40)]:
+                rows = list(array.iterrows(start, stop, step,
+                                           prefetch=prefetch))
+                self.assertTrue(allequal(numpy.array(rows),
+                                         data[start:stop:step]))
+
+    def test01_parameter(self):
+        """The default read-ahead comes from the parameters."""
+
+        self.h5file.params['PREFETCH_BUFFERS'] = 2
+        rows = [row for row in self.array]
+        self.assertTrue(allequal(numpy.array(rows), self.array.read()))
+
+    @unittest.skipIf(not tables.utilsextension.is_hdf5_threadsafe(),
+                     'HDF5 is not thread-safe')
+    def test02_break(self):
+        """Leaving an iteration with read-ahead before its end."""
+
+        array = self.array
+        for row in array.iterrows(prefetch=3):
+            if array.nrow == 50:
+                break
+        rows = list(array.iterrows(900, prefetch=2))
+        self.assertTrue(allequal(numpy.array(rows), array[900:]))
+        for row in array.iterrows(prefetch=3):
+            break
+        prefetcher = array._prefetcher
+        array.close()
+        # The read-ahead has been stopped
+        self.assertTrue(prefetcher.gi_frame is None)
+
+
+class MmapTestCase(common.TempFileMixin, TestCase):
+    """Test case for memory mapping the data of arrays."""
+
+    def setUp(self):
+        super(MmapTestCase, self).setUp()
+        self.data = numpy.arange(300, dtype='int32').reshape(100, 3)
+        self.array = self.h5file.create_array('/', 'array', self.data)
+
+    def test00_as_mmap(self):
+        """Mapping a contiguous array."""
+
+        mapped = self.array.as_mmap()
+        self.assertTrue(isinstance(mapped, numpy.memmap))
+        self.assertEqual(mapped.shape, self.data.shape)
+        self.assertTrue(allequal(mapped, self.data))
+        self.assertRaises(ValueError, mapped.__setitem__, 0, 1)
+
+    def test01_read(self):
+        """Reading an array through a memory map."""
+
+        array = self.array
+        for start, stop, step in [(None, None, None), (3, 50, 1),
+                                  (5, 99, 7), (-10, None, 2)]:
+            mapped = array.read(start, stop, step, mmap=True)
+            self.assertTrue(allequal(mapped, self.data[start:stop:step]))
+        self.assertRaises(ValueError, array.read,
+                          out=numpy.empty_like(self.data), mmap=True)
+
+    def test02_reopen(self):
+        """Mapping an array in a file opened read-only."""
+
+        self._reopen()
+        mapped = self.h5file.root.array.as_mmap()
+        self.assertTrue(allequal(mapped, self.data))
+
+    def test03_chunked(self):
+        """Chunked arrays cannot be mapped."""
+
+        carray = self.h5file.create_carray(
+            '/', 'carray', obj=self.data, filters=tables.Filters(complevel=1))
+        self.assertRaises(ValueError, carray.as_mmap)
+        self.assertRaises(ValueError, carray.read, mmap=True)
+        earray = self.h5file.create_earray(
+            '/', 'earray', tables.Int32Atom(), shape=(0, 3))
+        earray.append(self.data)
+        self.assertRaises(ValueError, earray.as_mmap)
+
+    def test04_vlarray(self):
+        """Variable length arrays cannot be mapped."""
+
+        vlarray = self.h5file.create_vlarray('/', 'vlarray',
+                                             tables.Int32Atom())
+        vlarray.append([1, 2, 3])
+        self.assertRaises(ValueError, vlarray.as_mmap)
+
+
 #----------------------------------------------------------------------
 
 
@@ -2737,6 +2842,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateArrayArgs))
         theSuite.addTest(unittest.makeSuite(BroadcastTest))
+        theSuite.addTest(unittest.makeSuite(PrefetchTestCase))
+        theSuite.addTest(unittest.makeSuite(MmapTestCase))
 
     return theSuite
 
@@ -2590,6 +2590,942 @@ class TestIndexingNans(TempFileMixin, TestCase):
         results = table.read_where('(values > 0)')
         self.assertEqual(len(results), 100*2)
 
+class ParallelIndexTestCase(TempFileMixin, TestCase):
+    """Test case for building indexes with several threads."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(ParallelIndexTestCase, self).setUp()
+        description = {'s1': StringCol(itemsize=4),
+                       's2': StringCol(itemsize=4),
+                       'f1': FloatCol(), 'f2': FloatCol(),
+                       'i1': Int16Col(), 'i2': Int16Col()}
+        self.table = self.h5file.create_table('/', 'test', description)
+        self.append_rows(self.nrows)
+
+    def append_rows(self, nrows):
+        table = self.table
+        values = numpy.random.RandomState(table.nrows).randint(0, 300, nrows)
+        rows = numpy.empty(nrows, dtype=table.dtype)
+        rows['s1'] = rows['s2'] = ['%03d' % v for v in values]
+        rows['f1'] = rows['f2'] = values * 0.5
+        rows['f1'][::17] = rows['f2'][::17] = numpy.nan
+        rows['i1'] = rows['i2'] = values
+        table.append(rows)
+        table.flush()
+
+    def check_indexes(self, colname1, colname2):
+        index1 = self.table.colinstances[colname1].index
+        index2 = self.table.colinstances[colname2].index
+        self.assertEqual(index1.nelements, index2.nelements)
+        self.assertEqual(index1.is_csi, index2.is_csi)
+        for name in ('sorted', 'indices', 'ranges', 'bounds', 'abounds',
+                     'zbounds', 'mbounds', 'sortedLR', 'indicesLR'):
+            values1 = getattr(index1, name)[:]
+            values2 = getattr(index2, name)[:]
+            if verbose:
+                print("%s of %s: %s" % (name, colname2, values2))
+            # Compare the bytes, since there are NaN values
+            self.assertEqual(values1.tostring(), values2.tostring())
+
+    def check_queries(self):
+        table = self.table
+        for condition in ('s2 > b"150"', '(f2 > 20) & (f2 <= 70.5)',
+                          'i2 == 17'):
+            result = table.get_where_list(condition)
+            table._disable_indexing_in_queries()
+            expected = table.get_where_list(condition)
+            table._enable_indexing_in_queries()
+            if verbose:
+                print("Condition ``%s`` selects %d rows."
+                      % (condition, len(result)))
+            self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test00_create(self):
+        """Indexes built by several threads are the same."""
+
+        for kind, optlevel in (('ultralight', 3), ('light', 6),
+                               ('medium', 6), ('full', 9)):
+            for colname in ('s', 'f', 'i'):
+                col1 = self.table.colinstances[colname + '1']
+                col2 = self.table.colinstances[colname + '2']
+                col1.create_index(kind=kind, optlevel=optlevel,
+                                  _blocksizes=small_blocksizes)
+                col2.create_index(kind=kind, optlevel=optlevel, nthreads=3,
+                                  _blocksizes=small_blocksizes)
+                self.check_indexes(colname + '1', colname + '2')
+                col1.remove_index()
+                col2.remove_index()
+
+    def test01_append(self):
+        """Indexes updated by several threads."""
+
+        table = self.table
+        self.h5file.params['INDEX_THREADS'] = 3
+        for colname in ('s2', 'f2', 'i2'):
+            table.colinstances[colname].create_index(
+                kind='full', _blocksizes=small_blocksizes)
+        self.check_queries()
+        for nrows in (7, 100, 350):
+            self.append_rows(nrows)
+            self.assertEqual(table.cols.f2.index.nelements, table.nrows)
+            self.check_queries()
+
+
+class IncrementalIndexTestCase(TempFileMixin, TestCase):
+    """Test case for updating indexes in place when rows are modified."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(IncrementalIndexTestCase, self).setUp()
+        description = {'i': Int32Col(), 'f': FloatCol(), 'b': Int8Col(),
+                       's': StringCol(itemsize=4)}
+        table = self.h5file.create_table('/', 'test', description)
+        self.table = table
+        table.append(self.make_rows(self.nrows))
+        table.flush()
+        table.cols.i.create_csindex(_blocksizes=small_blocksizes)
+        table.cols.f.create_index(kind='medium',
+                                  _blocksizes=small_blocksizes)
+        table.cols.b.create_index(kind='bitmap')
+        table.cols.s.create_index(kind='bloom')
+        table.create_expr_index('i + b', _blocksizes=small_blocksizes)
+
+    def make_rows(self, nrows, seed=0):
+        values = numpy.random.RandomState(seed).randint(0, 500, nrows)
+        rows = numpy.empty(nrows, dtype=self.table.dtype)
+        rows['i'] = values
+        rows['f'] = values * 0.5
+        rows['b'] = values % 5
+        rows['s'] = ['%03d' % v for v in values]
+        return rows
+
+    def check_queries(self):
+        table = self.table
+        for condition in ('i < 100', '(f > 20) & (f <= 70.5)', 'b == 3',
+                          's == b"123"', 'i + b > 400', 'i == 12345'):
+            result = table.get_where_list(condition)
+            table._disable_indexing_in_queries()
+            expected = table.get_where_list(condition)
+            table._enable_indexing_in_queries()
+            if verbose:
+                print("Condition ``%s`` selects %d rows."
+                      % (condition, len(result)))
+            self.assertTrue(common.areArraysEqual(result, expected))
+
+    def check_clean(self):
+        table = self.table
+        for colname in ('i', 'f', 'b', 's'):
+            self.assertFalse(table.colinstances[colname].index.dirty)
+        self.assertFalse(table.expr_indexes['i + b'].dirty)
+
+    def modify(self):
+        table = self.table
+        rows = self.make_rows(20, seed=1)
+        table.modify_column(10, 60, 1, column=numpy.arange(50) * 10,
+                            colname='i')
+        table.modify_rows(100, 103, 1, rows[:3])
+        table.modify_coordinates([5, 900, 5, 995], rows[3:7])
+        table.cols.f[200:210] = numpy.arange(10) + 1000.
+        table.modify_columns(300, columns=[rows['b'][7:12], rows['s'][7:12]],
+                             names=['b', 's'])
+
+    def test00_modify(self):
+        """Modifying rows keeps the indexes usable."""
+
+        table = self.table
+        self.modify()
+        self.check_clean()
+        self.assertTrue(table.cols.i.index.ndeltarows > 0)
+        self.assertTrue(table.cols.f.index.ndeltarows > 0)
+        self.assertTrue(table.expr_indexes['i + b'].ndeltarows > 0)
+        self.assertTrue(table.will_query_use_indexing('i < 100'))
+        self.check_queries()
+        # Modify some rows again, so that some values are back
+        table.modify_column(10, 20, 1, column=numpy.arange(10) + 7,
+                            colname='i')
+        self.check_clean()
+        self.check_queries()
+
+    def test01_update(self):
+        """Modifying rows with `Row.update()` keeps the indexes usable."""
+
+        table = self.table
+        for row in table.where('i < 50'):
+            row['i'] = row['i'] + 1000
+            row['b'] = 4
+            row['s'] = b'new'
+            row.update()
+        table.flush()
+        self.check_clean()
+        self.check_queries()
+
+    def test02_reopen(self):
+        """The modified rows are kept in the file."""
+
+        self.modify()
+        ndeltarows = self.table.cols.i.index.ndeltarows
+        self._reopen(mode='a')
+        self.table = self.h5file.root.test
+        self.assertEqual(self.table.cols.i.index.ndeltarows, ndeltarows)
+        self.check_queries()
+
+    def test03_append(self):
+        """The modified rows in the last row are indexed again."""
+
+        table = self.table
+        self.modify()
+        for nrows in (3, 40):
+            table.append(self.make_rows(nrows, seed=nrows))
+            table.flush()
+            self.assertEqual(table.cols.i.index.nelements, table.nrows)
+            self.check_clean()
+            self.check_queries()
+
+    def test04_compact(self):
+        """Compacting the indexes merges the modified rows."""
+
+        table = self.table
+        self.modify()
+        table.cols.f.index.compact()
+        table.expr_indexes['i + b'].compact()
+        self.assertEqual(table.cols.f.index.ndeltarows, 0)
+        self.assertEqual(table.expr_indexes['i + b'].ndeltarows, 0)
+        self.check_queries()
+        # Sorting with an index compacts it first
+        self.assertTrue(table.cols.i.index.ndeltarows > 0)
+        values = table.read_sorted('i', field='i')
+        self.assertEqual(table.cols.i.index.ndeltarows, 0)
+        self.assertTrue(table.cols.i.index.is_csi)
+        self.assertTrue(common.areArraysEqual(
+            values, numpy.sort(table.col('i'))))
+
+    def test05_max_rows(self):
+        """Indexes are rebuilt when the modified rows are too many."""
+
+        table = self.table
+        self.h5file.params['INDEX_DELTA_MAX_ROWS'] = 20
+        table.modify_column(10, 60, 1, column=numpy.arange(50) * 1000,
+                            colname='i')
+        table.cols.f[200:210] = numpy.arange(10) + 1000.
+        self.check_clean()
+        # The changes in `i` are too many for the delta
+        self.assertEqual(table.cols.i.index.ndeltarows, 0)
+        self.assertEqual(table.expr_indexes['i + b'].ndeltarows, 0)
+        self.assertEqual(table.cols.f.index.ndeltarows, 10)
+        self.check_queries()
+
+    def test06_noauto(self):
+        """Indexes are marked as dirty without automatic indexing."""
+
+        table = self.table
+        table.autoindex = False
+        self.modify()
+        self.assertTrue(table.cols.i.index.dirty)
+        self.assertTrue(table.expr_indexes['i + b'].dirty)
+        table.reindex_dirty()
+        self.check_clean()
+        self.assertEqual(table.cols.i.index.ndeltarows, 0)
+        self.check_queries()
+
+
+class MemoryLimitIndexTestCase(TempFileMixin, TestCase):
+    """Test case for building indexes within a memory limit."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(MemoryLimitIndexTestCase, self).setUp()
+        description = {'s': StringCol(itemsize=4), 'f': FloatCol(),
+                       'i': Int32Col()}
+        table = self.h5file.create_table('/', 'test', description)
+        values = numpy.random.RandomState(0).randint(0, 300, self.nrows)
+        rows = numpy.empty(self.nrows, dtype=table.dtype)
+        rows['s'] = ['%03d' % v for v in values]
+        rows['f'] = values * 0.5
+        rows['f'][::17] = numpy.nan
+        rows['i'] = values
+        table.append(rows)
+        table.flush()
+        self.table = table
+
+    def check_index(self, colname):
+        table = self.table
+        index = table.colinstances[colname].index
+        self.assertTrue(index.is_csi)
+        self.assertEqual(index.nelements, table.nrows)
+        sorted = index.read_sorted()
+        expected = numpy.sort(table.col(colname))
+        if verbose:
+            print("sorted values of %s: %s" % (colname, sorted))
+        # Compare the bytes, since there are NaN values
+        self.assertEqual(sorted.tostring(), expected.tostring())
+        indices = index.read_indices()
+        self.assertEqual(table.col(colname)[indices].tostring(),
+                         expected.tostring())
+        condition = {'s': 's > b"150"', 'f': '(f > 20) & (f <= 70.5)',
+                     'i': 'i == 17'}[colname]
+        result = table.get_where_list(condition)
+        table._disable_indexing_in_queries()
+        expected = table.get_where_list(condition)
+        table._enable_indexing_in_queries()
+        self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test00_csindex(self):
+        """Completely sorted indexes merged in one or several passes."""
+
+        for memory_limit in (8192, 2048, 600):
+            for colname in ('s', 'f', 'i'):
+                col = self.table.colinstances[colname]
+                col.create_csindex(memory_limit=memory_limit,
+                                   _blocksizes=small_blocksizes)
+                self.check_index(colname)
+                col.remove_index()
+
+    def test01_progress(self):
+        """The progress of the build is reported."""
+
+        calls = []
+        col = self.table.cols.f
+        col.create_csindex(memory_limit=600, _blocksizes=small_blocksizes,
+                           progress=lambda *args: calls.append(args))
+        if verbose:
+            print("progress calls:", calls)
+        npasses = col.index.count_passes(self.nrows)
+        self.assertTrue(npasses > 2)
+        self.assertEqual(calls[0], (0, npasses))
+        self.assertEqual(calls[-1], (self.nrows, 0))
+        self.assertEqual(set(c[1] for c in calls), set(range(npasses + 1)))
+        for c1, c2 in zip(calls[:-1], calls[1:]):
+            self.assertTrue(c1[1] >= c2[1])
+            if c1[1] == c2[1]:
+                self.assertTrue(c1[0] <= c2[0])
+
+        calls = []
+        col.remove_index()
+        col.create_index(kind='medium', _blocksizes=small_blocksizes,
+                         progress=lambda *args: calls.append(args))
+        self.assertEqual(calls[0], (0, 2))
+        self.assertEqual(calls[-1], (self.nrows, 0))
+
+    def test02_slicesize(self):
+        """The slices of the index fit in the memory limit."""
+
+        col = self.table.cols.i
+        col.create_index(kind='full', memory_limit=4096)
+        index = col.index
+        self.assertTrue(index.slicesize * (4 + 8) <= 4096 // 4)
+        col.remove_index()
+        col.create_csindex(memory_limit=4096)
+        self.check_index('i')
+        col.reindex(memory_limit=4096)
+        self.check_index('i')
+
+    def test03_invalid(self):
+        """Memory limits must be positive."""
+
+        self.assertRaises(ValueError, self.table.cols.i.create_index,
+                          memory_limit=0)
+        self.assertFalse(self.table.cols.i.is_indexed)
+
+
+class ChunkmapTestCase(TempFileMixin, TestCase):
+    """Test case for the map of chunks selected by index searches."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(ChunkmapTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', {'i': Int32Col()},
+                                         chunkshape=16)
+        values = numpy.random.RandomState(0).randint(0, 300, self.nrows)
+        table.append([(v,) for v in values])
+        table.flush()
+        self.table = table
+
+    def test00_chunkmap(self):
+        """The chunkmap covers the chunks of the selected rows."""
+
+        table = self.table
+        for kind in ('ultralight', 'light', 'medium', 'full'):
+            table.cols.i.create_index(kind=kind,
+                                      _blocksizes=small_blocksizes)
+            index = table.cols.i.index
+            nrowsinchunk = index.nrowsinchunk
+            for (lo, hi) in ((17, 17), (50, 80), (0, 299), (400, 500)):
+                index.search((lo, hi))
+                chunkmap = index.get_chunkmap()
+                rows = table.get_where_list('(i >= lo) & (i <= hi)')
+                if verbose:
+                    print("kind %s, range (%d, %d): %d chunks"
+                          % (kind, lo, hi, chunkmap.sum()))
+                self.assertEqual(len(chunkmap),
+                                 -(-self.nrows // nrowsinchunk))
+                self.assertTrue(chunkmap[rows // nrowsinchunk].all())
+                if kind == 'full' and index.lbucket == nrowsinchunk:
+                    self.assertEqual(chunkmap.sum(),
+                                     len(set(rows // nrowsinchunk)))
+            table.cols.i.remove_index()
+
+
+class IndexStatsTestCase(TempFileMixin, TestCase):
+    """Test case for the statistics of indexes."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(IndexStatsTestCase, self).setUp()
+        description = {'i': Int32Col(), 'm': Int32Col(), 'f': FloatCol(),
+                       's': StringCol(itemsize=4)}
+        table = self.h5file.create_table('/', 'test', description)
+        values = numpy.random.RandomState(0).permutation(self.nrows)
+        rows = numpy.empty(self.nrows, dtype=table.dtype)
+        rows['i'] = values
+        rows['m'] = values % 100
+        rows['f'] = values * 0.5
+        rows['f'][::10] = numpy.nan
+        rows['s'] = ['%03d' % (v % 100) for v in values]
+        table.append(rows)
+        table.flush()
+        self.table = table
+
+    def test00_stats(self):
+        """Histograms and distinct counts are computed for indexes."""
+
+        table = self.table
+        for kind, optlevel in (('light', 6), ('medium', 6), ('full', 9)):
+            for colname in ('i', 'm', 'f', 's'):
+                col = table.colinstances[colname]
+                col.create_index(kind=kind, optlevel=optlevel,
+                                 _blocksizes=small_blocksizes)
+                histogram = col.index.histogram
+                if verbose:
+                    print("histogram of %s (%s): %s"
+                          % (colname, kind, histogram))
+                values = table.col(colname)
+                if colname == 'f':
+                    values = values[~numpy.isnan(values)]
+                self.assertEqual(len(histogram), 33)
+                self.assertEqual(histogram[0], min(values))
+                self.assertEqual(histogram[-1], max(values))
+                self.assertTrue((histogram[1:] >= histogram[:-1]).all())
+                if colname in ('m', 's'):
+                    self.assertEqual(col.index.ndistinct, 100)
+                else:
+                    self.assertTrue(col.index.ndistinct >= len(values))
+                col.remove_index()
+
+        table.cols.m.create_index(_blocksizes=small_blocksizes)
+        self._reopen()
+        self.assertEqual(self.h5file.root.test.cols.m.index.ndistinct, 100)
+
+    def test01_estimate(self):
+        """The number of rows selected by indexes is estimated."""
+
+        table = self.table
+        table.cols.i.create_csindex(_blocksizes=small_blocksizes)
+        table.cols.m.create_index(_blocksizes=small_blocksizes)
+        index = table.cols.i.index
+        for (low, high) in ((100, 299), (0, 999), (-10, 10), (990, 2000)):
+            estimate = index.estimate_nrows((low, high))
+            expected = ((table.cols.i[:] >= low) &
+                        (table.cols.i[:] <= high)).sum()
+            if verbose:
+                print("range (%d, %d): %d rows, estimated %d"
+                      % (low, high, expected, estimate))
+            self.assertTrue(abs(estimate - expected) <= self.nrows // 20)
+        self.assertEqual(index.estimate_nrows((2000, 3000)), 0)
+        self.assertEqual(index.estimate_nrows((3000, 2000)), 0)
+        self.assertEqual(table.cols.m.index.estimate_nrows((17, 17)), 10)
+
+    def test02_queries(self):
+        """Queries skip the indexes that would not help."""
+
+        table = self.table
+        for colname in ('i', 'm', 'f'):
+            table.colinstances[colname].create_index(
+                _blocksizes=small_blocksizes)
+        for maxselectivity in (0.5, 0.01, 1):
+            self.h5file.params['INDEX_MAX_SELECTIVITY'] = maxselectivity
+            for condition in ('(i > 100) & (m == 17)', 'i >= 0',
+                              '(f < 400) | (m == 3)', '(i < 0) & (m > 5)',
+                              '(f > 100) & (i > 900)'):
+                result = table.get_where_list(condition)
+                table._disable_indexing_in_queries()
+                expected = table.get_where_list(condition)
+                table._enable_indexing_in_queries()
+                if verbose:
+                    print("Condition ``%s`` selects %d rows."
+                          % (condition, len(result)))
+                self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test03_repeated(self):
+        """Repeating a query that skips the indexes."""
+
+        table = self.table
+        table.cols.i.create_index(_blocksizes=small_blocksizes)
+        self.h5file.params['INDEX_MAX_SELECTIVITY'] = 0.01
+        values = table.col('i')
+        for condition, expected in (('i < 10', (values < 10).sum()),
+                                    ('i >= 100', (values >= 100).sum())):
+            for i in range(3):
+                rows = [row['i'] for row in table.where(condition)]
+                self.assertEqual(len(rows), expected)
+
+
+class WarmCacheTestCase(TempFileMixin, TestCase):
+    """Test case for saving the caches of indexes."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(WarmCacheTestCase, self).setUp()
+        description = {'i': Int32Col(), 's': StringCol(itemsize=4)}
+        table = self.h5file.create_table('/', 'test', description)
+        values = numpy.random.RandomState(0).randint(0, 300, self.nrows)
+        table.append([(v, '%03d' % v) for v in values])
+        table.flush()
+        table.cols.i.create_csindex(_blocksizes=small_blocksizes)
+        table.cols.s.create_index(_blocksizes=small_blocksizes)
+        self.conditions = ['(i > 10) & (i < 50)', 'i == 17',
+                           '(s > b"100") & (s < b"150")']
+        self.expected = [table.get_where_list(condition)
+                         for condition in self.conditions]
+
+    def check_queries(self):
+        table = self.h5file.root.test
+        for condition, expected in zip(self.conditions, self.expected):
+            result = table.get_where_list(condition)
+            self.assertTrue(common.areArraysEqual(result, expected))
+
+    def check_loaded(self, loaded):
+        table = self.h5file.root.test
+        for colname, value in (('i', 0), ('s', b'000')):
+            index = table.colinstances[colname].index
+            self.assertTrue('warmcache' in index)
+            # The first search loads the saved caches
+            index.search(index.get_lookup_range(('eq',), (value,)))
+            nitems = len(index.limboundscache.items())
+            if verbose:
+                print("Items in cache for %s: %d" % (colname, nitems))
+            self.assertEqual(nitems > 1, loaded)
+
+    def test00_save(self):
+        """Saving the caches of indexes explicitly."""
+
+        table = self.h5file.root.test
+        table.cols.i.index.save_cache()
+        table.cols.s.index.save_cache()
+        self._reopen()
+        self.check_loaded(True)
+        self.check_queries()
+
+    def test01_close(self):
+        """Saving the caches of indexes when the file is closed."""
+
+        self._reopen('a')
+        self.assertFalse('warmcache' in self.h5file.root.test.cols.i.index)
+        self.check_queries()
+        self.h5file.params['INDEX_SAVE_CACHES'] = True
+        self._reopen()
+        self.check_loaded(True)
+        self.check_queries()
+
+    def test02_stale(self):
+        """Saved caches are not used when the index changes."""
+
+        table = self.h5file.root.test
+        table.cols.i.index.save_cache()
+        table.cols.s.index.save_cache()
+        table.append([(v, '%03d' % v) for v in range(300)])
+        table.flush()
+        self.expected = [table.get_where_list(condition)
+                         for condition in self.conditions]
+        self._reopen()
+        self.check_loaded(False)
+        self.check_queries()
+
+
+class OrderStatsTestCase(TempFileMixin, TestCase):
+    """Test case for quantile, rank and value counts queries."""
+
+    nrows = 1000
+    quantiles = [0, 0.1, 0.25, 0.5, 0.9, 1]
+
+    def setUp(self):
+        super(OrderStatsTestCase, self).setUp()
+        description = {'i': Int32Col(), 'f': Float64Col(),
+                       's': StringCol(itemsize=4)}
+        table = self.h5file.create_table('/', 'test', description)
+        values = numpy.random.RandomState(0).randint(0, 300, self.nrows)
+        rows = numpy.empty(self.nrows, dtype=table.dtype)
+        rows['i'] = values
+        rows['f'] = values / 3.
+        rows['f'][values % 50 == 0] = numpy.nan
+        rows['s'] = ['%03d' % v for v in values]
+        table.append(rows)
+        table.flush()
+
+    def check_column(self, colname):
+        column = self.h5file.root.test.colinstances[colname]
+        values = column[:]
+        if values.dtype.kind == 'f':
+            values = values[~numpy.isnan(values)]
+        values = numpy.sort(values)
+        positions = numpy.array(self.quantiles) * (len(values) - 1)
+        if values.dtype.kind == 'S':
+            expected = values[numpy.floor(positions).astype('int64')]
+        else:
+            expected = numpy.percentile(values, [q * 100
+                                                 for q in self.quantiles])
+        result = column.quantile(self.quantiles)
+        if verbose:
+            print("Quantiles of %s:" % colname, result)
+        if values.dtype.kind == 'S':
+            self.assertTrue(common.areArraysEqual(result, expected))
+        else:
+            self.assertTrue(numpy.allclose(result, expected))
+        self.assertEqual(column.quantile(0), values[0])
+
+        for value in (values[0], values[len(values) // 3], values[-1]):
+            self.assertEqual(column.rank(value),
+                             numpy.count_nonzero(values < value))
+
+        distinct = numpy.unique(values)
+        counts = numpy.array([numpy.count_nonzero(values == value)
+                              for value in distinct])
+        order = numpy.argsort(-counts, kind='mergesort')
+        result = column.value_counts(limit=10)
+        self.assertEqual(len(result), 10)
+        self.assertTrue(common.areArraysEqual(result['value'],
+                                              distinct[order][:10]))
+        self.assertTrue(common.areArraysEqual(result['count'],
+                                              counts[order][:10]))
+        self.assertEqual(len(column.value_counts()), len(distinct))
+        self.assertTrue(common.areArraysEqual(column.unique(), distinct))
+        self.assertEqual(column.nunique(approx=False), len(distinct))
+
+    def test00_noindex(self):
+        """Order queries on columns without indexes."""
+
+        for colname in ('i', 'f', 's'):
+            self.check_column(colname)
+
+    def test01_csindex(self):
+        """Order queries on columns with CSI indexes."""
+
+        for colname in ('i', 'f', 's'):
+            self.h5file.root.test.colinstances[colname].create_csindex(
+                _blocksizes=small_blocksizes)
+            self.check_column(colname)
+
+    def test02_index(self):
+        """Order queries on columns with non-CSI indexes."""
+
+        for colname in ('i', 'f', 's'):
+            column = self.h5file.root.test.colinstances[colname]
+            column.create_index(optlevel=0, kind='full',
+                                _blocksizes=small_blocksizes)
+            self.assertFalse(column.index.is_csi)
+            self.check_column(colname)
+
+    def test03_bitmap(self):
+        """Order queries on columns with bitmap indexes."""
+
+        self.h5file.root.test.cols.i.create_index(kind='bitmap')
+        self.check_column('i')
+
+    def test04_sketch(self):
+        """Approximate quantiles of columns without indexes."""
+
+        self.h5file.params['QUANTILE_SKETCH_SIZE'] = 64
+        column = self.h5file.root.test.cols.i
+        values = numpy.sort(column[:])
+        for q in self.quantiles:
+            result = column.quantile(q)
+            # Check the position of the result instead of its value
+            error = abs(numpy.searchsorted(values, result) -
+                        q * (self.nrows - 1))
+            if verbose:
+                print("Quantile %s: %s (error %d)" % (q, result, error))
+            self.assertTrue(error <= self.nrows // 10)
+
+    def test05_errors(self):
+        """Invalid arguments in order queries."""
+
+        column = self.h5file.root.test.cols.i
+        self.assertRaises(ValueError, column.quantile, 1.5)
+        self.assertRaises(ValueError, column.value_counts, -1)
+
+    def test06_empty(self):
+        """Order queries on empty columns."""
+
+        table = self.h5file.create_table('/', 'empty', {'f': Float64Col()})
+        column = table.cols.f
+        self.assertTrue(column.quantile(0.5) is None)
+        self.assertEqual(column.rank(0), 0)
+        self.assertEqual(len(column.value_counts()), 0)
+        self.assertEqual(len(column.unique()), 0)
+        self.assertEqual(column.nunique(), 0)
+
+    def test07_nunique(self):
+        """Approximate number of distinct values."""
+
+        column = self.h5file.root.test.cols.f
+        expected = len(numpy.unique(column[:][~numpy.isnan(column[:])]))
+        self.assertTrue(abs(column.nunique() - expected) < expected * 0.05)
+        self.assertEqual(column.nunique(approx=False), expected)
+
+        table = self.h5file.create_table('/', 'big', {'i': Int64Col()})
+        values = numpy.random.RandomState(1).randint(0, 10 ** 9, 200000)
+        rows = numpy.empty(len(values), dtype=table.dtype)
+        rows['i'] = values
+        table.append(rows)
+        table.flush()
+        expected = len(numpy.unique(values))
+        result = table.cols.i.nunique()
+        if verbose:
+            print("Distinct values: %d (estimated %d)" % (expected, result))
+        self.assertTrue(abs(result - expected) < expected * 0.05)
+        self.assertEqual(table.cols.i.nunique(approx=False), expected)
+
+    def test08_nunique_bitmap(self):
+        """Exact number of distinct values from a bitmap index."""
+
+        column = self.h5file.root.test.cols.i
+        column.create_index(kind='bitmap')
+        self.assertEqual(column.nunique(), len(numpy.unique(column[:])))
+
+
+class StringPrefixTestCase(TempFileMixin, TestCase):
+    """Test case for prefix matching on string columns."""
+
+    prefixes = [b'A', b'AB', b'AB\xff', b'B\x7f', b'\xff', b'', b'ABCDE']
+
+    def setUp(self):
+        super(StringPrefixTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test',
+                                         {'s': StringCol(itemsize=4)})
+        chars = [b'A', b'B', b'\x7f', b'\x80', b'\xff']
+        self.values = [c1 + c2 + c3 for c1 in chars for c2 in chars
+                       for c3 in [b'', b'C', b'\xff']]
+        table.append([(value,) for value in self.values])
+        table.flush()
+
+    def check_prefixes(self):
+        column = self.h5file.root.test.cols.s
+        for prefix in self.prefixes:
+            result = [row.nrow for row in column.startswith(prefix)]
+            expected = [nrow for nrow, value in enumerate(self.values)
+                        if value.startswith(prefix)]
+            if verbose:
+                print("Rows starting with %r:" % prefix, result)
+            self.assertEqual(sorted(result), expected)
+
+    def test00_noindex(self):
+        """Prefix matching on a column without index."""
+
+        self.check_prefixes()
+
+    def test01_index(self):
+        """Prefix matching on an indexed column."""
+
+        table = self.h5file.root.test
+        table.cols.s.create_index(_blocksizes=small_blocksizes)
+        condvars = {'col': table.cols.s, 'prefix': b'AB',
+                    'upper': b'AC'}
+        self.assertTrue(table.will_query_use_indexing(
+            '(col >= prefix) & (col < upper)', condvars))
+        self.check_prefixes()
+
+    def test02_errors(self):
+        """Prefix matching on a non-string column."""
+
+        table = self.h5file.create_table('/', 'ints', {'i': Int32Col()})
+        self.assertRaises(TypeError, table.cols.i.startswith, b'1')
+
+
+class CacheBudgetTestCase(TempFileMixin, TestCase):
+    """Test case for the memory budget shared by caches."""
+
+    ntables = 4
+    nrows = 1000
+    conditions = ['(i > 10) & (i < 50)', 'i == 17',
+                  '(s > b"100") & (s < b"150")']
+
+    def setUp(self):
+        super(CacheBudgetTestCase, self).setUp()
+        description = {'i': Int32Col(), 's': StringCol(itemsize=4)}
+        random = numpy.random.RandomState(0)
+        for ntable in range(self.ntables):
+            table = self.h5file.create_table('/', 'test%d' % ntable,
+                                             description)
+            values = random.randint(0, 300, self.nrows)
+            table.append([(v, '%03d' % v) for v in values])
+            table.flush()
+            table.cols.i.create_csindex(_blocksizes=small_blocksizes)
+            table.cols.s.create_index(_blocksizes=small_blocksizes)
+        self.expected = self.run_queries()
+
+    def run_queries(self):
+        return [self.h5file.get_node('/test%d' % ntable).get_where_list(
+                    condition)
+                for ntable in range(self.ntables)
+                for condition in self.conditions]
+
+    def test00_queries(self):
+        """Queries in a file with a cache budget."""
+
+        self.h5file.close()
+        self.h5file = open_file(self.h5fname, 'r', cache_budget='256KB')
+        budget = self.h5file._cache_budget
+        self.assertEqual(budget.maxsize, 192 * 1024)
+        self.assertEqual(self.h5file.params['METADATA_CACHE_SIZE'],
+                         32 * 1024)
+        for i in range(2):
+            for result, expected in zip(self.run_queries(), self.expected):
+                self.assertTrue(common.areArraysEqual(result, expected))
+            if verbose:
+                print("Cache budget:", budget)
+            self.assertTrue(0 < budget.size <= budget.maxsize)
+
+    def test01_eviction(self):
+        """Least recently used caches are evicted first."""
+
+        from tables.lrucacheextension import (CacheBudget, ObjectCache,
+                                              NumCache)
+
+        budget = CacheBudget(1000)
+        cache1 = ObjectCache(10, 1000, 'cache1', budget)
+        cache2 = ObjectCache(10, 1000, 'cache2', budget)
+        for key in range(5):
+            cache1.setitem(key, 'value', 100)
+        for key in range(5):
+            cache2.setitem(key, 'value', 100)
+        self.assertEqual(budget.size, 1000)
+        cache2.setitem(5, 'value', 300)
+        self.assertEqual(cache1.budgetsize, 200)
+        self.assertEqual([key for key, value, size in cache1.items()],
+                         [4, 3])
+        numcache = NumCache((4, 10), numpy.dtype('float64'), 'numcache',
+                            budget)
+        # NumCache instances take a quarter of the budget at most
+        self.assertEqual(numcache.budgetsize, 240)
+        self.assertEqual(cache1.budgetsize, 0)
+        self.assertTrue(budget.size <= 1000)
+        cache1.setitem(0, 'value', 900)
+        self.assertTrue(numcache.evicted)
+        self.assertEqual(len(numcache), 0)
+        self.assertEqual(budget.size, 900)
+        self.assertEqual(cache1.setitem(1, 'value', 2000), -1)
+        del cache1
+        self.assertEqual(budget.size, 0)
+
+    def test02_invalid(self):
+        """Invalid cache budgets."""
+
+        self.h5file.close()
+        self.assertRaises(ValueError, open_file, self.h5fname, 'r',
+                          cache_budget='lots')
+        self.assertRaises(ValueError, open_file, self.h5fname, 'r',
+                          cache_budget=-1)
+        self.h5file = open_file(self.h5fname, 'r')
+
+
+class StatsTestCase(TempFileMixin, TestCase):
+    """Test case for the statistics of reads and caches."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(StatsTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'table',
+                                         {'i': Int32Col(), 'f': Float64Col()},
+                                         filters=Filters(complevel=1))
+        table.append([(i, i * 2.) for i in range(self.nrows)])
+        table.flush()
+        table.cols.i.create_index(_blocksizes=small_blocksizes)
+        self.h5file.create_array('/', 'array', numpy.arange(100))
+        self._reopen()
+        self.table = self.h5file.root.table
+
+    def test00_leaf(self):
+        """Reads from a leaf are counted."""
+
+        table = self.table
+        stats = table.get_stats()
+        self.assertEqual(stats['reads'], 0)
+        table.read(0, 100)
+        stats = table.get_stats()
+        if verbose:
+            print("Table stats:", stats)
+        self.assertEqual(stats['reads'], 1)
+        self.assertEqual(stats['bytes_read'], 100 * table.rowsize)
+        self.assertTrue(stats['chunks_read'] >= 1)
+        self.assertEqual(stats['bytes_decompressed'],
+                         stats['chunks_read'] * table.chunkshape[0] *
+                         table.rowsize)
+        self.assertTrue(stats['read_time'] >= 0)
+        array = self.h5file.root.array
+        array.read()
+        stats = array.get_stats()
+        self.assertEqual(stats['reads'], 1)
+        self.assertEqual(stats['bytes_read'],
+                         array.nrows * array.dtype.itemsize)
+        self.assertEqual(stats['bytes_decompressed'], 0)
+
+    def test01_reset(self):
+        """Counters are set to zero on reset."""
+
+        table = self.table
+        table.read()
+        stats = table.get_stats(reset=True)
+        self.assertTrue(stats['reads'] > 0)
+        stats = table.get_stats()
+        self.assertEqual(stats['reads'], 0)
+        self.assertEqual(stats['bytes_read'], 0)
+        self.assertEqual(stats['read_time'], 0)
+
+    def test02_caches(self):
+        """Hits and misses of caches are counted."""
+
+        table = self.table
+        condition = '(i > 10) & (i < 20)'
+        for i in range(5):
+            table.get_where_list(condition)
+        stats = self.h5file.get_stats()
+        if verbose:
+            print("File stats:", stats)
+        caches = stats['caches']
+        self.assertTrue(sum(cachestats['hits'] + cachestats['misses']
+                            for cachestats in caches.values()) > 0)
+        for cachestats in caches.values():
+            self.assertTrue(cachestats['hits'] >= 0)
+            self.assertTrue(cachestats['misses'] >= 0)
+            self.assertTrue(cachestats['size'] >= 0)
+        self.h5file.get_stats(reset=True)
+        caches = self.h5file.get_stats()['caches']
+        self.assertEqual(sum(cachestats['hits']
+                             for cachestats in caches.values()), 0)
+
+    def test03_closed_nodes(self):
+        """Statistics of closed nodes are kept in the file."""
+
+        self.h5file.root.array.read()
+        self.table.read()
+        nreads = self.h5file.get_stats()['reads']
+        self.assertTrue(nreads >= 2)
+        self.table.close()
+        self.h5file.root.array.close()
+        stats = self.h5file.get_stats()
+        self.assertEqual(stats['reads'], nreads)
+        self.assertEqual(stats['cache_budget'], None)
+        self.h5file.get_stats(reset=True)
+        self.assertEqual(self.h5file.get_stats()['reads'], 0)
+
+
 #----------------------------------------------------------------------
 
 
@@ -2629,6 +3565,16 @@ def suite():
         theSuite.addTest(unittest.makeSuite(Issue119Time32ColTestCase))
         theSuite.addTest(unittest.makeSuite(Issue119Time64ColTestCase))
         theSuite.addTest(unittest.makeSuite(TestIndexingNans))
+        theSuite.addTest(unittest.makeSuite(ParallelIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(IncrementalIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(MemoryLimitIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(ChunkmapTestCase))
+        theSuite.addTest(unittest.makeSuite(IndexStatsTestCase))
+        theSuite.addTest(unittest.makeSuite(WarmCacheTestCase))
+        theSuite.addTest(unittest.makeSuite(OrderStatsTestCase))
+        theSuite.addTest(unittest.makeSuite(StringPrefixTestCase))
+        theSuite.addTest(unittest.makeSuite(CacheBudgetTestCase))
+        theSuite.addTest(unittest.makeSuite(StatsTestCase))
     if heavy:
         # These are too heavy for normal testing
         theSuite.addTest(unittest.makeSuite(AI4bTestCase))
@@ -1188,6 +1188,1378 @@ class IndexedTableUsage32(IndexedTableUsage):
     str_expr = ''
 
 
+class BulkQueryTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for the bulk (buffer-wise) query paths.
+
+    Results of `Table.get_where_list()` and `Table.read_where()` must
+    match those of `Table.where()` even when they span several I/O
+    buffers.
+
+    """
+
+    nrows = 1000
+    nrowsinbuf = 37
+    nthreads = None
+
+    class Record(tables.IsDescription):
+        c_int = tables.IntCol(pos=1)
+        c_float = tables.FloatCol(pos=2)
+
+    def setUp(self):
+        super(BulkQueryTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([(i % 17, i * 0.5) for i in xrange(self.nrows)])
+        table.flush()
+        table.nrowsinbuf = self.nrowsinbuf
+        self.table = table
+
+    def check_query(self, cond, **kwargs):
+        table = self.table
+        rownos = [row.nrow for row in table.where(cond, **kwargs)]
+        values = [row['c_float'] for row in table.where(cond, **kwargs)]
+        ptrownos = table.get_where_list(cond, nthreads=self.nthreads,
+                                        **kwargs)
+        ptvalues = table.read_where(cond, field='c_float',
+                                    nthreads=self.nthreads, **kwargs)
+        self.assertEqual(list(ptrownos), rownos)
+        self.assertEqual(list(ptvalues), values)
+        ptrecords = table.read_where(cond, nthreads=self.nthreads, **kwargs)
+        self.assertTrue(common.areArraysEqual(
+            ptrecords, table.read_coordinates(rownos)))
+
+    def test00_inkernel(self):
+        """In-kernel bulk queries."""
+
+        self.check_query('c_int == 3')
+        self.check_query('(c_int > 3) & (c_float < 300)', start=5, stop=900)
+        self.check_query('c_int < 8', start=2, stop=800, step=7)
+        self.check_query('c_int < 0')
+
+    def test01_indexed(self):
+        """Indexed bulk queries."""
+
+        self.table.cols.c_int.create_index(_blocksizes=small_blocksizes)
+        self.assertTrue(self.table.will_query_use_indexing('c_int == 3'))
+        for i in range(2):  # the second time results come from cache
+            self.check_query('c_int == 3')
+            self.check_query('(c_int > 3) & (c_float < 300)',
+                             start=5, stop=900)
+            self.check_query('c_int < 8', start=2, stop=800, step=7)
+            self.check_query('c_int < 0')
+
+
+class ThreadedBulkQueryTestCase(BulkQueryTestCase):
+
+    """Test case for the bulk query paths evaluated in several threads."""
+
+    nthreads = 4
+
+
+class AggregateTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for `Table.aggregate()` and the `Column` reductions."""
+
+    nrows = 1000
+    nrowsinbuf = 37
+
+    class Record(tables.IsDescription):
+        c_int = tables.IntCol(pos=1)
+        c_float = tables.FloatCol(pos=2)
+        c_vec = tables.Int16Col(shape=2, pos=3)
+
+    def setUp(self):
+        super(AggregateTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([(i % 17, i * 0.5, (i, -i))
+                      for i in xrange(self.nrows)])
+        table.flush()
+        table.nrowsinbuf = self.nrowsinbuf
+        self.table = table
+        self.data = table.read()
+
+    def check_aggregate(self, cond, **kwargs):
+        table, data = self.table, self.data
+        if cond is None:
+            sel = data[slice(kwargs.get('start'), kwargs.get('stop'),
+                             kwargs.get('step'))]
+        else:
+            sel = table.read_where(cond, **kwargs)
+        aggs = {}
+        for colname in ('c_int', 'c_float', 'c_vec'):
+            for func in ('count', 'sum', 'min', 'max', 'mean'):
+                aggs[colname + func] = (colname, func)
+        result = table.aggregate(cond, aggs, **kwargs)
+        self.assertEqual(sorted(result.keys()), sorted(aggs.keys()))
+        for colname in ('c_int', 'c_float', 'c_vec'):
+            values = sel[colname]
+            self.assertEqual(result[colname + 'count'], len(values))
+            self.assertTrue(common.allequal(result[colname + 'sum'],
+                                            values.sum(axis=0)))
+            if len(values) == 0:
+                self.assertEqual(result[colname + 'min'], None)
+                self.assertEqual(result[colname + 'max'], None)
+                self.assertEqual(result[colname + 'mean'], None)
+                continue
+            self.assertTrue(common.allequal(result[colname + 'min'],
+                                            values.min(axis=0)))
+            self.assertTrue(common.allequal(result[colname + 'max'],
+                                            values.max(axis=0)))
+            self.assertTrue(numpy.allclose(result[colname + 'mean'],
+                                           values.mean(axis=0)))
+
+    def check_queries(self):
+        self.check_aggregate(None)
+        self.check_aggregate(None, start=3, stop=700, step=9)
+        self.check_aggregate('c_int == 3')
+        self.check_aggregate('(c_int > 3) & (c_float < 300)',
+                             start=5, stop=900)
+        self.check_aggregate('c_int < 8', start=2, stop=800, step=7)
+        self.check_aggregate('c_int < 0')
+
+    def test00_inkernel(self):
+        """Aggregations without indexes."""
+
+        self.check_queries()
+
+    def test01_indexed(self):
+        """Aggregations with indexes."""
+
+        self.table.cols.c_int.create_index(_blocksizes=small_blocksizes)
+        self.table.cols.c_float.create_index(_blocksizes=small_blocksizes)
+        self.check_queries()
+
+    def test02_indexed_shortcuts(self):
+        """Counts, minimums and maximums taken from full indexes."""
+
+        table = self.table
+        c_int, c_float = table.cols.c_int, table.cols.c_float
+        c_int.create_index(kind='full', _blocksizes=small_blocksizes)
+        c_float.create_index(kind='full', _blocksizes=small_blocksizes)
+        self.assertEqual(c_int.index.reduction, 1)
+        ints, floats = self.data['c_int'], self.data['c_float']
+        for cond in ('c_int == 3', 'c_int > 10', '(c_int >= 2) & (c_int < 5)',
+                     'c_int <= -1'):
+            self.assertEqual(c_int.count(cond),
+                             len(table.get_where_list(cond)))
+        self.assertEqual(c_float.count('c_float > 0.75'),
+                         (floats > 0.75).sum())
+        self.assertEqual(c_int.min(), ints.min())
+        self.assertEqual(c_int.max(), ints.max())
+        self.assertEqual(c_float.min(), floats.min())
+        self.assertEqual(c_float.max(), floats.max())
+
+    def test03_column_methods(self):
+        """Reductions on single columns with user variables."""
+
+        c_float = self.table.cols.c_float
+        floats = self.data['c_float']
+        limit = 10
+        sel = floats[self.data['c_int'] > limit]
+        self.assertEqual(c_float.count('c_int > limit'), len(sel))
+        self.assertEqual(c_float.sum('c_int > limit'), sel.sum())
+        self.assertEqual(c_float.min('c_int > limit'), sel.min())
+        self.assertEqual(c_float.max('c_int > limit'), sel.max())
+        self.assertTrue(numpy.allclose(c_float.mean('c_int > limit'),
+                                       sel.mean()))
+        self.assertEqual(c_float.sum(), floats.sum())
+        self.assertEqual(c_float.count(), self.nrows)
+
+    def test04_errors(self):
+        """Unknown columns and reductions."""
+
+        self.assertRaises(KeyError, self.table.aggregate, None,
+                          {'out': ('c_none', 'sum')})
+        self.assertRaises(ValueError, self.table.aggregate, None,
+                          {'out': ('c_int', 'median')})
+
+
+class GroupByTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for `Table.groupby()`."""
+
+    nrows = 1000
+    nrowsinbuf = 37
+
+    class Record(tables.IsDescription):
+        c_int = tables.IntCol(pos=1)
+        c_str = tables.StringCol(2, pos=2)
+        c_float = tables.FloatCol(pos=3)
+        c_vec = tables.Int16Col(shape=2, pos=4)
+
+    aggs = {'n': ('c_float', 'count'),
+            'total': ('c_vec', 'sum'),
+            'low': ('c_float', 'min'),
+            'high': ('c_vec', 'max'),
+            'avg': ('c_float', 'mean')}
+
+    def setUp(self):
+        super(GroupByTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([((i * 7) % 53, 'ab'[i % 2], i * 0.5, (i, -i))
+                      for i in xrange(self.nrows)])
+        table.flush()
+        table.nrowsinbuf = self.nrowsinbuf
+        self.table = table
+
+    def check_groupby(self, keys, condition=None, **kwargs):
+        table = self.table
+        if condition is None:
+            data = table.read(kwargs.get('start'), kwargs.get('stop'),
+                              kwargs.get('step'))
+        else:
+            data = table.read_where(condition, **kwargs)
+        result = table.groupby(keys, self.aggs, condition, **kwargs)
+        if isinstance(keys, str):
+            keys = [keys]
+        groups = {}
+        for row in data:
+            groups.setdefault(tuple(row[key] for key in keys), []).append(row)
+        self.assertEqual([tuple(row[key] for key in keys) for row in result],
+                         sorted(groups))
+        for row in result:
+            rows = numpy.array(groups[tuple(row[key] for key in keys)],
+                               dtype=data.dtype)
+            self.assertEqual(row['n'], len(rows))
+            self.assertTrue(common.allequal(row['total'],
+                                            rows['c_vec'].sum(axis=0)))
+            self.assertEqual(row['low'], rows['c_float'].min())
+            self.assertTrue(common.allequal(row['high'],
+                                            rows['c_vec'].max(axis=0)))
+            self.assertTrue(numpy.allclose(row['avg'],
+                                           rows['c_float'].mean()))
+        return result
+
+    def check_queries(self):
+        self.check_groupby('c_int')
+        self.check_groupby(['c_str', 'c_int'])
+        self.check_groupby('c_int', start=3, stop=700, step=9)
+        self.check_groupby('c_int', 'c_float < 300')
+        self.check_groupby(['c_int', 'c_str'], '(c_int > 3) & (c_int < 20)',
+                           start=5, stop=900)
+        result = self.check_groupby('c_int', 'c_int < 0')
+        self.assertEqual(len(result), 0)
+
+    def test00_hashed(self):
+        """Group-by accumulating the groups in memory."""
+
+        self.check_queries()
+
+    def test01_spilled(self):
+        """Group-by spilling the groups to a temporary file."""
+
+        self.h5file.params['GROUPBY_MAX_SIZE'] = 200
+        self.check_queries()
+
+    def test02_sorted(self):
+        """Group-by following the order of a CSI index."""
+
+        self.table.cols.c_int.create_csindex(_blocksizes=small_blocksizes)
+        self.check_queries()
+
+    def test03_out(self):
+        """Group-by with the results appended to a table."""
+
+        result = self.table.groupby('c_int', self.aggs)
+        out = self.h5file.create_table('/', 'out', result.dtype)
+        self.h5file.params['GROUPBY_MAX_SIZE'] = 200
+        self.assertTrue(self.table.groupby('c_int', self.aggs,
+                                           out=out) is out)
+        self.assertTrue(common.areArraysEqual(out.read(), result))
+
+    def test04_errors(self):
+        """Wrong keys and reductions."""
+
+        self.assertRaises(KeyError, self.table.groupby, 'c_none', self.aggs)
+        self.assertRaises(TypeError, self.table.groupby, 'c_vec', self.aggs)
+        self.assertRaises(ValueError, self.table.groupby, 'c_int',
+                          {'out': ('c_int', 'median')})
+
+    def test05_nan(self):
+        """NaN keys make a single group."""
+
+        table = self.h5file.create_table(
+            '/', 'nan', {'key': tables.FloatCol(), 'val': tables.IntCol()},
+            chunkshape=10)
+        keys = numpy.arange(self.nrows) % 7 * 0.5
+        keys[::5] = numpy.nan
+        table.append([(keys[i], i) for i in xrange(self.nrows)])
+        table.flush()
+        table.nrowsinbuf = self.nrowsinbuf
+        isnan = numpy.isnan(keys)
+        values = numpy.arange(self.nrows)
+        expected = [(key, (keys == key).sum(), values[keys == key].sum())
+                    for key in numpy.unique(keys[~isnan])]
+        expected.append((numpy.nan, isnan.sum(), values[isnan].sum()))
+        aggs = {'n': ('val', 'count'), 'total': ('val', 'sum')}
+        for maxsize, csindex in [(None, False), (50, False), (None, True)]:
+            if maxsize is not None:
+                self.h5file.params['GROUPBY_MAX_SIZE'] = maxsize
+            if csindex:
+                table.cols.key.create_csindex(_blocksizes=small_blocksizes)
+            result = table.groupby('key', aggs)
+            self.assertEqual(len(result), len(expected))
+            self.assertTrue(numpy.isnan(result['key'][-1]))
+            self.assertEqual(result['key'][:-1].tolist(),
+                             [e[0] for e in expected[:-1]])
+            self.assertEqual(result['n'].tolist(),
+                             [e[1] for e in expected])
+            self.assertEqual(result['total'].tolist(),
+                             [e[2] for e in expected])
+
+
+class JoinTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for `Table.join()`."""
+
+    nrowsinbuf = 23
+
+    class Trade(tables.IsDescription):
+        symbol = tables.StringCol(2, pos=1)
+        ts = tables.Int32Col(pos=2)
+        price = tables.FloatCol(pos=3)
+
+    class Quote(tables.IsDescription):
+        symbol = tables.StringCol(2, pos=1)
+        ts = tables.Int64Col(pos=2)
+        price = tables.FloatCol(pos=3, dflt=-1)
+        size = tables.IntCol(pos=4)
+
+    def setUp(self):
+        super(JoinTestCase, self).setUp()
+        trades = self.h5file.create_table('/', 'trades', self.Trade)
+        trades.append([('ab'[i % 2] + 'xy'[i % 3 % 2], (i * 37) % 200, i)
+                       for i in xrange(300)])
+        trades.flush()
+        quotes = self.h5file.create_table('/', 'quotes', self.Quote)
+        quotes.append([('ab'[i % 2] + 'xyz'[i % 3], (i * 53) % 250, -i, i)
+                       for i in xrange(400)])
+        quotes.flush()
+        trades.nrowsinbuf = quotes.nrowsinbuf = self.nrowsinbuf
+        self.trades, self.quotes = trades, quotes
+
+    def check_join(self, on, how):
+        trades, quotes = self.trades, self.quotes
+        result = trades.join(quotes, on, how)
+        if isinstance(on, str):
+            on = [on]
+        left, right = trades.read(), quotes.read()
+        rnames = [name for name in right.dtype.names if name not in on]
+        outnames = [name + '_right' if name in left.dtype.names else name
+                    for name in rnames]
+        self.assertEqual(result.dtype.names, left.dtype.names +
+                         tuple(outnames))
+        lkeys = [tuple(row[name] for name in on) for row in left]
+        rkeys = [tuple(row[name] for name in on) for row in right]
+        expected = []
+        for lrow, lkey in sorted(zip(left, lkeys), key=lambda x: x[1]):
+            if how == 'asof':
+                candidates = [(rkey, i) for i, rkey in enumerate(rkeys)
+                              if rkey[:-1] == lkey[:-1] and rkey <= lkey]
+                matches = [max(candidates)[1]] if candidates else []
+            else:
+                matches = [i for i, rkey in enumerate(rkeys) if rkey == lkey]
+            if not matches and how != 'inner':
+                matches = [None]
+            for i in matches:
+                rvalues = tuple(right[i][name] if i is not None else
+                                quotes.coldflts[name] for name in rnames)
+                expected.append(tuple(lrow) + rvalues)
+        vprint("Join on %s (%s): %d rows" % (on, how, len(result)))
+        self.assertEqual(len(result), len(expected))
+        # Rows with equal keys may come in any order
+        self.assertEqual(sorted(tuple(row) for row in result),
+                         sorted(expected))
+        keys = [tuple(row[name] for name in on) for row in result]
+        self.assertEqual(keys, sorted(keys))
+
+    def check_joins(self):
+        for how in ('inner', 'left', 'asof'):
+            self.check_join(['symbol', 'ts'], how)
+        # Quotes with the same time would make asof joins ambiguous
+        for how in ('inner', 'left'):
+            self.check_join('ts', how)
+
+    def test00_memory(self):
+        """Joining tables sorted in memory."""
+
+        self.check_joins()
+
+    def test01_spilled(self):
+        """Joining tables sorted with temporary files."""
+
+        self.h5file.params['JOIN_MAX_SIZE'] = 200
+        self.check_joins()
+
+    def test02_indexed(self):
+        """Joining tables following the order of CSI indexes."""
+
+        self.trades.cols.ts.create_csindex(_blocksizes=small_blocksizes)
+        self.quotes.cols.ts.create_csindex(_blocksizes=small_blocksizes)
+        self.quotes.create_index(['symbol', 'ts'], optlevel=9, kind='full',
+                                 _blocksizes=small_blocksizes)
+        self.check_joins()
+
+    def test03_out(self):
+        """Joining tables with the results appended to a table."""
+
+        result = self.trades.join(self.quotes, ['symbol', 'ts'], 'asof')
+        out = self.h5file.create_table('/', 'out', result.dtype)
+        self.assertTrue(self.trades.join(self.quotes, ['symbol', 'ts'],
+                                         'asof', out=out) is out)
+        self.assertTrue(common.areArraysEqual(out.read(), result))
+
+    def test04_errors(self):
+        """Wrong keys and kinds of join."""
+
+        self.assertRaises(KeyError, self.trades.join, self.quotes, 'none')
+        other = self.h5file.create_table('/', 'other',
+                                         {'ts': tables.StringCol(4)})
+        self.assertRaises(TypeError, self.trades.join, other, 'ts')
+        self.assertRaises(ValueError, self.trades.join, self.quotes, 'ts',
+                          'outer')
+
+
+class ZoneMapTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for queries using zone maps."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        c_int = tables.IntCol(pos=1)
+        c_str = tables.StringCol(4, pos=2)
+        c_float = tables.FloatCol(pos=3)
+        c_bool = tables.BoolCol(pos=4)
+
+    conditions = ['c_int < 97',
+                  '(c_int >= 95) & (c_int <= 312)',
+                  'c_int == 250',
+                  'c_int > 1000',
+                  '(c_float > 20) & (c_float < 22.5)',
+                  '(c_str == "0042") | (c_int > 480)',
+                  '(c_int > 200) & ~c_bool',
+                  '(c_int > 50) & (c_float < 4)']
+
+    def setUp(self):
+        super(ZoneMapTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([self.make_row(i) for i in xrange(self.nrows)])
+        table.flush()
+        self.table = table
+
+    def make_row(self, i):
+        c_float = float('nan') if i % 13 == 0 else i * 0.1
+        return (i, '%04d' % i, c_float, i % 3 == 0)
+
+    def create_zonemaps(self):
+        for colname in self.table.colnames:
+            self.table.cols._f_col(colname).create_zonemap()
+
+    def check_zonemaps(self, exact=True):
+        table = self.table
+        nrowsinchunk = table.chunkshape[0]
+        for colname in table.colnames:
+            zonemap = table.cols._f_col(colname).zonemap
+            data = table.col(colname)
+            self.assertEqual(
+                zonemap.nrows, -(-table.nrows // nrowsinchunk))
+            for nchunk, zone in enumerate(zonemap):
+                chunk = data[nchunk * nrowsinchunk:
+                             (nchunk + 1) * nrowsinchunk]
+                if chunk.dtype.kind == 'f':
+                    chunk = chunk[~numpy.isnan(chunk)]
+                    if len(chunk) == 0:
+                        self.assertTrue(numpy.isnan(zone).all())
+                        continue
+                chunk = numpy.sort(chunk)
+                if exact:
+                    self.assertEqual(zone[0], chunk[0])
+                    self.assertEqual(zone[1], chunk[-1])
+                else:
+                    self.assertTrue(zone[0] <= chunk[0])
+                    self.assertTrue(zone[1] >= chunk[-1])
+
+    def check_queries(self):
+        table = self.table
+        for condition in self.conditions:
+            result = table.get_where_list(condition)
+            rows = [row.nrow for row in table.where(condition)]
+            table._disable_indexing_in_queries()
+            expected = table.get_where_list(condition)
+            table._enable_indexing_in_queries()
+            vprint("* Condition ``%s`` selects %d rows."
+                   % (condition, len(result)))
+            self.assertTrue(common.areArraysEqual(result, expected))
+            self.assertEqual(rows, expected.tolist())
+
+    def test00_queries(self):
+        """Queries using zone maps."""
+
+        self.create_zonemaps()
+        self.check_zonemaps()
+        self.assertEqual(self.table.will_query_use_indexing('c_int < 97'),
+                         frozenset(['c_int']))
+        self.check_queries()
+
+    def test01_append(self):
+        """Zone maps after appending rows."""
+
+        self.create_zonemaps()
+        table = self.table
+        for nrows in (3, 1, 25, 7):
+            first = table.nrows
+            table.append([self.make_row(i) for i in
+                          xrange(first, first + nrows)])
+            table.flush()
+            self.check_zonemaps()
+            self.check_queries()
+
+    def test02_modify(self):
+        """Zone maps after modifying rows."""
+
+        self.create_zonemaps()
+        table = self.table
+        table.cols.c_int[10:15] = [1000, -5, 3, 250, 97]
+        table.modify_rows(
+            start=100, step=7, rows=[self.make_row(i) for i in xrange(20)])
+        for row in table.where('c_int == 420'):
+            row['c_int'] = -420
+            row['c_float'] = 21.0
+            row.update()
+        table.flush()
+        self.check_zonemaps(exact=False)
+        self.check_queries()
+
+    def test03_remove(self):
+        """Zone maps after removing rows."""
+
+        self.create_zonemaps()
+        table = self.table
+        table.remove_rows(123, 171)
+        self.check_zonemaps()
+        self.check_queries()
+        table.truncate(301)
+        self.check_zonemaps()
+        self.check_queries()
+
+    def test04_reopen(self):
+        """Zone maps are kept in the file."""
+
+        self.create_zonemaps()
+        self._reopen('a')
+        self.table = table = self.h5file.root.test
+        self.assertTrue(table.cols.c_int.zonemap is not None)
+        self.check_queries()
+        table.append([self.make_row(i) for i in xrange(3)])
+        table.flush()
+        self.check_zonemaps(exact=False)
+        self.check_queries()
+        table.cols.c_int.remove_zonemap()
+        self.assertTrue(table.cols.c_int.zonemap is None)
+        self.assertEqual(table.will_query_use_indexing('c_int < 97'),
+                         frozenset())
+        self.check_queries()
+
+    def test05_copy(self):
+        """Zone maps are copied along with indexes."""
+
+        self.create_zonemaps()
+        table = self.table.copy('/', 'test2', propindexes=True, start=25)
+        self.table = table
+        self.check_zonemaps()
+        self.check_queries()
+
+    def test06_errors(self):
+        """Unsupported zone maps."""
+
+        self.table.cols.c_int.create_zonemap()
+        self.assertRaises(ValueError, self.table.cols.c_int.create_zonemap)
+        table = self.h5file.create_table(
+            '/', 'test2', {'c_vec': tables.Int16Col(shape=2),
+                           'c_complex': tables.ComplexCol(16)})
+        self.assertRaises(TypeError, table.cols.c_vec.create_zonemap)
+        self.assertRaises(TypeError, table.cols.c_complex.create_zonemap)
+
+
+class BitmapIndexTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for queries using bitmap indexes."""
+
+    nrows = 500
+    colors = tables.Enum(['red', 'green', 'blue'])
+
+    conditions = ['c_status == 2',
+                  '(c_status == 2) & (c_region == 5)',
+                  '(c_status == 1) | (c_region < 2)',
+                  '(c_status >= 1) & (c_status < 3)',
+                  '(c_region > 2) & ~c_bool',
+                  'c_color == green',
+                  '(c_str == "b") & (c_status != 3)',
+                  'c_status == 7']
+
+    def setUp(self):
+        super(BitmapIndexTestCase, self).setUp()
+        description = {
+            'c_status': tables.Int8Col(pos=1),
+            'c_region': tables.UInt16Col(pos=2),
+            'c_bool': tables.BoolCol(pos=3),
+            'c_color': tables.EnumCol(self.colors, 'red', 'uint8', pos=4),
+            'c_str': tables.StringCol(1, pos=5),
+        }
+        table = self.h5file.create_table('/', 'test', description,
+                                         chunkshape=10)
+        table.append([self.make_row(i) for i in xrange(self.nrows)])
+        table.flush()
+        self.table = table
+
+    def make_row(self, i):
+        return (i % 4, (i // 50) % 8, i % 3 == 0, i % 7 % 3, 'abc'[i % 5 % 3])
+
+    def create_indexes(self):
+        for colname in self.table.colnames:
+            self.table.cols._f_col(colname).create_index(kind='bitmap')
+
+    def check_queries(self):
+        table = self.table
+        condvars = {'green': self.colors.green}
+        for condition in self.conditions:
+            result = table.get_where_list(condition, condvars)
+            rows = [row.nrow for row in table.where(condition, condvars)]
+            table._disable_indexing_in_queries()
+            expected = table.get_where_list(condition, condvars)
+            table._enable_indexing_in_queries()
+            vprint("* Condition ``%s`` selects %d rows."
+                   % (condition, len(result)))
+            self.assertTrue(common.areArraysEqual(result, expected))
+            self.assertEqual(rows, expected.tolist())
+
+    def test00_queries(self):
+        """Queries using bitmap indexes."""
+
+        self.create_indexes()
+        table = self.table
+        index = table.cols.c_status.index
+        self.assertEqual(index.kind, 'bitmap')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertEqual(
+            table.will_query_use_indexing('(c_status == 2) & (c_region == 5)'),
+            frozenset(['c_status', 'c_region']))
+        self.check_queries()
+
+    def test01_append(self):
+        """Bitmap indexes after appending rows."""
+
+        self.create_indexes()
+        table = self.table
+        for nrows in (3, 1, 13, 40):
+            first = table.nrows
+            table.append([self.make_row(i) for i in
+                          xrange(first, first + nrows)])
+            table.flush()
+            self.assertEqual(table.cols.c_region.index.nelements, table.nrows)
+            self.check_queries()
+
+    def test02_reopen(self):
+        """Bitmap indexes are kept in the file."""
+
+        self.create_indexes()
+        self._reopen('a')
+        self.table = table = self.h5file.root.test
+        self.assertEqual(table.cols.c_status.index.kind, 'bitmap')
+        self.check_queries()
+        table.append([self.make_row(i) for i in xrange(5)])
+        table.flush()
+        self.check_queries()
+
+    def test03_reindex(self):
+        """Bitmap indexes after invalidating operations."""
+
+        self.create_indexes()
+        table = self.table
+        table.remove_rows(123, 171)
+        self.assertEqual(table.cols.c_status.index.kind, 'bitmap')
+        self.assertEqual(table.cols.c_status.index.nelements, table.nrows)
+        self.check_queries()
+        table.cols.c_status[10:20] = [7] * 10
+        table.flush()
+        self.check_queries()
+
+    def test04_aggregate(self):
+        """Reductions solved by bitmap indexes."""
+
+        self.create_indexes()
+        table = self.table
+        data = table.read()
+        self.assertEqual(table.cols.c_status.count('c_status == 2'),
+                         (data['c_status'] == 2).sum())
+        self.assertEqual(table.cols.c_region.min(), data['c_region'].min())
+        self.assertEqual(table.cols.c_region.max(), data['c_region'].max())
+
+    def test05_errors(self):
+        """Bitmap indexes can not be used for sorting."""
+
+        self.table.cols.c_status.create_index(kind='bitmap')
+        self.assertRaises(ValueError, self.table.read_sorted, 'c_status')
+        self.assertRaises(ValueError, self.table.cols.c_region.create_index,
+                          kind='bitmaps')
+
+
+class BloomIndexTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for queries using bloom indexes."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        c_key = tables.StringCol(16, pos=1)
+        c_int = tables.IntCol(pos=2)
+
+    def setUp(self):
+        super(BloomIndexTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([self.make_row(i) for i in xrange(self.nrows)])
+        table.flush()
+        table.cols.c_key.create_index(kind='bloom')
+        self.table = table
+
+    def make_row(self, i):
+        return ('key-%d' % (i * 7919 % 100003), i)
+
+    def check_queries(self, keys):
+        table = self.table
+        conditions = ['c_key == key',
+                      '(c_key == key) & (c_int > 100)',
+                      '(c_key == key) | (c_int == 3)',
+                      'c_key < key']
+        for key in keys:
+            for condition in conditions:
+                result = table.get_where_list(condition, {'key': key})
+                table._disable_indexing_in_queries()
+                expected = table.get_where_list(condition, {'key': key})
+                table._enable_indexing_in_queries()
+                self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test00_lookup(self):
+        """Point lookups using a bloom index."""
+
+        table = self.table
+        index = table.cols.c_key.index
+        self.assertEqual(index.kind, 'bloom')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertEqual(table.will_query_use_indexing('c_key == "a"'),
+                         frozenset(['c_key']))
+        keys = table.cols.c_key[::37].tolist() + ['nokey']
+        self.check_queries(keys)
+        # Only a few chunks should be candidates for a single key
+        nrowsinchunk = table.chunkshape[0]
+        for key in keys:
+            index.search(index.get_lookup_range(('eq',), (key,)))
+            self.assertTrue(index.get_chunkmap().sum() <= 3)
+            self.assertTrue(index.get_chunkmap().sum() >= (key != 'nokey'))
+            vprint("* Key ``%s`` reads %d chunks of %d rows."
+                   % (key, index.get_chunkmap().sum(), nrowsinchunk))
+
+    def test01_append(self):
+        """Bloom indexes are updated on appends."""
+
+        table = self.table
+        for nrows in (3, 1, 13, 40):
+            first = table.nrows
+            table.append([self.make_row(i) for i in
+                          xrange(first, first + nrows)])
+            table.flush()
+            self.assertEqual(table.cols.c_key.index.nelements, table.nrows)
+            self.check_queries(table.cols.c_key[first:])
+
+    def test02_reopen(self):
+        """Bloom indexes are kept in the file."""
+
+        self._reopen('a')
+        self.table = table = self.h5file.root.test
+        self.assertEqual(table.cols.c_key.index.kind, 'bloom')
+        table.append([self.make_row(i) for i in xrange(1000, 1005)])
+        table.flush()
+        self.check_queries(table.cols.c_key[-10:])
+        table.cols.c_key[3] = 'newkey'
+        table.flush()
+        self.check_queries(['newkey'])
+
+    def test03_errors(self):
+        """Bloom indexes are only supported for string columns."""
+
+        self.assertRaises(TypeError, self.table.cols.c_int.create_index,
+                          kind='bloom')
+
+    def test04_blocks(self):
+        """Lookups reading the filters in several blocks."""
+
+        table = self.h5file.create_table('/', 'big', self.Record,
+                                         chunkshape=5000)
+        table.append([self.make_row(i) for i in xrange(50000)])
+        table.flush()
+        table.cols.c_key.create_index(kind='bloom')
+        index = table.cols.c_key.index
+        bloom = index._f_get_child('bloom')
+        self.assertTrue(bloom.nrows > bloom.chunkshape[0])
+        self.table = table
+        keys = table.cols.c_key[::4999].tolist() + ['nokey']
+        self.check_queries(keys)
+        for key in keys:
+            index.search(index.get_lookup_range(('eq',), (key,)))
+            chunks = table.get_where_list('c_key == key',
+                                          {'key': key}) // 5000
+            self.assertTrue(index.get_chunkmap()[chunks].all())
+            self.assertTrue(index.get_chunkmap().sum() <= len(chunks) + 1)
+
+
+class CompositeIndexTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for queries using composite indexes."""
+
+    nrows = 500
+
+    conditions = ['(c_symbol == sym) & (c_ts > 10.5) & (c_ts <= 40)',
+                  '(c_ts >= 20) & (c_symbol == sym)',
+                  '(c_symbol == sym) & (c_ts == 12) & (c_qty > 3)',
+                  '(c_symbol == sym) & (c_ts < t0) & (c_qty != 2)',
+                  '(c_symbol == sym) & (c_qty == 5)',
+                  'c_symbol == sym',
+                  '(c_symbol == sym) | (c_ts < 3)',
+                  '(c_symbol == sym) & (c_ts > 1000)']
+
+    class Record(tables.IsDescription):
+        c_symbol = tables.StringCol(4, pos=1)
+        c_ts = tables.Float64Col(pos=2)
+        c_qty = tables.Int16Col(pos=3)
+
+    def setUp(self):
+        super(CompositeIndexTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([self.make_row(i) for i in xrange(self.nrows)])
+        table.flush()
+        table.create_index(['c_symbol', 'c_ts'], kind='full')
+        self.table = table
+
+    def make_row(self, i):
+        return ('ABCD'[i * 7 % 4] * (1 + i % 3), i * 13 % 50 - 0.5 * (i % 2),
+                i % 11 - 5)
+
+    def check_queries(self):
+        table = self.table
+        for sym in ('AA', 'B', 'CCC', 'E'):
+            condvars = {'sym': sym, 't0': 25}
+            for condition in self.conditions:
+                result = table.get_where_list(condition, condvars)
+                table._disable_indexing_in_queries()
+                expected = table.get_where_list(condition, condvars)
+                table._enable_indexing_in_queries()
+                vprint("* Condition ``%s`` selects %d rows."
+                       % (condition, len(result)))
+                self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test00_queries(self):
+        """Queries using composite indexes."""
+
+        table = self.table
+        index = table.composite_indexes[('c_symbol', 'c_ts')]
+        self.assertEqual(index.colnames, ('c_symbol', 'c_ts'))
+        self.assertEqual(index.kind, 'full')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertTrue(table.indexed)
+        self.assertEqual(table.indexedcolpathnames, [])
+        self.assertEqual(
+            table.will_query_use_indexing('(c_symbol == "A") & (c_ts > 3)'),
+            frozenset(['c_symbol', 'c_ts']))
+        self.assertEqual(table.will_query_use_indexing('c_ts > 3'),
+                         frozenset())
+        self.check_queries()
+        # The count of a condition solved by the index is exact
+        count = table.aggregate('(c_symbol == "BB") & (c_ts > 20)',
+                                {'n': ('c_qty', 'count')})['n']
+        data = table.read()
+        self.assertEqual(count, ((data['c_symbol'] == b'BB') &
+                                 (data['c_ts'] > 20)).sum())
+
+    def test01_append(self):
+        """Composite indexes after appending rows."""
+
+        table = self.table
+        index = table.composite_indexes[('c_symbol', 'c_ts')]
+        for nrows in (3, 1, 13, 40):
+            first = table.nrows
+            table.append([self.make_row(i) for i in
+                          xrange(first, first + nrows)])
+            table.flush()
+            self.assertEqual(index.nelements, table.nrows)
+            self.check_queries()
+
+    def test02_reindex(self):
+        """Composite indexes after invalidating operations."""
+
+        table = self.table
+        table.cols.c_ts[10:20] = numpy.arange(10) + 30.5
+        table.flush()
+        index = table.composite_indexes[('c_symbol', 'c_ts')]
+        self.assertFalse(index.dirty)
+        self.check_queries()
+        table.remove_rows(123, 171)
+        index = table.composite_indexes[('c_symbol', 'c_ts')]
+        self.assertEqual(index.nelements, table.nrows)
+        self.check_queries()
+        # Modifications of other columns do not affect the index
+        table.autoindex = False
+        table.cols.c_qty[:5] = [1] * 5
+        self.assertFalse(index.dirty)
+        table.cols.c_symbol[:5] = ['A'] * 5
+        self.assertTrue(index.dirty)
+        self.assertEqual(
+            table.will_query_use_indexing('(c_symbol == "A") & (c_ts > 3)'),
+            frozenset())
+        self.check_queries()
+        table.reindex_dirty()
+        self.assertEqual(
+            table.will_query_use_indexing('(c_symbol == "A") & (c_ts > 3)'),
+            frozenset(['c_symbol', 'c_ts']))
+        self.check_queries()
+
+    def test03_reopen(self):
+        """Composite indexes are kept in the file and in copies."""
+
+        self._reopen('a')
+        self.table = table = self.h5file.root.test
+        self.assertEqual(list(table.composite_indexes),
+                         [('c_symbol', 'c_ts')])
+        self.check_queries()
+        table.append([self.make_row(i) for i in xrange(5)])
+        table.flush()
+        self.check_queries()
+        self.table = table.copy('/', 'test2', propindexes=True)
+        self.assertEqual(list(self.table.composite_indexes),
+                         [('c_symbol', 'c_ts')])
+        self.check_queries()
+
+    def test04_remove(self):
+        """Removing composite indexes."""
+
+        table = self.table
+        table.cols.c_ts.create_index()
+        table.remove_index(['c_symbol', 'c_ts'])
+        self.assertEqual(table.composite_indexes, {})
+        self.assertEqual(
+            table.will_query_use_indexing('(c_symbol == "A") & (c_ts > 3)'),
+            frozenset(['c_ts']))
+        self.check_queries()
+        table.remove_index('c_ts')
+        self.assertFalse(table.indexed)
+        self.assertEqual(table.will_query_use_indexing('c_ts > 3'),
+                         frozenset())
+
+    def test05_errors(self):
+        """Errors when creating composite indexes."""
+
+        table = self.table
+        self.assertRaises(ValueError, table.create_index,
+                          ['c_symbol', 'c_ts'])
+        self.assertRaises(ValueError, table.create_index,
+                          ['c_qty', 'c_qty'])
+        self.assertRaises(ValueError, table.create_index,
+                          ['c_qty', 'c_ts'], kind='bitmap')
+        self.assertRaises(KeyError, table.create_index,
+                          ['c_qty', 'c_foo'])
+
+
+class ExpressionIndexTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for queries using expression indexes."""
+
+    nrows = 500
+
+    conditions = ['abs(c_ts - c_qty) > 20',
+                  '(abs(c_ts - c_qty) >= 3.5) & (abs(c_ts - c_qty) < t0)',
+                  'abs( c_ts-c_qty ) == 12',
+                  '(abs(c_ts - c_qty) < 2) & (c_qty > 0)',
+                  '(abs(c_ts - c_qty) < 2) | (c_qty % 5 == 3)',
+                  '(c_qty % 5 <= 1) & (c_ts > 30)',
+                  'abs(c_qty - c_ts) > 20',
+                  'abs(c_ts - c_qty) > 1000']
+
+    class Record(tables.IsDescription):
+        c_ts = tables.Float64Col(pos=1)
+        c_qty = tables.Int16Col(pos=2)
+
+    def setUp(self):
+        super(ExpressionIndexTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        table.append([self.make_row(i) for i in xrange(self.nrows)])
+        table.flush()
+        table.create_expr_index('abs(c_ts - c_qty)', kind='full')
+        table.create_expr_index('c_qty % 5', kind='medium')
+        self.table = table
+
+    def make_row(self, i):
+        return (i * 13 % 50 - 0.5 * (i % 2), i % 11 - 5)
+
+    def check_queries(self):
+        table = self.table
+        for t0 in (10, 25.5):
+            condvars = {'t0': t0}
+            for condition in self.conditions:
+                result = table.get_where_list(condition, condvars)
+                table._disable_indexing_in_queries()
+                expected = table.get_where_list(condition, condvars)
+                table._enable_indexing_in_queries()
+                vprint("* Condition ``%s`` selects %d rows."
+                       % (condition, len(result)))
+                self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test00_queries(self):
+        """Queries using expression indexes."""
+
+        table = self.table
+        self.assertEqual(sorted(table.expr_indexes),
+                         ['abs(c_ts - c_qty)', 'c_qty % 5'])
+        index = table.expr_indexes['abs(c_ts - c_qty)']
+        self.assertEqual(index.colnames, ('c_qty', 'c_ts'))
+        self.assertEqual(index.kind, 'full')
+        self.assertEqual(index.dtype, numpy.dtype('float64'))
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertTrue(table.indexed)
+        self.assertEqual(table.indexedcolpathnames, [])
+        self.assertEqual(table.will_query_use_indexing('abs(c_ts-c_qty) > 3'),
+                         frozenset(['c_ts', 'c_qty']))
+        self.assertEqual(table.will_query_use_indexing('c_qty % 5 == 3'),
+                         frozenset(['c_qty']))
+        self.assertEqual(table.will_query_use_indexing('abs(c_ts) > 3'),
+                         frozenset())
+        self.check_queries()
+        # The count of a condition solved by the index is exact
+        count = table.aggregate('abs(c_ts - c_qty) > 20',
+                                {'n': ('c_qty', 'count')})['n']
+        data = table.read()
+        self.assertEqual(count,
+                         (abs(data['c_ts'] - data['c_qty']) > 20).sum())
+
+    def test01_append(self):
+        """Expression indexes after appending rows."""
+
+        table = self.table
+        index = table.expr_indexes['abs(c_ts - c_qty)']
+        for nrows in (3, 1, 13, 40):
+            first = table.nrows
+            table.append([self.make_row(i) for i in
+                          xrange(first, first + nrows)])
+            table.flush()
+            self.assertEqual(index.nelements, table.nrows)
+            self.check_queries()
+
+    def test02_reindex(self):
+        """Expression indexes after invalidating operations."""
+
+        table = self.table
+        table.cols.c_ts[10:20] = numpy.arange(10) + 30.5
+        table.flush()
+        index = table.expr_indexes['abs(c_ts - c_qty)']
+        self.assertFalse(index.dirty)
+        self.check_queries()
+        table.remove_rows(123, 171)
+        index = table.expr_indexes['abs(c_ts - c_qty)']
+        self.assertEqual(index.nelements, table.nrows)
+        self.check_queries()
+        # Modifications of other columns do not affect the index
+        table.autoindex = False
+        table.cols.c_ts[:5] = [1] * 5
+        self.assertTrue(index.dirty)
+        self.assertFalse(table.expr_indexes['c_qty % 5'].dirty)
+        self.assertEqual(table.will_query_use_indexing('abs(c_ts-c_qty) > 3'),
+                         frozenset())
+        self.check_queries()
+        table.reindex_dirty()
+        self.assertEqual(table.will_query_use_indexing('abs(c_ts-c_qty) > 3'),
+                         frozenset(['c_ts', 'c_qty']))
+        self.check_queries()
+
+    def test03_reopen(self):
+        """Expression indexes are kept in the file and in copies."""
+
+        self._reopen('a')
+        self.table = table = self.h5file.root.test
+        self.assertEqual(sorted(table.expr_indexes),
+                         ['abs(c_ts - c_qty)', 'c_qty % 5'])
+        self.check_queries()
+        table.append([self.make_row(i) for i in xrange(5)])
+        table.flush()
+        self.check_queries()
+        self.table = table.copy('/', 'test2', propindexes=True)
+        self.assertEqual(sorted(self.table.expr_indexes),
+                         ['abs(c_ts - c_qty)', 'c_qty % 5'])
+        self.check_queries()
+
+    def test04_remove(self):
+        """Removing expression indexes."""
+
+        table = self.table
+        table.remove_expr_index('abs(c_ts - c_qty)')
+        self.assertEqual(list(table.expr_indexes), ['c_qty % 5'])
+        self.assertEqual(table.will_query_use_indexing('abs(c_ts-c_qty) > 3'),
+                         frozenset())
+        self.check_queries()
+        table.remove_expr_index('c_qty%5')
+        self.assertFalse(table.indexed)
+        self.assertEqual(table.will_query_use_indexing('c_qty % 5 == 3'),
+                         frozenset())
+
+    def test05_errors(self):
+        """Errors when creating expression indexes."""
+
+        table = self.table
+        self.assertRaises(ValueError, table.create_expr_index,
+                          'abs(c_ts-c_qty)')
+        self.assertRaises(ValueError, table.create_expr_index,
+                          'c_qty * 2', kind='bloom')
+        self.assertRaises(NameError, table.create_expr_index,
+                          'c_qty * c_foo')
+        self.assertRaises(ValueError, table.create_expr_index, '2 * 3')
+        self.assertRaises(TypeError, table.create_expr_index,
+                          'complex(c_ts, c_qty)')
+
+
+class TopKTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for reading the top-k rows of a table."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        c_price = tables.Float64Col(pos=1)
+        c_qty = tables.Int32Col(pos=2)
+
+    def setUp(self):
+        super(TopKTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        prices = numpy.random.RandomState(7).permutation(self.nrows) * 0.5
+        table.append([(prices[i], i % 11) for i in xrange(self.nrows)])
+        table.flush()
+        table.nrowsinbuf = 23
+        self.table = table
+
+    def check_topk(self, k, condition=None, reverse=True):
+        table = self.table
+        data = table.read()
+        if condition is not None:
+            data = data[table.get_where_list(condition)]
+        data = data[~numpy.isnan(data['c_price'])]
+        data = numpy.sort(data, order='c_price')
+        if reverse:
+            data = data[::-1]
+        result = table.read_topk('c_price', k, condition, reverse=reverse)
+        vprint("* Top-%d rows for ``%s``: %d rows."
+               % (k, condition, len(result)))
+        self.assertTrue(common.areArraysEqual(result, data[:k]))
+
+    def check_all(self):
+        for k in (0, 1, 10, 99, 600):
+            for condition in (None, 'c_qty == 3', 'c_qty > 20'):
+                for reverse in (True, False):
+                    self.check_topk(k, condition, reverse)
+
+    def test00_buffered(self):
+        """Top-k rows without an index."""
+
+        self.check_all()
+
+    def test01_indexed(self):
+        """Top-k rows using a completely sorted index."""
+
+        self.table.cols.c_price.create_csindex()
+        self.check_all()
+
+    def test02_not_csi(self):
+        """Top-k rows with an index which is not completely sorted."""
+
+        self.table.cols.c_price.create_index(kind='light')
+        self.check_all()
+
+    def test03_field(self):
+        """Top-k values of a single field."""
+
+        table = self.table
+        result = table.read_topk(table.cols.c_price, 5, field='c_qty')
+        expected = table.read_topk('c_price', 5)['c_qty']
+        self.assertTrue(common.areArraysEqual(result, expected))
+
+    def test04_errors(self):
+        """Errors when reading the top-k rows."""
+
+        table = self.table
+        self.assertRaises(KeyError, table.read_topk, 'c_foo', 5)
+        self.assertRaises(ValueError, table.read_topk, 'c_price', -1)
+
+    def test05_nan(self):
+        """Rows with NaN values are never in the top-k."""
+
+        table = self.table
+        prices = table.cols.c_price[:]
+        prices[::7] = numpy.nan
+        table.cols.c_price[:] = prices
+        table.flush()
+        self.check_all()
+        table.cols.c_price.create_csindex()
+        self.check_all()
+
+
+class QueryCacheTestCase(common.TempFileMixin, TestCase):
+
+    """Test case for the cache of results of in-kernel queries."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        c_int = tables.Int32Col(pos=1)
+        c_float = tables.Float64Col(pos=2)
+
+    conditions = ['c_int < 7', '(c_int > 20) & (c_float < 30)',
+                  'c_int == 1000']
+
+    def setUp(self):
+        super(QueryCacheTestCase, self).setUp()
+        # The cache is disabled by default
+        self.h5file.params['QUERY_CACHE_MAX_SIZE'] = 1024 * 1024
+        table = self.h5file.create_table('/', 'test', self.Record,
+                                         chunkshape=10)
+        self.append_rows(table, self.nrows)
+        table.nrowsinbuf = 23
+        self.table = table
+
+    def append_rows(self, table, nrows):
+        first = table.nrows
+        table.append([(i % 50, i * 0.1) for i in xrange(first, first + nrows)])
+        table.flush()
+
+    def ncached(self):
+        return len(self.table._querycache.items())
+
+    def check_queries(self, start=None, stop=None, step=None):
+        table = self.table
+        data = table.read()
+        rows = numpy.arange(table.nrows)[start:stop:step]
+        for condition in self.conditions:
+            cond = eval(condition, {}, {'c_int': data['c_int'],
+                                        'c_float': data['c_float']})
+            expected = rows[cond[start:stop:step]]
+            coords = table.get_where_list(condition, start=start,
+                                          stop=stop, step=step)
+            vprint("* %d rows for ``%s``." % (len(coords), condition))
+            self.assertTrue(common.areArraysEqual(coords, expected))
+            result = table.read_where(condition, start=start, stop=stop,
+                                      step=step)
+            self.assertTrue(common.areArraysEqual(result, data[expected]))
+
+    def test00_hits(self):
+        """Repeated queries are got from the cache."""
+
+        self.check_queries()
+        stats = self.table._querycache.get_stats()
+        self.assertEqual(stats['hits'], len(self.conditions))
+        self.assertEqual(self.ncached(), len(self.conditions))
+        self.table.get_stats(reset=True)
+        for condition in self.conditions:
+            self.table.get_where_list(condition)
+        # Only the rows in the results are read
+        stats = self.table.get_stats()
+        self.assertEqual(stats['caches']['query']['misses'], 0)
+        self.assertTrue(stats['bytes_read'] <
+                        self.table.nrows * self.table.rowsize)
+
+    def test01_append(self):
+        """Cached results are extended when rows are appended."""
+
+        table = self.table
+        self.check_queries()
+        self.check_queries(3, None, 4)
+        ncached = self.ncached()
+        self.append_rows(table, 123)
+        table.get_stats(reset=True)
+        self.check_queries()
+        self.check_queries(3, None, 4)
+        self.assertEqual(self.ncached(), ncached)
+        stats = table.get_stats()
+        self.assertEqual(stats['caches']['query']['misses'], 0)
+
+    def test02_ranges(self):
+        """Queries in closed ranges are not extended."""
+
+        self.check_queries(10, 300, 3)
+        self.append_rows(self.table, 50)
+        self.check_queries(10, 300, 3)
+        self.check_queries(10, -10)
+
+    def test03_modify(self):
+        """Cached results are dropped when rows are modified."""
+
+        table = self.table
+        self.check_queries()
+        table.cols.c_int[10:20] = numpy.arange(10)
+        self.assertEqual(self.ncached(), 0)
+        self.check_queries()
+        table.modify_coordinates([3, 70], [(1000, 0.), (1000, 0.)])
+        self.check_queries()
+        table.remove_rows(0, 33)
+        self.check_queries()
+        table.truncate(400)
+        self.check_queries()
+
+    def test04_where(self):
+        """Row iterators use the cached results."""
+
+        table = self.table
+        self.check_queries()
+        for condition in self.conditions:
+            rows = [row.nrow for row in table.where(condition)]
+            self.assertTrue(common.areArraysEqual(
+                numpy.array(rows, dtype=SizeType),
+                table.get_where_list(condition)))
+        stats = table._querycache.get_stats()
+        self.assertEqual(stats['hits'], 3 * len(self.conditions))
+
+    def test05_disabled(self):
+        """The cache can be disabled."""
+
+        self.h5file.params['QUERY_CACHE_MAX_SIZE'] = 0
+        self.check_queries()
+        self.assertEqual(self.ncached(), 0)
+
+    def test06_condvars(self):
+        """Queries with different variable values are cached apart."""
+
+        table = self.table
+        for limit in (3, 5, 3):
+            coords = table.get_where_list('c_int < limit',
+                                          {'c_int': table.cols.c_int,
+                                           'limit': limit})
+            self.assertEqual(len(coords), limit * self.nrows // 50)
+        self.assertEqual(self.ncached(), 2)
+
+    def test07_compress(self):
+        """Cached coordinates are compressed without losses."""
+
+        from tables.table import _compress_coords, _decompress_coords
+
+        for coords in [[], [5], [0, 1, 2, 300, 70000, 2 ** 33]]:
+            coords = numpy.array(coords, dtype='int64')
+            block = _compress_coords(coords)
+            self.assertTrue(common.areArraysEqual(
+                _decompress_coords(*block), coords))
+
+
 # Main part
 # ---------
 def suite():
@@ -1249,6 +2621,18 @@ def suite():
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage30))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage31))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage32))
+        testSuite.addTest(unittest.makeSuite(BulkQueryTestCase))
+        testSuite.addTest(unittest.makeSuite(ThreadedBulkQueryTestCase))
+        testSuite.addTest(unittest.makeSuite(AggregateTestCase))
+        testSuite.addTest(unittest.makeSuite(GroupByTestCase))
+        testSuite.addTest(unittest.makeSuite(JoinTestCase))
+        testSuite.addTest(unittest.makeSuite(ZoneMapTestCase))
+        testSuite.addTest(unittest.makeSuite(BitmapIndexTestCase))
+        testSuite.addTest(unittest.makeSuite(BloomIndexTestCase))
+        testSuite.addTest(unittest.makeSuite(CompositeIndexTestCase))
+        testSuite.addTest(unittest.makeSuite(ExpressionIndexTestCase))
+        testSuite.addTest(unittest.makeSuite(TopKTestCase))
+        testSuite.addTest(unittest.makeSuite(QueryCacheTestCase))
 
     return testSuite
 
@@ -3,6 +3,7 @@
 from __future__ import print_function
 import os
 import sys
+import time
 import tempfile
 import warnings
 
@@ -6740,6 +6741,139 @@ class TestCreateTableArgs(common.TempFileMixin, TestCase):
                           description=RecordDescriptionDict)
 
 
+class PrefetchTestCase(common.TempFileMixin, TestCase):
+    """Test case for reading ahead the buffers of row iterators."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(PrefetchTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', {'x': Int32Col(), 'y': Float64Col()},
+            filters=Filters(complevel=1), chunkshape=10)
+        self.table.append([(i, i / 2.) for i in range(self.nrows)])
+        self.table.flush()
+        self.table.nrowsinbuf = 17
+
+    def check_iterrows(self, start=None, stop=None, step=None, prefetch=2):
+        table = self.table
+        result = [(row.nrow, row['x'])
+                  for row in table.iterrows(start, stop, step,
+                                            prefetch=prefetch)]
+        data = table.read()['x'][start:stop:step]
+        rows = list(range(table.nrows))[start:stop:step]
+        self.assertEqual(result, list(zip(rows, data)))
+
+    def test00_iterrows(self):
+        """Iterating with read-ahead."""
+
+        for prefetch in (1, 2, 5):
+            for start, stop, step in [(None, None, None), (3, 500, 1),
+                                      (5, 999, 7), (1, None, 40),
+                                      (0, 10, 100), (16, 18, 1),
+                                      (999, None, 17)]:
+                self.check_iterrows(start, stop, step, prefetch)
+
+    def test01_parameter(self):
+        """The default read-ahead comes from the parameters."""
+
+        self.h5file.params['PREFETCH_BUFFERS'] = 3
+        rows = [row['x'] for row in self.table]
+        self.assertEqual(rows, list(range(self.nrows)))
+
+    @unittest.skipIf(not tables.utilsextension.is_hdf5_threadsafe(),
+                     'HDF5 is not thread-safe')
+    def test02_break(self):
+        """Leaving an iteration with read-ahead before its end."""
+
+        table = self.table
+        for row in table.iterrows(prefetch=3):
+            if row.nrow == 50:
+                break
+        self.check_iterrows()
+        prefetchers = list(table._prefetchers)
+        self.assertTrue(len(prefetchers) > 0)
+        table.close()
+        # The read-ahead has been stopped
+        for prefetcher in prefetchers:
+            self.assertTrue(prefetcher.gi_frame is None)
+
+    def test03_update(self):
+        """Updating rows while iterating with read-ahead."""
+
+        table = self.table
+        for row in table.iterrows(step=3, prefetch=2):
+            row['y'] = -row['x']
+            row.update()
+        table.flush()
+        y = table.col('y')
+        self.assertTrue(allequal(y[::3], -np.arange(0., self.nrows, 3)))
+        self.assertTrue(allequal(y[1::3], np.arange(1, self.nrows, 3) / 2.))
+
+    @unittest.skipIf(not tables.utilsextension.is_hdf5_threadsafe(),
+                     'HDF5 is not thread-safe')
+    def test04_depth(self):
+        """The number of buffers read ahead."""
+
+        table = self.table
+        read_records = table._read_records
+        for prefetch in (1, 3):
+            bstarts = []
+
+            def read(start, nrecords, recarr):
+                bstarts.append(start)
+                return read_records(start, nrecords, recarr)
+
+            table._read_records = read
+            try:
+                for row in table.iterrows(prefetch=prefetch):
+                    break
+                # Give the background thread the time to read ahead
+                for i in range(100):
+                    if len(bstarts) > prefetch:
+                        break
+                    time.sleep(0.01)
+                time.sleep(0.1)
+            finally:
+                del table._read_records
+            # The first buffer is being processed, the next ones are ahead
+            nrowsinbuf = table.nrowsinbuf
+            self.assertEqual(bstarts, [i * nrowsinbuf
+                                       for i in range(prefetch + 1)])
+
+    @unittest.skipIf(tables.utilsextension.is_hdf5_threadsafe(),
+                     'HDF5 is thread-safe')
+    def test05_not_threadsafe(self):
+        """Read-ahead is disabled if HDF5 is not thread-safe."""
+
+        with warnings.catch_warnings(record=True) as warns:
+            warnings.simplefilter('always')
+            self.check_iterrows(prefetch=2)
+        self.assertTrue(any(issubclass(w.category, PerformanceWarning)
+                            for w in warns))
+        self.assertEqual(len(self.table._prefetchers), 0)
+
+
+class MmapTestCase(common.TempFileMixin, TestCase):
+    """Test case for memory mapping the data of tables."""
+
+    def test00_chunked(self):
+        """Tables written by PyTables are chunked and cannot be mapped."""
+
+        table = self.h5file.create_table(
+            '/', 'table', {'x': Int32Col(), 'y': Float64Col()})
+        table.append([(i, i / 2.) for i in range(10)])
+        self.assertRaises(ValueError, table.as_mmap)
+
+    def test01_time(self):
+        """Tables with time columns cannot be mapped."""
+
+        table = self.h5file.create_table(
+            '/', 'table', {'t': Time64Col()})
+        self.assertTrue(table._g_mmap_dtype() is None)
+        self.assertRaises(ValueError, table.as_mmap)
+
+
 #----------------------------------------------------------------------
 
 
@@ -6825,6 +6959,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(ColumnIterationTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateTableArgs))
+        theSuite.addTest(unittest.makeSuite(PrefetchTestCase))
+        theSuite.addTest(unittest.makeSuite(MmapTestCase))
 
     if common.heavy:
         theSuite.addTest(unittest.makeSuite(CompressBzip2TablesTestCase))
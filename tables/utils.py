@@ -17,7 +17,9 @@ import os
 import sys
 import warnings
 import subprocess
+import collections
 from time import time
+from multiprocessing.pool import ThreadPool
 
 import numpy
 
@@ -469,6 +471,30 @@ detectNumberOfCores = previous_api(detect_number_of_cores)
 
 # Main part
 # =========
+def map_in_threads(func, argsiter, nthreads, maxpending):
+    """Map `func` over the argument tuples in `argsiter` using threads.
+
+    A pool of `nthreads` threads is used, and the results are yielded
+    in the same order than `argsiter`.  No more than `maxpending` of them
+    are kept in flight, and the `argsiter` iterator is always consumed
+    by the calling thread (so it may safely do I/O with HDF5).
+
+    """
+
+    pool = ThreadPool(nthreads)
+    pending = collections.deque()
+    try:
+        for args in argsiter:
+            pending.append(pool.apply_async(func, args))
+            if len(pending) >= maxpending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 def _test():
     """Run ``doctest`` on this module."""
 
@@ -69,8 +69,8 @@ from definitions cimport (H5ARRAYget_info, H5ARRAYget_ndims,
   PyArray_Scalar, create_ieee_complex128, create_ieee_complex64,
   create_ieee_float16, create_ieee_complex192, create_ieee_complex256,
   get_len_of_range, get_order, herr_t, hid_t, hsize_t,
-  hssize_t, htri_t, is_complex, register_blosc, set_order,
-  pt_H5free_memory)
+  hssize_t, htri_t, hbool_t, is_complex, register_blosc, set_order,
+  pt_H5free_memory, pt_H5is_library_threadsafe)
 
 
 # Platform-dependent types
@@ -683,6 +683,19 @@ def get_hdf5_version():
 getHDF5Version = previous_api(get_hdf5_version)
 
 
+def is_hdf5_threadsafe():
+  """Return whether the underlying HDF5 library is thread-safe.
+
+  .. versionadded:: 3.1.2
+
+  """
+
+  cdef hbool_t is_ts = 0
+
+  pt_H5is_library_threadsafe(&is_ts)
+  return bool(is_ts)
+
+
 def get_pytables_version():
   """Return this extension version."""
 